@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Crawler job workers (see utils/crawler_jobs.py).
+
+Starts CRAWLER_WORKERS processes that claim queued crawler_jobs rows and run
+each crawl on the integration service (POST /process or /process-links on
+SERVICE_API_URL), storing its streamed output in crawler_job_logs. Each
+process runs one job at a time; the per-type limits in JOB_TYPE_LIMITS cap
+how many of them run keyword or manual crawls at once. The supervisor
+restarts dead workers and requeues or fails jobs whose heartbeat stopped.
+
+Usage: cd backend && python3 crawler_worker.py [--workers 2]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import List, Optional
+
+import httpx
+
+from db import engine
+from utils.crawler_jobs import (
+    JOB_HEARTBEAT_SECONDS, JOB_STALE_SECONDS, JobListener, append_logs, claim_job, finish_job,
+    heartbeat, recover_stale_jobs, release_job,
+)
+from utils.progress_events import parse_event
+
+CRAWLER_WORKERS = int(os.getenv("CRAWLER_WORKERS", "2"))
+SERVICE_API_URL = os.getenv("SERVICE_API_URL", "http://localhost:5000")
+JOB_POLL_SECONDS = 5.0  # idle wait between claims when no notification arrives
+LOG_FLUSH_SECONDS = 0.5
+LOG_FLUSH_LINES = 200
+
+
+def run_in_transaction(fn, *args, **kwargs):
+    with engine.begin() as conn:
+        return fn(conn, *args, **kwargs)
+
+
+class JobLog:
+    """
+    Buffers a job's output lines and appends them to crawler_job_logs in batches.
+
+    Each batch is one transaction and one NOTIFY, which wakes the backend's
+    log streams (utils/job_log_hub.py).
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.pending: List[str] = []
+        self.flushed_at = time.monotonic()
+        self._flush_lock = asyncio.Lock()  # batches must commit in order
+
+    async def write(self, line: str):
+        self.pending.append(line)
+        if len(self.pending) >= LOG_FLUSH_LINES or time.monotonic() - self.flushed_at >= LOG_FLUSH_SECONDS:
+            await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            self.flushed_at = time.monotonic()
+            if not self.pending:
+                return
+            lines, self.pending = self.pending, []
+            await asyncio.to_thread(run_in_transaction, append_logs, self.job_id, lines)
+
+    async def flush_periodically(self):
+        """Flush lines left pending when output pauses."""
+        while True:
+            await asyncio.sleep(LOG_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[WORKER] Log flush of job {self.job_id} failed: {e}", flush=True)
+
+
+class CrawlerJobRunner:
+    """Runs one claimed job against the integration service."""
+
+    def __init__(self, job: dict):
+        self.job = job
+        self.log = JobLog(job["id"])
+        self.summary: Optional[dict] = None
+        self.latest_result: Optional[dict] = None  # last item_result event
+
+    def request(self):
+        """Integration service endpoint and payload of the job."""
+        params = self.job["params"]
+        if self.job["job_type"] == "manual":
+            return "/process-links", {"links": params["domains"], "job_id": self.job["id"]}
+        keywords = params.get("keywords") or []
+        # The integration service takes one keyword per crawl
+        return "/process", {
+            "data": keywords[0] if keywords else "",
+            "num_domains": params["domain_count"],
+            "job_id": self.job["id"],
+        }
+
+    def progress(self) -> Optional[dict]:
+        if self.latest_result is None:
+            return None
+        return {
+            "items_done": self.latest_result["done"],
+            "items_success": self.latest_result["success"],
+            "items_failed": self.latest_result["failed"],
+        }
+
+    async def run(self):
+        """Stream the crawl's output into the job log. Raises on connection/HTTP errors."""
+        path, payload = self.request()
+        params = self.job["params"]
+        await self.log.write("[INFO] Connecting to RunPod API...")
+        if self.job["job_type"] == "manual":
+            await self.log.write(f"[INFO] Processing {len(params['domains'])} domains")
+        else:
+            await self.log.write(f"[INFO] Keyword: {payload['data']}")
+            await self.log.write(f"[INFO] Domain count: {params['domain_count']}")
+
+        async with httpx.AsyncClient(timeout=3600.0) as client:  # 1 hour timeout for large batches
+            async with client.stream("POST", f"{SERVICE_API_URL}{path}", json=payload) as response:
+                if response.status_code != 200:
+                    error_text = await response.aread()
+                    raise RuntimeError(f"RunPod API error: {response.status_code} - {error_text.decode()}")
+
+                await self.log.write("[INFO] Connected to RunPod API, streaming logs...")
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    # Progress events are stored as they are; the log stream relays them typed
+                    await self.log.write(line)
+                    event = parse_event(line)
+                    if event is None:
+                        continue
+                    if event["type"] == "item_result":
+                        self.latest_result = event
+                    elif event["type"] == "summary":
+                        self.summary = event.get("summary")
+
+        if self.summary is None:
+            await self.log.write("[INFO] Crawler finished without summary")
+        await self.log.flush()
+
+
+class CrawlerWorker:
+    """One worker process: claim, run, report, repeat."""
+
+    def __init__(self, index: int):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+        self.listener = JobListener(engine, log=self.print)
+        self.stopping = False
+        self.current: Optional[asyncio.Task] = None
+
+    def print(self, message: str):
+        print(f"[WORKER {self.worker_id}] {message}", flush=True)
+
+    def stop(self):
+        self.stopping = True
+        if self.current is not None:
+            self.current.cancel()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, self.stop)
+        loop.add_signal_handler(signal.SIGINT, self.stop)
+        self.print("Started")
+        try:
+            while not self.stopping:
+                try:
+                    job = await asyncio.to_thread(run_in_transaction, claim_job, self.worker_id)
+                except Exception as e:
+                    self.print(f"Claim failed: {e}")
+                    job = None
+                if job is None:
+                    await asyncio.to_thread(self.listener.wait, JOB_POLL_SECONDS)
+                    continue
+                await self.run_job(job)
+        finally:
+            self.listener.close()
+            self.print("Stopped")
+
+    async def run_job(self, job: dict):
+        job_id = job["id"]
+        self.print(f"Running {job['job_type']} job {job_id} (attempt {job['attempts']})")
+        runner = CrawlerJobRunner(job)
+        self.current = asyncio.create_task(runner.run())
+        monitor = asyncio.create_task(self.monitor(job_id, runner))
+        flusher = asyncio.create_task(runner.log.flush_periodically())
+        status, error = "completed", None
+        try:
+            await self.current
+        except asyncio.CancelledError:
+            status, error = "cancelled", "Job cancelled by user"
+        except httpx.TimeoutException:
+            status, error = "failed", "RunPod API request timeout"
+        except httpx.RequestError as e:
+            status, error = "failed", f"RunPod API connection error: {e}"
+        except Exception as e:
+            status, error = "failed", str(e)
+        finally:
+            monitor.cancel()
+            flusher.cancel()
+            self.current = None
+
+        try:
+            if status == "cancelled" and self.stopping:
+                # Shutdown, not a user cancel: give the job back to the queue
+                await runner.log.write("[INFO] Worker shutting down, job requeued")
+                await runner.log.flush()
+                await asyncio.to_thread(run_in_transaction, release_job, job_id, self.worker_id)
+                self.print(f"Released job {job_id}")
+                return
+            if error:
+                await runner.log.write(f"[ERROR] {error}")
+            await runner.log.flush()
+            await asyncio.to_thread(
+                run_in_transaction, finish_job, job_id, self.worker_id, status, runner.summary, error,
+                runner.progress(),
+            )
+            self.print(f"Job {job_id} {status}")
+        except Exception as e:
+            # Heartbeat stops; the supervisor fails the job after JOB_STALE_SECONDS
+            self.print(f"Failed to record result of job {job_id}: {e}")
+
+    async def monitor(self, job_id: str, runner: CrawlerJobRunner):
+        """Heartbeat, progress and cancellation of the running job."""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                keep_running = await asyncio.to_thread(
+                    run_in_transaction, heartbeat, job_id, self.worker_id, runner.progress()
+                )
+            except Exception as e:
+                self.print(f"Heartbeat of job {job_id} failed: {e}")
+                continue
+            if not keep_running and self.current is not None:
+                self.current.cancel()
+                return
+
+
+def worker_main(index: int):
+    asyncio.run(CrawlerWorker(index).run())
+
+
+def supervise(workers: int):
+    """Keep `workers` processes alive and sweep stale jobs until SIGTERM/SIGINT."""
+    context = multiprocessing.get_context("spawn")  # no inherited pool connections
+    processes = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"[WORKERS] Starting {workers} crawler workers", flush=True)
+
+    next_sweep = 0.0
+    while not stopping:
+        for index in range(workers):
+            process = processes.get(index)
+            if process is None or not process.is_alive():
+                if process is not None:
+                    print(f"[WORKERS] Worker {index} exited ({process.exitcode}), restarting", flush=True)
+                process = context.Process(target=worker_main, args=(index,), name=f"crawler-worker-{index}")
+                process.start()
+                processes[index] = process
+        if time.monotonic() >= next_sweep:
+            next_sweep = time.monotonic() + JOB_STALE_SECONDS / 2
+            try:
+                recovered = run_in_transaction(recover_stale_jobs)
+                if recovered["requeued"] or recovered["failed"]:
+                    print(f"[WORKERS] Stale jobs requeued: {recovered['requeued']}, failed: {recovered['failed']}",
+                          flush=True)
+            except Exception as e:
+                print(f"[WORKERS] Stale job sweep failed: {e}", flush=True)
+        time.sleep(1.0)
+
+    print("[WORKERS] Stopping workers...", flush=True)
+    for process in processes.values():
+        if process.is_alive():
+            process.terminate()
+    for process in processes.values():
+        process.join(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run crawler job workers")
+    parser.add_argument("--workers", type=int, default=CRAWLER_WORKERS, help="Worker processes")
+    args = parser.parse_args()
+    supervise(max(1, args.workers))
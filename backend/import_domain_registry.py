@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+One-off import of the legacy all_domains.txt into domain_registry
+(see database/migrations/004_domain_registry.sql).
+
+Safe to re-run; domains already registered are skipped.
+Usage: cd backend && python3 import_domain_registry.py [--file PATH] [--batch-size 5000] [--dry-run]
+"""
+import argparse
+import os
+import time
+from db import SessionLocal
+from utils.domain_registry import normalize_domain, register_domains
+
+DEFAULT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "integrasi-service", "domain-generator", "output", "all_domains.txt"
+)
+
+
+def read_domains(path: str):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.strip():
+                yield line.strip()
+
+
+def import_file(path: str, batch_size: int, dry_run: bool = False):
+    if not os.path.exists(path):
+        print(f"❌ File not found: {path}")
+        return
+
+    db = SessionLocal()
+    read = 0
+    invalid = 0
+    added = 0
+    batch = []
+    start = time.time()
+
+    def flush():
+        nonlocal added
+        if dry_run:
+            added += len(batch)
+        else:
+            added += len(register_domains(db, batch, source="legacy_file"))
+            db.commit()
+        batch.clear()
+        print(f"[IMPORT] {read} lines read, {added} {'candidates' if dry_run else 'new domains'}")
+
+    try:
+        for domain in read_domains(path):
+            read += 1
+            if not normalize_domain(domain):
+                invalid += 1
+                continue
+            batch.append(domain)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    elapsed = time.time() - start
+    action = "would be imported (before de-duplication)" if dry_run else "newly registered"
+    print(f"\n✅ Done in {elapsed:.1f}s: {read} lines, {added} domains {action}, {invalid} invalid")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import all_domains.txt into domain_registry")
+    parser.add_argument("--file", default=DEFAULT_FILE, help="Path to all_domains.txt")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Domains per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only count domains that would be imported")
+    args = parser.parse_args()
+    import_file(args.file, args.batch_size, args.dry_run)
@@ -1,11 +1,17 @@
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from dotenv import load_dotenv
 import os
+import secrets
 import traceback
 
 import db
+from stores.settings_store import generator_settings
+from stores.job_log_store import job_logs
+from stores.metrics_store import metrics
+from utils.metrics import MetricsMiddleware
+from utils.prometheus import CONTENT_TYPE as METRICS_CONTENT_TYPE
 from routes import data_routes
 from routes import chat_routes, chat_history_routes, history_routes, update_routes, text_analyze_routes, law_rag_routes, crawler_routes
 from routes import auth_routes, audit_routes, admin_routes, notes_routes, image_routes, manual_domain_routes, feedback_routes, keyword_routes, announcement_routes, runpod_chat
@@ -14,6 +20,8 @@ from routes import auth_routes, audit_routes, admin_routes, notes_routes, image_
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000").split(",")
+# Bearer token required by GET /metrics when set (empty: open, e.g. scraped on a private network)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 app = FastAPI(title="PRD Chatbot Backend")
 
@@ -44,6 +52,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts, latency and in-flight requests per route (GET /metrics)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 # Authentication routes (no auth required)
 app.include_router(auth_routes.router)
 
@@ -66,6 +77,33 @@ app.include_router(keyword_routes.router)
 app.include_router(announcement_routes.router, prefix="/api", tags=["announcements"])
 app.include_router(runpod_chat.router, prefix="/api", tags=["runpod"])
 
+@app.on_event("startup")
+async def start_settings_listener():
+    """Keep the generator settings cache in sync with admin edits (LISTEN/NOTIFY)"""
+    generator_settings.start_listener()
+
+@app.on_event("startup")
+async def start_job_log_listener():
+    """Push crawler job output to SSE clients as workers append it (LISTEN/NOTIFY)"""
+    job_logs.start_listener()
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    """Close pooled database connections on shutdown"""
+    generator_settings.stop_listener()
+    job_logs.stop_listener()
+    await db.async_engine.dispose()
+    db.engine.dispose()
+
 @app.get("/")
 def root():
     return {"message": "FastAPI backend running OK"}
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(request: Request):
+    """HTTP, database pool/query and upstream metrics in Prometheus text format"""
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not secrets.compare_digest(supplied, METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
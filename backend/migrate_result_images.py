@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+One-off migration: move inline base64 images out of results.image_final_path
+into the result_images store (see database/migrations/002_result_images.sql).
+
+Safe to re-run; rows already migrated are skipped.
+Usage: cd backend && python3 migrate_result_images.py [--batch-size 200] [--dry-run]
+"""
+import argparse
+import time
+from sqlalchemy import text
+from db import SessionLocal
+from stores.image_store import INLINE_IMAGE_MIN_LENGTH, move_inline_result_image
+
+
+def migrate(batch_size: int, dry_run: bool = False):
+    db = SessionLocal()
+    last_id = 0
+    moved = 0
+    failed = 0
+    start = time.time()
+
+    try:
+        while True:
+            rows = db.execute(text("""
+                SELECT id_results, image_final_path
+                FROM results
+                WHERE id_results > :last_id
+                  AND image_sha256 IS NULL
+                  AND (
+                      octet_length(image_final_path) > :min_length
+                      OR left(image_final_path, 10) = 'data:image'
+                  )
+                ORDER BY id_results
+                LIMIT :batch_size
+            """), {
+                "last_id": last_id,
+                "min_length": INLINE_IMAGE_MIN_LENGTH,
+                "batch_size": batch_size
+            }).fetchall()
+
+            if not rows:
+                break
+
+            for row in rows:
+                last_id = row.id_results
+                if dry_run:
+                    moved += 1
+                    continue
+                sha256 = move_inline_result_image(db, row.id_results, row.image_final_path)
+                if sha256:
+                    moved += 1
+                else:
+                    failed += 1
+                    print(f"[WARN] id_results={row.id_results}: image is not valid base64, left as is")
+
+            if not dry_run:
+                db.commit()
+            print(f"[MIGRATE] up to id_results={last_id}: {moved} moved, {failed} failed")
+
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    elapsed = time.time() - start
+    action = "would be moved" if dry_run else "moved"
+    print(f"\n✅ Done in {elapsed:.1f}s: {moved} images {action}, {failed} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move base64 result images into result_images")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only count rows that would be migrated")
+    args = parser.parse_args()
+    migrate(args.batch_size, args.dry_run)
@@ -1,14 +1,18 @@
 """
 Admin routes for administrator-only operations
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from pydantic import BaseModel
 from typing import Optional, List
-from db import get_db
+from db import get_db, query_profiler
 from utils.auth_middleware import get_current_user, require_role
 from utils.auth import get_password_hash
+from utils.user_cache import user_cache
+from utils.domain_matcher import DomainMatcher, match_domains
+from utils.generator_settings import save_setting
+from stores.settings_store import generator_settings
 import os
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
@@ -43,6 +47,10 @@ class UserResponse(BaseModel):
 class GeneratorSettingsUpdate(BaseModel):
     value: str
 
+class BlockedDomainsTest(BaseModel):
+    domains: List[str]
+    value: Optional[str] = None  # unsaved list to test; stored list when omitted
+
 # ============================================================
 # User Management Endpoints
 # ============================================================
@@ -208,6 +216,9 @@ async def update_user(
         row = result.fetchone()
         user_dict = dict(row._mapping)
         
+        # Profile or password changed: drop the cached lookup
+        await user_cache.invalidate(user_dict["username"])
+        
         return {
             "id": user_dict["id"],
             "username": user_dict["username"],
@@ -238,7 +249,7 @@ async def delete_user(
     """
     try:
         # Check if user exists and is verifikator
-        check_query = text("SELECT id, role FROM users WHERE id = :user_id")
+        check_query = text("SELECT id, username, role FROM users WHERE id = :user_id")
         existing = db.execute(check_query, {"user_id": user_id}).fetchone()
         
         if not existing:
@@ -255,6 +266,9 @@ async def delete_user(
         db.execute(delete_query, {"user_id": user_id})
         db.commit()
         
+        # Deleted users must stop authenticating immediately
+        await user_cache.invalidate(dict(existing._mapping)["username"])
+        
         return {"ok": True, "message": "User deleted successfully"}
     
     except HTTPException:
@@ -264,13 +278,59 @@ async def delete_user(
         raise HTTPException(status_code=500, detail=f"Failed to delete user: {str(e)}")
 
 
+@router.get("/cache/users")
+async def get_user_cache_stats(
+    current_user: dict = Depends(require_role("administrator"))
+):
+    """
+    Get hit/miss counters of the authenticated-user cache.
+    Counters are per worker process (see "pid").
+    Only accessible by administrators.
+    """
+    return user_cache.stats()
+
+
+# ============================================================
+# Query Profiler Endpoints
+# ============================================================
+
+@router.get("/queries")
+async def get_query_report(
+    sort: str = Query("total", description="total, count, mean, p95, max or errors"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: dict = Depends(require_role("administrator"))
+):
+    """
+    Get the SQL statements run by this worker grouped by fingerprint
+    (count, total/mean/p95/max time, errors, last sampled EXPLAIN plan)
+    and the recent slow queries.
+    Counters are per worker process (see "pid").
+    Only accessible by administrators.
+    """
+    try:
+        return query_profiler.report(sort=sort, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/queries/reset")
+async def reset_query_report(
+    current_user: dict = Depends(require_role("administrator"))
+):
+    """
+    Clear this worker's query profile and slow-query log.
+    Only accessible by administrators.
+    """
+    query_profiler.reset()
+    return {"message": "Query profile cleared"}
+
+
 # ============================================================
 # Generator Settings Endpoints
 # ============================================================
 
 @router.get("/generator/blocked-domains")
 async def get_blocked_domains(
-    db: Session = Depends(get_db),
     current_user: dict = Depends(require_role("administrator"))
 ):
     """
@@ -278,23 +338,7 @@ async def get_blocked_domains(
     Only accessible by administrators.
     """
     try:
-        query = text("""
-            SELECT setting_value, updated_by, updated_at
-            FROM generator_settings
-            WHERE setting_key = 'blocked_domains'
-        """)
-        
-        result = db.execute(query).fetchone()
-        
-        if result:
-            row_dict = dict(result._mapping)
-            return {
-                "value": row_dict["setting_value"],
-                "updated_by": row_dict["updated_by"],
-                "updated_at": row_dict["updated_at"].isoformat() if row_dict["updated_at"] else None
-            }
-        else:
-            return {"value": "", "updated_by": None, "updated_at": None}
+        return generator_settings.get().entry("blocked_domains")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch blocked domains: {str(e)}")
@@ -313,30 +357,17 @@ async def update_blocked_domains(
     try:
         username = current_user.get("username")
         
-        query = text("""
-            INSERT INTO generator_settings (setting_key, setting_value, updated_by, updated_at)
-            VALUES ('blocked_domains', :value, :username, now())
-            ON CONFLICT (setting_key) DO UPDATE SET
-                setting_value = EXCLUDED.setting_value,
-                updated_by = EXCLUDED.updated_by,
-                updated_at = EXCLUDED.updated_at
-            RETURNING setting_value, updated_by, updated_at
-        """)
-        
-        result = db.execute(query, {
-            "value": settings_data.value,
-            "username": username
-        })
+        # Also notifies crawlers and other workers to reload their settings cache
+        row_dict = save_setting(db, "blocked_domains", settings_data.value, username)
         db.commit()
-        
-        row = result.fetchone()
-        row_dict = dict(row._mapping)
+        generator_settings.invalidate()
         
         return {
             "ok": True,
             "value": row_dict["setting_value"],
             "updated_by": row_dict["updated_by"],
-            "updated_at": row_dict["updated_at"].isoformat() if row_dict["updated_at"] else None
+            "updated_at": row_dict["updated_at"].isoformat() if row_dict["updated_at"] else None,
+            "rules": DomainMatcher.from_text(row_dict["setting_value"]).summary()
         }
     
     except Exception as e:
@@ -344,9 +375,35 @@ async def update_blocked_domains(
         raise HTTPException(status_code=500, detail=f"Failed to update blocked domains: {str(e)}")
 
 
+@router.post("/generator/blocked-domains/test")
+async def test_blocked_domains(
+    test_data: BlockedDomainsTest,
+    current_user: dict = Depends(require_role("administrator"))
+):
+    """
+    Check domains against the blocked list with the crawler's matching rules.
+    Tests `value` when given (unsaved edits), otherwise the stored list.
+    Only accessible by administrators.
+    """
+    try:
+        if test_data.value is None:
+            matcher = generator_settings.get().blocked_domains
+        else:
+            matcher = DomainMatcher.from_text(test_data.value)
+        return {
+            "results": [
+                {"domain": domain, "blocked": rule is not None, "rule": rule}
+                for domain, rule in match_domains(matcher, test_data.domains[:1000])
+            ],
+            "rules": matcher.summary()
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to test blocked domains: {str(e)}")
+
+
 @router.get("/generator/blocked-keywords")
 async def get_blocked_keywords(
-    db: Session = Depends(get_db),
     current_user: dict = Depends(require_role("administrator"))
 ):
     """
@@ -354,23 +411,7 @@ async def get_blocked_keywords(
     Only accessible by administrators.
     """
     try:
-        query = text("""
-            SELECT setting_value, updated_by, updated_at
-            FROM generator_settings
-            WHERE setting_key = 'blocked_keywords'
-        """)
-        
-        result = db.execute(query).fetchone()
-        
-        if result:
-            row_dict = dict(result._mapping)
-            return {
-                "value": row_dict["setting_value"],
-                "updated_by": row_dict["updated_by"],
-                "updated_at": row_dict["updated_at"].isoformat() if row_dict["updated_at"] else None
-            }
-        else:
-            return {"value": "", "updated_by": None, "updated_at": None}
+        return generator_settings.get().entry("blocked_keywords")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch blocked keywords: {str(e)}")
@@ -389,24 +430,10 @@ async def update_blocked_keywords(
     try:
         username = current_user.get("username")
         
-        query = text("""
-            INSERT INTO generator_settings (setting_key, setting_value, updated_by, updated_at)
-            VALUES ('blocked_keywords', :value, :username, now())
-            ON CONFLICT (setting_key) DO UPDATE SET
-                setting_value = EXCLUDED.setting_value,
-                updated_by = EXCLUDED.updated_by,
-                updated_at = EXCLUDED.updated_at
-            RETURNING setting_value, updated_by, updated_at
-        """)
-        
-        result = db.execute(query, {
-            "value": settings_data.value,
-            "username": username
-        })
+        # Also notifies crawlers and other workers to reload their settings cache
+        row_dict = save_setting(db, "blocked_keywords", settings_data.value, username)
         db.commit()
-        
-        row = result.fetchone()
-        row_dict = dict(row._mapping)
+        generator_settings.invalidate()
         
         return {
             "ok": True,
@@ -422,7 +449,6 @@ async def update_blocked_keywords(
 
 @router.get("/generator/serpapi-key")
 async def get_serpapi_key(
-    db: Session = Depends(get_db),
     current_user: dict = Depends(require_role("administrator"))
 ):
     """
@@ -432,35 +458,19 @@ async def get_serpapi_key(
     try:
         from utils.serpapi_service import get_serpapi_quota
         
-        query = text("""
-            SELECT setting_value, updated_by, updated_at
-            FROM generator_settings
-            WHERE setting_key = 'serpapi_key'
-        """)
+        entry = generator_settings.get().entry("serpapi_key")
+        api_key = entry["value"]
         
-        result = db.execute(query).fetchone()
-        
-        if result:
-            row_dict = dict(result._mapping)
-            api_key = row_dict["setting_value"]
-            
-            # Get quota if key exists
-            quota = None
-            if api_key:
-                try:
-                    quota = get_serpapi_quota(api_key)
-                except Exception as e:
-                    print(f"Failed to fetch quota: {e}")
-                    quota = {"used": 0, "limit": 0, "remaining": 0}
-            
-            return {
-                "value": api_key,
-                "quota": quota,
-                "updated_by": row_dict["updated_by"],
-                "updated_at": row_dict["updated_at"].isoformat() if row_dict["updated_at"] else None
-            }
-        else:
-            return {"value": "", "quota": None, "updated_by": None, "updated_at": None}
+        # Get quota if key exists
+        quota = None
+        if api_key:
+            try:
+                quota = get_serpapi_quota(api_key)
+            except Exception as e:
+                print(f"Failed to fetch quota: {e}")
+                quota = {"used": 0, "limit": 0, "remaining": 0}
+        
+        return {**entry, "quota": quota}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch SerpAPI key: {str(e)}")
@@ -495,24 +505,10 @@ async def update_serpapi_key(
                 )
         
         # Update key in database
-        query = text("""
-            INSERT INTO generator_settings (setting_key, setting_value, updated_by, updated_at)
-            VALUES ('serpapi_key', :value, :username, now())
-            ON CONFLICT (setting_key) DO UPDATE SET
-                setting_value = EXCLUDED.setting_value,
-                updated_by = EXCLUDED.updated_by,
-                updated_at = EXCLUDED.updated_at
-            RETURNING setting_value, updated_by, updated_at
-        """)
-        
-        result = db.execute(query, {
-            "value": api_key,
-            "username": username
-        })
+        # Also notifies crawlers and other workers to reload their settings cache
+        row_dict = save_setting(db, "serpapi_key", api_key, username)
         db.commit()
-        
-        row = result.fetchone()
-        row_dict = dict(row._mapping)
+        generator_settings.invalidate()
         
         return {
             "ok": True,
@@ -531,7 +527,6 @@ async def update_serpapi_key(
 
 @router.get("/generator/batch-size")
 async def get_batch_size(
-    db: Session = Depends(get_db),
     current_user: dict = Depends(require_role("administrator"))
 ):
     """
@@ -539,23 +534,7 @@ async def get_batch_size(
     Only accessible by administrators.
     """
     try:
-        query = text("""
-            SELECT setting_value, updated_by, updated_at
-            FROM generator_settings
-            WHERE setting_key = 'batch_size'
-        """)
-        
-        result = db.execute(query).fetchone()
-        
-        if result:
-            row_dict = dict(result._mapping)
-            return {
-                "value": row_dict["setting_value"],
-                "updated_by": row_dict["updated_by"],
-                "updated_at": row_dict["updated_at"].isoformat() if row_dict["updated_at"] else None
-            }
-        else:
-            return {"value": "10", "updated_by": None, "updated_at": None}
+        return generator_settings.get().entry("batch_size", "10")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch batch size: {str(e)}")
@@ -586,24 +565,10 @@ async def update_batch_size(
                 detail="Batch size must be a positive integer"
             )
         
-        query = text("""
-            INSERT INTO generator_settings (setting_key, setting_value, updated_by, updated_at)
-            VALUES ('batch_size', :value, :username, now())
-            ON CONFLICT (setting_key) DO UPDATE SET
-                setting_value = EXCLUDED.setting_value,
-                updated_by = EXCLUDED.updated_by,
-                updated_at = EXCLUDED.updated_at
-            RETURNING setting_value, updated_by, updated_at
-        """)
-        
-        result = db.execute(query, {
-            "value": batch_size,
-            "username": username
-        })
+        # Also notifies crawlers and other workers to reload their settings cache
+        row_dict = save_setting(db, "batch_size", batch_size, username)
         db.commit()
-        
-        row = result.fetchone()
-        row_dict = dict(row._mapping)
+        generator_settings.invalidate()
         
         return {
             "ok": True,
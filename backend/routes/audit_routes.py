@@ -2,9 +2,9 @@
 Audit log routes for retrieving change history
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from db import get_db
-from utils.audit import get_audit_history, format_audit_timestamp
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import get_async_db
+from utils.audit import get_audit_history_async, format_audit_timestamp
 from utils.auth_middleware import get_current_user
 
 router = APIRouter(prefix="/api/audit", tags=["Audit"])
@@ -13,7 +13,7 @@ router = APIRouter(prefix="/api/audit", tags=["Audit"])
 @router.get("/{id_result}")
 async def get_result_history(
     id_result: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -28,7 +28,7 @@ async def get_result_history(
         List of audit log entries with formatted timestamps
     """
     try:
-        history = get_audit_history(db, id_result)
+        history = await get_audit_history_async(db, id_result)
         
         # Format timestamps for display
         formatted_history = []
@@ -3,14 +3,16 @@ Authentication routes for login, logout, and user session management
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 from typing import Optional
 from datetime import timedelta
-from db import get_db
+from db import get_async_db
 from utils.auth import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from utils.auth_middleware import get_current_user
+from utils.user_cache import user_cache
 import traceback
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -39,7 +41,7 @@ class UserResponse(BaseModel):
 
 
 @router.post("/login")
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and return JWT token
     
@@ -69,7 +71,7 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             WHERE username = :username
         """)
         
-        result = db.execute(query, {"username": login_data.username})
+        result = await db.execute(query, {"username": login_data.username})
         user = result.fetchone()
         
         if not user:
@@ -81,7 +83,8 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         user_dict = dict(user._mapping)
         
         # Verify password
-        if not verify_password(login_data.password, user_dict["password_hash"]):
+        # bcrypt is CPU-bound; keep it off the event loop
+        if not await run_in_threadpool(verify_password, login_data.password, user_dict["password_hash"]):
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Incorrect username or password"}
@@ -94,8 +97,10 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
                 SET last_login = now()
                 WHERE username = :username
             """)
-            db.execute(update_query, {"username": login_data.username})
-            db.commit()
+            await db.execute(update_query, {"username": login_data.username})
+            await db.commit()
+            # Cached profile still carries the previous last_login
+            await user_cache.invalidate(login_data.username)
         except Exception as e:
             print(f"Warning: Failed to update last_login: {e}")
             # Continue anyway - this is not critical
@@ -237,7 +242,7 @@ class PreferencesUpdate(BaseModel):
 @router.post("/preferences")
 async def update_preferences(
     preferences: PreferencesUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -283,8 +288,8 @@ async def update_preferences(
             RETURNING dark_mode, compact_mode, generator_keywords
         """)
         
-        result = db.execute(update_query, params)
-        db.commit()
+        result = await db.execute(update_query, params)
+        await db.commit()
         
         row = result.fetchone()
         if not row:
@@ -308,7 +313,7 @@ async def update_preferences(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Preferences update error: {e}")
         print(traceback.format_exc())
         return JSONResponse(
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from db import get_db
+from db import get_async_db
 
 router = APIRouter(prefix="/api/chat", tags=["chat_history"])
 
@@ -15,7 +15,7 @@ class ChatMessage(BaseModel):
 
 
 @router.get("/history/{id_domain}")
-async def get_chat_history(id_domain: int, username: str, db: Session = Depends(get_db)) -> List[ChatMessage]:
+async def get_chat_history(id_domain: int, username: str, db: AsyncSession = Depends(get_async_db)) -> List[ChatMessage]:
     """
     Retrieve chat history for a specific user and domain.
     """
@@ -27,7 +27,7 @@ async def get_chat_history(id_domain: int, username: str, db: Session = Depends(
             ORDER BY created_at ASC
         """)
         
-        result = db.execute(query, {"username": username, "id_domain": id_domain})
+        result = await db.execute(query, {"username": username, "id_domain": id_domain})
         rows = result.fetchall()
         
         messages = [
@@ -52,7 +52,7 @@ class SaveChatRequest(BaseModel):
 
 
 @router.post("/history/{id_domain}")
-async def save_chat_message(id_domain: int, req: SaveChatRequest, db: Session = Depends(get_db)):
+async def save_chat_message(id_domain: int, req: SaveChatRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Save a chat message to the database.
     """
@@ -63,7 +63,7 @@ async def save_chat_message(id_domain: int, req: SaveChatRequest, db: Session =
             RETURNING id, created_at
         """)
         
-        result = db.execute(query, {
+        result = await db.execute(query, {
             "username": req.username,
             "id_domain": id_domain,
             "role": req.role,
@@ -71,7 +71,7 @@ async def save_chat_message(id_domain: int, req: SaveChatRequest, db: Session =
         })
         
         row = result.fetchone()
-        db.commit()
+        await db.commit()
         
         return {
             "id": row[0],
@@ -81,12 +81,12 @@ async def save_chat_message(id_domain: int, req: SaveChatRequest, db: Session =
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to save chat message: {str(e)}")
 
 
 @router.delete("/history/{id_domain}")
-async def clear_chat_history(id_domain: int, username: str, db: Session = Depends(get_db)):
+async def clear_chat_history(id_domain: int, username: str, db: AsyncSession = Depends(get_async_db)):
     """
     Clear all chat history for a specific user and domain.
     """
@@ -96,9 +96,9 @@ async def clear_chat_history(id_domain: int, username: str, db: Session = Depend
             WHERE username = :username AND id_domain = :id_domain
         """)
         
-        result = db.execute(query, {"username": username, "id_domain": id_domain})
+        result = await db.execute(query, {"username": username, "id_domain": id_domain})
         deleted_count = result.rowcount
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -106,5 +106,5 @@ async def clear_chat_history(id_domain: int, username: str, db: Session = Depend
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to clear chat history: {str(e)}")
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 import requests
 import os
 from db import get_db
+from stores.metrics_store import metrics
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
@@ -68,7 +69,9 @@ def chat(req: ChatRequest, db: Session = Depends(get_db)):
             
             # Kirim request ke RAG Service
             print(f"Sending request to RAG service: {rag_payload}", flush=True)
-            response = requests.post(target_url, json=rag_payload, timeout=60)
+            with metrics.upstream("rag") as call:
+                response = requests.post(target_url, json=rag_payload, timeout=60)
+                call.status = response.status_code
             
             if response.status_code == 200:
                 result = response.json()
@@ -1,47 +1,52 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import os
+from starlette.concurrency import run_in_threadpool
 import uuid
-import asyncio
-from typing import Dict, Optional
-import json
-import sys
-from datetime import datetime
 from utils.auth_middleware import get_current_user
-from sqlalchemy import text
-from db import engine 
-import aiofiles
+from utils.crawler_jobs import (
+    TERMINAL_STATUSES, append_logs, enqueue_job, get_job, latest_job_id, request_cancel, total_items,
+)
+from utils.progress_events import sse_message
+from stores.job_log_store import job_logs
+from db import engine
 
 router = APIRouter()
 
-# Log file path (must match crawler.py in integrasi-service)
-LOG_FILE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "integrasi-service", "domain-generator", "output", "crawler.log")
-
 # =========================
-# JOB MANAGEMENT
+# JOB QUEUE
 # =========================
-class CrawlerJob:
-    def __init__(self, job_id: str):
-        self.job_id = job_id
-        self.queue = asyncio.Queue()
-        self.task: Optional[asyncio.Task] = None
-        self.returncode: Optional[int] = None
-        self.summary: Optional[dict] = None
+# Jobs live in crawler_jobs and are run by crawler_worker.py processes
+# (see utils/crawler_jobs.py); these routes enqueue them and read their
+# state; their output is pushed to SSE clients by the job log hub
+# (utils/job_log_hub.py).
+KEEPALIVE_SECONDS = 15.0
+
+
+def run_in_transaction(fn, *args, **kwargs):
+    with engine.begin() as conn:
+        return fn(conn, *args, **kwargs)
 
-    async def log(self, message: str):
-        await self.queue.put(f"data: {message}\n\n")
 
-    async def error(self, message: str):
-        await self.queue.put(f"data: [ERROR] {message}\n\n")
+async def create_job(job_type: str, params: dict, username: str) -> str:
+    job_id = str(uuid.uuid4())
+    await run_in_threadpool(
+        run_in_transaction, enqueue_job, job_id, job_type, params, username, total_items(params, job_type)
+    )
+    return job_id
 
-    async def finish(self):
-        await self.queue.put("data: [DONE]\n\n")
-        await self.queue.put(None)
-        self.returncode = 0
 
+async def load_job(job_id: str) -> dict:
+    """Job row, 404 when it does not exist (or the id is not a UUID)."""
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await run_in_threadpool(run_in_transaction, get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-active_jobs: Dict[str, CrawlerJob] = {}
 
 # =========================
 # REQUEST MODELS
@@ -60,196 +65,6 @@ class LogMessage(BaseModel):
     message: str
 
 
-# =========================
-# CORE: RUN LOCAL CRAWLER
-# =========================
-async def run_runpod_crawler(
-    job: CrawlerJob,
-    keywords: list[str],
-    domain_count: int,
-    username: str
-):
-    """
-    Call RunPod API and stream logs + REAL summary.
-    """
-    import httpx
-    
-    summary = None
-    runpod_base_url = os.getenv("SERVICE_API_URL", "http://localhost:5000")
-    runpod_url = f"{runpod_base_url}/process"
-
-    try:
-        # Gunakan keyword pertama untuk dikirim ke RunPod
-        keyword_data = keywords[0] if keywords else ""
-        
-        await job.log(f"[INFO] Connecting to RunPod API...")
-        await job.log(f"[INFO] Keyword: {keyword_data}")
-        await job.log(f"[INFO] Domain count: {domain_count}")
-
-        # Prepare request payload
-        payload = {
-            "data": keyword_data,
-            "num_domains": domain_count
-        }
-
-        headers = {
-            "Content-Type": "application/json",
-        }
-
-        # Stream response from RunPod API
-        async with httpx.AsyncClient(timeout=3600.0) as client:  # 1 hour timeout for large batches
-            async with client.stream("POST", runpod_url, json=payload, headers=headers) as response:
-                if response.status_code != 200:
-                    error_text = await response.aread()
-                    await job.error(f"RunPod API error: {response.status_code} - {error_text.decode()}")
-                    return
-
-                await job.log("[INFO] Connected to RunPod API, streaming logs...")
-                
-                # Track if we just saw a [SAVE] line
-                save_line_seen = False
-                
-                # Stream line by line
-                async for line in response.aiter_lines():
-                    if not line:
-                        continue
-                    
-                    # Check if this is the [SAVE] Summary saved line
-                    if line.startswith("[SAVE] Summary saved:"):
-                        save_line_seen = True
-                        # Don't send the file path to UI
-                        continue
-                    
-                    # If previous line was [SAVE], this line should be the JSON
-                    if save_line_seen:
-                        save_line_seen = False
-                        try:
-                            job.summary = json.loads(line)
-                            # Send as [SUMMARY] format for frontend compatibility
-                            await job.log(f"[SUMMARY] {line}")
-                            continue
-                        except Exception as e:
-                            await job.error(f"Failed to parse summary JSON: {str(e)}")
-                    
-                    # Send log to UI
-                    await job.log(line)
-                    
-                    # Also check for old [SUMMARY] format for backward compatibility
-                    if line.startswith("[SUMMARY]"):
-                        try:
-                            summary_json = line.replace("[SUMMARY]", "").strip()
-                            job.summary = json.loads(summary_json)
-                        except Exception as e:
-                            await job.error(f"Failed to parse summary JSON: {str(e)}")
-
-        # If summary was found, ensure it's sent to frontend
-        if job.summary is not None:
-            await job.log(f"[SUMMARY] {json.dumps(job.summary)}")
-        else:
-            await job.log("[INFO] Crawler finished without summary")
-        
-    except httpx.TimeoutException:
-        await job.error("RunPod API request timeout")
-    except httpx.RequestError as e:
-        await job.error(f"RunPod API connection error: {str(e)}")
-    except Exception as e:
-        await job.error(f"Exception while calling RunPod API: {str(e)}")
-    finally:
-        await job.finish()
-
-
-# =========================
-# CORE: RUN RUNPOD MANUAL CRAWLER
-# =========================
-async def run_runpod_manual_crawler(
-    job: CrawlerJob,
-    domains: list[str],
-    username: str
-):
-    """
-    Call RunPod API /process-links and stream logs for manual domain input.
-    """
-    import httpx
-    
-    summary = None
-    runpod_base_url = os.getenv("SERVICE_API_URL", "http://localhost:5000")
-    runpod_url = f"{runpod_base_url}/process-links"
-
-    try:
-        await job.log(f"[INFO] Connecting to RunPod API (Manual Mode)...")
-        await job.log(f"[INFO] Processing {len(domains)} domains")
-
-        # Prepare request payload
-        payload = {
-            "links": domains
-        }
-
-        headers = {
-            "Content-Type": "application/json",
-        }
-
-        # Stream response from RunPod API
-        async with httpx.AsyncClient(timeout=3600.0) as client:  # 1 hour timeout for large batches
-            async with client.stream("POST", runpod_url, json=payload, headers=headers) as response:
-                if response.status_code != 200:
-                    error_text = await response.aread()
-                    await job.error(f"RunPod API error: {response.status_code} - {error_text.decode()}")
-                    return
-
-                await job.log("[INFO] Connected to RunPod API, streaming logs...")
-                
-                # Track if we just saw a [SAVE] line
-                save_line_seen = False
-                
-                # Stream line by line
-                async for line in response.aiter_lines():
-                    if not line:
-                        continue
-                    
-                    # Check if this is the [SAVE] Summary saved line
-                    if line.startswith("[SAVE] Summary saved:"):
-                        save_line_seen = True
-                        # Don't send the file path to UI
-                        continue
-                    
-                    # If previous line was [SAVE], this line should be the JSON
-                    if save_line_seen:
-                        save_line_seen = False
-                        try:
-                            job.summary = json.loads(line)
-                            # Send as [SUMMARY] format for frontend compatibility
-                            await job.log(f"[SUMMARY] {line}")
-                            continue
-                        except Exception as e:
-                            await job.error(f"Failed to parse summary JSON: {str(e)}")
-                    
-                    # Send log to UI
-                    await job.log(line)
-                    
-                    # Also check for old [SUMMARY] format for backward compatibility
-                    if line.startswith("[SUMMARY]"):
-                        try:
-                            summary_json = line.replace("[SUMMARY]", "").strip()
-                            job.summary = json.loads(summary_json)
-                        except Exception as e:
-                            await job.error(f"Failed to parse summary JSON: {str(e)}")
-
-        # If summary was found, ensure it's sent to frontend
-        if job.summary is not None:
-            await job.log(f"[SUMMARY] {json.dumps(job.summary)}")
-        else:
-            await job.log("[INFO] Crawler finished without summary")
-        
-    except httpx.TimeoutException:
-        await job.error("RunPod API request timeout")
-    except httpx.RequestError as e:
-        await job.error(f"RunPod API connection error: {str(e)}")
-    except Exception as e:
-        await job.error(f"Exception while calling RunPod API: {str(e)}")
-    finally:
-        await job.finish()
-
-
 # =========================
 # API: START CRAWLER
 # =========================
@@ -264,24 +79,16 @@ async def start_crawler(
     if not request.keywords:
         raise HTTPException(status_code=400, detail="Keywords cannot be empty")
 
-    job_id = str(uuid.uuid4())
-    job = CrawlerJob(job_id)
-
-    job.task = asyncio.create_task(
-        run_runpod_crawler(
-            job=job,
-            keywords=request.keywords,
-            domain_count=request.domain_count,
-            username=current_user.get("username", "system")
-        )
+    job_id = await create_job(
+        "keyword",
+        {"keywords": request.keywords, "domain_count": request.domain_count},
+        current_user.get("username", "system"),
     )
 
-    active_jobs[job_id] = job
-
     return {
         "job_id": job_id,
-        "status": "started",
-        "message": "Crawler started locally"
+        "status": "queued",
+        "message": "Crawler job queued"
     }
 
 
@@ -296,158 +103,91 @@ async def start_manual_crawler(
     if not request.domains:
         raise HTTPException(status_code=400, detail="Domains cannot be empty")
 
-    job_id = str(uuid.uuid4())
-    job = CrawlerJob(job_id)
-
-    job.task = asyncio.create_task(
-        run_runpod_manual_crawler(
-            job=job,
-            domains=request.domains,
-            username=current_user.get("username", "system")
-        )
+    job_id = await create_job(
+        "manual",
+        {"domains": request.domains},
+        current_user.get("username", "system"),
     )
 
-    active_jobs[job_id] = job
-
     return {
         "job_id": job_id,
-        "status": "started",
-        "message": "Manual crawler started"
+        "status": "queued",
+        "message": "Manual crawler job queued"
     }
 
 
-# =========================
-# API: STREAM LOGS FROM FILE (Real-time)
-# NOTE: This MUST come before /logs/{job_id} to avoid route conflict
-# =========================
-@router.get("/logs/file")
-async def stream_logs_from_file():
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
+
+def job_event_stream(job_id: str, status: str, after_seq: int):
     """
-    Stream logs directly from the crawler log file.
-    This bypasses subprocess buffering and provides real-time logs.
+    SSE of one job's output, pushed by the job log hub.
+
+    Each line carries its seq as the event id, so a reconnecting client
+    resumes with Last-Event-ID. The crawler's progress events are sent as
+    SSE events of their type (utils/progress_events.py), log lines as plain
+    messages. Ends with [DONE] once the job has finished and all of its
+    output was sent.
     """
-    async def file_log_generator():
-        last_position = 0
-        end_marker_found = False
-        max_wait_cycles = 14400  # 2 hours max (14400 * 0.5 seconds) for large batches
-        wait_cycles = 0
-        
-        # Send initial keepalive
+    async def event_generator():
         yield ": keepalive\n\n"
-        
-        while not end_marker_found and wait_cycles < max_wait_cycles:
-            try:
-                # Check if file exists
-                if not os.path.exists(LOG_FILE_PATH):
-                    await asyncio.sleep(0.5)
-                    wait_cycles += 1
+        if status == "queued":
+            yield "data: [INFO] Waiting for a crawler worker...\n\n"
+        try:
+            async for item in job_logs.subscribe(job_id, after_seq, keepalive=KEEPALIVE_SECONDS):
+                if item is None:
+                    yield ": keepalive\n\n"
                     continue
-                
-                # Read new content from file
-                async with aiofiles.open(LOG_FILE_PATH, mode='r', encoding='utf-8') as f:
-                    await f.seek(last_position)
-                    content = await f.read()
-                    
-                    if content:
-                        # Update position
-                        last_position = await f.tell()
-                        
-                        # Check for end marker
-                        if "===END===" in content:
-                            end_marker_found = True
-                        
-                        # Split content into lines and send as SSE events
-                        lines = content.strip().split('\n')
-                        for line in lines:
-                            if line.strip():
-                                # Check if this is a summary JSON line (may have timestamp prefix)
-                                # Pattern: either starts with { or has timestamp like [08:31:56] {
-                                stripped_line = line.strip()
-                                json_start = stripped_line.find('{')
-                                if json_start != -1 and '"status"' in stripped_line and '"domains_generated"' in stripped_line:
-                                    try:
-                                        json_part = stripped_line[json_start:]
-                                        summary = json.loads(json_part)
-                                        yield f"data: [SUMMARY] {json_part}\n\n"
-                                        continue
-                                    except:
-                                        pass
-                                
-                                yield f"data: {line}\n\n"
-                        
-                        # Reset wait cycles since we got content
-                        wait_cycles = 0
-                    else:
-                        # No new content, wait a bit and send keepalive
-                        await asyncio.sleep(0.5)
-                        wait_cycles += 1
-                        
-                        # Send keepalive every 10 cycles (5 seconds)
-                        if wait_cycles % 10 == 0:
-                            yield ": keepalive\n\n"
-                        
-            except Exception as e:
-                yield f"data: [ERROR] Failed to read log file: {str(e)}\n\n"
-                break
-        
-        # Send completion marker
-        yield "data: [DONE]\n\n"
-    
-    return StreamingResponse(
-        file_log_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-            "Content-Type": "text/event-stream; charset=utf-8"
-        }
-    )
-
+                yield sse_message(*item)
+            final = await run_in_threadpool(run_in_transaction, get_job, job_id)
+            if final is not None and final["status"] == "cancelled":
+                yield "data: [ERROR] Job cancelled by user\n\n"
+        except Exception as e:
+            yield f"data: [ERROR] {str(e)}\n\n"
 
-# =========================
-# API: STREAM LOGS (SSE) - Job-based
-# =========================
-@router.get("/logs/{job_id}")
-async def stream_logs(job_id: str):
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
+        yield "data: [DONE]\n\n"
 
-    job = active_jobs[job_id]
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
 
-    async def event_generator():
-        try:
-            yield ": keepalive\n\n"
 
-            while True:
-                try:
-                    message = await asyncio.wait_for(job.queue.get(), timeout=15.0)
+def last_event_id(request: Request) -> int:
+    try:
+        return int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        return 0
 
-                    if message is None:
-                        break
 
-                    yield message
+# =========================
+# API: STREAM LOGS OF THE LATEST JOB
+# NOTE: This MUST come before /logs/{job_id} to avoid route conflict
+# =========================
+@router.get("/logs/file")
+async def stream_logs_from_file(request: Request):
+    """
+    Stream the output of the most recently started crawler job.
 
-                except asyncio.TimeoutError:
-                    yield ": keepalive\n\n"
+    Kept for clients of the old crawler.log tail; concurrent jobs no longer
+    share a log file, so new clients should use /logs/{job_id}.
+    """
+    job_id = await run_in_threadpool(run_in_transaction, latest_job_id)
+    if job_id is None:
+        raise HTTPException(status_code=404, detail="No crawler job found")
+    job = await load_job(job_id)
+    return job_event_stream(job_id, job["status"], last_event_id(request))
 
-            if job_id in active_jobs:
-                del active_jobs[job_id]
 
-        except Exception as e:
-            yield f"data: [ERROR] {str(e)}\n\n"
-            if job_id in active_jobs:
-                del active_jobs[job_id]
-
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+# =========================
+# API: STREAM LOGS (SSE) - Job-based
+# =========================
+@router.get("/logs/{job_id}")
+async def stream_logs(job_id: str, request: Request):
+    """Stream one job's output as SSE, from the start or after `Last-Event-ID`."""
+    job = await load_job(job_id)
+    return job_event_stream(job_id, job["status"], last_event_id(request))
 
 
 # =========================
@@ -455,23 +195,15 @@ async def stream_logs(job_id: str):
 # =========================
 @router.post("/cancel/{job_id}")
 async def cancel_crawler(job_id: str):
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
-
-    job = active_jobs[job_id]
-
-    if job.task:
-        job.task.cancel()
-
-    await job.error("Job cancelled by user")
-    await job.finish()
-
-    if job_id in active_jobs:
-        del active_jobs[job_id]
+    await load_job(job_id)
+    status = await run_in_threadpool(run_in_transaction, request_cancel, job_id)
+    if status is None:
+        raise HTTPException(status_code=409, detail="Job already finished")
 
     return {
         "job_id": job_id,
-        "status": "cancelled",
+        # A running job stops at its worker's next heartbeat
+        "status": "cancelled" if status == "cancelled" else "cancelling",
         "message": "Crawler job cancelled"
     }
 
@@ -481,19 +213,23 @@ async def cancel_crawler(job_id: str):
 # =========================
 @router.get("/status/{job_id}")
 async def get_crawler_status(job_id: str):
-    if job_id not in active_jobs:
-        return {
-            "job_id": job_id,
-            "status": "completed_or_not_found",
-            "summary": None
-        }
-
-    job = active_jobs[job_id]
+    job = await load_job(job_id)
 
     return {
         "job_id": job_id,
-        "status": "completed" if job.summary else "running",
-        "summary": job.summary
+        "status": job["status"],
+        "job_type": job["job_type"],
+        "progress": {
+            "total": job["items_total"],
+            "done": job["items_done"],
+            "success": job["items_success"],
+            "failed": job["items_failed"],
+        },
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "summary": job["summary"]
     }
 
 
@@ -503,16 +239,14 @@ async def get_crawler_status(job_id: str):
 @router.post("/log")
 async def receive_log(log_message: LogMessage):
     job_id = log_message.job_id
-    message = log_message.message
-
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
+    job = await load_job(job_id)
+    if job["status"] in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail="Job already finished")
 
-    job = active_jobs[job_id]
-    await job.log(message)
+    await run_in_threadpool(run_in_transaction, append_logs, job_id, [log_message.message])
 
     return {
         "status": "success",
         "job_id": job_id,
-        "message": "Log message queued"
+        "message": "Log message stored"
     }
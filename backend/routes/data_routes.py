@@ -1,24 +1,201 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from db import get_db
+from typing import Optional
+from db import get_async_db
 from utils.auth_middleware import get_current_user
+from stores.image_store import INLINE_IMAGE_MIN_LENGTH
 from datetime import datetime
 
 router = APIRouter(prefix="/api/data", tags=["Data"])
 
+# Hard cap for a single page in paginated mode
+MAX_PAGE_SIZE = 500
+
+
+def build_results_filters(
+    status: Optional[str] = None,
+    flagged: Optional[bool] = None,
+    is_manual: Optional[bool] = None,
+    created_by: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """
+    Build WHERE clause parts and bind params for the results listing.
+
+    Args:
+        status: Comma-separated list of statuses (e.g. "verified,unverified")
+        flagged: Only flagged / unflagged rows
+        is_manual: Only manual / generated rows
+        created_by: Username of the creator
+        min_confidence: Minimum final_confidence (0-100)
+        max_confidence: Maximum final_confidence (0-100)
+        date_from: created_at lower bound (inclusive)
+        date_to: created_at upper bound (inclusive)
+
+    Returns:
+        Tuple of (list of SQL conditions, params dict)
+    """
+    where_parts = []
+    params = {}
+
+    if status:
+        statuses = [s.strip().lower() for s in status.split(",") if s.strip()]
+        if statuses:
+            # Same expression as idx_results_status_norm_id (migration 001)
+            where_parts.append("LOWER(COALESCE(r.status, 'unverified')) = ANY(:statuses)")
+            params["statuses"] = statuses
+
+    if flagged is not None:
+        where_parts.append("COALESCE(r.flagged, FALSE) = :flagged")
+        params["flagged"] = flagged
+
+    if is_manual is not None:
+        where_parts.append("COALESCE(r.is_manual, FALSE) = :is_manual")
+        params["is_manual"] = is_manual
+
+    if created_by:
+        where_parts.append("r.created_by = :created_by")
+        params["created_by"] = created_by
+
+    if min_confidence is not None:
+        where_parts.append("r.final_confidence >= :min_confidence")
+        params["min_confidence"] = min_confidence
+
+    if max_confidence is not None:
+        where_parts.append("r.final_confidence <= :max_confidence")
+        params["max_confidence"] = max_confidence
+
+    if date_from is not None:
+        where_parts.append("r.created_at >= :date_from")
+        params["date_from"] = date_from
+
+    if date_to is not None:
+        where_parts.append("r.created_at <= :date_to")
+        params["date_to"] = date_to
+
+    return where_parts, params
+
+
+def format_result_row(row: dict, now: datetime) -> dict:
+    """
+    Convert a results row into the shape expected by the dashboard.
+
+    Args:
+        row: Row mapping from the results table
+        now: Current UTC time (naive), used for the isNew flag
+
+    Returns:
+        Formatted dictionary
+    """
+    # Extract first keyword as jenis, or default to "Judi"
+    keywords = row.get("keywords") or ""
+    jenis = keywords.split(",")[0].strip().title() if keywords else "Judi"
+
+    # Confidence is already in percentage (0-100) in DB
+    confidence_val = float(row.get("final_confidence")) if row.get("final_confidence") else 0.0  # Default to 0 if no confidence data
+    kepercayaan = round(confidence_val)
+
+    created_at = row.get("created_at")
+
+    return {
+        "id": row["id_results"],
+        "link": row["url"] or "",
+        "jenis": jenis,
+        "kepercayaan": kepercayaan,
+        "status": (row.get("status") or "unverified").lower(),
+        "tanggal": created_at.isoformat() if created_at else now.isoformat(),
+        "createdBy": row.get("created_by") or "-",
+        "verifiedBy": row.get("verified_by") or "-",
+        "verifiedAt": (
+            row.get("verified_at").isoformat()
+            if row.get("verified_at")
+            else None
+        ),
+        "lastModified": (
+            row.get("modified_at").isoformat()
+            if row.get("modified_at")
+            else (created_at.isoformat() if created_at else now.isoformat())
+        ),
+        "modifiedBy": row.get("modified_by") or "-",
+        "reasoning": row.get("reasoning_text") or "-",
+        "image": (
+            f"/api/images/result/{row['id_results']}"
+            if row.get("has_stored_image")
+            else row.get("image_final_path") or ""
+        ),
+        "flagged": row.get("flagged") or False,
+        "isManual": row.get("is_manual") or False,
+        "isNew": (
+            (now - created_at.replace(tzinfo=None)).total_seconds() < 300
+            if created_at
+            else False
+        )
+    }
+
+
 @router.get("")
 @router.get("/")
-def get_all_data(
-    db: Session = Depends(get_db),
+async def get_all_data(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables paginated mode"),
+    cursor: Optional[int] = Query(None, ge=1, description="Return rows with id_results lower than this value"),
+    status: Optional[str] = Query(None, description="Comma-separated statuses"),
+    flagged: Optional[bool] = None,
+    is_manual: Optional[bool] = None,
+    created_by: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=100),
+    max_confidence: Optional[float] = Query(None, ge=0, le=100),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_total: bool = Query(False, description="Also return the total number of matching rows"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Get all results data.
+    Get results data.
     Requires authentication.
+
+    Images are never inlined: rows with a stored (or legacy base64) image get
+    an `/api/images/result/{id}` URL, other rows keep their file path.
+
+    Without `limit`/`cursor` the full (filtered) list is returned as a plain
+    array, matching the original response shape. With `limit` or `cursor`
+    the response is a page object using keyset pagination on id_results:
+    {"items": [...], "next_cursor": int | null, "limit": int, "total": int | null}
     """
+    where_parts, params = build_results_filters(
+        status=status,
+        flagged=flagged,
+        is_manual=is_manual,
+        created_by=created_by,
+        min_confidence=min_confidence,
+        max_confidence=max_confidence,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+    paginated = limit is not None or cursor is not None
+    page_size = limit or 50
+
+    # Total is computed before the cursor condition so it counts the whole filtered set
+    count_where = list(where_parts)
+
+    if cursor is not None:
+        where_parts.append("r.id_results < :cursor")
+        params["cursor"] = cursor
+
+    where_sql = f"WHERE {' AND '.join(where_parts)}" if where_parts else ""
+    limit_sql = ""
+    if paginated:
+        # Fetch one extra row to know whether another page exists
+        limit_sql = "LIMIT :limit"
+        params["limit"] = page_size + 1
+
     try:
-        query = text("""
+        query = text(f"""
             SELECT
                 r.id_results,
                 r.id_domain,
@@ -27,7 +204,17 @@ def get_all_data(
                 r.url,
                 r.keywords,
                 r.reasoning_text,
-                r.image_final_path,
+                -- octet_length() reads the TOAST header, so base64 blobs are never fetched here
+                CASE
+                    WHEN octet_length(r.image_final_path) <= :inline_image_min_length
+                         AND left(r.image_final_path, 10) <> 'data:image'
+                    THEN r.image_final_path
+                END AS image_final_path,
+                (
+                    r.image_sha256 IS NOT NULL
+                    OR octet_length(r.image_final_path) > :inline_image_min_length
+                    OR left(r.image_final_path, 10) = 'data:image'
+                ) AS has_stored_image,
                 r.label_final,
                 r.final_confidence,
                 r.created_at,
@@ -40,60 +227,39 @@ def get_all_data(
                 r.flagged,
                 r.is_manual
             FROM results r
+            {where_sql}
             ORDER BY r.id_results DESC
+            {limit_sql}
         """)
-        result = db.execute(query)
+        result = await db.execute(query, {**params, "inline_image_min_length": INLINE_IMAGE_MIN_LENGTH})
         rows = [dict(r._mapping) for r in result]
 
-        formatted = []
-        for row in rows:
-            # Extract first keyword as jenis, or default to "Judi"
-            keywords = row.get("keywords") or ""
-            jenis = keywords.split(",")[0].strip().title() if keywords else "Judi"
-            
-            # Confidence is already in percentage (0-100) in DB
-            confidence_val = float(row.get("final_confidence")) if row.get("final_confidence") else 0.0  # Default to 0 if no confidence data
-            kepercayaan = round(confidence_val)
-            
-            formatted.append({
-                "id": row["id_results"],
-                "link": row["url"] or "",
-                "jenis": jenis,
-                "kepercayaan": kepercayaan,
-                "status": (row.get("status") or "unverified").lower(),
-                "tanggal": (
-                    row.get("created_at").isoformat()
-                    if row.get("created_at")
-                    else datetime.utcnow().isoformat()
-                ),
-                "createdBy": row.get("created_by") or "-",
-                "verifiedBy": row.get("verified_by") or "-",
-                "verifiedAt": (
-                    row.get("verified_at").isoformat()
-                    if row.get("verified_at")
-                    else None
-                ),
-                "lastModified": (
-                    row.get("modified_at").isoformat()
-                    if row.get("modified_at")
-                    else (row.get("created_at").isoformat() if row.get("created_at") else datetime.utcnow().isoformat())
-                ),
-                "modifiedBy": row.get("modified_by") or "-",
-                "reasoning": row.get("reasoning_text") or "-",
-                "image": row.get("image_final_path") or "",
-                "flagged": row.get("flagged") or False,
-                "isManual": row.get("is_manual") or False,
-                "isNew": (
-                    (datetime.utcnow() - row.get("created_at").replace(tzinfo=None)).total_seconds() < 300
-                    if row.get("created_at")
-                    else False
-                )
-            })
-        return formatted
+        next_cursor = None
+        if paginated and len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = rows[-1]["id_results"]
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database query error: {e}")
+        now = datetime.utcnow()
+        formatted = [format_result_row(row, now) for row in rows]
 
+        if not paginated:
+            return formatted
 
+        total = None
+        if include_total:
+            count_sql = f"WHERE {' AND '.join(count_where)}" if count_where else ""
+            count_params = {k: v for k, v in params.items() if k not in ("cursor", "limit")}
+            total = (await db.execute(
+                text(f"SELECT COUNT(*) FROM results r {count_sql}"),
+                count_params
+            )).scalar()
 
+        return {
+            "items": formatted,
+            "next_cursor": next_cursor,
+            "limit": page_size,
+            "total": total,
+        }
 
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database query error: {e}")
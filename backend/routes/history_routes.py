@@ -1,16 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from db import get_db
-from utils.audit import get_audit_history
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import get_async_db
+from utils.audit import get_audit_history_async
 from utils.auth_middleware import get_current_user
 
 router = APIRouter(prefix="/api/history", tags=["history"])
 
 @router.get("")
 @router.get("/")
-def get_history_data(
+async def get_history_data(
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -20,7 +20,7 @@ def get_history_data(
     if not id:
         raise HTTPException(status_code=400, detail="Missing id")
     
-    history = get_audit_history(db, id)
+    history = await get_audit_history_async(db, id)
     
     # Transform to match frontend expected format
     events = [
@@ -1,7 +1,18 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Optional, Tuple
 import os
+import re
 from pathlib import Path
+from db import get_db, SessionLocal
+from stores.image_store import (
+    is_inline_image,
+    get_image_meta,
+    read_image_range,
+    move_inline_result_image,
+)
 
 router = APIRouter(prefix="/api/images", tags=["Images"])
 
@@ -71,9 +82,11 @@ async def get_screenshot_image(filename: str):
         if not file_path.is_file():
             raise HTTPException(status_code=400, detail="Not a file")
         
+        # Crawler screenshots are WebP/JPEG (PNG for older runs), thumbnails are <id>_thumb.<ext>
+        media_types = {".webp": "image/webp", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
         return FileResponse(
             path=str(file_path),
-            media_type="image/png",
+            media_type=media_types.get(file_path.suffix.lower(), "image/png"),
             headers={"Cache-Control": "public, max-age=3600"}
         )
     
@@ -82,3 +95,139 @@ async def get_screenshot_image(filename: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error serving image: {str(e)}")
 
+
+# Chunk size used when streaming stored images
+IMAGE_STREAM_CHUNK_SIZE = 256 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "Range: bytes=start-end" header.
+
+    Returns:
+        (start, end) inclusive byte offsets, or None to serve the whole body
+
+    Raises:
+        HTTPException 416 if the range can't be satisfied
+    """
+    if not range_header:
+        return None
+
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        # Multi-range or unknown unit: ignore and send the full image
+        return None
+
+    start_str, end_str = match.groups()
+    if not start_str and not end_str:
+        return None
+
+    if not start_str:
+        # Suffix range: last N bytes
+        length = int(end_str)
+        if length == 0:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        start = max(size - length, 0)
+        end = size - 1
+    else:
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+        end = min(end, size - 1)
+
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+    return start, end
+
+
+def stream_stored_image(sha256: str, start: int, end: int):
+    """Yield image bytes [start, end] from the store in chunks using its own session."""
+    db = SessionLocal()
+    try:
+        offset = start
+        while offset <= end:
+            length = min(IMAGE_STREAM_CHUNK_SIZE, end - offset + 1)
+            chunk = read_image_range(db, sha256, offset, length)
+            if not chunk:
+                break
+            yield chunk
+            offset += len(chunk)
+    finally:
+        db.close()
+
+
+@router.get("/result/{id_result}")
+def get_result_image(
+    id_result: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Serve the stored image of a result with ETag and Range support.
+    Results still holding an inline base64 image are moved into the store on first access.
+    """
+    row = db.execute(text("""
+        SELECT
+            image_sha256,
+            CASE WHEN image_sha256 IS NULL THEN image_final_path END AS image_final_path
+        FROM results
+        WHERE id_results = :id
+    """), {"id": id_result}).fetchone()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Result not found")
+
+    sha256 = row.image_sha256
+    if not sha256 and is_inline_image(row.image_final_path):
+        try:
+            sha256 = move_inline_result_image(db, id_result, row.image_final_path)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error storing image: {str(e)}")
+
+    if not sha256:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    meta = get_image_meta(db, sha256.strip())
+    if not meta:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    size = meta["byte_size"]
+    etag = f'"{meta["sha256"].strip()}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Content-addressed, so the bytes behind an ETag never change
+        "Cache-Control": "public, max-age=86400",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    # Honour If-Range: only serve a partial response if the validator still matches
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
+
+    byte_range = parse_range_header(range_header, size)
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        stream_stored_image(meta["sha256"].strip(), start, end),
+        status_code=status_code,
+        media_type=meta["mime_type"],
+        headers=headers
+    )
+
@@ -3,12 +3,11 @@ Keyword Generation Routes
 Handles keyword generation using SerpAPI
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List
-from db import get_db
 from utils.auth_middleware import get_current_user, require_role
-from utils.serpapi_service import get_serpapi_key, get_serpapi_quota, generate_keywords
+from utils.serpapi_service import get_serpapi_quota, generate_keywords
+from stores.settings_store import generator_settings
 
 router = APIRouter(prefix="/api/keywords", tags=["Keywords"])
 
@@ -39,7 +38,6 @@ class QuotaResponse(BaseModel):
 @router.post("/generate/", response_model=KeywordGenerateResponse)
 async def generate_keywords_endpoint(
     request: KeywordGenerateRequest,
-    db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -48,8 +46,8 @@ async def generate_keywords_endpoint(
     """
     print(f"[DEBUG] Keyword Generation Request: {request.keyword}")
     try:
-        # Get SerpAPI key from database
-        api_key = get_serpapi_key(db)
+        # Get SerpAPI key from the settings cache
+        api_key = generator_settings.get().serpapi_key
         print(f"[DEBUG] SerpAPI Key found: {bool(api_key)}")
         
         if not api_key:
@@ -80,7 +78,6 @@ async def generate_keywords_endpoint(
 
 @router.get("/quota", response_model=QuotaResponse)
 async def get_quota_endpoint(
-    db: Session = Depends(get_db),
     current_user: dict = Depends(require_role("administrator"))
 ):
     """
@@ -88,8 +85,8 @@ async def get_quota_endpoint(
     Only accessible by administrators.
     """
     try:
-        # Get SerpAPI key from database
-        api_key = get_serpapi_key(db)
+        # Get SerpAPI key from the settings cache
+        api_key = generator_settings.get().serpapi_key
         
         if not api_key:
             raise HTTPException(
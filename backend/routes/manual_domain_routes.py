@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
 from db import get_db
 from utils.auth_middleware import get_current_user
 from utils.audit import add_audit_log
+from utils.domain_registry import domain_exists, register_domains
 import os
 from urllib.parse import urlparse
 import traceback
@@ -21,7 +23,6 @@ class ManualDomainResponse(BaseModel):
 
 # Path to domain generator output files
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "domain-generator", "output")
-ALL_DOMAINS_FILE = os.path.join(OUTPUT_DIR, "all_domains.txt")
 LAST_ID_FILE = os.path.join(OUTPUT_DIR, "last_id.txt")
 
 def normalize_url(url: str) -> str:
@@ -42,15 +43,9 @@ def normalize_url(url: str) -> str:
     except:
         raise ValueError("Invalid URL format")
 
-def check_domain_exists(domain: str) -> bool:
-    """Check if domain already exists in all_domains.txt"""
-    if not os.path.exists(ALL_DOMAINS_FILE):
-        return False
-    
-    with open(ALL_DOMAINS_FILE, 'r') as f:
-        existing_domains = {line.strip().lower() for line in f if line.strip()}
-    
-    return domain.lower() in existing_domains
+def check_domain_exists(db: Session, domain: str) -> bool:
+    """Check if domain already exists in the domain registry"""
+    return domain_exists(db, domain)
 
 def get_next_id(db: Session) -> int:
     """Get next available ID by checking database for highest existing ID"""
@@ -81,13 +76,6 @@ def get_next_id(db: Session) -> int:
             return last_id + 1
         return 1
 
-def append_to_all_domains(domain: str):
-    """Append domain to all_domains.txt"""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    with open(ALL_DOMAINS_FILE, 'a') as f:
-        f.write(f"{domain}\n")
-
 @router.post("/add", response_model=ManualDomainResponse)
 async def add_manual_domain(
     request: ManualDomainRequest,
@@ -109,8 +97,13 @@ async def add_manual_domain(
         if not domain:
             raise HTTPException(status_code=400, detail="Domain cannot be empty")
         
-        # Check for duplicates in all_domains.txt
-        if check_domain_exists(domain):
+        # Check for duplicates in the domain registry
+        if check_domain_exists(db, domain):
+            raise HTTPException(status_code=409, detail=f"Domain '{domain}' already exists")
+        
+        # Register first, in the same transaction: a concurrent add of the same
+        # domain waits on the registry's unique index and then registers nothing
+        if not register_domains(db, [domain], source="manual"):
             raise HTTPException(status_code=409, detail=f"Domain '{domain}' already exists")
         
         # Get next ID from database
@@ -160,9 +153,6 @@ async def add_manual_domain(
         # Commit transaction
         db.commit()
         
-        # Append to all_domains.txt
-        append_to_all_domains(domain)
-        
         # Add audit log
         add_audit_log(db, result_id, "manual_domain_added", username)
         db.commit()
@@ -176,6 +166,10 @@ async def add_manual_domain(
     except HTTPException:
         db.rollback()
         raise
+    except IntegrityError:
+        # generated_domains' unique domain index (migrations/003), e.g. a crawler write in between
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Domain '{domain}' already exists")
     except Exception as e:
         db.rollback()
         print(f"[ERROR] Failed to add manual domain: {traceback.format_exc()}")
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 import requests
 import os
 from typing import Optional
+from stores.metrics_store import metrics
 
 router = APIRouter()
 
@@ -20,20 +21,22 @@ def runpod_chat_proxy(request: RunPodChatRequest):
     """
     try:
         runpod_base_url = os.getenv("SERVICE_API_URL", "http://localhost:5000")
-        response = requests.post(
-            f"{runpod_base_url}/chat",
-            headers={
-                "Content-Type": "application/json",
-            },
-            json={
-                "query": request.query,
-                "category": request.category,
-                "k": request.k,
-                "max_new_tokens": request.max_new_tokens,
-                "temperature": request.temperature
-            },
-            timeout=60
-        )
+        with metrics.upstream("runpod_chat") as call:
+            response = requests.post(
+                f"{runpod_base_url}/chat",
+                headers={
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "query": request.query,
+                    "category": request.category,
+                    "k": request.k,
+                    "max_new_tokens": request.max_new_tokens,
+                    "temperature": request.temperature
+                },
+                timeout=60
+            )
+            call.status = response.status_code
         
         if response.status_code != 200:
             raise HTTPException(
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Request
 from stores.overrides_store import apply_override
 from stores.history_store import add_history
+from stores.metrics_store import metrics
 import os, aiohttp, asyncio
 
 router = APIRouter(prefix="/api/text-analyze", tags=["text-analyze"])
@@ -14,11 +15,13 @@ async def call_image_analyze(image_url: str):
     if not image_url:
         return {"message": "Tidak ada image_url dikirimkan."}
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(IMAGE_ANALYZE_URL, json={"image_url": image_url}, timeout=8) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                return {"message": f"API Tim 5 tidak merespons (status {resp.status})."}
+        with metrics.upstream("image_analyze") as call:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(IMAGE_ANALYZE_URL, json={"image_url": image_url}, timeout=8) as resp:
+                    call.status = resp.status
+                    if resp.status == 200:
+                        return await resp.json()
+                    return {"message": f"API Tim 5 tidak merespons (status {resp.status})."}
     except Exception as e:
         return {"message": f"API Tim 5 belum aktif: {e}"}
 
@@ -30,11 +33,13 @@ async def call_law_rag(keywords:list[str], reasoning:str):
         return {"message": "Reasoning kosong, tidak dapat melakukan analisis hukum."}
     try:
         payload = {"keywords": keywords, "reasoning": reasoning}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(LAW_RAG_URL, json=payload, timeout=8) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                return {"message": f"API Tim 4 tidak merespons (status {resp.status})."}
+        with metrics.upstream("law_rag") as call:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(LAW_RAG_URL, json=payload, timeout=8) as resp:
+                    call.status = resp.status
+                    if resp.status == 200:
+                        return await resp.json()
+                    return {"message": f"API Tim 4 tidak merespons (status {resp.status})."}
     except Exception as e:
         return {"message": f"API Tim 4 belum aktif: {e}"}
 
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, HTTPException, Request, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from db import get_db
+from db import get_async_db
 from utils.auth_middleware import get_current_user
-from utils.audit import add_audit_log
+from utils.audit import add_audit_log_async
 import traceback
 
 router = APIRouter(prefix="/api/update", tags=["update"])
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/api/update", tags=["update"])
 @router.post("/")
 async def update_item(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -97,9 +97,9 @@ async def update_item(
     print("=====================================\n")
 
     try:
-        res = db.execute(query, params)
+        res = await db.execute(query, params)
         row = res.fetchone()
-        db.commit()
+        await db.commit()
 
         if not row:
             print("[DEBUG] No row returned for id:", id_)
@@ -107,8 +107,10 @@ async def update_item(
 
         print("[DEBUG] SQL UPDATE SUCCESS → returned row:", dict(row._mapping))
 
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print("\n[DEBUG] UPDATE EXCEPTION:")
         print(traceback.format_exc())
         print("==== END ERROR ====\n")
@@ -117,18 +119,18 @@ async def update_item(
     # Add audit log entries
     if "flagged" in patch:
         action = "flagged" if patch["flagged"] else "unflagged"
-        add_audit_log(db, id_, action, username)
+        await add_audit_log_async(db, id_, action, username)
 
     if "status" in patch:
         s = patch["status"]
         if s == "verified":
-            add_audit_log(db, id_, "verified", username)
+            await add_audit_log_async(db, id_, "verified", username)
         elif s == "unverified":
-            add_audit_log(db, id_, "unverified", username)
+            await add_audit_log_async(db, id_, "unverified", username)
         elif s == "false-positive":
-            add_audit_log(db, id_, "false_positive", username)
+            await add_audit_log_async(db, id_, "false_positive", username)
 
     # Commit audit logs
-    db.commit()
+    await db.commit()
 
     return {"ok": True, "updated": dict(row._mapping)}
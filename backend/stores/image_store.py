@@ -0,0 +1,123 @@
+"""
+Content-addressed binary image store (result_images table).
+
+Images are keyed by the SHA-256 of their bytes, which doubles as the HTTP ETag.
+Schema: database/migrations/002_result_images.sql
+"""
+import base64
+import binascii
+import hashlib
+from typing import Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Values of results.image_final_path longer than this are treated as inline
+# base64 payloads rather than file paths
+INLINE_IMAGE_MIN_LENGTH = 512
+
+
+def is_inline_image(value: Optional[str]) -> bool:
+    """Return True if a stored image column holds base64 data instead of a path."""
+    if not value:
+        return False
+    return value.startswith("data:image") or len(value) > INLINE_IMAGE_MIN_LENGTH
+
+
+def detect_mime_type(data: bytes) -> str:
+    """Detect image MIME type from magic bytes (defaults to PNG)."""
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    return "image/png"
+
+
+def decode_image_payload(value: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Decode a base64 image (with or without data URI prefix).
+
+    Returns:
+        Tuple of (bytes, mime_type) or None if the value isn't valid base64
+    """
+    mime_type = None
+    payload = value
+    if payload.startswith("data:"):
+        header, _, payload = payload.partition(",")
+        mime_type = header[5:].split(";")[0] or None
+
+    try:
+        data = base64.b64decode("".join(payload.split()), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+    if not data:
+        return None
+    return data, mime_type or detect_mime_type(data)
+
+
+def put_image(db: Session, data: bytes, mime_type: Optional[str] = None) -> str:
+    """
+    Store image bytes (no-op if the same content already exists).
+
+    Returns:
+        SHA-256 hex digest of the image
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    db.execute(text("""
+        INSERT INTO result_images (sha256, mime_type, byte_size, data)
+        VALUES (:sha256, :mime_type, :byte_size, :data)
+        ON CONFLICT (sha256) DO NOTHING
+    """), {
+        "sha256": sha256,
+        "mime_type": mime_type or detect_mime_type(data),
+        "byte_size": len(data),
+        "data": data,
+    })
+    return sha256
+
+
+def get_image_meta(db: Session, sha256: str) -> Optional[dict]:
+    """Get mime type and size of a stored image without loading its bytes."""
+    row = db.execute(text("""
+        SELECT sha256, mime_type, byte_size
+        FROM result_images
+        WHERE sha256 = :sha256
+    """), {"sha256": sha256}).fetchone()
+    return dict(row._mapping) if row else None
+
+
+def read_image_range(db: Session, sha256: str, start: int, length: int) -> bytes:
+    """Read `length` bytes of a stored image starting at offset `start` (0-based)."""
+    chunk = db.execute(text("""
+        SELECT substring(data FROM :start FOR :length)
+        FROM result_images
+        WHERE sha256 = :sha256
+    """), {"sha256": sha256, "start": start + 1, "length": length}).scalar()
+    return bytes(chunk) if chunk is not None else b""
+
+
+def move_inline_result_image(db: Session, id_result: int, value: str) -> Optional[str]:
+    """
+    Move an inline base64 image of a result into the store.
+
+    Sets results.image_sha256 and clears the base64 from image_final_path.
+    Caller is responsible for committing.
+
+    Returns:
+        SHA-256 of the stored image, or None if the value couldn't be decoded
+    """
+    decoded = decode_image_payload(value)
+    if decoded is None:
+        return None
+
+    data, mime_type = decoded
+    sha256 = put_image(db, data, mime_type)
+    db.execute(text("""
+        UPDATE results
+        SET image_sha256 = :sha256,
+            image_final_path = NULL
+        WHERE id_results = :id
+    """), {"sha256": sha256, "id": id_result})
+    return sha256
@@ -0,0 +1,10 @@
+"""
+Backend instance of the crawler job log hub (see utils/job_log_hub.py).
+
+The LISTEN thread is started/stopped with the app (main.py); each uvicorn
+worker follows only the jobs its own SSE clients are watching.
+"""
+from db import engine
+from utils.job_log_hub import JobLogHub
+
+job_logs = JobLogHub(engine)
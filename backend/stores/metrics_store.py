@@ -0,0 +1,13 @@
+"""
+Backend instance of the metrics registry (see utils/metrics.py).
+
+Both database engines are instrumented on import; the HTTP middleware and
+GET /metrics are set up in main.py. Each uvicorn worker keeps its own
+counters, so scrape every worker (or run one) for complete numbers.
+"""
+from db import async_engine, engine
+from utils.metrics import BackendMetrics
+
+metrics = BackendMetrics()
+metrics.instrument_engine(engine, "sync")
+metrics.instrument_engine(async_engine.sync_engine, "async")
@@ -0,0 +1,10 @@
+"""
+Backend instance of the generator settings cache (see utils/generator_settings.py).
+
+The LISTEN thread is started/stopped with the app (main.py); each uvicorn
+worker keeps its own copy and reloads it on every change notification.
+"""
+from db import engine
+from utils.generator_settings import GeneratorSettingsService
+
+generator_settings = GeneratorSettingsService(engine)
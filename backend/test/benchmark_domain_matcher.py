@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the blocked-domain check: legacy substring scan vs DomainMatcher.
+
+Usage: cd backend && python3 test/benchmark_domain_matcher.py [--rules 100000] [--lookups 20000]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.domain_matcher import DomainMatcher  # noqa: E402
+
+TLDS = ["com", "net", "org", "id", "co.id", "go.id", "ac.id", "or.id", "info", "xyz"]
+
+
+def random_label(rng, low=4, high=12):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+
+def generate_rules(rng, count):
+    rules = []
+    for i in range(count):
+        domain = f"{random_label(rng)}.{rng.choice(TLDS)}"
+        if i % 500 == 0:
+            rules.append(f"~{random_label(rng, 6, 10)}")
+        elif i % 50 == 0:
+            rules.append(f"*.{domain}")
+        else:
+            rules.append(domain)
+    return rules
+
+
+def generate_lookups(rng, rules, count):
+    plain = [r for r in rules if not r.startswith(("*.", "~"))]
+    lookups = []
+    for i in range(count):
+        if i % 10 == 0:
+            lookups.append(f"www.{rng.choice(plain)}")
+        else:
+            lookups.append(f"{random_label(rng)}.{rng.choice(TLDS)}")
+    return lookups
+
+
+def legacy_is_blocked(blocked, domain):
+    for entry in blocked:
+        if entry in domain:
+            return True
+    return False
+
+
+def run(rule_count, lookup_count, seed=42):
+    rng = random.Random(seed)
+    rules = generate_rules(rng, rule_count)
+    lookups = generate_lookups(rng, rules, lookup_count)
+    print(f"Rules: {rule_count:,}  Lookups: {lookup_count:,}\n")
+
+    start = time.perf_counter()
+    legacy = set(rules)
+    legacy_build = time.perf_counter() - start
+    legacy_sample = lookups[: max(1, lookup_count // 100)]
+    start = time.perf_counter()
+    legacy_hits = sum(legacy_is_blocked(legacy, d) for d in legacy_sample)
+    legacy_time = time.perf_counter() - start
+    legacy_rate = len(legacy_sample) / legacy_time
+
+    start = time.perf_counter()
+    matcher = DomainMatcher(rules)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    hits = sum(matcher.is_blocked(d) for d in lookups)
+    lookup_time = time.perf_counter() - start
+    rate = lookup_count / lookup_time
+
+    print(f"{'':<16}{'build':>10}{'lookups/s':>14}{'us/lookup':>12}")
+    print(f"{'legacy scan':<16}{legacy_build * 1000:>8.1f}ms{legacy_rate:>14,.0f}{1e6 / legacy_rate:>12.1f}"
+          f"   ({len(legacy_sample)} sampled, {legacy_hits} hits)")
+    print(f"{'DomainMatcher':<16}{build * 1000:>8.1f}ms{rate:>14,.0f}{1e6 / rate:>12.1f}"
+          f"   ({hits} hits)")
+    print(f"\nSpeedup: {rate / legacy_rate:,.0f}x  Rules: {matcher.summary()['domain_rules']:,} domain, "
+          f"{matcher.summary()['wildcard_rules']:,} wildcard, {matcher.summary()['substring_rules']:,} substring")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark blocked-domain matching")
+    parser.add_argument("--rules", type=int, default=100000, help="Blocked entries to generate")
+    parser.add_argument("--lookups", type=int, default=20000, help="Domains to check")
+    args = parser.parse_args()
+    run(args.rules, args.lookups)
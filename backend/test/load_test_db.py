@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Load test untuk route backend yang memakai database.
+
+Menjalankan banyak request konkuren ke route "hot" (data, audit/history,
+chat history, auth/me) dan mencetak latency p50/p95/p99 per route.
+Jalankan sekali sebelum dan sesudah perubahan layer database untuk
+membandingkan hasilnya.
+
+Usage:
+    python3 load_test_db.py --concurrency 50 --duration 30
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+# Konfigurasi
+BASE_URL = "http://localhost:8000"
+USERNAME = "admin"
+PASSWORD = "admin"
+
+# (label, path) - {id} diganti dengan id result pertama dari /api/data
+ROUTES = [
+    ("data (page)", "/api/data?limit=50"),
+    ("auth/me", "/api/auth/me"),
+    ("history", "/api/history?id={id}"),
+    ("audit", "/api/audit/{id}"),
+    ("chat history", "/api/chat/history/{id}?username=" + USERNAME),
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def login(client):
+    response = await client.post(
+        f"{BASE_URL}/api/auth/login",
+        json={"username": USERNAME, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def first_result_id(client, headers):
+    response = await client.get(f"{BASE_URL}/api/data?limit=1", headers=headers)
+    response.raise_for_status()
+    items = response.json().get("items", [])
+    return items[0]["id"] if items else 1
+
+
+async def worker(client, headers, routes, deadline, latencies, errors):
+    i = 0
+    while time.perf_counter() < deadline:
+        label, path = routes[i % len(routes)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(f"{BASE_URL}{path}", headers=headers)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response.status_code >= 400:
+                errors[label] = errors.get(label, 0) + 1
+            latencies.setdefault(label, []).append(elapsed_ms)
+        except httpx.HTTPError:
+            errors[label] = errors.get(label, 0) + 1
+
+
+async def run(concurrency, duration):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        token = await login(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        result_id = await first_result_id(client, headers)
+        routes = [(label, path.format(id=result_id)) for label, path in ROUTES]
+
+        print(f"Target: {BASE_URL}")
+        print(f"Concurrency: {concurrency}, duration: {duration}s, result id: {result_id}")
+        print("Running...\n")
+
+        latencies = {}
+        errors = {}
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[
+            worker(client, headers, routes, deadline, latencies, errors)
+            for _ in range(concurrency)
+        ])
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    print(f"{'route':<16}{'count':>8}{'err':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    print("-" * 70)
+    for label, _ in ROUTES:
+        values = latencies.get(label, [])
+        print(
+            f"{label:<16}{len(values):>8}{errors.get(label, 0):>6}"
+            f"{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}"
+            f"{percentile(values, 99):>10.1f}{(max(values) if values else 0):>10.1f}"
+        )
+    print("-" * 70)
+    print(
+        f"{'ALL':<16}{len(all_latencies):>8}{sum(errors.values()):>6}"
+        f"{percentile(all_latencies, 50):>10.1f}{percentile(all_latencies, 95):>10.1f}"
+        f"{percentile(all_latencies, 99):>10.1f}{(max(all_latencies) if all_latencies else 0):>10.1f}"
+    )
+    if all_latencies:
+        print(f"\nThroughput: {len(all_latencies) / duration:.1f} req/s, mean {statistics.mean(all_latencies):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend DB load test (latencies in ms)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=int, default=30, help="Seconds")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args.concurrency, args.duration))
+    except httpx.HTTPError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
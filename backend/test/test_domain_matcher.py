@@ -0,0 +1,158 @@
+"""
+Pins the matching semantics of utils.domain_matcher (blocked domains).
+
+Run: cd backend && python3 -m pytest test/test_domain_matcher.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.domain_matcher import DomainMatcher, clean_host  # noqa: E402
+
+
+def matcher(*rules):
+    return DomainMatcher(rules)
+
+
+# Domain rules: exact domain and its subdomains
+
+def test_exact_domain_is_blocked():
+    assert matcher("example.com").match("example.com") == "example.com"
+
+
+def test_subdomain_is_blocked():
+    m = matcher("example.com")
+    assert m.is_blocked("www.example.com")
+    assert m.is_blocked("a.b.example.com")
+
+
+def test_lookalike_suffix_is_not_blocked():
+    m = matcher("go.id", "example.com")
+    assert not m.is_blocked("tokogo.id")
+    assert not m.is_blocked("myexample.com")
+    assert not m.is_blocked("example.com.evil.net")
+
+
+def test_parent_domain_is_not_blocked_by_subdomain_rule():
+    m = matcher("news.example.com")
+    assert not m.is_blocked("example.com")
+    assert m.is_blocked("news.example.com")
+    assert m.is_blocked("m.news.example.com")
+
+
+def test_public_suffix_rule_blocks_whole_suffix():
+    m = matcher("go.id")
+    assert m.is_blocked("kominfo.go.id")
+    assert not m.is_blocked("co.id")
+
+
+# Wildcard rules: subdomains only
+
+def test_wildcard_blocks_subdomains_only():
+    m = matcher("*.example.com")
+    assert m.is_blocked("a.example.com")
+    assert m.is_blocked("a.b.example.com")
+    assert not m.is_blocked("example.com")
+    assert not m.is_blocked("tokoexample.com")
+
+
+def test_wildcard_and_domain_rule_together():
+    m = matcher("*.example.com", "example.com")
+    assert m.match("example.com") == "example.com"
+    assert m.is_blocked("a.example.com")
+
+
+# Substring rules (Aho-Corasick)
+
+def test_substring_rule_matches_anywhere():
+    m = matcher("~judi")
+    assert m.match("situsjudi.com") == "~judi"
+    assert m.is_blocked("judionline.net")
+    assert m.is_blocked("a.judi.id")
+    assert not m.is_blocked("example.com")
+
+
+def test_overlapping_substring_rules():
+    m = matcher("~slot", "~lotto", "~ott")
+    assert m.is_blocked("mylotto.com")
+    assert m.is_blocked("slotgacor.com")
+    assert m.is_blocked("otto.de")
+    assert not m.is_blocked("lot.com")
+
+
+def test_substring_that_is_suffix_of_another_pattern():
+    m = matcher("~abcd", "~bc")
+    assert m.is_blocked("xbcx.com")
+    assert m.is_blocked("abcd.com")
+
+
+def test_plain_word_is_a_domain_rule_not_a_substring():
+    # Old behaviour was a substring scan; now "judi" only blocks the TLD ".judi"
+    m = matcher("judi")
+    assert not m.is_blocked("situsjudi.com")
+    assert m.is_blocked("situs.judi")
+
+
+# Normalization
+
+def test_matching_is_case_insensitive():
+    m = matcher("Example.COM", "~JUDI")
+    assert m.is_blocked("WWW.EXAMPLE.com")
+    assert m.is_blocked("SitusJudi.com")
+
+
+def test_urls_ports_and_trailing_dots_are_cleaned():
+    m = matcher("https://example.com/path")
+    assert m.is_blocked("http://sub.example.com:8080/x?y=1")
+    assert m.is_blocked("example.com.")
+
+
+def test_www_rule_does_not_block_apex():
+    m = matcher("www.example.com")
+    assert m.is_blocked("www.example.com")
+    assert not m.is_blocked("example.com")
+
+
+def test_clean_host():
+    assert clean_host(" HTTPS://User@Example.com:443/a ") == "example.com"
+    assert clean_host("") == ""
+    assert clean_host(None) == ""
+
+
+# Parsing
+
+def test_comments_blank_lines_and_invalid_rules():
+    m = DomainMatcher.from_text("# social\n\nfacebook.com\n~\n*.\nbad..domain\n")
+    assert len(m) == 1
+    assert m.invalid == ["~", "*.", "bad..domain"]
+    assert m.is_blocked("m.facebook.com")
+
+
+def test_duplicate_rules_are_counted_once():
+    m = matcher("example.com", "example.com", "*.example.com", "*.example.com")
+    assert m.summary()["domain_rules"] == 1
+    assert m.summary()["wildcard_rules"] == 1
+
+
+def test_empty_matcher_blocks_nothing():
+    m = DomainMatcher.from_text(None)
+    assert not m.is_blocked("example.com")
+    assert not m.is_blocked("")
+    assert not m.is_blocked(None)
+
+
+# Entries written for the old substring matching
+
+def test_legacy_match_reports_domains_only_the_old_rule_blocked():
+    m = matcher("example.com", "judi", "~slot")
+    assert m.legacy_match("tokoexample.com") == "example.com"
+    assert m.legacy_match("agenjudi.net") == "judi"
+    assert m.legacy_match("a.example.com") is None  # still blocked
+    assert m.legacy_match("slotgacor.com") is None  # still blocked
+    assert m.legacy_match("unrelated.org") is None
+
+
+def test_single_label_entries_are_listed():
+    m = DomainMatcher.from_text("judi\nexample.com\n*.togel\n~slot\n")
+    assert m.summary()["single_label"] == ["judi"]
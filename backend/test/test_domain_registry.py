@@ -0,0 +1,49 @@
+"""
+Pins the in-process view of the domain registry (utils.domain_registry):
+domains seen in a run stay duplicates until committed, and leave `pending`
+for the Bloom filter once they are.
+
+Run: cd backend && python3 -m pytest test/test_domain_registry.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+pytest.importorskip("sqlalchemy")
+
+from utils.domain_registry import DomainRegistry  # noqa: E402
+
+
+class RegisteredEngine:
+    """Engine whose existence lookup finds every domain (Bloom hits are confirmed)."""
+
+    def connect(self):
+        class Connection:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, query, params):
+                class Rows:
+                    def first(self):
+                        return (1,)
+                return Rows()
+
+        return Connection()
+
+
+def test_committed_domains_leave_pending():
+    registry = DomainRegistry(RegisteredEngine())
+    registry.mark_seen("https://www.Example.com/page")
+    registry.mark_seen("other.example")
+    assert registry.contains("example.com") and registry.stats()["pending"] == 2
+
+    registry.registered(["example.com", "not-seen.example"])
+    assert registry.pending == {"other.example"}
+    assert registry.contains("www.example.com") and registry.confirm_queries == 1
+    assert registry.contains("other.example") and registry.confirm_queries == 1
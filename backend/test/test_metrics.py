@@ -0,0 +1,67 @@
+"""
+Pins what MetricsMiddleware (utils.metrics) records per request.
+
+Run: cd backend && python3 -m pytest test/test_metrics.py
+"""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+pytest.importorskip("sqlalchemy")
+
+from utils.metrics import BackendMetrics, MetricsMiddleware  # noqa: E402
+
+
+def request(app, path="/api/data/42"):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({"type": "http", "method": "GET", "path": path}, receive, send))
+    return sent
+
+
+def test_requests_are_labelled_with_the_route_template():
+    async def app(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/api/data/{id}")  # as the router does
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    metrics = BackendMetrics()
+    request(MetricsMiddleware(app, metrics))
+    request(MetricsMiddleware(app, metrics), "/api/data/43")
+    text = metrics.render()
+    assert 'http_requests_total{method="GET",route="/api/data/{id}",status="200"} 2' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/data/{id}"} 2' in text
+    assert 'http_requests_in_progress{method="GET"} 0' in text
+
+
+def test_unhandled_errors_count_as_500_on_an_unmatched_route():
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    metrics = BackendMetrics()
+    with pytest.raises(RuntimeError):
+        request(MetricsMiddleware(app, metrics))
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="500"} 1' in metrics.render()
+
+
+def test_upstream_outcome():
+    metrics = BackendMetrics()
+    with metrics.upstream("rag") as call:
+        call.status = 503
+    with pytest.raises(TimeoutError):
+        with metrics.upstream("rag"):
+            raise TimeoutError()
+    text = metrics.render()
+    assert 'upstream_request_duration_seconds_count{upstream="rag",outcome="5xx"} 1' in text
+    assert 'upstream_request_duration_seconds_count{upstream="rag",outcome="error"} 1' in text
@@ -0,0 +1,97 @@
+"""
+Pins the shared LISTEN loop (utils.pg_listener): notifications reach the
+callback as payload sets, and a dropped connection is reopened with
+on_connect called again.
+
+Run: cd backend && python3 -m pytest test/test_pg_listener.py
+"""
+import os
+import socket
+import sys
+import threading
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.pg_listener import ListenConnection, listen  # noqa: E402
+
+
+class FakeConnection:
+    """psycopg2-like connection; writing to `feed` makes it readable."""
+
+    def __init__(self):
+        self._read, self.feed = socket.socketpair()
+        self.notifies = []
+        self.listening = []
+        self.autocommit = False
+
+    def fileno(self):
+        return self._read.fileno()
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                connection.listening.append(sql)
+
+        return Cursor()
+
+    def poll(self):
+        data = self._read.recv(4096).decode()
+        if "!" in data:
+            raise OSError("server closed the connection")
+        self.notifies.extend(SimpleNamespace(payload=payload) for payload in data.split(",") if payload)
+
+
+class FakeEngine:
+    def __init__(self):
+        self.connections = []
+        self.opened = threading.Semaphore(0)
+
+    def raw_connection(self):
+        connection = FakeConnection()
+        self.connections.append(connection)
+        self.opened.release()
+        return SimpleNamespace(dbapi_connection=connection, detach=lambda: None, close=lambda: None)
+
+
+def test_wait_returns_payloads_and_connects_on_demand():
+    engine = FakeEngine()
+    connection = ListenConnection(engine, ["a", "b"])
+    assert not connection.connected
+    assert connection.wait(0.01) == set()
+    engine.connections[0].feed.send(b"1,2,1,")
+    assert connection.wait(1) == {"1", "2"}
+    assert engine.connections[0].listening == ["LISTEN a", "LISTEN b"]
+    assert engine.connections[0].autocommit
+
+
+def test_listen_reconnects_after_an_error():
+    engine = FakeEngine()
+    stop = threading.Event()
+    notified, connects = [], []
+    thread = threading.Thread(target=listen, args=(engine, ["jobs"], notified.append, stop), kwargs={
+        "on_connect": lambda: connects.append(1), "poll_interval": 0.05, "log": lambda line: None,
+    })
+    thread.start()
+    try:
+        assert engine.opened.acquire(timeout=5)
+        engine.connections[0].feed.send(b"!")
+        assert engine.opened.acquire(timeout=5)  # reconnected after a 1 s backoff
+        engine.connections[1].feed.send(b"job-1")
+        for _ in range(100):
+            if notified:
+                break
+            stop.wait(0.05)
+    finally:
+        stop.set()
+        thread.join(timeout=5)
+    assert notified == [{"job-1"}]
+    assert len(connects) == 2
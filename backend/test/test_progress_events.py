@@ -0,0 +1,58 @@
+"""
+Pins the crawler progress event protocol of utils.progress_events.
+
+Run: cd backend && python3 -m pytest test/test_progress_events.py
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.progress_events import ProgressTracker, format_event, parse_event, sse_message  # noqa: E402
+
+
+def test_event_round_trip():
+    line = format_event("item_result", item_id="00000001", done=1, total=10)
+    event = parse_event(line)
+    assert event["type"] == "item_result"
+    assert event["item_id"] == "00000001"
+    assert "\n" not in line
+
+
+def test_unknown_event_type_is_rejected():
+    with pytest.raises(ValueError):
+        format_event("progress")
+
+
+def test_log_lines_are_not_events():
+    assert parse_event("[12:00:00] [FILTER] Added domain (1/10): example.com") is None
+    assert parse_event('@event {"type": "other"}') is None
+    assert parse_event("@event {not json") is None
+
+
+def test_sse_message_is_typed_for_events_only():
+    assert sse_message(4, "[INFO] hello") == "id: 4\ndata: [INFO] hello\n\n"
+    message = sse_message(5, format_event("summary", summary={"status": "success"}))
+    id_field, event_field, data_field = message.rstrip("\n").split("\n")
+    assert (id_field, event_field) == ("id: 5", "event: summary")
+    assert json.loads(data_field[len("data: "):])["summary"] == {"status": "success"}
+
+
+def test_tracker_rate_and_eta():
+    tracker = ProgressTracker(total=10)
+    tracker.started = 0.0
+    tracker._completions.extend([10.0, 11.0, 12.0])
+    tracker.done, tracker.success = 3, 3
+    progress = tracker.progress(now=12.0)
+    assert progress["rate_per_sec"] == 1.0  # 2 completions in the last 2 seconds, not 3 in 12
+    assert progress["eta_seconds"] == 7.0
+
+
+def test_tracker_counts_failures():
+    tracker = ProgressTracker(total=2)
+    tracker.add(True)
+    progress = tracker.add(False)
+    assert (progress["done"], progress["success"], progress["failed"]) == (2, 1, 1)
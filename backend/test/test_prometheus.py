@@ -0,0 +1,55 @@
+"""
+Pins the text exposition of utils.prometheus (GET /metrics).
+
+Run: cd backend && python3 -m pytest test/test_prometheus.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.prometheus import Registry  # noqa: E402
+
+
+def test_counter_and_gauge_samples():
+    registry = Registry()
+    requests = registry.counter("http_requests_total", "Requests", ("route", "status"))
+    in_progress = registry.gauge("http_requests_in_progress", "In flight")
+    requests.inc(route="/api/data", status="200")
+    requests.inc(2, route="/api/data", status="200")
+    in_progress.inc()
+    in_progress.dec()
+    text = registry.render()
+    assert "# TYPE http_requests_total counter" in text
+    assert 'http_requests_total{route="/api/data",status="200"} 3' in text
+    assert "http_requests_in_progress 0" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, route="/x")
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/x",le="1"} 3' in text
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/x"} 4' in text
+    assert 'latency_seconds_sum{route="/x"} 4.05' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.counter("errors_total", "Errors", ("message",))
+    counter.inc(message='say "hi"\\n')
+    assert 'errors_total{message="say \\"hi\\"\\\\n"} 1' in registry.render()
+
+
+def test_labels_must_match():
+    counter = Registry().counter("errors_total", "Errors", ("route",))
+    with pytest.raises(ValueError):
+        counter.inc(status="500")
+    with pytest.raises(ValueError):
+        counter.inc(-1, route="/x")
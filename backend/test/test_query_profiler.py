@@ -0,0 +1,121 @@
+"""
+Pins how the query profiler (utils.query_profiler) fingerprints statements,
+which ones it may EXPLAIN ANALYZE, and its per-fingerprint report.
+
+Run: cd backend && python3 -m pytest test/test_query_profiler.py
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+pytest.importorskip("sqlalchemy")
+
+from utils.query_profiler import (  # noqa: E402
+    QueryProfiler, analyzable, explainable, fingerprint, normalize, to_psycopg2,
+)
+
+
+def test_literals_and_parameters_share_a_fingerprint():
+    statements = [
+        "SELECT * FROM results WHERE id_results = 42 AND status = 'verified'",
+        "select *  from results\n where id_results = %(id)s and status = %(status)s -- by id",
+        "SELECT * FROM results WHERE id_results = $1 AND status = $2",
+        "SELECT * FROM results /* api */ WHERE id_results = :id AND status = 'it''s'",
+    ]
+    assert len({fingerprint(statement)[0] for statement in statements}) == 1
+    assert normalize(statements[0]) == "select * from results where id_results = ? and status = ?"
+
+
+def test_lists_collapse_and_casts_survive():
+    assert normalize("SELECT 1 FROM t WHERE id IN (1, 2, 3)") == normalize("SELECT 1 FROM t WHERE id IN ($1)")
+    assert normalize("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y')") == "insert into t (a, b) values (?, ?), ..."
+    assert normalize("SELECT created_at::date, col2 FROM t2") == "select created_at::date, col2 from t2"
+
+
+def test_only_plain_reads_are_analyzed():
+    assert analyzable("WITH x AS (SELECT 1) SELECT * FROM x")
+    assert analyzable("SELECT COUNT(*), LOWER(COALESCE(status, 'unverified')) FROM results WHERE id IN (SELECT 1)")
+    assert analyzable("SELECT 'pg_notify(x)' FROM t")
+    assert not analyzable("UPDATE results SET status = 'x'")
+    assert not analyzable("WITH d AS (DELETE FROM t RETURNING id) SELECT * FROM d")
+    assert not analyzable("SELECT * FROM crawler_jobs FOR UPDATE SKIP LOCKED")
+    assert explainable("UPDATE results SET status = 'x'")
+    assert not explainable("LISTEN crawler_jobs")
+
+
+def test_notify_and_advisory_lock_are_only_planned():
+    notify = "SELECT pg_notify(%(channel)s, %(payload)s)"
+    claim_lock = "SELECT pg_advisory_xact_lock(%(key)s)"
+    assert not analyzable(notify) and not analyzable(claim_lock)
+    assert not analyzable("SELECT pg_catalog.pg_notify($1, $2)")
+
+    class Cursor:
+        def execute(self, sql, parameters):
+            executed.append(sql)
+
+        def fetchall(self):
+            return [("Result  (cost=0.00..0.01 rows=1 width=4)",)]
+
+        def close(self):
+            pass
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    class Engine:
+        def raw_connection(self):
+            return Connection()
+
+    executed = []
+    profiler = QueryProfiler(explain_engine=Engine(), slow_ms=1, explain_sample_rate=1.0, log=lambda line: None)
+    for statement in (notify, claim_lock):
+        profiler.record("sync", statement, {"channel": "c", "payload": "p", "key": 1}, 0.5)
+    deadline = time.monotonic() + 5
+    while profiler.explains < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert executed == ["EXPLAIN " + notify, "EXPLAIN " + claim_lock]
+    assert all(entry["explained"] and not entry["analyzed"] for entry in profiler.slow_log)
+
+
+def test_asyncpg_statements_are_rewritten_for_psycopg2():
+    statement, parameters = to_psycopg2("SELECT * FROM t WHERE a = $2 AND b LIKE '%x' AND c = $1", ("c", "a"))
+    assert statement == "SELECT * FROM t WHERE a = %s AND b LIKE '%%x' AND c = %s"
+    assert parameters == ("a", "c")
+
+
+def test_report_ranks_fingerprints_and_logs_slow_queries():
+    logged = []
+    profiler = QueryProfiler(slow_ms=100, log=logged.append)
+    for ms in range(1, 101):
+        profiler.record("sync", "SELECT * FROM results WHERE id_results = %(id)s", {"id": ms}, ms / 1000)
+    profiler.record("async", "SELECT count(*) FROM generated_domains", (), 0.25)
+
+    report = profiler.report(sort="count")
+    top = report["queries"][0]
+    assert report["fingerprints"] == 2 and report["statements"] == 101
+    assert top["count"] == 100 and top["p95_ms"] == 95.0 and top["max_ms"] == 100.0
+    assert [entry["duration_ms"] for entry in report["slow_queries"]] == [250.0, 100.0]
+    assert len(logged) == 2 and logged[0].startswith("[SLOW QUERY]")
+    assert profiler.report(sort="max")["queries"][0]["engines"] == ["async"]
+    with pytest.raises(ValueError):
+        profiler.report(sort="name")
+
+
+def test_fingerprints_past_the_limit_count_as_other():
+    profiler = QueryProfiler(max_fingerprints=2)
+    for table in ("a", "b", "c", "d"):
+        profiler.record("sync", f"SELECT * FROM {table}", None, 0.001)
+    report = profiler.report()
+    assert report["fingerprints"] == 3
+    assert {query["fingerprint"]: query["count"] for query in report["queries"]}["other"] == 2
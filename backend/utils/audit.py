@@ -3,11 +3,34 @@ Audit logging utilities for tracking all changes to results
 """
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import Optional
 import json
 
 
+AUDIT_INSERT_QUERY = text("""
+    INSERT INTO audit_log (id_result, action, username, timestamp, details)
+    VALUES (:id_result, :action, :username, now(), :details)
+""")
+
+AUDIT_HISTORY_QUERY = text("""
+    SELECT action, username, timestamp, details
+    FROM audit_log
+    WHERE id_result = :id_result
+    ORDER BY timestamp ASC
+""")
+
+
+def _audit_params(id_result: int, action: str, username: str, details: Optional[dict]) -> dict:
+    return {
+        "id_result": id_result,
+        "action": action,
+        "username": username,
+        "details": json.dumps(details) if details else None
+    }
+
+
 def add_audit_log(
     db: Session,
     id_result: int,
@@ -25,19 +48,18 @@ def add_audit_log(
         username: Username of the user performing the action
         details: Optional additional details as dictionary
     """
-    query = text("""
-        INSERT INTO audit_log (id_result, action, username, timestamp, details)
-        VALUES (:id_result, :action, :username, now(), :details)
-    """)
-    
-    details_json = json.dumps(details) if details else None
-    
-    db.execute(query, {
-        "id_result": id_result,
-        "action": action,
-        "username": username,
-        "details": details_json
-    })
+    db.execute(AUDIT_INSERT_QUERY, _audit_params(id_result, action, username, details))
+
+
+async def add_audit_log_async(
+    db: AsyncSession,
+    id_result: int,
+    action: str,
+    username: str,
+    details: Optional[dict] = None
+):
+    """Async version of add_audit_log for routes using get_async_db"""
+    await db.execute(AUDIT_INSERT_QUERY, _audit_params(id_result, action, username, details))
 
 
 def get_audit_history(db: Session, id_result: int) -> list:
@@ -51,16 +73,26 @@ def get_audit_history(db: Session, id_result: int) -> list:
     Returns:
         List of audit log entries with formatted messages
     """
-    query = text("""
-        SELECT action, username, timestamp, details
-        FROM audit_log
-        WHERE id_result = :id_result
-        ORDER BY timestamp ASC
-    """)
-    
-    result = db.execute(query, {"id_result": id_result})
-    rows = result.fetchall()
+    result = db.execute(AUDIT_HISTORY_QUERY, {"id_result": id_result})
+    return format_audit_history(result.fetchall())
+
+
+async def get_audit_history_async(db: AsyncSession, id_result: int) -> list:
+    """Async version of get_audit_history for routes using get_async_db"""
+    result = await db.execute(AUDIT_HISTORY_QUERY, {"id_result": id_result})
+    return format_audit_history(result.fetchall())
+
+
+def format_audit_history(rows) -> list:
+    """
+    Turn audit_log rows into entries with human-readable messages
     
+    Args:
+        rows: audit_log rows (action, username, timestamp, details)
+        
+    Returns:
+        List of audit log entries with formatted messages
+    """
     history = []
     for row in rows:
         row_dict = dict(row._mapping)
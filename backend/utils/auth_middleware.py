@@ -3,18 +3,19 @@ Authentication middleware for protecting routes
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import Optional
 from utils.auth import decode_access_token
-from db import get_db
+from utils.user_cache import user_cache
+from db import get_async_db
 
 security = HTTPBearer()
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict:
     """
     Get current authenticated user from JWT token
@@ -40,6 +41,11 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Served from cache when possible (invalidated on user changes, see utils/user_cache.py)
+    cached_user = await user_cache.get(username)
+    if cached_user is not None:
+        return cached_user
+    
     # Fetch user from database
     query = text("""
         SELECT id, username, full_name, email, phone, role, created_at, last_login
@@ -47,7 +53,7 @@ def get_current_user(
         WHERE username = :username
     """)
     
-    result = db.execute(query, {"username": username})
+    result = await db.execute(query, {"username": username})
     user = result.fetchone()
     
     if user is None:
@@ -57,7 +63,9 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return dict(user._mapping)
+    user_dict = dict(user._mapping)
+    await user_cache.set(username, user_dict)
+    return user_dict
 
 
 def get_current_active_user(current_user: dict = Depends(get_current_user)) -> dict:
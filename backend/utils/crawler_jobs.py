@@ -0,0 +1,331 @@
+"""
+Durable crawler job queue (database/migrations/007_crawler_jobs.sql).
+
+The crawler routes only insert jobs and read their state and output; the
+crawls themselves run in crawler_worker.py processes, which claim queued jobs
+with SELECT ... FOR UPDATE SKIP LOCKED. Claims take a transaction-level
+advisory lock first, so the per-type running limits (JOB_TYPE_LIMITS) hold
+across any number of workers. New jobs are announced with NOTIFY on
+JOBS_CHANNEL so idle workers pick them up without waiting for their poll.
+Appended output and status changes are announced on JOB_LOGS_CHANNEL (the
+payload is the job id) for the log streams in utils/job_log_hub.py.
+
+Every function takes a Session or Connection and leaves committing to the
+caller (notifications are delivered on commit).
+"""
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import text
+
+from utils.pg_listener import ListenConnection
+
+JOBS_CHANNEL = "crawler_jobs"
+JOB_LOGS_CHANNEL = "crawler_job_logs"
+
+JOB_TYPES = ("keyword", "manual")
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Jobs of one type allowed to run at the same time (across all workers)
+JOB_TYPE_LIMITS = {
+    "keyword": int(os.getenv("CRAWLER_MAX_KEYWORD_JOBS", "1")),  # search + full pipeline, SerpAPI quota
+    "manual": int(os.getenv("CRAWLER_MAX_MANUAL_JOBS", "2")),
+}
+JOB_HEARTBEAT_SECONDS = float(os.getenv("CRAWLER_JOB_HEARTBEAT_SECONDS", "5"))
+JOB_STALE_SECONDS = float(os.getenv("CRAWLER_JOB_STALE_SECONDS", "60"))  # no heartbeat -> worker is gone
+JOB_MAX_ATTEMPTS = int(os.getenv("CRAWLER_JOB_MAX_ATTEMPTS", "1"))  # >1 requeues jobs of dead workers
+
+# Serializes claims (pg_advisory_xact_lock key, arbitrary but fixed)
+CLAIM_LOCK_KEY = 0x63726177
+
+JOB_COLUMNS = """
+    id, job_type, status, params, created_by, items_total, items_done, items_success,
+    items_failed, log_lines, summary, error, cancel_requested, attempts, worker_id,
+    created_at, started_at, heartbeat_at, finished_at
+"""
+
+JOB_INSERT_QUERY = text("""
+    INSERT INTO crawler_jobs (id, job_type, params, created_by, items_total)
+    VALUES (:id, :job_type, CAST(:params AS jsonb), :created_by, :items_total)
+""")
+
+JOB_NOTIFY_QUERY = text("SELECT pg_notify(:channel, :payload)")
+
+JOB_SELECT_QUERY = text(f"SELECT {JOB_COLUMNS} FROM crawler_jobs WHERE id = :id")
+
+LATEST_JOB_QUERY = text("SELECT id FROM crawler_jobs ORDER BY created_at DESC LIMIT 1")
+
+CLAIM_LOCK_QUERY = text("SELECT pg_advisory_xact_lock(:key)")
+
+RUNNING_COUNTS_QUERY = text("""
+    SELECT job_type, count(*) FROM crawler_jobs WHERE status = 'running' GROUP BY job_type
+""")
+
+CLAIM_QUERY = text(f"""
+    UPDATE crawler_jobs
+    SET status = 'running', worker_id = :worker_id, attempts = attempts + 1,
+        started_at = now(), heartbeat_at = now()
+    WHERE id = (
+        SELECT id FROM crawler_jobs
+        WHERE status = 'queued' AND job_type = ANY(:job_types)
+        ORDER BY created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING {JOB_COLUMNS}
+""")
+
+# Reserves seq numbers; the row lock orders concurrent writers of one job
+LOG_RESERVE_QUERY = text("""
+    UPDATE crawler_jobs SET log_lines = log_lines + :count WHERE id = :id RETURNING log_lines
+""")
+
+LOG_INSERT_QUERY = text("""
+    INSERT INTO crawler_job_logs (job_id, seq, line) VALUES (:job_id, :seq, :line)
+""")
+
+LOG_SELECT_QUERY = text("""
+    SELECT seq, line FROM crawler_job_logs
+    WHERE job_id = :id AND seq > :after
+    ORDER BY seq
+    LIMIT :limit
+""")
+
+HEARTBEAT_QUERY = text("""
+    UPDATE crawler_jobs
+    SET heartbeat_at = now(),
+        items_done = COALESCE(:items_done, items_done),
+        items_success = COALESCE(:items_success, items_success),
+        items_failed = COALESCE(:items_failed, items_failed)
+    WHERE id = :id AND worker_id = :worker_id
+    RETURNING cancel_requested, status
+""")
+
+FINISH_QUERY = text("""
+    UPDATE crawler_jobs
+    SET status = :status, summary = CAST(:summary AS jsonb), error = :error, finished_at = now(),
+        heartbeat_at = now(),
+        items_done = COALESCE(:items_done, items_done),
+        items_success = COALESCE(:items_success, items_success),
+        items_failed = COALESCE(:items_failed, items_failed)
+    WHERE id = :id AND status = 'running' AND worker_id = :worker_id
+""")
+
+CANCEL_QUERY = text("""
+    UPDATE crawler_jobs
+    SET cancel_requested = true,
+        status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+        finished_at = CASE WHEN status = 'queued' THEN now() ELSE finished_at END
+    WHERE id = :id AND status IN ('queued', 'running')
+    RETURNING status
+""")
+
+# Jobs of a worker that shut down cleanly go back to the queue as if never started
+RELEASE_QUERY = text("""
+    UPDATE crawler_jobs
+    SET status = 'queued', worker_id = NULL, attempts = attempts - 1, heartbeat_at = NULL
+    WHERE id = :id AND status = 'running' AND worker_id = :worker_id AND NOT cancel_requested
+""")
+
+STALE_REQUEUE_QUERY = text("""
+    UPDATE crawler_jobs
+    SET status = 'queued', worker_id = NULL, heartbeat_at = NULL
+    WHERE status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale_after)
+      AND attempts < :max_attempts AND NOT cancel_requested
+    RETURNING id
+""")
+
+STALE_FAIL_QUERY = text("""
+    UPDATE crawler_jobs
+    SET status = CASE WHEN cancel_requested THEN 'cancelled' ELSE 'failed' END,
+        error = COALESCE(error, 'Worker stopped responding'), finished_at = now()
+    WHERE status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale_after)
+    RETURNING id
+""")
+
+
+def job_to_dict(row) -> dict:
+    """Job row in the shape the API returns (ISO timestamps, str id)."""
+    job = dict(row._mapping)
+    job["id"] = str(job["id"])
+    for key in ("created_at", "started_at", "heartbeat_at", "finished_at"):
+        if job[key] is not None:
+            job[key] = job[key].isoformat()
+    return job
+
+
+def enqueue_job(db, job_id: str, job_type: str, params: dict, created_by: Optional[str], items_total: int):
+    """Insert a queued job and wake the workers (on commit)."""
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"Unknown crawler job type: {job_type}")
+    db.execute(JOB_INSERT_QUERY, {
+        "id": job_id,
+        "job_type": job_type,
+        "params": json.dumps(params),
+        "created_by": created_by,
+        "items_total": items_total,
+    })
+    db.execute(JOB_NOTIFY_QUERY, {"channel": JOBS_CHANNEL, "payload": job_id})
+
+
+def notify_job_changed(db, job_id: str):
+    """Wake log streams of a job (new output or status change), delivered on commit."""
+    db.execute(JOB_NOTIFY_QUERY, {"channel": JOB_LOGS_CHANNEL, "payload": job_id})
+
+
+def get_job(db, job_id: str) -> Optional[dict]:
+    row = db.execute(JOB_SELECT_QUERY, {"id": job_id}).fetchone()
+    return job_to_dict(row) if row else None
+
+
+def latest_job_id(db) -> Optional[str]:
+    """Id of the most recently created job."""
+    job_id = db.execute(LATEST_JOB_QUERY).scalar()
+    return str(job_id) if job_id else None
+
+
+def claim_job(db, worker_id: str, limits: Optional[Dict[str, int]] = None) -> Optional[dict]:
+    """
+    Mark the oldest claimable queued job as running by this worker.
+
+    Must run in its own transaction: the advisory lock taken here is held
+    until commit, so running counts cannot change between the check and the
+    claim.
+
+    Args:
+        db: Connection inside a transaction
+        worker_id: Identifier stored on the job (host:pid)
+        limits: job_type -> max running jobs (default JOB_TYPE_LIMITS)
+
+    Returns:
+        The claimed job, or None if nothing is queued or every type is at its limit
+    """
+    limits = limits or JOB_TYPE_LIMITS
+    db.execute(CLAIM_LOCK_QUERY, {"key": CLAIM_LOCK_KEY})
+    running = {job_type: count for job_type, count in db.execute(RUNNING_COUNTS_QUERY).fetchall()}
+    job_types = [job_type for job_type, limit in limits.items() if running.get(job_type, 0) < limit]
+    if not job_types:
+        return None
+    row = db.execute(CLAIM_QUERY, {"worker_id": worker_id, "job_types": job_types}).fetchone()
+    return job_to_dict(row) if row else None
+
+
+def append_logs(db, job_id: str, lines: List[str]) -> int:
+    """Append output lines to a job. Returns the seq of the last line."""
+    if not lines:
+        return 0
+    last_seq = db.execute(LOG_RESERVE_QUERY, {"id": job_id, "count": len(lines)}).scalar()
+    if last_seq is None:
+        return 0  # job was deleted
+    first_seq = last_seq - len(lines) + 1
+    db.execute(LOG_INSERT_QUERY, [
+        {"job_id": job_id, "seq": first_seq + i, "line": line} for i, line in enumerate(lines)
+    ])
+    notify_job_changed(db, job_id)
+    return last_seq
+
+
+def read_logs(db, job_id: str, after_seq: int = 0, limit: int = 500) -> List[tuple]:
+    """Output lines of a job after a seq, as (seq, line) tuples."""
+    rows = db.execute(LOG_SELECT_QUERY, {"id": job_id, "after": after_seq, "limit": limit}).fetchall()
+    return [(row.seq, row.line) for row in rows]
+
+
+def _progress_params(progress: Optional[dict]) -> dict:
+    progress = progress or {}
+    return {key: progress.get(key) for key in ("items_done", "items_success", "items_failed")}
+
+
+def heartbeat(db, job_id: str, worker_id: str, progress: Optional[dict] = None) -> bool:
+    """
+    Refresh a running job's heartbeat (and progress counters).
+
+    Returns:
+        False when the job was cancelled or taken away from this worker and
+        should be stopped
+    """
+    row = db.execute(HEARTBEAT_QUERY, {"id": job_id, "worker_id": worker_id, **_progress_params(progress)}).fetchone()
+    return row is not None and not row.cancel_requested and row.status == "running"
+
+
+def finish_job(db, job_id: str, worker_id: str, status: str, summary: Optional[dict] = None,
+               error: Optional[str] = None, progress: Optional[dict] = None):
+    """Move a job running on this worker to a terminal status."""
+    if status not in TERMINAL_STATUSES:
+        raise ValueError(f"Not a terminal job status: {status}")
+    db.execute(FINISH_QUERY, {
+        "id": job_id,
+        "worker_id": worker_id,
+        "status": status,
+        "summary": json.dumps(summary) if summary is not None else None,
+        "error": error,
+        **_progress_params(progress),
+    })
+    notify_job_changed(db, job_id)
+
+
+def request_cancel(db, job_id: str) -> Optional[str]:
+    """
+    Cancel a job. Queued jobs are cancelled at once; running jobs are flagged
+    and stopped by their worker at the next heartbeat.
+
+    Returns:
+        The job's status afterwards, or None if it was not queued or running
+    """
+    status = db.execute(CANCEL_QUERY, {"id": job_id}).scalar()
+    if status is not None:
+        notify_job_changed(db, job_id)
+    return status
+
+
+def release_job(db, job_id: str, worker_id: str):
+    """Requeue a job whose worker is shutting down (not counted as an attempt)."""
+    db.execute(RELEASE_QUERY, {"id": job_id, "worker_id": worker_id})
+    notify_job_changed(db, job_id)
+
+
+def recover_stale_jobs(db, stale_after: float = JOB_STALE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS) -> dict:
+    """
+    Requeue (attempts left) or fail running jobs whose heartbeat stopped.
+
+    Returns:
+        {"requeued": [job ids], "failed": [job ids]}
+    """
+    params = {"stale_after": stale_after, "max_attempts": max_attempts}
+    requeued = [str(row.id) for row in db.execute(STALE_REQUEUE_QUERY, params).fetchall()]
+    failed = [str(row.id) for row in db.execute(STALE_FAIL_QUERY, params).fetchall()]
+    if requeued:
+        db.execute(JOB_NOTIFY_QUERY, {"channel": JOBS_CHANNEL, "payload": "requeued"})
+    for job_id in requeued + failed:
+        notify_job_changed(db, job_id)
+    return {"requeued": requeued, "failed": failed}
+
+
+class JobListener:
+    """LISTEN connection on JOBS_CHANNEL for idle workers (blocking, use from a thread)."""
+
+    def __init__(self, engine, log: Callable = print):
+        self.log = log
+        self._connection = ListenConnection(engine, [JOBS_CHANNEL])
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a job notification arrives or `timeout` passes. True if notified."""
+        try:
+            return bool(self._connection.wait(timeout))
+        except Exception as e:
+            self.log(f"[JOBS] Listener error, falling back to polling: {e}")
+            self.close()
+            time.sleep(timeout)
+            return False
+
+    def close(self):
+        self._connection.close()
+
+
+def total_items(params: dict, job_type: str) -> int:
+    """Domains a job is expected to produce."""
+    if job_type == "manual":
+        return len(params.get("domains") or [])
+    return int(params.get("domain_count") or 0)
+
@@ -0,0 +1,226 @@
+"""
+Compiled matcher for the blocked-domains list (generator_settings 'blocked_domains').
+
+One rule per line:
+    example.com      blocks example.com and every subdomain (a.example.com),
+                     but not lookalikes such as tokoexample.com
+    *.example.com    blocks subdomains of example.com only, not example.com itself
+    ~judi            blocks every domain containing "judi" anywhere
+    # comment        ignored, as are empty lines
+
+Before this matcher, every entry blocked any domain containing it as text.
+Plain entries now only block the domain and its subdomains; legacy_match()
+reports domains a plain entry would still have blocked under the old rule,
+and single-label entries ("judi"), which can no longer match a real domain,
+are listed in summary() (database/migrations/008 rewrites them to "~judi").
+
+Domain rules live in a trie keyed by reversed labels (com -> example -> ...),
+so a lookup costs one step per label of the candidate regardless of how many
+rules there are. Substring rules (~) are compiled into an Aho-Corasick
+automaton and only built when the list has any.
+
+Shared by the crawler (integrasi-service/domain-generator/crawler.py) and the
+admin routes.
+"""
+import re
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+SUBSTRING_PREFIX = "~"
+WILDCARD_PREFIX = "*."
+
+# Already a bare lowercase host: skip urlparse (most list entries and crawled domains)
+_PLAIN_HOST = re.compile(r"^[a-z0-9.-]+$")
+
+
+def clean_host(value: Optional[str]) -> str:
+    """Lowercase host of a domain or URL, without port or trailing dot ("" if none)."""
+    if not value:
+        return ""
+    value = value.strip().lower()
+    if _PLAIN_HOST.match(value):
+        return value.rstrip(".")
+    if "://" not in value:
+        value = "//" + value
+    try:
+        host = urlparse(value).hostname or ""
+    except ValueError:
+        return ""
+    return host.rstrip(".")
+
+
+class _TrieNode:
+    __slots__ = ("children", "rule", "wildcard_rule")
+
+    def __init__(self):
+        self.children = {}
+        self.rule = None           # matches this domain and all subdomains
+        self.wildcard_rule = None  # matches subdomains only
+
+
+class _AhoCorasick:
+    """Multi-pattern substring search (returns the first pattern found)."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+            state = next_state
+        if self.output[state] is None:
+            self.output[state] = pattern
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                # Inherit a match from the fail chain (pattern that is a suffix of this one)
+                if self.output[next_state] is None:
+                    self.output[next_state] = self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> Optional[str]:
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state] is not None:
+                return self.output[state]
+        return None
+
+
+class DomainMatcher:
+    """Blocked-domain rules compiled for fast matching."""
+
+    def __init__(self, rules: Iterable[str] = ()):
+        self._root = _TrieNode()
+        self._substrings = None
+        self.domain_rules = 0
+        self.wildcard_rules = 0
+        self.substring_rules = 0
+        self.invalid: List[str] = []
+        self.single_label: List[str] = []  # plain entries without a dot, see module docstring
+        self._legacy = None
+
+        substrings = []
+        plain_hosts = []
+        for line in rules:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(SUBSTRING_PREFIX):
+                pattern = line[len(SUBSTRING_PREFIX):].strip().lower()
+                if pattern:
+                    substrings.append(pattern)
+                    self.substring_rules += 1
+                else:
+                    self.invalid.append(line)
+                continue
+            wildcard = line.startswith(WILDCARD_PREFIX)
+            host = clean_host(line[len(WILDCARD_PREFIX):] if wildcard else line)
+            if not host or "" in host.split("."):
+                self.invalid.append(line)
+                continue
+            self._insert(host, line, wildcard)
+            if not wildcard:
+                plain_hosts.append(host)
+                if "." not in host:
+                    self.single_label.append(line)
+
+        if substrings:
+            self._substrings = _AhoCorasick(substrings)
+        if plain_hosts:
+            self._legacy = _AhoCorasick(plain_hosts)
+
+    @classmethod
+    def from_text(cls, value: Optional[str]) -> "DomainMatcher":
+        """Compile a newline-separated setting value."""
+        return cls((value or "").splitlines())
+
+    def _insert(self, host: str, rule: str, wildcard: bool):
+        node = self._root
+        for label in reversed(host.split(".")):
+            node = node.children.setdefault(label, _TrieNode())
+        if wildcard:
+            if node.wildcard_rule is None:
+                self.wildcard_rules += 1
+            node.wildcard_rule = node.wildcard_rule or rule
+        else:
+            if node.rule is None:
+                self.domain_rules += 1
+            node.rule = node.rule or rule
+
+    def match(self, domain: Optional[str]) -> Optional[str]:
+        """Return the rule that blocks `domain` (a domain or URL), or None."""
+        host = clean_host(domain)
+        if not host:
+            return None
+
+        labels = host.split(".")
+        node = self._root
+        remaining = len(labels)
+        for label in reversed(labels):
+            node = node.children.get(label)
+            if node is None:
+                break
+            remaining -= 1
+            if node.rule is not None:
+                return node.rule
+            if node.wildcard_rule is not None and remaining > 0:
+                return node.wildcard_rule
+
+        if self._substrings is not None:
+            pattern = self._substrings.search(host)
+            if pattern is not None:
+                return SUBSTRING_PREFIX + pattern
+        return None
+
+    def is_blocked(self, domain: Optional[str]) -> bool:
+        return self.match(domain) is not None
+
+    def legacy_match(self, domain: Optional[str]) -> Optional[str]:
+        """
+        Plain entry that the old substring matching would have blocked `domain`
+        with, when the current rules do not block it; None otherwise.
+        """
+        if self._legacy is None or self.match(domain) is not None:
+            return None
+        return self._legacy.search(clean_host(domain))
+
+    def __len__(self):
+        return self.domain_rules + self.wildcard_rules + self.substring_rules
+
+    def summary(self) -> dict:
+        return {
+            "domain_rules": self.domain_rules,
+            "wildcard_rules": self.wildcard_rules,
+            "substring_rules": self.substring_rules,
+            "invalid": self.invalid,
+            "single_label": self.single_label,
+        }
+
+
+def match_domains(matcher: DomainMatcher, domains: Iterable[str]) -> List[Tuple[str, Optional[str]]]:
+    """(domain, matching rule or None) for each domain."""
+    return [(domain, matcher.match(domain)) for domain in domains]
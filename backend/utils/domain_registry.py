@@ -0,0 +1,180 @@
+"""
+Registry of every domain seen by the crawler or added manually (domain_registry table).
+
+Replaces output/all_domains.txt. Domains are stored normalized (see
+normalize_domain) under a unique index, so "Example.com", "www.example.com"
+and "https://example.com:443/" are the same entry.
+
+DomainRegistry keeps a Bloom filter of the whole table in memory for bulk
+membership checks (crawler filter stage): a miss is definitive, a hit is
+confirmed with one primary-key lookup. Single checks in the backend just use
+the indexed lookup, and registration itself is an INSERT ... ON CONFLICT, so
+two writers can never both register the same domain.
+
+Schema: database/migrations/004_domain_registry.sql
+Shared by the backend and integrasi-service/domain-generator/crawler.py.
+"""
+import hashlib
+import math
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+from sqlalchemy import text
+
+REGISTRY_INSERT_QUERY = text("""
+    INSERT INTO domain_registry (normalized_domain, source)
+    SELECT unnest(CAST(:domains AS varchar[])), :source
+    ON CONFLICT (normalized_domain) DO NOTHING
+    RETURNING normalized_domain
+""")
+
+REGISTRY_EXISTS_QUERY = text("""
+    SELECT 1 FROM domain_registry WHERE normalized_domain = :domain
+""")
+
+
+def normalize_domain(value: Optional[str]) -> str:
+    """
+    Normalize a domain or URL to the registry key.
+
+    Lowercases, drops scheme, path, credentials, port, trailing dot and a
+    leading "www.". Returns "" when no host can be extracted.
+    """
+    if not value:
+        return ""
+    value = value.strip().lower()
+    if "://" not in value:
+        value = "//" + value
+    try:
+        host = urlparse(value).hostname or ""
+    except ValueError:
+        return ""
+    host = host.rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    return host[:255]
+
+
+def domain_exists(db, domain: str) -> bool:
+    """Indexed lookup of one domain (db: Session or Connection)."""
+    normalized = normalize_domain(domain)
+    if not normalized:
+        return False
+    return db.execute(REGISTRY_EXISTS_QUERY, {"domain": normalized}).first() is not None
+
+
+def register_domains(db, domains: Iterable[str], source: str = "crawler") -> List[str]:
+    """
+    Add domains to the registry (no-op for ones already there).
+    Caller is responsible for committing.
+
+    Returns:
+        Normalized domains that were newly registered
+    """
+    normalized = sorted({d for d in (normalize_domain(x) for x in domains) if d})
+    if not normalized:
+        return []
+    rows = db.execute(REGISTRY_INSERT_QUERY, {"domains": normalized, "source": source}).fetchall()
+    return [row[0] for row in rows]
+
+
+class BloomFilter:
+    """Bloom filter over strings (bytearray bit set, double hashing)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class DomainRegistry:
+    """In-memory membership view of domain_registry for bulk checks."""
+
+    def __init__(self, engine, error_rate: float = 0.01, growth: float = 2.0):
+        """
+        Args:
+            engine: SQLAlchemy engine used for loading and confirming hits
+            error_rate: Bloom filter false-positive rate (hits cost one DB lookup)
+            growth: Filter is sized for this many times the current row count
+        """
+        self.engine = engine
+        self.error_rate = error_rate
+        self.growth = growth
+        self.bloom = BloomFilter(1, error_rate)
+        self.pending = set()  # seen in this process, not registered yet
+        self.loaded = 0
+        self.confirm_queries = 0
+
+    def load(self, batch_size: int = 50000) -> int:
+        """Build the Bloom filter from the table. Returns the number of domains loaded."""
+        with self.engine.connect() as conn:
+            total = conn.execute(text("SELECT COUNT(*) FROM domain_registry")).scalar() or 0
+            self.bloom = BloomFilter(int(max(total, 1000) * self.growth), self.error_rate)
+            result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                text("SELECT normalized_domain FROM domain_registry")
+            )
+            loaded = 0
+            for row in result:
+                self.bloom.add(row[0])
+                loaded += 1
+        self.loaded = loaded
+        return loaded
+
+    def contains(self, domain: str) -> bool:
+        """True if the domain is registered or was marked as seen in this process."""
+        normalized = normalize_domain(domain)
+        if not normalized:
+            return False
+        if normalized in self.pending:
+            return True
+        if normalized not in self.bloom:
+            return False
+        self.confirm_queries += 1
+        with self.engine.connect() as conn:
+            return conn.execute(REGISTRY_EXISTS_QUERY, {"domain": normalized}).first() is not None
+
+    def mark_seen(self, domain: str):
+        """Remember a domain for the rest of this run (registered later with flush)."""
+        normalized = normalize_domain(domain)
+        if normalized:
+            self.pending.add(normalized)
+
+    def register(self, domains: Iterable[str], source: str = "crawler") -> List[str]:
+        """Register domains in the database and the local filter. Returns the new ones."""
+        domains = list(domains)
+        with self.engine.begin() as conn:
+            added = register_domains(conn, domains, source)
+        self.registered(domains)
+        return added
+
+    def registered(self, domains: Iterable[str]):
+        """Move domains committed to domain_registry elsewhere from pending into the filter."""
+        for domain in domains:
+            normalized = normalize_domain(domain)
+            if normalized:
+                self.bloom.add(normalized)
+                self.pending.discard(normalized)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "pending": len(self.pending),
+            "bloom_bits": self.bloom.size,
+            "bloom_hashes": self.bloom.hashes,
+            "confirm_queries": self.confirm_queries,
+        }
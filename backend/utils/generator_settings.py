@@ -0,0 +1,215 @@
+"""
+Cached, typed view of the generator_settings table.
+
+Every reader (crawler blocklist, search query exclusions, SerpAPI key, admin
+batch size) used to run its own SELECT each time and split the newline-joined
+value itself. GeneratorSettingsService loads all keys once, parses them into
+a GeneratorSettings object and keeps it in memory.
+
+Writes go through save_setting(), which sends a NOTIFY on SETTINGS_CHANNEL in
+the same transaction. Every process that called start_listener() (backend
+workers, running crawlers) holds a LISTEN connection and reloads its copy when
+the notification arrives, so a long crawl picks up blocklist edits mid-run
+without querying the database per item. If the listener connection drops, the
+cache is reloaded on reconnect; `max_age` is a safety net for edits made
+outside save_setting().
+
+Shared by the backend and integrasi-service/domain-generator/crawler.py.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import text
+
+from utils.domain_matcher import DomainMatcher
+from utils.pg_listener import listen
+
+SETTINGS_CHANNEL = "generator_settings_changed"
+
+DEFAULT_BATCH_SIZE = 10
+
+SETTINGS_SELECT_QUERY = text("""
+    SELECT setting_key, setting_value, updated_by, updated_at
+    FROM generator_settings
+""")
+
+SETTINGS_UPSERT_QUERY = text("""
+    INSERT INTO generator_settings (setting_key, setting_value, updated_by, updated_at)
+    VALUES (:key, :value, :username, now())
+    ON CONFLICT (setting_key) DO UPDATE SET
+        setting_value = EXCLUDED.setting_value,
+        updated_by = EXCLUDED.updated_by,
+        updated_at = EXCLUDED.updated_at
+    RETURNING setting_value, updated_by, updated_at
+""")
+
+SETTINGS_NOTIFY_QUERY = text("SELECT pg_notify(:channel, :key)")
+
+
+def split_lines(value: Optional[str]) -> List[str]:
+    """Non-empty, stripped lines of a newline-joined setting value."""
+    return [line.strip() for line in (value or "").splitlines() if line.strip()]
+
+
+class GeneratorSettings:
+    """Parsed generator settings (immutable snapshot, replaced on reload)."""
+
+    def __init__(self, rows: Optional[Dict[str, dict]] = None, loaded_at: Optional[float] = None):
+        """
+        Args:
+            rows: setting_key -> {"setting_value", "updated_by", "updated_at"}
+            loaded_at: time.monotonic() of the load
+        """
+        self.rows = rows or {}
+        self.loaded_at = loaded_at if loaded_at is not None else time.monotonic()
+
+        self.blocked_domains = DomainMatcher.from_text(self.value("blocked_domains"))
+        self.blocked_keywords = split_lines(self.value("blocked_keywords"))
+        self.serpapi_key = self.value("serpapi_key").strip() or None
+        try:
+            self.batch_size = max(1, int(self.value("batch_size") or DEFAULT_BATCH_SIZE))
+        except ValueError:
+            self.batch_size = DEFAULT_BATCH_SIZE
+
+    def value(self, key: str, default: str = "") -> str:
+        """Raw stored value of a setting."""
+        row = self.rows.get(key)
+        if row is None or row["setting_value"] is None:
+            return default
+        return row["setting_value"]
+
+    def entry(self, key: str, default: str = "") -> dict:
+        """Value plus audit fields, in the shape the admin API returns."""
+        row = self.rows.get(key)
+        if row is None:
+            return {"value": default, "updated_by": None, "updated_at": None}
+        return {
+            "value": row["setting_value"] if row["setting_value"] is not None else default,
+            "updated_by": row["updated_by"],
+            "updated_at": row["updated_at"].isoformat() if row["updated_at"] else None,
+        }
+
+
+def load_settings(db) -> GeneratorSettings:
+    """Read every generator setting (db: Session or Connection)."""
+    rows = {}
+    for row in db.execute(SETTINGS_SELECT_QUERY).fetchall():
+        row_dict = dict(row._mapping)
+        rows[row_dict["setting_key"]] = row_dict
+    return GeneratorSettings(rows)
+
+
+def save_setting(db, key: str, value: str, username: Optional[str]) -> dict:
+    """
+    Upsert one setting and notify listeners (delivered when the caller commits).
+
+    Returns:
+        The stored row: {"setting_value", "updated_by", "updated_at"}
+    """
+    row = db.execute(SETTINGS_UPSERT_QUERY, {"key": key, "value": value, "username": username}).fetchone()
+    db.execute(SETTINGS_NOTIFY_QUERY, {"channel": SETTINGS_CHANNEL, "key": key})
+    return dict(row._mapping)
+
+
+class GeneratorSettingsService:
+    """Process-wide settings cache, refreshed by LISTEN/NOTIFY."""
+
+    def __init__(self, engine, max_age: float = 300.0, retry_after: float = 30.0, log: Callable = print):
+        """
+        Args:
+            engine: SQLAlchemy engine (psycopg2) used for loading and listening
+            max_age: Reload after this many seconds even without a notification
+                (0 disables)
+            retry_after: Seconds to keep serving the previous (or empty)
+                settings after a failed load before trying again
+            log: Logging function for reloads and listener errors
+        """
+        self.engine = engine
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self.log = log
+        self._settings: Optional[GeneratorSettings] = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable] = []
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.loads = 0
+        self.notifications = 0
+
+    def get(self) -> GeneratorSettings:
+        """Current settings; only touches the database when missing or stale."""
+        settings = self._settings
+        now = time.monotonic()
+        if settings is not None and not (self.max_age and now - settings.loaded_at > self.max_age):
+            return settings
+        if now < self._retry_at:
+            return settings or GeneratorSettings()
+        return self.reload()
+
+    def reload(self) -> GeneratorSettings:
+        """Load from the database now. Keeps the previous settings if that fails."""
+        with self._lock:
+            try:
+                with self.engine.connect() as conn:
+                    settings = load_settings(conn)
+            except Exception as e:
+                self._retry_at = time.monotonic() + self.retry_after
+                self.log(f"[SETTINGS] Failed to load generator settings: {e}")
+                return self._settings or GeneratorSettings()
+            self._settings = settings
+            self._retry_at = 0.0
+            self.loads += 1
+        return settings
+
+    def invalidate(self):
+        """Drop the cached settings; the next get() reloads."""
+        self._settings = None
+        self._retry_at = 0.0
+
+    def on_change(self, callback: Callable[[GeneratorSettings, set], None]):
+        """Call `callback(settings, changed_keys)` after a notification-triggered reload."""
+        self._callbacks.append(callback)
+
+    # ------------------------------------------------------------------
+    # LISTEN connection
+    # ------------------------------------------------------------------
+
+    def start_listener(self, poll_interval: float = 5.0):
+        """Start the background LISTEN thread (idempotent)."""
+        if self._listener is not None and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, args=(poll_interval,), name="generator-settings-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=10)
+            self._listener = None
+
+    def _listen(self, poll_interval: float):
+        listen(self.engine, [SETTINGS_CHANNEL], self._notified, self._stop,
+               # Anything may have changed while we were not listening
+               on_connect=self.reload, poll_interval=poll_interval, log=self.log, label="SETTINGS")
+
+    def _notified(self, changed: set):
+        self.notifications += 1
+        settings = self.reload()
+        for callback in self._callbacks:
+            try:
+                callback(settings, changed)
+            except Exception as e:
+                self.log(f"[SETTINGS] Change callback failed: {e}")
+
+    def stats(self) -> dict:
+        settings = self._settings
+        return {
+            "loads": self.loads,
+            "notifications": self.notifications,
+            "listening": self._listener is not None and self._listener.is_alive(),
+            "age_seconds": round(time.monotonic() - settings.loaded_at, 1) if settings else None,
+        }
@@ -0,0 +1,224 @@
+"""
+Push-based streaming of crawler job output (crawler_job_logs) to SSE clients.
+
+Workers append output in batches and NOTIFY JOB_LOGS_CHANNEL with the job id
+(utils/crawler_jobs.py). Each backend process runs one JobLogHub: a LISTEN
+thread hands notifications to the event loop, and every job with at least
+one subscriber has a single follower task that reads the new rows once and
+appends them to the job's ring buffer. All SSE subscribers of that job in
+this process are fanned out from the buffer, so the table is read once per
+batch instead of once per client per poll.
+
+Subscribers resume from any seq (SSE Last-Event-ID): lines still in the
+ring buffer are served from memory, older ones are read from the table
+first. A slow refresh (`refresh_interval`) covers notifications lost while
+the LISTEN connection was down.
+"""
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from utils.crawler_jobs import JOB_LOGS_CHANNEL, TERMINAL_STATUSES, get_job, read_logs
+from utils.pg_listener import listen
+
+READ_BATCH = 500
+
+
+class JobLogChannel:
+    """Ring buffer of one job's output in this process."""
+
+    def __init__(self, job_id: str, size: int):
+        self.job_id = job_id
+        self.lines = deque(maxlen=size)
+        self.last_seq = 0  # seq of the newest line read
+        self.status: Optional[str] = None
+        self.finished = False
+        self.subscribers = 0
+        self.loaded = False  # first read done
+        self.wake = asyncio.Event()
+        self.changed = asyncio.Condition()
+        self.follower: Optional[asyncio.Task] = None
+
+    @property
+    def first_seq(self) -> int:
+        return self.last_seq - len(self.lines) + 1
+
+
+class JobLogHub:
+    """Per-process fan-out of crawler job output, driven by LISTEN/NOTIFY."""
+
+    def __init__(self, engine, buffer_lines: int = 5000, refresh_interval: float = 10.0, log: Callable = print):
+        """
+        Args:
+            engine: SQLAlchemy engine (psycopg2) for reading logs and listening
+            buffer_lines: Lines kept in memory per followed job
+            refresh_interval: Seconds between reads without a notification
+            log: Logging function for listener errors
+        """
+        self.engine = engine
+        self.buffer_lines = buffer_lines
+        self.refresh_interval = refresh_interval
+        self.log = log
+        self._channels: Dict[str, JobLogChannel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.notifications = 0
+        self.reads = 0
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _read(self, job_id: str, after_seq: int, limit: int = READ_BATCH):
+        # Status first: output written before a job finished is always read after it
+        with self.engine.connect() as conn:
+            job = get_job(conn, job_id)
+            rows = read_logs(conn, job_id, after_seq, limit)
+        self.reads += 1
+        return job, rows
+
+    async def _follow(self, channel: JobLogChannel):
+        """The one reader of a job's new rows in this process."""
+        while True:
+            channel.wake.clear()
+            try:
+                job, rows = await asyncio.to_thread(self._read, channel.job_id, channel.last_seq)
+            except Exception as e:
+                self.log(f"[JOB LOGS] Failed to read logs of {channel.job_id}: {e}")
+                job, rows = {"status": channel.status}, []
+            for seq, line in rows:
+                channel.lines.append(line)
+                channel.last_seq = seq
+            channel.status = job["status"] if job else None
+            channel.loaded = True
+            if len(rows) < READ_BATCH and (job is None or channel.status in TERMINAL_STATUSES):
+                channel.finished = True
+            async with channel.changed:
+                channel.changed.notify_all()
+            if channel.finished:
+                return
+            if len(rows) == READ_BATCH:
+                continue  # more waiting
+            try:
+                await asyncio.wait_for(channel.wake.wait(), self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _channel(self, job_id: str) -> JobLogChannel:
+        channel = self._channels.get(job_id)
+        if channel is None:
+            channel = JobLogChannel(job_id, self.buffer_lines)
+            channel.follower = asyncio.create_task(self._follow(channel))
+            self._channels[job_id] = channel
+        return channel
+
+    def _release(self, channel: JobLogChannel):
+        channel.subscribers -= 1
+        if channel.subscribers == 0 and self._channels.get(channel.job_id) is channel:
+            del self._channels[channel.job_id]
+            if channel.follower is not None:
+                channel.follower.cancel()
+
+    async def subscribe(self, job_id: str, after_seq: int = 0, keepalive: float = 15.0):
+        """
+        Yield (seq, line) for a job's output after `after_seq` until the job
+        has finished and everything was sent; None after `keepalive` seconds
+        without output.
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        channel = self._channel(job_id)
+        channel.subscribers += 1
+        cursor = max(0, after_seq)
+        try:
+            while True:
+                if channel.loaded and channel.lines and cursor < channel.first_seq - 1:
+                    # Behind the ring buffer (late joiner or slow client): catch up from the table
+                    _, rows = await asyncio.to_thread(
+                        self._read, job_id, cursor, min(READ_BATCH, channel.first_seq - 1 - cursor)
+                    )
+                    if not rows:
+                        cursor = channel.first_seq - 1
+                    for seq, line in rows:
+                        cursor = seq
+                        yield seq, line
+                    continue
+                if channel.lines and cursor >= channel.first_seq - 1:
+                    start = cursor - channel.first_seq + 1
+                    for line in list(itertools.islice(channel.lines, start, None)):
+                        cursor += 1
+                        yield cursor, line
+                if channel.finished and cursor >= channel.last_seq:
+                    return
+                async with channel.changed:
+                    try:
+                        await asyncio.wait_for(
+                            channel.changed.wait_for(
+                                lambda: channel.last_seq > cursor or channel.finished
+                            ),
+                            keepalive,
+                        )
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+                yield None
+        finally:
+            self._release(channel)
+
+    def status(self, job_id: str) -> Optional[str]:
+        """Last status seen by a followed job's reader (None if not followed)."""
+        channel = self._channels.get(job_id)
+        return channel.status if channel else None
+
+    def _notified(self, job_id: Optional[str]):
+        """On the event loop: wake the follower of one job (or all of them)."""
+        if job_id is None:
+            for channel in self._channels.values():
+                channel.wake.set()
+            return
+        channel = self._channels.get(job_id)
+        if channel is not None:
+            channel.wake.set()
+
+    # ------------------------------------------------------------------
+    # LISTEN connection
+    # ------------------------------------------------------------------
+
+    def start_listener(self):
+        """Start the LISTEN thread (idempotent); call from the event loop (app startup)."""
+        self._loop = asyncio.get_running_loop()
+        if self._listener is not None and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, name="job-log-listener", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=10)
+            self._listener = None
+
+    def _listen(self, poll_interval: float = 5.0):
+        listen(self.engine, [JOB_LOGS_CHANNEL], self._job_ids_notified, self._stop,
+               # Output may have been appended while we were not listening
+               on_connect=lambda: self._loop.call_soon_threadsafe(self._notified, None),
+               poll_interval=poll_interval, log=self.log, label="JOB LOGS")
+
+    def _job_ids_notified(self, job_ids: set):
+        """On the listener thread: hand the notified job ids to the event loop."""
+        self.notifications += len(job_ids)
+        for job_id in job_ids:
+            self._loop.call_soon_threadsafe(self._notified, job_id)
+
+    def stats(self) -> dict:
+        return {
+            "followed_jobs": len(self._channels),
+            "subscribers": sum(channel.subscribers for channel in self._channels.values()),
+            "notifications": self.notifications,
+            "reads": self.reads,
+            "listening": self._listener is not None and self._listener.is_alive(),
+        }
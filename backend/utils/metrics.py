@@ -0,0 +1,193 @@
+"""
+Backend metrics for GET /metrics (Prometheus text format, utils/prometheus.py).
+
+- HTTP: MetricsMiddleware (pure ASGI) records every request by method,
+  route template (e.g. /api/data/{id}, so paths with ids do not each get a
+  series) and status: a request counter, a latency histogram up to the
+  response start (for SSE streams that is the time to the first byte, not
+  the life of the stream) and the number of requests in progress.
+- Database: instrument_engine() wraps the pool's connect() to time the
+  checkout wait (including opening a new connection) and count checkout
+  timeouts, and times every statement with SQLAlchemy's cursor execute
+  events. Pool size/checked-out/overflow gauges are read at render time.
+- Upstreams: `with metrics.upstream("rag") as call:` around outgoing calls
+  (RAG service, RunPod chat, law RAG, image analysis), with
+  `call.status = response.status_code` for the outcome label.
+"""
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from utils.prometheus import DEFAULT_BUCKETS, Registry
+
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+UNMATCHED_ROUTE = "<unmatched>"
+STATEMENT_KINDS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+def statement_kind(statement: str) -> str:
+    """SELECT/INSERT/UPDATE/DELETE, or OTHER (DDL, LISTEN, CTEs, ...)."""
+    words = statement.lstrip().split(None, 1)
+    kind = words[0].upper() if words else ""
+    return kind if kind in STATEMENT_KINDS else "OTHER"
+
+
+def status_class(status: Optional[int]) -> str:
+    return f"{status // 100}xx" if status else "error"
+
+
+class UpstreamCall:
+    """Outcome of one outgoing call; set `status` to the HTTP status code."""
+
+    def __init__(self):
+        self.status: Optional[int] = None
+
+
+class BackendMetrics:
+    """The backend's metric families and the hooks that feed them."""
+
+    def __init__(self, registry: Optional[Registry] = None):
+        self.registry = registry or Registry()
+        r = self.registry
+        self.http_requests = r.counter(
+            "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+        self.http_latency = r.histogram(
+            "http_request_duration_seconds", "Time until the response started, by route",
+            ("method", "route"), buckets=DEFAULT_BUCKETS)
+        self.http_in_progress = r.gauge(
+            "http_requests_in_progress", "Requests being handled", ("method",))
+
+        self.pool_wait = r.histogram(
+            "db_pool_checkout_seconds", "Wait for a pooled connection (including connecting)",
+            ("engine",), buckets=QUERY_BUCKETS)
+        self.pool_timeouts = r.counter(
+            "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ("engine",))
+        self.pool_size = r.gauge("db_pool_size", "Configured pool size", ("engine",))
+        self.pool_checked_out = r.gauge("db_pool_checked_out", "Connections in use", ("engine",))
+        self.pool_overflow = r.gauge("db_pool_overflow", "Connections above the pool size", ("engine",))
+        self.query_latency = r.histogram(
+            "db_query_duration_seconds", "Statement execution time", ("engine", "kind"), buckets=QUERY_BUCKETS)
+        self.query_errors = r.counter("db_query_errors_total", "Statements that raised", ("engine",))
+
+        self.upstream_latency = r.histogram(
+            "upstream_request_duration_seconds", "Outgoing calls to model and RAG services",
+            ("upstream", "outcome"), buckets=DEFAULT_BUCKETS)
+
+        self._pools = {}  # engine label -> pool
+
+    # ------------------------------------------------------------------
+    # Database
+    # ------------------------------------------------------------------
+
+    def instrument_engine(self, engine, name: str):
+        """
+        Record pool checkout waits and statement durations of a (sync) Engine;
+        for an AsyncEngine pass its .sync_engine.
+        """
+        pool = engine.pool
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            except PoolTimeoutError:
+                self.pool_timeouts.inc(engine=name)
+                raise
+            finally:
+                self.pool_wait.observe(time.perf_counter() - started, engine=name)
+
+        pool.connect = timed_connect
+        self._pools[name] = pool
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["query_started"].pop()
+            self.query_latency.observe(time.perf_counter() - started, engine=name, kind=statement_kind(statement))
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(context):
+            self.query_errors.inc(engine=name)
+            started = context.connection.info.get("query_started") if context.connection is not None else None
+            if started:
+                started.pop()
+
+    def _collect_pools(self):
+        for name, pool in self._pools.items():
+            # QueuePool and AsyncAdaptedQueuePool; other pools have no size
+            if hasattr(pool, "checkedout"):
+                self.pool_size.set(pool.size(), engine=name)
+                self.pool_checked_out.set(pool.checkedout(), engine=name)
+                self.pool_overflow.set(max(0, pool.overflow()), engine=name)
+
+    # ------------------------------------------------------------------
+    # Upstreams
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def upstream(self, name: str):
+        """Time an outgoing call; outcome is the status class, or error when it raised."""
+        call = UpstreamCall()
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield call
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            outcome = "error" if failed and call.status is None else status_class(call.status)
+            self.upstream_latency.observe(time.perf_counter() - started, upstream=name, outcome=outcome)
+
+    def render(self) -> str:
+        self._collect_pools()
+        return self.registry.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding BackendMetrics' HTTP families."""
+
+    def __init__(self, app, metrics: BackendMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                self._observe(scope, method, status, time.perf_counter() - started)
+            await send(message)
+
+        self.metrics.http_in_progress.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            if status is None:
+                # The server's error handler sends the 500 outside this middleware
+                self._observe(scope, method, 500, time.perf_counter() - started)
+            raise
+        finally:
+            self.metrics.http_in_progress.dec(method=method)
+
+    def _observe(self, scope, method: str, status: int, seconds: float):
+        # The router stores the matched route in the scope (FastAPI APIRoute)
+        route = scope.get("route")
+        path = getattr(route, "path", None) or UNMATCHED_ROUTE
+        self.metrics.http_requests.inc(method=method, route=path, status=str(status))
+        self.metrics.http_latency.observe(seconds, method=method, route=path)
@@ -0,0 +1,99 @@
+"""
+LISTEN/NOTIFY plumbing shared by the settings cache (generator_settings),
+the job log fan-out (job_log_hub) and idle crawler workers (crawler_jobs).
+
+ListenConnection holds one dedicated psycopg2 connection LISTENing on some
+channels; listen() runs it in a loop on a background thread, reconnecting
+with exponential backoff. The services only supply channels and callbacks.
+"""
+import select
+import threading
+from typing import Callable, Iterable, Optional, Set
+
+MAX_BACKOFF = 60.0
+
+
+class ListenConnection:
+    """A psycopg2 connection LISTENing on `channels` (blocking, use from a thread)."""
+
+    def __init__(self, engine, channels: Iterable[str]):
+        self.engine = engine
+        self.channels = tuple(channels)
+        self._fairy = None
+
+    @property
+    def connected(self) -> bool:
+        return self._fairy is not None
+
+    def open(self):
+        """(Re)connect and LISTEN; closes any previous connection first."""
+        self.close()
+        # Dedicated connection, taken out of the pool for the life of the listener
+        fairy = self.engine.raw_connection()
+        fairy.detach()
+        conn = fairy.dbapi_connection
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for channel in self.channels:
+                cursor.execute(f"LISTEN {channel}")
+        self._fairy = fairy
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Payloads of the notifications that arrive within `timeout` seconds (connects if needed)."""
+        if self._fairy is None:
+            self.open()
+        conn = self._fairy.dbapi_connection
+        if select.select([conn], [], [], timeout) == ([], [], []):
+            return set()
+        conn.poll()
+        payloads = set()
+        while conn.notifies:
+            payloads.add(conn.notifies.pop(0).payload)
+        return payloads
+
+    def close(self):
+        if self._fairy is not None:
+            try:
+                self._fairy.close()
+            except Exception:
+                pass
+            self._fairy = None
+
+
+def listen(engine, channels: Iterable[str], on_notify: Callable[[Set[str]], None], stop: threading.Event,
+           on_connect: Optional[Callable[[], None]] = None, poll_interval: float = 5.0,
+           log: Callable = print, label: str = "LISTEN"):
+    """
+    LISTEN on `channels` until `stop` is set (run it as a thread's target).
+
+    Args:
+        engine: SQLAlchemy engine (psycopg2)
+        channels: Channels to LISTEN on
+        on_notify: Called with the set of payloads of each batch of notifications
+        stop: Event that ends the loop
+        on_connect: Called after every (re)connect, to catch up on what was
+            missed while not listening
+        poll_interval: Seconds between checks of `stop`
+        log: Logging function for connection errors
+        label: Log prefix
+    """
+    connection = ListenConnection(engine, channels)
+    backoff = 1.0
+    while not stop.is_set():
+        try:
+            connection.open()
+            if on_connect is not None:
+                on_connect()
+            backoff = 1.0
+            while not stop.is_set():
+                payloads = connection.wait(poll_interval)
+                if payloads:
+                    on_notify(payloads)
+        except Exception as e:
+            if stop.is_set():
+                break
+            log(f"[{label}] Listener error, reconnecting in {backoff:.0f}s: {e}")
+            stop.wait(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+        finally:
+            connection.close()
@@ -0,0 +1,115 @@
+"""
+Typed progress events of a crawler run.
+
+The crawler prints each event as one line on stdout, between its log lines:
+
+    @event {"type": "item_result", "ts": 1760000000.0, "done": 3, ...}
+
+The integration service relays them as SSE events named after the type
+(/process/logs), the crawler worker stores them with the job's other output
+and takes the job's progress and summary from them, and the backend's job
+log stream (/api/crawler/logs/{job_id}) relays them the same way. Clients
+read progress from the events instead of matching log text.
+
+Event types and their fields (besides "type" and "ts"):
+    stage_started   stage, workers
+    item_progress   stage, item_id, domain, status
+    item_result     item_id, domain, status, done, success, failed, total,
+                    elapsed_seconds, rate_per_sec, eta_seconds
+    stage_metrics   stage, finished, items, busy_seconds, started_at, finished_at,
+                    timings ({step: count, sum_seconds, percentiles, cumulative
+                    buckets}), buckets_ms; sent periodically while the stage
+                    runs (finished false) and once when it has finished
+    summary         summary (the run's summary.json)
+"""
+import json
+import time
+from collections import deque
+from typing import Optional
+
+EVENT_PREFIX = "@event "
+EVENT_TYPES = ("stage_started", "item_progress", "item_result", "stage_metrics", "summary")
+
+
+def format_event(event_type: str, **fields) -> str:
+    """One output line for an event."""
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Unknown progress event type: {event_type}")
+    event = {"type": event_type, "ts": round(time.time(), 3), **fields}
+    return EVENT_PREFIX + json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def parse_event(line: str) -> Optional[dict]:
+    """The event of an output line, or None for a plain log line."""
+    if not line.startswith(EVENT_PREFIX):
+        return None
+    try:
+        event = json.loads(line[len(EVENT_PREFIX):])
+    except ValueError:
+        return None
+    if not isinstance(event, dict) or event.get("type") not in EVENT_TYPES:
+        return None
+    return event
+
+
+def sse_message(seq: Optional[int], line: str) -> str:
+    """
+    SSE message of one output line: `event: <type>` with the event's JSON as
+    data for events, a plain `data:` message for log lines.
+    """
+    id_field = f"id: {seq}\n" if seq is not None else ""
+    event = parse_event(line)
+    if event is None:
+        return f"{id_field}data: {line}\n\n"
+    return f"{id_field}event: {event['type']}\ndata: {line[len(EVENT_PREFIX):]}\n\n"
+
+
+class ProgressTracker:
+    """
+    Done/success/failed counts of a run's items with live throughput and ETA.
+
+    The rate is taken over the last `window` completions, so the pipeline's
+    start-up (search, browser launch) does not drag it down for the rest of
+    the run.
+    """
+
+    def __init__(self, total: int, window: int = 20):
+        self.total = total
+        self.done = 0
+        self.success = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._completions = deque(maxlen=window)
+
+    def add(self, success: bool) -> dict:
+        """Count one finished item; returns the progress fields of its item_result event."""
+        now = time.monotonic()
+        self.done += 1
+        if success:
+            self.success += 1
+        else:
+            self.failed += 1
+        self._completions.append(now)
+        return self.progress(now)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Items per second."""
+        now = time.monotonic() if now is None else now
+        if len(self._completions) >= 2 and self._completions[-1] > self._completions[0]:
+            return (len(self._completions) - 1) / (self._completions[-1] - self._completions[0])
+        elapsed = now - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def progress(self, now: Optional[float] = None) -> dict:
+        now = time.monotonic() if now is None else now
+        rate = self.rate(now)
+        remaining = max(0, self.total - self.done)
+        return {
+            "done": self.done,
+            "success": self.success,
+            "failed": self.failed,
+            "total": self.total,
+            "elapsed_seconds": round(now - self.started, 1),
+            "rate_per_sec": round(rate, 3),
+            "eta_seconds": round(remaining / rate, 1) if rate > 0 else None,
+        }
@@ -0,0 +1,373 @@
+"""
+Per-statement profile of the backend's SQL (GET /api/admin/queries).
+
+QueryProfiler hooks SQLAlchemy's cursor execute events of the engines in
+db.py. Every statement is reduced to a fingerprint: comments dropped,
+literals and bind parameters replaced by `?`, IN lists and VALUES rows
+collapsed, whitespace and case normalized, so one route's query is one
+entry whatever its parameters. Each fingerprint keeps its count, total and
+max time, errors and a reservoir sample of durations for the p95.
+
+Statements slower than `slow_ms` are logged and kept in a ring buffer. A
+sampled share of them (`explain_sample_rate`, off by default, at most once
+per fingerprint every `explain_interval` seconds) is explained on a
+background thread, with the same parameters and on its own connection,
+and the plan is attached to the entry. EXPLAIN ANALYZE executes the
+statement again, so (ANALYZE, BUFFERS) is only used for plain reads whose
+function calls are all in SAFE_CALLS; anything else (writes, locking
+reads, pg_notify, pg_advisory_xact_lock, ...) gets a plain EXPLAIN, which
+only plans it. Parameters are only held until that EXPLAIN ran; they are
+never logged or reported.
+"""
+import hashlib
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+
+RESERVOIR_SIZE = 512
+OTHER_FINGERPRINT = "other"  # statements past max_fingerprints
+STATEMENT_PREVIEW = 2000
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"(?:\b[Ee])?'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.I)
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_IN_LISTS = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_VALUES_ROWS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_ARRAYS = re.compile(r"array\[\s*\?(?:\s*,\s*\?)*\s*\]", re.I)
+_WHITESPACE = re.compile(r"\s+")
+# EXPLAIN ANALYZE runs the statement: only plain reads are analyzed
+_EXPLAINABLE = re.compile(r"^\s*(select|with|insert|update|delete)\b", re.I)
+_READ_ONLY = re.compile(r"^\s*(select|with)\b", re.I)
+_WRITES = re.compile(r"\b(insert|update|delete|merge|nextval|setval|for\s+(no\s+key\s+)?update|for\s+share)\b", re.I)
+_CALLS = re.compile(r"\b([a-z_][\w.]*)\s*\(", re.I)
+# Words that may precede "(" in a read EXPLAIN ANALYZE may re-run: SQL syntax,
+# type modifiers and side-effect-free functions. Anything else is only planned.
+SAFE_CALLS = frozenset("""
+    select from where and or not in exists any all some values as on using join lateral over filter within
+    partition by cast case when then else is like ilike between union intersect except row array interval
+    numeric decimal varchar char character timestamp timestamptz
+    count sum avg min max coalesce nullif greatest least lower upper length char_length octet_length trim
+    btrim ltrim rtrim substring substr replace split_part position strpos concat concat_ws left right md5
+    abs round floor ceil ceiling extract date_trunc date_part to_char to_timestamp to_date age now
+    array_agg string_agg json_agg jsonb_agg json_build_object jsonb_build_object jsonb_array_length
+    array_length unnest row_number rank dense_rank lag lead bool_or bool_and percentile_cont
+""".split())
+_ASYNCPG_PARAMS = re.compile(r"\$(\d+)")
+
+
+def normalize(statement: str) -> str:
+    """Statement with literals/parameters as `?` and lists collapsed, lower-cased."""
+    sql = _COMMENTS.sub(" ", statement)
+    sql = _STRINGS.sub("?", sql)
+    sql = _PARAMS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _IN_LISTS.sub("in (...)", sql)
+    sql = _ARRAYS.sub("array[...]", sql)
+    sql = _VALUES_ROWS.sub(r"\1, ...", sql)
+    return _WHITESPACE.sub(" ", sql).strip().lower()
+
+
+def fingerprint(statement: str) -> tuple:
+    """(fingerprint id, normalized statement)."""
+    normalized = normalize(statement)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16], normalized
+
+
+def explainable(statement: str) -> bool:
+    """Whether EXPLAIN accepts the statement (plain EXPLAIN only plans it)."""
+    return bool(_EXPLAINABLE.match(statement))
+
+
+def analyzable(statement: str) -> bool:
+    """Whether EXPLAIN ANALYZE may re-run the statement: a plain read calling only SAFE_CALLS."""
+    sql = _STRINGS.sub("?", _COMMENTS.sub(" ", statement))
+    if not _READ_ONLY.match(sql) or _WRITES.search(sql):
+        return False
+    return all(name.lower() in SAFE_CALLS for name in _CALLS.findall(sql))
+
+
+def to_psycopg2(statement: str, parameters):
+    """
+    asyncpg statements use $1..$n with a positional tuple; the EXPLAIN
+    connection is psycopg2 (%s placeholders, literal % doubled).
+    """
+    if not isinstance(parameters, (list, tuple)) or not _ASYNCPG_PARAMS.search(statement):
+        return statement, parameters
+    order = [int(number) - 1 for number in _ASYNCPG_PARAMS.findall(statement)]
+    statement = _ASYNCPG_PARAMS.sub("%s", statement.replace("%", "%%"))
+    return statement, tuple(parameters[index] for index in order)
+
+
+class FingerprintStats:
+    """Counters and a duration sample of one fingerprint."""
+
+    def __init__(self, fingerprint_id: str, normalized: str, statement: str, engine: str):
+        self.id = fingerprint_id
+        self.normalized = normalized
+        self.statement = statement[:STATEMENT_PREVIEW]
+        self.engines = {engine}
+        self.count = 0
+        self.errors = 0
+        self.slow = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.sample = []
+        self.last_seen = 0.0
+        self.last_explain_at = 0.0
+        self.explain: Optional[dict] = None
+
+    def observe(self, seconds: float, rng: random.Random):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_seen = time.time()
+        # Reservoir sampling: every duration has the same chance to be in the sample
+        if len(self.sample) < RESERVOIR_SIZE:
+            self.sample.append(seconds)
+        else:
+            index = rng.randrange(self.count)
+            if index < RESERVOIR_SIZE:
+                self.sample[index] = seconds
+
+    def percentile(self, pct: float) -> float:
+        if not self.sample:
+            return 0.0
+        ordered = sorted(self.sample)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def to_dict(self) -> dict:
+        return {
+            "fingerprint": self.id,
+            "query": self.normalized,
+            "example": self.statement,
+            "engines": sorted(self.engines),
+            "count": self.count,
+            "errors": self.errors,
+            "slow": self.slow,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "mean_ms": round(self.total_seconds / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "max_ms": round(self.max_seconds * 1000, 2),
+            "last_seen": self.last_seen,
+            "explain": self.explain,
+        }
+
+
+class QueryProfiler:
+    """Fingerprinted statement stats, slow-query log and sampled EXPLAIN plans."""
+
+    SORT_KEYS = {
+        "total": lambda s: s.total_seconds,
+        "count": lambda s: s.count,
+        "mean": lambda s: s.total_seconds / s.count if s.count else 0.0,
+        "p95": lambda s: s.percentile(95),
+        "max": lambda s: s.max_seconds,
+        "errors": lambda s: s.errors,
+    }
+
+    def __init__(self, explain_engine=None, slow_ms: float = 500.0, explain_sample_rate: float = 0.0,
+                 explain_interval: float = 300.0, max_fingerprints: int = 1000, slow_log_size: int = 200,
+                 log: Callable = print):
+        """
+        Args:
+            explain_engine: Sync (psycopg2) engine the EXPLAINs run on; None disables them
+            slow_ms: Statements at or above this many ms are logged as slow
+            explain_sample_rate: Share (0..1) of slow statements explained
+            explain_interval: Minimum seconds between two EXPLAINs of one fingerprint
+            max_fingerprints: Distinct fingerprints tracked; later ones count as "other"
+            slow_log_size: Slow statements kept for the report
+            log: Logging function
+        """
+        self.explain_engine = explain_engine
+        self.slow_seconds = slow_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval = explain_interval
+        self.max_fingerprints = max_fingerprints
+        self.log = log
+        self.started_at = time.time()
+        self.slow_log = deque(maxlen=slow_log_size)
+        self.explains = 0
+        self.explains_dropped = 0
+        self._stats: Dict[str, FingerprintStats] = {}
+        self._fingerprints: Dict[str, tuple] = {}  # statement -> (id, normalized), statements repeat
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self._explain_queue: "queue.Queue" = queue.Queue(maxsize=16)
+        self._explainer: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Engine hooks
+    # ------------------------------------------------------------------
+
+    def attach(self, engine, name: str):
+        """Profile the statements of a (sync) Engine; for an AsyncEngine pass its .sync_engine."""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["profiler_started"].pop()
+            self.record(name, statement, parameters, time.perf_counter() - started)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(context):
+            conn = context.connection
+            started = conn.info.get("profiler_started") if conn is not None else None
+            if started:
+                started.pop()
+            if context.statement:
+                with self._lock:
+                    self._entry(name, context.statement).errors += 1
+
+    def _entry(self, engine: str, statement: str) -> FingerprintStats:
+        """Stats of a statement's fingerprint; call with the lock held."""
+        known = self._fingerprints.get(statement)
+        if known is None:
+            known = fingerprint(statement)
+            if len(self._fingerprints) < self.max_fingerprints * 4:
+                self._fingerprints[statement] = known
+        fingerprint_id, normalized = known
+        stats = self._stats.get(fingerprint_id)
+        if stats is None:
+            if len(self._stats) >= self.max_fingerprints:
+                fingerprint_id, normalized = OTHER_FINGERPRINT, OTHER_FINGERPRINT
+                stats = self._stats.get(OTHER_FINGERPRINT)
+            if stats is None:
+                stats = FingerprintStats(fingerprint_id, normalized, statement, engine)
+                self._stats[fingerprint_id] = stats
+        stats.engines.add(engine)
+        return stats
+
+    def record(self, engine: str, statement: str, parameters, seconds: float):
+        explain = False
+        with self._lock:
+            stats = self._entry(engine, statement)
+            stats.observe(seconds, self._rng)
+            slow = seconds >= self.slow_seconds
+            if slow:
+                stats.slow += 1
+                now = time.time()
+                explain = (
+                    self.explain_engine is not None
+                    and stats.id != OTHER_FINGERPRINT
+                    and self._rng.random() < self.explain_sample_rate
+                    and now - stats.last_explain_at >= self.explain_interval
+                    and explainable(statement)
+                )
+                if explain:
+                    stats.last_explain_at = now
+                entry = {
+                    "at": now,
+                    "engine": engine,
+                    "fingerprint": stats.id,
+                    "duration_ms": round(seconds * 1000, 1),
+                    "statement": statement[:STATEMENT_PREVIEW],
+                    "explained": explain,
+                    "analyzed": explain and analyzable(statement),
+                }
+                self.slow_log.append(entry)
+        if not slow:
+            return
+        self.log(f"[SLOW QUERY] {seconds * 1000:.0f} ms ({engine}, {stats.id}): "
+                 f"{_WHITESPACE.sub(' ', statement).strip()[:300]}")
+        if explain:
+            self._queue_explain(stats, statement, parameters, entry)
+
+    # ------------------------------------------------------------------
+    # EXPLAIN
+    # ------------------------------------------------------------------
+
+    def _queue_explain(self, stats: FingerprintStats, statement: str, parameters, entry: dict):
+        if self._explainer is None or not self._explainer.is_alive():
+            self._explainer = threading.Thread(target=self._explain_loop, name="query-explain", daemon=True)
+            self._explainer.start()
+        try:
+            self._explain_queue.put_nowait((stats, statement, parameters, entry))
+        except queue.Full:
+            self.explains_dropped += 1
+            entry["explained"] = entry["analyzed"] = False
+
+    def _explain_loop(self):
+        while True:
+            stats, statement, parameters, entry = self._explain_queue.get()
+            try:
+                plan, seconds = self.explain(statement, parameters, analyze=entry["analyzed"])
+                result = {"at": time.time(), "duration_ms": round(seconds * 1000, 1),
+                          "analyzed": entry["analyzed"], "plan": plan}
+                self.explains += 1
+                self.log(f"[SLOW QUERY] EXPLAIN {stats.id}:\n" + "\n".join(plan))
+            except Exception as e:
+                result = {"at": time.time(), "error": str(e)[:500]}
+                self.log(f"[SLOW QUERY] EXPLAIN {stats.id} failed: {e}")
+            with self._lock:
+                stats.explain = result
+                entry["plan"] = result.get("plan")
+
+    def explain(self, statement: str, parameters, analyze: bool = False) -> tuple:
+        """Plan lines of EXPLAIN, or EXPLAIN (ANALYZE, BUFFERS), run in a rolled-back transaction."""
+        statement, parameters = to_psycopg2(statement, parameters)
+        started = time.perf_counter()
+        connection = self.explain_engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+                cursor.execute(prefix + statement, parameters or None)
+                plan = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+                connection.rollback()
+        finally:
+            connection.close()
+        return plan, time.perf_counter() - started
+
+    # ------------------------------------------------------------------
+    # Report
+    # ------------------------------------------------------------------
+
+    def report(self, sort: str = "total", limit: int = 50) -> dict:
+        """Top fingerprints by `sort` (total, count, mean, p95, max, errors) and the slow-query log."""
+        key = self.SORT_KEYS.get(sort)
+        if key is None:
+            raise ValueError(f"sort must be one of {', '.join(self.SORT_KEYS)}")
+        with self._lock:
+            ranked = sorted(self._stats.values(), key=key, reverse=True)
+            queries = [stats.to_dict() for stats in ranked[:limit]]
+            slow = [dict(entry) for entry in reversed(self.slow_log)]
+            total_count = sum(stats.count for stats in self._stats.values())
+            total_seconds = sum(stats.total_seconds for stats in self._stats.values())
+        return {
+            "pid": os.getpid(),
+            "since": self.started_at,
+            "settings": {
+                "slow_ms": self.slow_seconds * 1000,
+                "explain_sample_rate": self.explain_sample_rate,
+                "explain_interval_seconds": self.explain_interval,
+                "max_fingerprints": self.max_fingerprints,
+            },
+            "fingerprints": len(self._stats),
+            "statements": total_count,
+            "total_ms": round(total_seconds * 1000, 1),
+            "explains": self.explains,
+            "explains_dropped": self.explains_dropped,
+            "queries": queries,
+            "slow_queries": slow,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._fingerprints.clear()
+            self.slow_log.clear()
+            self.started_at = time.time()
@@ -1,38 +1,10 @@
 """
 SerpAPI Service Utility
-Handles SerpAPI integration for keyword generation and quota checking
+Handles SerpAPI integration for keyword generation and quota checking.
+The configured key comes from the settings cache (generator_settings.get().serpapi_key).
 """
 import requests
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import Optional, Dict, List
-
-
-def get_serpapi_key(db: Session) -> Optional[str]:
-    """
-    Retrieve SerpAPI key from database
-    
-    Args:
-        db: Database session
-        
-    Returns:
-        API key string or None if not configured
-    """
-    try:
-        query = text("""
-            SELECT setting_value 
-            FROM generator_settings 
-            WHERE setting_key = 'serpapi_key'
-        """)
-        result = db.execute(query).fetchone()
-        
-        if result:
-            key = dict(result._mapping)["setting_value"]
-            return key if key else None
-        return None
-    except Exception as e:
-        print(f"Error fetching SerpAPI key: {e}")
-        return None
+from typing import Dict, List
 
 
 def get_serpapi_quota(api_key: str) -> Dict:
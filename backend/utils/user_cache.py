@@ -0,0 +1,218 @@
+"""
+Cache for authenticated user lookups done by get_current_user.
+
+The default backend is an in-process TTL + LRU cache. With several uvicorn
+workers each worker has its own copy, so an admin change is only seen by the
+worker that made it until the TTL expires; set USER_CACHE_BACKEND=redis to
+share one cache (and its invalidations) across workers.
+"""
+import asyncio
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory").lower()
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))  # seconds, 0 disables caching
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+USER_CACHE_REDIS_URL = os.getenv("USER_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+# Fields of the cached user dict that hold datetimes (restored after JSON round trips)
+DATETIME_FIELDS = ("created_at", "last_login")
+
+
+class UserCacheBackend(ABC):
+    """Interface for user cache storage backends."""
+
+    name = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: dict, ttl: float):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class InMemoryUserCache(UserCacheBackend):
+    """Per-process TTL cache with LRU eviction."""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = USER_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.evictions = 0
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    async def get(self, key: str) -> Optional[dict]:
+        async with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return dict(value)
+
+    async def set(self, key: str, value: dict, ttl: float):
+        async with self._lock:
+            self._items[key] = (time.monotonic() + ttl, dict(value))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    async def delete(self, key: str):
+        async with self._lock:
+            self._items.pop(key, None)
+
+    async def clear(self):
+        async with self._lock:
+            self._items.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._items)
+
+
+class RedisUserCache(UserCacheBackend):
+    """Shared cache in Redis (requires the optional `redis` package)."""
+
+    name = "redis"
+
+    def __init__(self, url: str = USER_CACHE_REDIS_URL, prefix: str = "prd:user:"):
+        import redis.asyncio as redis_asyncio
+
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._client.get(self.prefix + key)
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        for field in DATETIME_FIELDS:
+            if value.get(field):
+                value[field] = datetime.fromisoformat(value[field])
+        return value
+
+    async def set(self, key: str, value: dict, ttl: float):
+        payload = json.dumps(
+            value,
+            default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v)
+        )
+        await self._client.set(self.prefix + key, payload, px=int(ttl * 1000))
+
+    async def delete(self, key: str):
+        await self._client.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self._client.scan_iter(match=self.prefix + "*"):
+            await self._client.delete(key)
+
+
+class UserCache:
+    """User lookup cache with hit/miss counters on top of a pluggable backend."""
+
+    def __init__(self, backend: UserCacheBackend, ttl: float = USER_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    async def get(self, username: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        try:
+            user = await self.backend.get(username)
+        except Exception as e:
+            # A broken shared backend must never lock users out; fall back to the DB
+            self.errors += 1
+            print(f"[USER CACHE] get failed: {e}")
+            user = None
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    async def set(self, username: str, user: dict):
+        if not self.enabled:
+            return
+        try:
+            await self.backend.set(username, user, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"[USER CACHE] set failed: {e}")
+
+    async def invalidate(self, username: Optional[str]):
+        """Drop a user from the cache (call after the user row changes or is deleted)."""
+        if not username:
+            return
+        self.invalidations += 1
+        try:
+            await self.backend.delete(username)
+        except Exception as e:
+            self.errors += 1
+            print(f"[USER CACHE] invalidate failed: {e}")
+
+    async def clear(self):
+        await self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "size": self.backend.size(),
+            "max_size": getattr(self.backend, "max_size", None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": getattr(self.backend, "evictions", None),
+            "errors": self.errors,
+            "pid": os.getpid(),
+        }
+
+
+def create_backend(name: str = USER_CACHE_BACKEND) -> UserCacheBackend:
+    """Create the configured backend, falling back to memory if Redis is unavailable."""
+    if name == "redis":
+        try:
+            return RedisUserCache()
+        except ImportError:
+            print("[USER CACHE] redis package not installed, using in-memory cache")
+    return InMemoryUserCache()
+
+
+user_cache = UserCache(create_backend())
+
+
+def set_user_cache_backend(backend: UserCacheBackend):
+    """Swap the storage backend (e.g. a custom shared cache) at startup."""
+    user_cache.backend = backend
@@ -0,0 +1,25 @@
+-- Indexes backing the paginated / filtered GET /api/data listing.
+-- Keyset pagination walks results by id_results DESC, optionally narrowed by
+-- status, creator, flags or date. Safe to run multiple times.
+--
+-- Usage: psql "$DB_URL" -f database/migrations/001_results_listing_indexes.sql
+
+-- Same expression as the listing's status filter, so the planner can use it
+DROP INDEX IF EXISTS public.idx_results_status_id;
+CREATE INDEX IF NOT EXISTS idx_results_status_norm_id
+    ON public.results ((LOWER(COALESCE(status, 'unverified'))), id_results DESC);
+
+CREATE INDEX IF NOT EXISTS idx_results_created_by_id
+    ON public.results (created_by, id_results DESC);
+
+CREATE INDEX IF NOT EXISTS idx_results_created_at
+    ON public.results (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_results_final_confidence
+    ON public.results (final_confidence);
+
+CREATE INDEX IF NOT EXISTS idx_results_flagged_id
+    ON public.results (id_results DESC) WHERE flagged;
+
+CREATE INDEX IF NOT EXISTS idx_results_manual_id
+    ON public.results (id_results DESC) WHERE is_manual;
@@ -0,0 +1,25 @@
+-- Binary image store for result screenshots / detection visualizations.
+-- Images are content-addressed by their SHA-256 so identical captures
+-- (common across mirror domains) are stored once. results.image_sha256
+-- points at the stored image; results.image_final_path keeps only file paths.
+--
+-- Existing base64 values in results.image_final_path are moved here by
+-- backend/migrate_result_images.py.
+
+CREATE TABLE IF NOT EXISTS public.result_images (
+    sha256 character(64) PRIMARY KEY,
+    mime_type character varying(50) NOT NULL DEFAULT 'image/png',
+    byte_size integer NOT NULL,
+    data bytea NOT NULL,
+    created_at timestamp with time zone DEFAULT now()
+);
+
+-- Images are already compressed; EXTERNAL skips TOAST compression and lets
+-- substring() read only the chunks a Range request asks for.
+ALTER TABLE public.result_images ALTER COLUMN data SET STORAGE EXTERNAL;
+
+ALTER TABLE public.results
+    ADD COLUMN IF NOT EXISTS image_sha256 character(64);
+
+CREATE INDEX IF NOT EXISTS idx_results_image_sha256
+    ON public.results (image_sha256);
@@ -0,0 +1,22 @@
+-- Unique keys used by the crawler's bulk save (INSERT ... ON CONFLICT).
+-- The crawler keeps one row per domain in each of these tables; the old
+-- per-row SELECT-then-INSERT enforced that in code, these indexes enforce it
+-- in the database so the save can be set-based.
+--
+-- CREATE UNIQUE INDEX fails if duplicates already exist. Find them first with:
+--   SELECT domain, count(*) FROM generated_domains GROUP BY domain HAVING count(*) > 1;
+--   SELECT id_domain, count(*) FROM object_detection GROUP BY id_domain HAVING count(*) > 1;
+--   SELECT id_domain, count(*) FROM reasoning GROUP BY id_domain HAVING count(*) > 1;
+--   SELECT id_domain, count(*) FROM results GROUP BY id_domain HAVING count(*) > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_generated_domains_domain
+    ON public.generated_domains (domain);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_object_detection_id_domain
+    ON public.object_detection (id_domain);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_reasoning_id_domain
+    ON public.reasoning (id_domain);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_results_id_domain
+    ON public.results (id_domain);
@@ -0,0 +1,34 @@
+-- Registry of every domain ever seen by the crawler or added manually.
+-- Replaces integrasi-service/domain-generator/output/all_domains.txt.
+--
+-- normalized_domain is lowercase, without scheme, port, trailing dot or a
+-- leading "www." (see backend/utils/domain_registry.normalize_domain). Rows are
+-- kept when the generated_domains row is deleted, just like the old text file
+-- kept every domain it had seen.
+--
+-- Import the legacy file afterwards with:
+--   cd backend && python3 import_domain_registry.py
+
+CREATE TABLE IF NOT EXISTS public.domain_registry (
+    normalized_domain character varying(255) PRIMARY KEY,
+    source character varying(32) NOT NULL DEFAULT 'crawler',
+    first_seen_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+-- Backfill from domains already in the database
+INSERT INTO public.domain_registry (normalized_domain, source, first_seen_at)
+SELECT DISTINCT ON (normalized_domain) normalized_domain, 'generated_domains', date_generated
+FROM (
+    SELECT
+        regexp_replace(
+            regexp_replace(
+                regexp_replace(lower(trim(domain)), ':[0-9]+$', ''),
+                '\.$', ''),
+            '^www\.', '') AS normalized_domain,
+        COALESCE(date_generated, now()) AS date_generated
+    FROM public.generated_domains
+    WHERE domain IS NOT NULL AND trim(domain) <> ''
+) d
+WHERE normalized_domain <> ''
+ORDER BY normalized_domain, date_generated
+ON CONFLICT (normalized_domain) DO NOTHING;
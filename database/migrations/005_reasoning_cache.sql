@@ -0,0 +1,20 @@
+-- Persistent tier of the crawler's reasoning LLM result cache
+-- (integrasi-service/domain-generator/reasoning_cache.py).
+--
+-- cache_key is the SHA-256 of the normalized prompt content (title,
+-- description, keywords, P1-P5) plus model name and prompt version, so a
+-- new model or prompt never reads old answers. Expired rows are ignored on
+-- read and deleted when a crawler starts.
+
+CREATE TABLE IF NOT EXISTS public.reasoning_cache (
+    cache_key character(64) PRIMARY KEY,
+    model character varying(255) NOT NULL,
+    prompt_version character varying(64) NOT NULL,
+    result jsonb NOT NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    hits integer NOT NULL DEFAULT 0,
+    last_hit_at timestamp with time zone
+);
+
+CREATE INDEX IF NOT EXISTS idx_reasoning_cache_created_at
+    ON public.reasoning_cache (created_at);
@@ -0,0 +1,25 @@
+-- Perceptual hashes of screenshots sent to object detection, with the
+-- detector's answer (integrasi-service/domain-generator/screenshot_dedup.py).
+--
+-- The crawler loads recent hashes of the current detector at startup and
+-- reuses the stored result for near-identical screenshots (mirror domains)
+-- instead of calling the detection API again. The visualization image is not
+-- duplicated here; it is referenced in result_images by sha256.
+
+CREATE TABLE IF NOT EXISTS public.screenshot_hashes (
+    id bigserial PRIMARY KEY,
+    phash character varying(128) NOT NULL,
+    detector character varying(255) NOT NULL,
+    domain character varying(255),
+    detection_result jsonb NOT NULL,
+    visualization_sha256 character(64),
+    created_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+-- Startup load: newest hashes of one detector
+CREATE INDEX IF NOT EXISTS idx_screenshot_hashes_detector_created
+    ON public.screenshot_hashes (detector, created_at DESC);
+
+-- Exact-duplicate lookups and reporting
+CREATE INDEX IF NOT EXISTS idx_screenshot_hashes_phash
+    ON public.screenshot_hashes (phash);
@@ -0,0 +1,55 @@
+-- Durable crawler job queue (backend/utils/crawler_jobs.py, backend/crawler_worker.py).
+--
+-- POST /api/crawler/start and /api/crawler/manual insert a queued row; worker
+-- processes claim queued rows with SELECT ... FOR UPDATE SKIP LOCKED (at most
+-- CRAWLER_MAX_KEYWORD_JOBS / CRAWLER_MAX_MANUAL_JOBS running per job type),
+-- run the crawl on the integration service and append its output to
+-- crawler_job_logs. Jobs survive backend restarts and are visible to every
+-- uvicorn worker; a running job whose heartbeat stops (worker killed) is
+-- requeued or failed by the worker supervisor.
+
+CREATE TABLE IF NOT EXISTS public.crawler_jobs (
+    id uuid PRIMARY KEY,
+    job_type character varying(16) NOT NULL,           -- keyword | manual
+    status character varying(16) NOT NULL DEFAULT 'queued',
+    params jsonb NOT NULL,                             -- request body
+    created_by character varying(255),
+    items_total integer NOT NULL DEFAULT 0,            -- domains requested
+    items_done integer NOT NULL DEFAULT 0,
+    items_success integer NOT NULL DEFAULT 0,
+    items_failed integer NOT NULL DEFAULT 0,
+    log_lines integer NOT NULL DEFAULT 0,
+    summary jsonb,
+    error text,
+    cancel_requested boolean NOT NULL DEFAULT false,
+    attempts integer NOT NULL DEFAULT 0,
+    worker_id character varying(255),
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    started_at timestamp with time zone,
+    heartbeat_at timestamp with time zone,
+    finished_at timestamp with time zone,
+    CONSTRAINT crawler_jobs_job_type_check CHECK (job_type IN ('keyword', 'manual')),
+    CONSTRAINT crawler_jobs_status_check
+        CHECK (status IN ('queued', 'running', 'completed', 'failed', 'cancelled'))
+);
+
+-- Dispatcher: oldest queued job of the types below their concurrency limit
+CREATE INDEX IF NOT EXISTS idx_crawler_jobs_queued
+    ON public.crawler_jobs (job_type, created_at) WHERE status = 'queued';
+
+-- Running counts per type and the stale-heartbeat sweep
+CREATE INDEX IF NOT EXISTS idx_crawler_jobs_running
+    ON public.crawler_jobs (heartbeat_at) WHERE status = 'running';
+
+-- Job history of a user
+CREATE INDEX IF NOT EXISTS idx_crawler_jobs_created_by
+    ON public.crawler_jobs (created_by, created_at DESC);
+
+-- Output of each job, in order; seq is the SSE event id
+CREATE TABLE IF NOT EXISTS public.crawler_job_logs (
+    job_id uuid NOT NULL REFERENCES public.crawler_jobs (id) ON DELETE CASCADE,
+    seq integer NOT NULL,
+    line text NOT NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    PRIMARY KEY (job_id, seq)
+);
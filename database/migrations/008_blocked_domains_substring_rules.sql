@@ -0,0 +1,20 @@
+-- Blocked-domain entries used to match any domain containing them as text.
+-- The compiled matcher (backend/utils/domain_matcher.py) treats a plain entry
+-- as a domain (it blocks the domain and its subdomains) and needs a "~" prefix
+-- for substring matching. Single-label entries such as "judi" or "slot" were
+-- only ever meaningful as substrings, so keep their old behaviour by
+-- rewriting them to "~judi". Dotted entries (example.com) keep the domain
+-- semantics; the crawler logs a warning when one of them would still have
+-- blocked a domain under the old rule. Safe to run multiple times.
+--
+-- Usage: psql "$DB_URL" -f database/migrations/008_blocked_domains_substring_rules.sql
+
+UPDATE public.generator_settings
+SET setting_value = regexp_replace(setting_value, '^[ \t]*([A-Za-z0-9_-]+)[ \t]*(\r?)$', '~\1\2', 'gn'),
+    updated_by = 'migration-008',
+    updated_at = now()
+WHERE setting_key = 'blocked_domains'
+  AND setting_value ~ '(^|\n)[ \t]*[A-Za-z0-9_-]+[ \t]*\r?(\n|$)';
+
+-- Running backends and crawlers reload their cached settings
+SELECT pg_notify('generator_settings_changed', 'blocked_domains');
@@ -16,6 +16,8 @@ export default function GeneratorSettingsSection() {
     const [loadingKeywords, setLoadingKeywords] = useState(true)
     const [loadingSerpApi, setLoadingSerpApi] = useState(true)
     const [loadingBatchSize, setLoadingBatchSize] = useState(true)
+    const [testDomain, setTestDomain] = useState("")
+    const [testResult, setTestResult] = useState<{ domain: string, blocked: boolean, rule: string | null } | null>(null)
 
     useEffect(() => {
         loadSettings()
@@ -48,8 +50,11 @@ export default function GeneratorSettingsSection() {
     const handleSaveDomains = async () => {
         setLoading(true)
         try {
-            await apiPost("/api/admin/generator/blocked-domains", { value: blockedDomains })
-            alert("Blocked domains saved successfully")
+            const saved = await apiPost("/api/admin/generator/blocked-domains", { value: blockedDomains })
+            const singleLabel: string[] = saved?.rules?.single_label || []
+            alert(singleLabel.length
+                ? `Blocked domains saved. These rules have no dot and only block that exact host: ${singleLabel.join(", ")}. Prefix them with ~ to block every domain containing the text.`
+                : "Blocked domains saved successfully")
         } catch (err: any) {
             alert(`Failed to save blocked domains: ${err.message}`)
         } finally {
@@ -57,6 +62,19 @@ export default function GeneratorSettingsSection() {
         }
     }
 
+    const handleTestDomain = async () => {
+        if (!testDomain.trim()) return
+        try {
+            const response = await apiPost("/api/admin/generator/blocked-domains/test", {
+                domains: [testDomain.trim()],
+                value: blockedDomains,
+            })
+            setTestResult(response.results[0] || null)
+        } catch (err: any) {
+            alert(`Failed to test domain: ${err.message}`)
+        }
+    }
+
     const handleSaveKeywords = async () => {
         setLoading(true)
         try {
@@ -121,6 +139,33 @@ export default function GeneratorSettingsSection() {
                             >
                                 {loading ? "Saving..." : "Save Blocked Domains"}
                             </Button>
+                            <p className="text-xs text-muted-foreground mt-2">
+                                <code>example.com</code> blocks the domain and its subdomains,{" "}
+                                <code>*.example.com</code> only subdomains,{" "}
+                                <code>~judi</code> any domain containing the text. Lines starting with <code>#</code> are ignored.
+                                {" "}Plain entries no longer match as text: <code>judi</code> used to block every domain
+                                containing it and now only blocks the host <code>judi</code>, so write <code>~judi</code> for that.
+                            </p>
+                            <div className="flex gap-2 mt-2">
+                                <input
+                                    type="text"
+                                    className="flex-1 p-2 border rounded-md font-mono text-sm"
+                                    value={testDomain}
+                                    onChange={(e) => { setTestDomain(e.target.value); setTestResult(null) }}
+                                    onKeyDown={(e) => { if (e.key === "Enter") handleTestDomain() }}
+                                    placeholder="Test a domain, e.g. sub.example.com"
+                                />
+                                <Button onClick={handleTestDomain} disabled={!testDomain.trim()}>
+                                    Test
+                                </Button>
+                            </div>
+                            {testResult && (
+                                <div className={`text-sm mt-1 ${testResult.blocked ? "text-red-600" : "text-green-600"}`}>
+                                    {testResult.blocked
+                                        ? `Blocked by rule: ${testResult.rule}`
+                                        : "Not blocked"}
+                                </div>
+                            )}
                         </>
                     )}
                 </div>
@@ -25,6 +25,24 @@ interface GeneratorSummary {
     reasoning_api?: { success: number; failed: number; total: number }
 }
 
+// Progress events of a crawler run (backend/utils/progress_events.py), sent as typed SSE events
+interface CrawlProgress {
+    done: number
+    success: number
+    failed: number
+    total: number
+    rate_per_sec: number
+    eta_seconds: number | null
+}
+
+const STAGE_LABELS: Record<string, string> = {
+    search: "Search",
+    filter: "Filter",
+    screenshot: "Screenshot",
+    analysis: "Analysis",
+    persist: "Save",
+}
+
 export default function CrawlingModal({
     open,
     onClose,
@@ -71,6 +89,9 @@ export default function CrawlingModal({
     const [isCompleted, setIsCompleted] = useState(false)
     const [countdown, setCountdown] = useState(3)
     const [isCancelling, setIsCancelling] = useState(false)
+    const [progress, setProgress] = useState<CrawlProgress | null>(null)
+    const [stageItems, setStageItems] = useState<Record<string, number>>({})
+    const [activeStages, setActiveStages] = useState<string[]>([])
 
     // Result tab state
     const [summary, setSummary] = useState<GeneratorSummary | null>(null)
@@ -370,6 +391,9 @@ export default function CrawlingModal({
             setLogs([])
             setTimeElapsed(0)
             setSummary(null)
+            setProgress(null)
+            setStageItems({})
+            setActiveStages([])
             setIsCompleted(false)
             setCountdown(3)
             setActiveTab("generating")
@@ -433,13 +457,12 @@ export default function CrawlingModal({
             const data = await res.json()
             setJobId(data.job_id)
 
-            // Start streaming logs from file (bypasses subprocess buffering)
+            // Stream this job's output (stored by the crawler worker, see crawler_jobs)
             const controller = new AbortController()
             abortControllerRef.current = controller
 
             try {
-                // Use file-based log streaming for real-time updates
-                const response = await fetch(`${API_BASE}/api/crawler/logs/file`, {
+                const response = await fetch(`${API_BASE}/api/crawler/logs/${data.job_id}`, {
                     signal: controller.signal
                 })
 
@@ -470,39 +493,58 @@ export default function CrawlingModal({
                     buffer = parts.pop() || ""
 
                     for (const part of parts) {
-                        const lines = part.split("\n")
-                        for (const line of lines) {
-                            if (line.startsWith("data: ")) {
-                                const message = line.slice(6)
-
-                                if (message === "[DONE]") {
-                                    handleStreamComplete()
-                                    return
-                                }
-
-                                // Parse summary if present
-                                if (message.startsWith("[SUMMARY]")) {
-                                    const summaryJson = message.replace("[SUMMARY]", "").trim()
-                                    try {
-                                        const parsedSummary = JSON.parse(summaryJson)
-                                        setSummary(parsedSummary)
-                                        setIsCompleted(true)
-                                        setLogs((prev: string[]) => [...prev, "", `[INFO] Crawling completed! This will automatically continue in ${countdown} seconds...`])
-
-                                        // Send keyword to RunPod API if we have generated domains and used keywords
-                                        if (parsedSummary.domains_generated && parsedSummary.domains_generated.success > 0 && usedKeywords.length > 0) {
-                                            // Send the first keyword to RunPod with domain count
-                                            sendKeywordsToRunPod(usedKeywords[0], domainCount)
-                                        }
-                                    } catch (e) {
-                                        console.error("Failed to parse summary:", e)
-                                    }
-                                }
-
-                                // Add log line (skip keepalive comments)
-                                if (!message.startsWith(":")) {
-                                    setLogs((prev: string[]) => [...prev, message])
-                                }
+                        let eventType = "message"
+                        let message: string | null = null
+                        for (const line of part.split("\n")) {
+                            if (line.startsWith("event: ")) {
+                                eventType = line.slice(7)
+                            } else if (line.startsWith("data: ")) {
+                                message = line.slice(6)
+                            }
+                        }
+                        // Keepalive comments carry no data
+                        if (message === null) {
+                            continue
+                        }
+
+                        if (eventType === "message") {
+                            if (message === "[DONE]") {
+                                handleStreamComplete()
+                                return
+                            }
+                            setLogs((prev: string[]) => [...prev, message as string])
+                            continue
+                        }
+
+                        let event: any
+                        try {
+                            event = JSON.parse(message)
+                        } catch (e) {
+                            console.error(`Failed to parse ${eventType} event:`, e)
+                            continue
+                        }
+
+                        if (eventType === "stage_started") {
+                            setActiveStages((prev) => [...prev, event.stage])
+                        } else if (eventType === "stage_metrics") {
+                            // Also sent periodically while the stage runs
+                            if (event.finished) {
+                                setActiveStages((prev) => prev.filter((stage) => stage !== event.stage))
+                            }
+                        } else if (eventType === "item_progress") {
+                            setStageItems((prev) => ({ ...prev, [event.stage]: (prev[event.stage] || 0) + 1 }))
+                        } else if (eventType === "item_result") {
+                            setProgress(event)
+                        } else if (eventType === "summary") {
+                            const parsedSummary = event.summary
+                            setSummary(parsedSummary)
+                            setIsCompleted(true)
+                            setLogs((prev: string[]) => [...prev, "", `[INFO] Crawling completed! This will automatically continue in ${countdown} seconds...`])
+
+                            // Send keyword to RunPod API if we have generated domains and used keywords
+                            if (parsedSummary.domains_generated && parsedSummary.domains_generated.success > 0 && usedKeywords.length > 0) {
+                                // Send the first keyword to RunPod with domain count
+                                sendKeywordsToRunPod(usedKeywords[0], domainCount)
                             }
                         }
                     }
@@ -595,6 +637,9 @@ export default function CrawlingModal({
             setLogs([])
             setTimeElapsed(0)
             setSummary(null)
+            setProgress(null)
+            setStageItems({})
+            setActiveStages([])
             setJobId(null)
             setIsMinimized(false)
             setIsCompleted(false)
@@ -888,6 +933,40 @@ export default function CrawlingModal({
                                 </div>
                             </div>
 
+                            {/* Progress (item_result / item_progress events) */}
+                            {(progress || Object.keys(stageItems).length > 0) && (
+                                <div className="space-y-2">
+                                    {progress && (
+                                        <>
+                                            <div className="flex justify-between text-sm">
+                                                <span>
+                                                    {progress.done}/{progress.total} domains ({progress.success} success, {progress.failed} failed)
+                                                </span>
+                                                <span className="text-muted-foreground">
+                                                    {progress.rate_per_sec.toFixed(2)} domains/s
+                                                    {progress.eta_seconds !== null && progress.done < progress.total && ` · ETA ${formatTime(Math.round(progress.eta_seconds))}`}
+                                                </span>
+                                            </div>
+                                            <div className="h-2 w-full bg-muted rounded-full overflow-hidden">
+                                                <div
+                                                    className="h-full bg-primary transition-all"
+                                                    style={{ width: `${progress.total ? Math.min(100, (progress.done / progress.total) * 100) : 0}%` }}
+                                                />
+                                            </div>
+                                        </>
+                                    )}
+                                    <div className="flex flex-wrap gap-3 text-xs text-muted-foreground">
+                                        {Object.entries(STAGE_LABELS).map(([stage, label]) => (
+                                            stage in stageItems || activeStages.includes(stage) ? (
+                                                <span key={stage} className={activeStages.includes(stage) ? "text-foreground" : ""}>
+                                                    {label}: {stageItems[stage] || 0}
+                                                </span>
+                                            ) : null
+                                        ))}
+                                    </div>
+                                </div>
+                            )}
+
                             {/* Time Elapsed */}
                             <div className="text-sm text-muted-foreground">
                                 Time elapsed: {formatTime(timeElapsed)}
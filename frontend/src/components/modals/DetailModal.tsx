@@ -41,6 +41,12 @@ function getImageSrc(imageData: string | null | undefined): string | null {
     return imageData
   }
 
+  // Already an API image URL (e.g. /api/images/result/<id>), use as is
+  if (imageData.startsWith('/api/images/')) {
+    console.log('[getImageSrc] Already an API image URL')
+    return imageData
+  }
+
   // Check if it's a file path (contains /)
   if (imageData.includes('/')) {
     console.log('[getImageSrc] Detected as file path')
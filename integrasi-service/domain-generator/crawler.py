@@ -4,7 +4,6 @@
 # Force unbuffered output for real-time streaming
 import sys
 import os
-import re
 
 # Reconfigure stdout and stderr to be unbuffered
 if sys.stdout is not None:
@@ -17,20 +16,41 @@ os.environ['PYTHONUNBUFFERED'] = '1'
 
 from ddgs import DDGS
 import httpx
-from bs4 import BeautifulSoup
 import json
 import argparse
 from datetime import datetime
 from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import asyncio
 import time
-from multiprocessing import Pool, cpu_count
-from sqlalchemy import create_engine, text
+from multiprocessing import cpu_count
+from sqlalchemy import create_engine
+import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
-import requests
-from playwright.sync_api import sync_playwright
 import base64
-import threading
+import hashlib
+import atexit
+
+from screenshot_engine import ScreenshotEngine
+from reasoning_cache import ReasoningCache, prompt_version_of
+from reasoning_dispatcher import ReasoningDispatcher, completion_tokens
+from reasoning_output import ReasoningJSONExtractor, ReasoningOutput, stream_completion
+from screenshot_dedup import ScreenshotDedup, strip_visualization
+from page_readiness import AdaptiveReadiness, SettleTimeStore
+from http_clients import HttpClients
+from page_scraper import PageScraper, scraped_fields
+from image_pipeline import ImagePipeline, data_uri
+from log_writer import LogWriter
+from crawler_metrics import LATENCY_BUCKETS_MS, CrawlMetrics
+
+# Shared modules from the backend (domain registry, ...)
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from utils.domain_registry import DomainRegistry, normalize_domain
+from utils.generator_settings import GeneratorSettingsService
+from utils.progress_events import ProgressTracker, format_event
 
 
 # Load environment variables
@@ -40,7 +60,6 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
 OUTPUT_IMG_DIR = os.path.join(OUTPUT_DIR, "img")
 LAST_ID_FILE = os.path.join(OUTPUT_DIR, "last_id.txt")
-ALL_DOMAINS_FILE = os.path.join(OUTPUT_DIR, "all_domains.txt")
 LAST_KEYWORDS_FILE = os.path.join(OUTPUT_DIR, "last_keywords.txt")
 
 # Database configuration
@@ -59,14 +78,56 @@ SCREENSHOT_TIMEOUT = 20
 DETECTION_API_TIMEOUT = 30
 
 # Processing configuration
-MAX_WORKERS_FETCH = 5
 MAX_WORKERS_SCREENSHOT = max(2, cpu_count() - 1)  # Use multiple CPU cores for screenshots
 MAX_WORKERS_DETECTION = 3  # Limit concurrent API calls to detection service
 
+# Upstream HTTP clients (see http_clients.py); pools are sized to MAX_WORKERS_DETECTION
+HTTP_ENABLE_HTTP2 = os.getenv("CRAWLER_HTTP2", "true").lower() == "true"
+HTTP_RETRIES = int(os.getenv("CRAWLER_HTTP_RETRIES", "2"))  # retries after a connection reset
+
+# Screenshot browser pool (see screenshot_engine.py)
+SCREENSHOT_BROWSERS = int(os.getenv("SCREENSHOT_BROWSERS", str(min(MAX_WORKERS_SCREENSHOT, 4))))
+SCREENSHOT_PAGES_PER_BROWSER = int(os.getenv("SCREENSHOT_PAGES_PER_BROWSER", "3"))
+SCREENSHOT_RECYCLE_AFTER = int(os.getenv("SCREENSHOT_RECYCLE_AFTER", "50"))  # pages before a browser is relaunched
+SCREENSHOT_PAGE_DEADLINE = float(os.getenv("SCREENSHOT_PAGE_DEADLINE", "45"))  # seconds per page, all stages
+SCREENSHOT_SETTLE_SECONDS = float(os.getenv("SCREENSHOT_SETTLE_SECONDS", "3"))  # only for READINESS_MODE=fixed
+
+# Stored screenshots (see image_pipeline.py): webp | jpeg | png, plus a thumbnail for the dashboard
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "webp").lower()
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "80"))
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "320"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "60"))
+
+# Page readiness before capture (see page_readiness.py): adaptive | fixed
+READINESS_MODE = os.getenv("READINESS_MODE", "adaptive").lower()
+READINESS_NETWORK_IDLE_CAP = float(os.getenv("READINESS_NETWORK_IDLE_CAP", "1.5"))  # seconds
+READINESS_QUIET_MS = float(os.getenv("READINESS_QUIET_MS", "500"))
+READINESS_SOFT_CAP = float(os.getenv("READINESS_SOFT_CAP", "2.5"))  # seconds
+READINESS_MAX_WAIT = float(os.getenv("READINESS_MAX_WAIT", "8"))  # seconds
+SETTLE_TIMES_FILE = os.path.join(OUTPUT_DIR, "settle_times.json")
+
+# Streaming pipeline (see CrawlPipeline)
+PIPELINE_QUEUE_SIZE = int(os.getenv("CRAWLER_QUEUE_SIZE", "20"))  # items buffered between two stages
+PERSIST_FLUSH_SECONDS = float(os.getenv("CRAWLER_PERSIST_FLUSH_SECONDS", "5"))  # max wait before a partial DB batch is written
+METRICS_INTERVAL = float(os.getenv("CRAWLER_METRICS_INTERVAL", "10"))  # seconds between live stage_metrics events
+
 # Detection API configuration
 # Detection API configuration
 SCRAPER_API_URL = os.getenv("SCRAPER_API_URL", "http://localhost:7000/api/scrape")
+# Local scrape for reasoning stops after the head + 5 paragraphs, or after this many body bytes
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(512 * 1024)))
+# Reasoning reads title/meta/paragraphs from the DOM rendered for the screenshot;
+# the direct fetch above is only the fallback when the DOM gave nothing
+REASONING_CONTENT_FROM_DOM = os.getenv("REASONING_CONTENT_FROM_DOM", "true").lower() == "true"
 DETECTION_API_URL = os.getenv("OBJ_DETECTION_URL", "http://localhost:9090/predict")
+# Stored detection results are only reused for the same detector; bump when the model changes
+DETECTION_MODEL_VERSION = os.getenv("DETECTION_MODEL_VERSION") or DETECTION_API_URL
+
+# Perceptual-hash dedup before detection (see screenshot_dedup.py)
+SCREENSHOT_DEDUP_ENABLED = os.getenv("SCREENSHOT_DEDUP_ENABLED", "true").lower() == "true"
+SCREENSHOT_DEDUP_THRESHOLD = int(os.getenv("SCREENSHOT_DEDUP_THRESHOLD", "6"))  # max differing bits
+SCREENSHOT_DEDUP_HASH_SIZE = int(os.getenv("SCREENSHOT_DEDUP_HASH_SIZE", "16"))  # 16 -> 256-bit dHash
+SCREENSHOT_DEDUP_TTL_DAYS = float(os.getenv("SCREENSHOT_DEDUP_TTL_DAYS", "30"))
 MAX_RESULT = 10  # Maximum number of valid domains to process per run
 VERSION = "1.4"
 
@@ -76,6 +137,19 @@ VLLM_BASE_URL = os.getenv("REASONING_SERVICE_URL", "http://localhost:8001/v1")
 VLLM_MODEL_NAME = os.getenv("VLLM_MODEL_NAME", "aitfindonesia/KomdigiUB-8B-Instruct-PRD3")
 REASONING_MAX_TOKENS = int(os.getenv("REASONING_MAX_TOKENS", "600"))
 
+# Reasoning dispatcher (see reasoning_dispatcher.py): micro-batches under an AIMD concurrency limit
+REASONING_MIN_CONCURRENCY = int(os.getenv("REASONING_MIN_CONCURRENCY", "1"))
+REASONING_MAX_CONCURRENCY = int(os.getenv("REASONING_MAX_CONCURRENCY", "32"))
+REASONING_INITIAL_CONCURRENCY = int(os.getenv("REASONING_INITIAL_CONCURRENCY", "4"))
+REASONING_TOKEN_BUDGET = int(os.getenv("REASONING_TOKEN_BUDGET", "0"))  # concurrency * max_tokens cap, 0 = none
+REASONING_BATCH_SIZE = int(os.getenv("REASONING_BATCH_SIZE", "8"))
+REASONING_BATCH_WAIT_MS = float(os.getenv("REASONING_BATCH_WAIT_MS", "50"))
+
+# Reasoning output (see reasoning_output.py): streamed answers are cut off once the JSON is complete
+REASONING_STREAM = os.getenv("REASONING_STREAM", "true").lower() == "true"
+# auto (response_format json_schema, dropped if the server rejects it) | json_schema | guided_json | off
+REASONING_STRUCTURED_OUTPUT = os.getenv("REASONING_STRUCTURED_OUTPUT", "auto").lower()
+
 # Simplified system prompt (matching working test_tim3.py)
 REASONING_SYSTEM_PROMPT = """Tugas: Klasifikasikan apakah konten ini adalah SITUS JUDI atau BUKAN SITUS JUDI.
 
@@ -91,20 +165,38 @@ JAWAB DALAM FORMAT JSON:
 }
 """
 
+# Reasoning result cache (see reasoning_cache.py); the key includes the prompt version,
+# so changing the prompt or generation parameters never reuses old answers
+REASONING_TEMPERATURE = 0.2
+REASONING_PROMPT_VERSION = os.getenv("REASONING_PROMPT_VERSION") or prompt_version_of(
+    REASONING_SYSTEM_PROMPT, REASONING_TEMPERATURE, REASONING_MAX_TOKENS
+)
+REASONING_CACHE_ENABLED = os.getenv("REASONING_CACHE_ENABLED", "true").lower() == "true"
+REASONING_CACHE_PERSIST = os.getenv("REASONING_CACHE_PERSIST", "true").lower() == "true"
+REASONING_CACHE_TTL_HOURS = float(os.getenv("REASONING_CACHE_TTL_HOURS", "168"))
+REASONING_CACHE_MAX_ENTRIES = int(os.getenv("REASONING_CACHE_MAX_ENTRIES", "5000"))
+
 # Global sets untuk tracking (anti-duplikasi dan blocked domains)
-SEEN_DOMAINS = set()
-BLOCKED_DOMAINS = set()
+DOMAIN_REGISTRY = DomainRegistry(engine)  # replaces output/all_domains.txt
+# Blocked domains/keywords from generator_settings, reloaded on admin edits (LISTEN/NOTIFY)
+GENERATOR_SETTINGS = GeneratorSettingsService(engine, log=lambda message: log_print(message))
+REASONING_OUTPUT = ReasoningOutput(
+    REASONING_STRUCTURED_OUTPUT, stream=REASONING_STREAM, log=lambda message: log_print(message)
+)
 
 # Ensure output directories exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(OUTPUT_IMG_DIR, exist_ok=True)
 
-# Log file for real-time streaming
+# Log file for real-time streaming (output/jobs/<job_id>.log when run for a backend job).
+# Live output goes through stdout; the file is written in batches and fsynced at checkpoints.
 LOG_FILE = os.path.join(OUTPUT_DIR, "crawler.log")
-LOG_LOCK = threading.Lock()
+JOB_LOG_DIR = os.path.join(OUTPUT_DIR, "jobs")
+LOG_WRITER = LogWriter(LOG_FILE)
+atexit.register(LOG_WRITER.flush)  # lines logged after finish_log_file
 
 def log_print(*args, **kwargs):
-    """Print to both stdout and log file for real-time streaming."""
+    """Print to stdout (streamed to the caller) and queue the line for the log file."""
     message = " ".join(str(arg) for arg in args)
     timestamp = datetime.now().strftime("%H:%M:%S")
     log_line = f"[{timestamp}] {message}"
@@ -112,39 +204,48 @@ def log_print(*args, **kwargs):
     # Print to stdout
     print(log_line, flush=True)
     
-    # Write to log file with lock for thread safety
-    with LOG_LOCK:
-        try:
-            with open(LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(log_line + "\n")
-                f.flush()
-                os.fsync(f.fileno())  # Force write to disk
-        except Exception as e:
-            print(f"[LOG ERROR] Failed to write to log file: {e}", flush=True)
+    try:
+        LOG_WRITER.write(log_line)
+    except Exception as e:
+        print(f"[LOG ERROR] Failed to write to log file: {e}", flush=True)
+
+def emit_event(event_type, **fields):
+    """Print a typed progress event (utils/progress_events.py) and queue it for the log file."""
+    line = format_event(event_type, **fields)
+    print(line, flush=True)
+    try:
+        LOG_WRITER.write(line)
+    except Exception as e:
+        print(f"[LOG ERROR] Failed to write to log file: {e}", flush=True)
 
 def init_log_file():
     """Initialize/clear log file at start of crawl."""
     try:
-        with open(LOG_FILE, "w", encoding="utf-8") as f:
-            f.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Crawler started\n")
-            f.flush()
+        LOG_WRITER.path = LOG_FILE
+        LOG_WRITER.open(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Crawler started")
         return True
     except Exception as e:
         print(f"[LOG ERROR] Failed to initialize log file: {e}", flush=True)
         return False
 
+def checkpoint_log_file():
+    """Make everything logged so far durable (after milestones such as the saved summary)."""
+    try:
+        LOG_WRITER.checkpoint()
+    except Exception as e:
+        print(f"[LOG ERROR] Failed to sync log file: {e}", flush=True)
+
 def finish_log_file(success=True):
     """Mark log file as complete."""
     status = "SUCCESS" if success else "FAILED"
-    with LOG_LOCK:
-        try:
-            with open(LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Crawler finished: {status}\n")
-                f.write("===END===\n")  # Marker for frontend to detect completion
-                f.flush()
-                os.fsync(f.fileno())
-        except Exception as e:
-            log_print(f"[LOG ERROR] Failed to finish log file: {e}")
+    try:
+        LOG_WRITER.close(
+            "",
+            f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Crawler finished: {status}",
+            "===END===",  # Marker for frontend to detect completion
+        )
+    except Exception as e:
+        print(f"[LOG ERROR] Failed to finish log file: {e}", flush=True)
 
 
 def get_last_id():
@@ -159,83 +260,35 @@ def get_last_id():
 
 
 def load_seen_domains():
-    """Load all previously seen domains into global set."""
-    global SEEN_DOMAINS
-    SEEN_DOMAINS = set()
-    
-    if os.path.exists(ALL_DOMAINS_FILE):
-        try:
-            with open(ALL_DOMAINS_FILE, "r", encoding="utf-8") as f:
-                for line in f:
-                    domain = line.strip()
-                    if domain:
-                        SEEN_DOMAINS.add(domain)
-            print(f"[INFO] Loaded {len(SEEN_DOMAINS)} existing domains")
-        except Exception as e:
-            print(f"[WARNING] Failed to load domains: {str(e)}")
-    else:
-        print(f"[INFO] No existing domains file. Starting fresh.")
-
-
-def load_blocked_domains():
-    """Load blocked domains from database into global set."""
-    global BLOCKED_DOMAINS
-    BLOCKED_DOMAINS = set()
-    
+    """Load the domain registry into its in-memory Bloom filter."""
     try:
-        with engine.begin() as conn:
-            query = text("""
-                SELECT setting_value
-                FROM generator_settings
-                WHERE setting_key = 'blocked_domains'
-            """)
-            result = conn.execute(query).fetchone()
-            
-            if result:
-                setting_value = dict(result._mapping)["setting_value"]
-                if setting_value:
-                    # Split by newlines and filter empty lines
-                    domains = [line.strip() for line in setting_value.split('\n') if line.strip()]
-                    BLOCKED_DOMAINS = set(domains)
-                    print(f"[INFO] Loaded {len(BLOCKED_DOMAINS)} blocked domains from database")
-                else:
-                    print(f"[INFO] No blocked domains found in database")
-            else:
-                print(f"[INFO] No blocked domains setting in database")
+        loaded = DOMAIN_REGISTRY.load()
+        print(f"[INFO] Loaded {loaded} existing domains from domain registry")
     except Exception as e:
-        print(f"[WARNING] Failed to load blocked domains from database: {str(e)}")
-        print(f"[INFO] Continuing without blocked domains")
+        print(f"[WARNING] Failed to load domain registry: {str(e)}")
 
 
-def load_blocked_keywords():
-    """Load blocked keywords from database and return as list."""
-    blocked_keywords = []
-    
-    try:
-        with engine.begin() as conn:
-            query = text("""
-                SELECT setting_value
-                FROM generator_settings
-                WHERE setting_key = 'blocked_keywords'
-            """)
-            result = conn.execute(query).fetchone()
-            
-            if result:
-                setting_value = dict(result._mapping)["setting_value"]
-                if setting_value:
-                    # Split by newlines and filter empty lines
-                    keywords = [line.strip() for line in setting_value.split('\n') if line.strip()]
-                    blocked_keywords = keywords
-                    print(f"[INFO] Loaded {len(blocked_keywords)} blocked keywords from database")
-                else:
-                    print(f"[INFO] No blocked keywords found in database")
-            else:
-                print(f"[INFO] No blocked keywords setting in database")
-    except Exception as e:
-        print(f"[WARNING] Failed to load blocked keywords from database: {str(e)}")
-        print(f"[INFO] Continuing without blocked keywords")
-    
-    return blocked_keywords
+def log_blocked_domain_rules(matcher, prefix="[INFO]"):
+    """Print a summary of the compiled blocked-domain rules."""
+    rules = matcher.summary()
+    log_print(f"{prefix} {len(matcher)} blocked domain rules "
+              f"({rules['domain_rules']} domain, {rules['wildcard_rules']} wildcard, "
+              f"{rules['substring_rules']} substring)")
+    if rules["invalid"]:
+        log_print(f"[WARNING] Ignored {len(rules['invalid'])} invalid blocked domain rules: "
+                  f"{', '.join(rules['invalid'][:10])}")
+    if rules["single_label"]:
+        log_print(f"[WARNING] {len(rules['single_label'])} blocked domain rules have no dot and only match that "
+                  f"exact host, not domains containing it (use ~ for that): {', '.join(rules['single_label'][:10])}")
+
+
+def on_settings_changed(settings, changed_keys):
+    """Listener callback: blocklist edits apply to the rest of the run."""
+    if "blocked_domains" in changed_keys:
+        log_blocked_domain_rules(settings.blocked_domains, prefix="[SETTINGS] Reloaded")
+    if "blocked_keywords" in changed_keys:
+        log_print(f"[SETTINGS] Reloaded {len(settings.blocked_keywords)} blocked keywords "
+                  f"(used by the next search)")
 
 
 def save_last_keywords(keywords):
@@ -281,154 +334,38 @@ def extract_domain(url):
         return "unknown"
 
 
+LEGACY_RULE_WARNINGS = set()  # plain rules already reported by is_domain_blocked
+
+
 def is_domain_blocked(domain):
-    """Check if domain is in blocked list."""
+    """Check if domain (or a parent domain) is in the blocked list (cached, no query)."""
     if not domain or domain == "unknown":
         return False
-    
-    # Check if domain or any subdomain matches blocked domains
-    for blocked in BLOCKED_DOMAINS:
-        if blocked in domain:
-            return True
+    matcher = GENERATOR_SETTINGS.get().blocked_domains
+    if matcher.is_blocked(domain):
+        return True
+    legacy = matcher.legacy_match(domain)
+    if legacy is not None and legacy not in LEGACY_RULE_WARNINGS:
+        LEGACY_RULE_WARNINGS.add(legacy)
+        log_print(f"[WARNING] {domain} is not blocked by rule '{legacy}' any more: plain rules only block the "
+                  f"domain and its subdomains, use '~{legacy}' to block every domain containing it")
     return False
 
 
 def is_domain_duplicate(domain):
-    """Check if domain already exists in global set."""
-    return domain in SEEN_DOMAINS
+    """Check if domain is already in the domain registry (or was seen in this run)."""
+    return DOMAIN_REGISTRY.contains(domain)
 
 
 def add_domain_to_set(domain):
-    """Add domain to global set."""
+    """Mark domain as seen for the rest of this run (registered when its record is saved)."""
     if domain and domain != "unknown":
-        SEEN_DOMAINS.add(domain)
-
-
-def save_new_domains(new_domains):
-    """Append new domains to all_domains.txt file."""
-    if not new_domains:
-        return
-    
-    try:
-        with open(ALL_DOMAINS_FILE, "a", encoding="utf-8") as f:
-            for domain in new_domains:
-                f.write(domain + "\n")
-        print(f"[INFO] Saved {len(new_domains)} new domains")
-    except Exception as e:
-        print(f"[ERROR] Failed to save new domains: {str(e)}")
-
-
-
-def take_screenshot_worker(url, output_path, item_id):
-    """Worker function for taking screenshot (must be picklable for multiprocessing)."""
-    try:
-        # Essential headless arguments (kept, mapped to Playwright/Chromium args)
-        chromium_args = [
-            "--no-sandbox",
-            "--disable-dev-shm-usage",
-
-            # Additional stability arguments (kept)
-            "--disable-gpu",
-            "--disable-software-rasterizer",
-            "--disable-extensions",
-            "--disable-setuid-sandbox",
-            "--disable-web-security",
-            "--disable-features=VizDisplayCompositor",
-            "--window-size=1920,1080",
-            "--start-maximized",
-            "--log-level=3",
-        ]
-
-        user_agent = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,  # equivalent to --headless=new
-                # executable_path=chrome_executable, # Removed: broken path
-                args=chromium_args,
-            )
-
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent=user_agent,
-            )
-
-            page = context.new_page()
-
-            # Match Selenium-ish behavior: give navigation time to load
-            page.set_default_navigation_timeout(30_000)
-            page.set_default_timeout(30_000)
-
-            page.goto(url, wait_until="load")
-            time.sleep(3)  # Wait for page to fully load (kept)
-            
-            # Take screenshot as bytes (also saves to disk if path is provided)
-            screenshot_bytes = page.screenshot(path=output_path, full_page=False)
-            
-            # Convert to base64
-            base64_str = base64.b64encode(screenshot_bytes).decode('utf-8')
+        DOMAIN_REGISTRY.mark_seen(domain)
 
-            context.close()
-            browser.close()
 
-        return True, base64_str
-
-    except Exception as e:
-        print(f"[SCREENSHOT ERROR] {item_id}: {str(e)[:100]}")
-        return False, None
-
-
-
-def take_screenshot(url, output_path, retries=2):
-    """Take screenshot of the URL (no retries on timeout)."""
-    try:
-        chromium_args = [
-            "--no-sandbox",
-            "--disable-dev-shm-usage",
-
-            "--disable-gpu",
-            "--disable-software-rasterizer",
-            "--disable-extensions",
-            "--disable-setuid-sandbox",
-            "--disable-web-security",
-            "--disable-features=VizDisplayCompositor",
-            "--window-size=1920,1080",
-            "--start-maximized",
-            "--log-level=3",
-        ]
-
-        user_agent = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                # executable_path=chrome_executable,
-                args=chromium_args,
-            )
-
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent=user_agent,
-            )
-            page = context.new_page()
-            page.set_default_navigation_timeout(30_000)
-            page.set_default_timeout(30_000)
-
-            page.goto(url, wait_until="load")
-            time.sleep(3)
-            page.screenshot(path=output_path, full_page=False)
-
-            context.close()
-            browser.close()
-
-        return True
-
-    except Exception as e:
-        print(f"[SCREENSHOT ERROR]: {str(e)[:100]}")
-        return False
-
-
-def fetch_url_data(url_item, item_index, current_id):
-    """Fetch data for a single URL (without screenshot)."""
-    result = {
+def build_result(url_item, current_id):
+    """Crawl result for one accepted search result (before screenshot/API stages)."""
+    return {
         "id": f"{current_id:08d}",
         "title": url_item.get("title", "-"),
         "url": url_item.get("href", "-"),
@@ -436,136 +373,121 @@ def fetch_url_data(url_item, item_index, current_id):
         "screenshot_status": "pending",
     }
 
-    print(f"[{item_index}] Fetched ID {current_id:08d}: {result['title'][:50]}")
-    return result
-
-def process_screenshots_parallel(all_results):
-    """Process screenshots in parallel using multiprocessing."""
-    print(f"\n[SCREENSHOT] Taking screenshots with {MAX_WORKERS_SCREENSHOT} processes")
-    
-    # Prepare screenshot tasks
-    screenshot_tasks = []
-    for result in all_results:
-        url = result.get("url", "")
-        item_id = result.get("id", "unknown")
-        
-        if url and url != "-":
-            screenshot_path = os.path.join(OUTPUT_IMG_DIR, f"{item_id}.png")
-            screenshot_tasks.append((url, screenshot_path, item_id))
-    
-    # Use ProcessPoolExecutor for parallel screenshot processing
-    results_status = {}
-    
-    with ProcessPoolExecutor(max_workers=MAX_WORKERS_SCREENSHOT) as executor:
-        futures = {
-            executor.submit(take_screenshot_worker, url, path, item_id): item_id
-            for url, path, item_id in screenshot_tasks
-        }
-        
-        completed = 0
-        for future in as_completed(futures):
-            item_id = futures[future]
-            try:
-                success, base64_str = future.result()
-                status = "success" if success else "failed"
-                results_status[item_id] = {"status": status, "base64": base64_str}
-                
-                completed += 1
-                status_symbol = "✓" if success else "✗"
-                print(f"[{completed}/{len(screenshot_tasks)}] {item_id} {status_symbol}")
-            except Exception as e:
-                results_status[item_id] = {"status": "failed", "base64": None}
-                completed += 1
-                print(f"[{completed}/{len(screenshot_tasks)}] {item_id} ✗ (Exception: {str(e)[:50]})")
-    
-    # Update screenshot status in results
-    for result in all_results:
-        item_id = result.get("id", "unknown")
-        if item_id in results_status:
-            result["screenshot_status"] = results_status[item_id]["status"]
-            result["image_base64"] = results_status[item_id]["base64"]
-        else:
-            result["screenshot_status"] = "skipped"
-            result["image_base64"] = None
 
+def create_reasoning_cache():
+    """Reasoning result cache configured from the REASONING_CACHE_* settings (None if disabled)."""
+    if not REASONING_CACHE_ENABLED:
+        return None
+    return ReasoningCache(
+        engine,
+        VLLM_MODEL_NAME,
+        REASONING_PROMPT_VERSION,
+        ttl_seconds=int(REASONING_CACHE_TTL_HOURS * 3600),
+        max_entries=REASONING_CACHE_MAX_ENTRIES,
+        persistent=REASONING_CACHE_PERSIST,
+        log=log_print,
+    )
+
+
+def create_screenshot_dedup():
+    """Screenshot dedup configured from the SCREENSHOT_DEDUP_* settings (None if disabled)."""
+    if not SCREENSHOT_DEDUP_ENABLED:
+        return None
+    return ScreenshotDedup(
+        engine,
+        DETECTION_MODEL_VERSION,
+        threshold=SCREENSHOT_DEDUP_THRESHOLD,
+        hash_size=SCREENSHOT_DEDUP_HASH_SIZE,
+        ttl_seconds=int(SCREENSHOT_DEDUP_TTL_DAYS * 86400),
+        log=log_print,
+    )
+
+
+def create_screenshot_engine(on_launch=None):
+    """
+    Screenshot engine configured from the SCREENSHOT_* / READINESS_* settings.
+
+    Args:
+        on_launch: Called with the seconds each browser launch took
+
+    Returns:
+        Tuple of (ScreenshotEngine, SettleTimeStore or None)
+    """
+    readiness = None
+    settle_store = None
+    if READINESS_MODE == "adaptive":
+        settle_store = SettleTimeStore(SETTLE_TIMES_FILE)
+        settle_store.load()
+        readiness = AdaptiveReadiness(
+            store=settle_store,
+            network_idle_cap=READINESS_NETWORK_IDLE_CAP,
+            quiet_ms=READINESS_QUIET_MS,
+            soft_cap=READINESS_SOFT_CAP,
+            max_wait=READINESS_MAX_WAIT,
+        )
 
-def scrape_website_direct(url, item_id):
-    """Scrape website locally using BeautifulSoup."""
+    screenshot_engine = ScreenshotEngine(
+        browsers=SCREENSHOT_BROWSERS,
+        pages_per_browser=SCREENSHOT_PAGES_PER_BROWSER,
+        recycle_after=SCREENSHOT_RECYCLE_AFTER,
+        page_deadline=SCREENSHOT_PAGE_DEADLINE,
+        navigation_timeout=SCREENSHOT_TIMEOUT,
+        settle_seconds=SCREENSHOT_SETTLE_SECONDS,
+        readiness=readiness,
+        extract_content=REASONING_CONTENT_FROM_DOM,
+        on_launch=on_launch,
+    )
+    return screenshot_engine, settle_store
+
+
+async def scrape_website_direct(scraper, url, item_id):
+    """Scrape the reasoning fields of a page locally (streamed, see page_scraper.py)."""
     try:
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        resp = requests.get(url, headers=headers, timeout=30, verify=False)
-        resp.raise_for_status()
-        
-        soup = BeautifulSoup(resp.content, 'html.parser')
-        
-        title = soup.title.string.strip() if soup.title and soup.title.string else ""
-        
-        description = ""
-        meta_desc = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
-        if meta_desc:
-            description = meta_desc.get('content', '').strip()
-            
-        keywords = ""
-        meta_keys = soup.find('meta', attrs={'name': 'keywords'})
-        if meta_keys:
-            keywords = meta_keys.get('content', '').strip()
-            
-        paragraphs = [p.get_text(strip=True) for p in soup.find_all('p') if p.get_text(strip=True)]
-        
-        data = {
-            "Scraped_URL": url,
-            "Title": title,
-            "Description": description,
-            "Keywords": keywords,
-        }
-        
-        for i in range(5):
-            data[f"P{i+1}"] = paragraphs[i] if i < len(paragraphs) else ""
-            
+        data, info = await scraper.scrape(url)
+        print(f"[SCRAPE LOCAL] {item_id}: ✓ {info['bytes_read'] / 1024:.1f} KB read ({info['stop']}), "
+              f"parse {info['parse_ms']:.1f} ms")
         return data
     except Exception as e:
         print(f"[SCRAPE LOCAL] {item_id}: ✗ {str(e)[:100]}")
         return None
 
 
-def call_reasoning_llm(scraped_data, item_id):
-    """Call vLLM reasoning API with scraped content."""
+def build_reasoning_prompt(scraped_data):
+    """Format scraped content as the reasoning LLM's user message."""
+    url = scraped_data.get('Scraped_URL', '')
+    title = scraped_data.get('Title', '')
+    description = scraped_data.get('Description', '')
+    keywords = scraped_data.get('Keywords', '')
+    
+    # Collect paragraphs
+    paragraphs = []
+    for i in range(1, 6):
+        p = scraped_data.get(f"P{i}", "")
+        if p:
+            paragraphs.append(f"- {p}")
+    
+    # Build formatted content
+    content_parts = [
+        f"URL: {url}",
+        "",
+        f"Judul: {title}",
+        "",
+        f"Deskripsi: {description}",
+        "",
+        f"Kata kunci: {keywords}",
+        "",
+        "Isi artikel:"
+    ]
+    
+    # Add paragraphs
+    content_parts.extend(paragraphs)
+    
+    return "\n".join(content_parts)
+
+
+async def request_reasoning(dispatcher, combined_content, item_id):
+    """Send one prompt to the vLLM reasoning API through the dispatcher; returns the parsed answer or None."""
     try:
-        # Format content to match expected structure
-        url = scraped_data.get('Scraped_URL', '')
-        title = scraped_data.get('Title', '')
-        description = scraped_data.get('Description', '')
-        keywords = scraped_data.get('Keywords', '')
-        
-        # Collect paragraphs
-        paragraphs = []
-        for i in range(1, 6):
-            p = scraped_data.get(f"P{i}", "")
-            if p:
-                paragraphs.append(f"- {p}")
-        
-        # Build formatted content
-        content_parts = [
-            f"URL: {url}",
-            "",
-            f"Judul: {title}",
-            "",
-            f"Deskripsi: {description}",
-            "",
-            f"Kata kunci: {keywords}",
-            "",
-            "Isi artikel:"
-        ]
-        
-        # Add paragraphs
-        content_parts.extend(paragraphs)
-        
-        combined_content = "\n".join(content_parts)
-        
-        # Call vLLM API
         url = f"{VLLM_BASE_URL}/chat/completions"
         payload = {
             "model": VLLM_MODEL_NAME,
@@ -573,36 +495,40 @@ def call_reasoning_llm(scraped_data, item_id):
                 {"role": "system", "content": REASONING_SYSTEM_PROMPT},
                 {"role": "user", "content": combined_content}
             ],
-            "temperature": 0.2,
+            "temperature": REASONING_TEMPERATURE,
             "max_tokens": REASONING_MAX_TOKENS
         }
         
-        response = requests.post(url, json=payload, timeout=120)
-        response.raise_for_status()
-        
-        raw_text = response.json()["choices"][0]["message"]["content"]
-        
-        # Strip <think> tags and parse JSON
-        cleaned = re.sub(r"<think>.*?</think>", "", raw_text, flags=re.DOTALL).strip()
-        cleaned = re.sub(r"```json|```", "", cleaned).strip()
-        
-        try:
-            parsed = json.loads(cleaned)
-            # Add metadata
-            parsed['metadata'] = {
-                'model_source': VLLM_MODEL_NAME,
-                'scraped_url': scraped_data.get('Scraped_URL', '')
-            }
-            print(f"[REASONING API] {item_id}: ✓ {parsed.get('label', 'unknown')} (confidence: {parsed.get('confidence', 0.0):.2f})")
-            return parsed
-        except json.JSONDecodeError:
-            print(f"[REASONING API] {item_id}: ✗ Failed to parse JSON response")
-            return None
-            
-    except requests.exceptions.Timeout:
+        async def send(client):
+            while True:
+                extractor = ReasoningJSONExtractor()
+                try:
+                    if REASONING_OUTPUT.stream:
+                        info = await stream_completion(client, url, REASONING_OUTPUT.apply(payload), extractor)
+                    else:
+                        response = await client.post(url, json=REASONING_OUTPUT.apply(payload), timeout=120)
+                        response.raise_for_status()
+                        data = response.json()
+                        extractor.feed(data["choices"][0]["message"]["content"] or "")
+                        info = {"tokens": completion_tokens(data) or 0, "stopped_early": False}
+                except httpx.HTTPStatusError as e:
+                    if REASONING_OUTPUT.rejected(e.response.status_code, e.response.text):
+                        continue
+                    raise
+                extractor.finish()
+                REASONING_OUTPUT.record(extractor, info["tokens"], info["stopped_early"])
+                # usage lets the dispatcher compare latency per generated token
+                return {"result": extractor.result, "usage": {"completion_tokens": info["tokens"]}}
+
+        data = await dispatcher.submit(send)
+        if data["result"] is None:
+            print(f"[REASONING API] {item_id}: ✗ No JSON answer in response")
+        return data["result"]
+
+    except httpx.TimeoutException:
         print(f"[REASONING API] {item_id}: ✗ Timeout after 120s")
         return None
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print(f"[REASONING API] {item_id}: ✗ Connection failed (is vLLM API running?)")
         return None
     except Exception as e:
@@ -610,15 +536,43 @@ def call_reasoning_llm(scraped_data, item_id):
         return None
 
 
-def reasoning_workflow(url, item_id):
-    """Scrape content locally and then call Reasoning LLM."""
-    scraped = scrape_website_direct(url, item_id)
-    if scraped:
-        return call_reasoning_llm(scraped, item_id)
-    return None
+async def call_reasoning_llm(dispatcher, scraped_data, item_id, cache=None):
+    """
+    Call vLLM reasoning API with scraped content.
 
+    With a ReasoningCache, pages whose normalized content was classified
+    before (same model and prompt version) reuse that answer.
+    """
+    try:
+        combined_content = build_reasoning_prompt(scraped_data)
+
+        async def compute():
+            return await request_reasoning(dispatcher, combined_content, item_id)
+
+        if cache is not None:
+            parsed, source = await cache.get_or_compute(cache.key(scraped_data), compute)
+        else:
+            parsed, source = await compute(), "llm"
+
+        if parsed is None:
+            return None
 
-def send_to_detection_api(screenshot_path, item_id):
+        # Copy: cached results are shared between items
+        parsed = dict(parsed)
+        parsed['metadata'] = {
+            'model_source': VLLM_MODEL_NAME,
+            'scraped_url': scraped_data.get('Scraped_URL', ''),
+            'cache': source
+        }
+        cached = f" [cache: {source}]" if source != "llm" else ""
+        print(f"[REASONING API] {item_id}: ✓ {parsed.get('label', 'unknown')} (confidence: {parsed.get('confidence', 0.0):.2f}){cached}")
+        return parsed
+    except Exception as e:
+        print(f"[REASONING API] {item_id}: ✗ {str(e)[:100]}")
+        return None
+
+
+async def send_to_detection_api(client, screenshot_path, item_id, mime_type="image/png"):
     """Send screenshot to object detection API and return response."""
     try:
         if not os.path.exists(screenshot_path):
@@ -626,32 +580,35 @@ def send_to_detection_api(screenshot_path, item_id):
             return None
         
         with open(screenshot_path, 'rb') as img_file:
-            files = {'file': ('screenshot.png', img_file, 'image/png')}
-            response = requests.post(
-                DETECTION_API_URL,
-                files=files,
-                timeout=DETECTION_API_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                api_response = response.json()
-                if api_response.get('success'):
-                    result = api_response.get('result', {})
-                    status = result.get('status', 'unknown')
-                    confidence = result.get('prob_fusion', 0.0)
-                    print(f"[DETECTION API] {item_id}: ✓ {status} (prob_fusion: {confidence:.4f})")
-                    return api_response
-                else:
-                    print(f"[DETECTION API] {item_id}: API returned success=false")
-                    return None
+            image_bytes = img_file.read()
+
+        extension = os.path.splitext(screenshot_path)[1] or '.png'
+        files = {'file': (f'screenshot{extension}', image_bytes, mime_type)}
+        response = await client.post(
+            DETECTION_API_URL,
+            files=files,
+            timeout=DETECTION_API_TIMEOUT
+        )
+        
+        if response.status_code == 200:
+            api_response = response.json()
+            if api_response.get('success'):
+                result = api_response.get('result', {})
+                status = result.get('status', 'unknown')
+                confidence = result.get('prob_fusion', 0.0)
+                print(f"[DETECTION API] {item_id}: ✓ {status} (prob_fusion: {confidence:.4f})")
+                return api_response
             else:
-                print(f"[DETECTION API] {item_id}: HTTP {response.status_code}")
+                print(f"[DETECTION API] {item_id}: API returned success=false")
                 return None
+        else:
+            print(f"[DETECTION API] {item_id}: HTTP {response.status_code}")
+            return None
                 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print(f"[DETECTION API] {item_id}: Timeout after {DETECTION_API_TIMEOUT}s")
         return None
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print(f"[DETECTION API] {item_id}: Connection failed (is API running on port 9090?)")
         return None
     except Exception as e:
@@ -659,464 +616,963 @@ def send_to_detection_api(screenshot_path, item_id):
         return None
 
 
-def process_apis_parallel(all_results):
-    """Process both detection and reasoning API calls in parallel for successful screenshots."""
-    # Filter only successful screenshots
-    api_tasks = []
-    for result in all_results:
-        if result.get('screenshot_status') == 'success':
-            item_id = result.get('id', 'unknown')
-            screenshot_path = os.path.join(OUTPUT_IMG_DIR, f"{item_id}.png")
-            url = result.get('url', '')
-            api_tasks.append((screenshot_path, url, item_id, result))
-    
-    if not api_tasks:
-        print("[API] No successful screenshots to process")
-        return
-    
-    print(f"\n[API] Sending {len(api_tasks)} items to both Detection and Reasoning APIs with workers")
-    
-    # Use ThreadPoolExecutor for API calls
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS_DETECTION * 2) as executor:
-        futures = {}
-        
-        for screenshot_path, url, item_id, result in api_tasks:
-            # 1. Submit Detection Task
-            detection_future = executor.submit(send_to_detection_api, screenshot_path, item_id)
-            futures[detection_future] = ('detection', item_id, result)
-            
-            # 2. Submit Reasoning Task (Local Scrape + LLM)
-            reasoning_future = executor.submit(reasoning_workflow, url, item_id)
-            futures[reasoning_future] = ('reasoning', item_id, result)
-        
-        # Collect results
-        completed = 0
-        total_calls = len(futures)
-        
-        for future in as_completed(futures):
-            api_type, item_id, result = futures[future]
-            try:
-                api_response = future.result()
-                
-                if api_type == 'detection':
-                    if api_response:
-                        result['detection_api_response'] = api_response
-                        result['detection_status'] = 'success'
-                    else:
-                        result['detection_status'] = 'failed'
-                    status_symbol = "✓" if api_response else "✗"
-                    
-                elif api_type == 'reasoning':
-                    if api_response:
-                        result['reasoning_api_response'] = api_response
-                        result['reasoning_status'] = 'success'
-                    else:
-                        result['reasoning_status'] = 'failed'
-                    status_symbol = "✓" if api_response else "✗"
-                
-                completed += 1
-                # Format log nicely
-                if api_type == 'detection':
-                     # Detection already prints its own log inside send_to_detection_api
-                     pass 
-                elif api_type == 'reasoning':
-                     # Reasoning workflow already prints its own logs inside scrape/llm functions
-                     pass
-
-                # print(f"[{completed}/{total_calls}] {api_type.title()} {item_id} {status_symbol}")
-                    
-            except Exception as e:
-                if api_type == 'detection':
-                    result['detection_status'] = 'failed'
-                elif api_type == 'reasoning':
-                    result['reasoning_status'] = 'failed'
-                print(f"[API ERROR] {api_type} {item_id}: {str(e)[:50]}")
-    
-    # Print summary
-    detection_success = sum(1 for r in all_results if r.get('detection_status') == 'success')
-    detection_failed = sum(1 for r in all_results if r.get('detection_status') == 'failed')
-    reasoning_success = sum(1 for r in all_results if r.get('reasoning_status') == 'success')
-    reasoning_failed = sum(1 for r in all_results if r.get('reasoning_status') == 'failed')
-    
-    print(f"[DETECTION API] Complete: {detection_success} success, {detection_failed} failed")
-    print(f"[REASONING API] Complete: {reasoning_success} success, {reasoning_failed} failed")
 
+# Rows per bulk statement group in save_to_database
+DB_BATCH_SIZE = int(os.getenv("CRAWLER_DB_BATCH_SIZE", "200"))
+
+
+def decode_image_base64(image_base64):
+    """Decode a base64 image (optional data URI prefix) into (bytes, mime_type, sha256) or None."""
+    if not image_base64:
+        return None
+    payload = image_base64
+    mime_type = "image/png"
+    if payload.startswith("data:"):
+        header, _, payload = payload.partition(",")
+        mime_type = header[5:].split(";")[0] or mime_type
+    try:
+        image_bytes = base64.b64decode("".join(payload.split()), validate=True)
+    except Exception:
+        return None
+    if not image_bytes:
+        return None
+    if image_bytes.startswith(b"\xff\xd8\xff"):
+        mime_type = "image/jpeg"
+    return image_bytes, mime_type, hashlib.sha256(image_bytes).hexdigest()
+
+
+def prepare_db_record(result, keyword, username):
+    """
+    Turn one crawl result into the rows written by save_to_database.
+
+    Pure Python (no DB access) so a whole batch can be prepared up front and
+    written with one statement per table.
+    """
+    # Prepare image path in the format: domain-generator/output/img/<id>.<ext>
+    # Note: result['id'] is just for file naming, not for database ID
+    image_path = None
+    thumbnail = None
+    if result.get('screenshot_status') == 'success' and result.get('screenshot_path'):
+        image_path = f"domain-generator/output/img/{os.path.basename(result['screenshot_path'])}"
+        # Only the small thumbnail is stored inline, for the dashboard
+        thumbnail = data_uri(result['thumbnail_path'], result['screenshot_mime_type'])
+
+    record = {
+        "key": result.get('id'),
+        "domain": result.get('domain', ''),
+        "domain_row": {
+            "url": result.get('url', ''),
+            "title": (result.get('title') or '')[:255],  # Limit to 255 chars
+            "domain": result.get('domain', ''),
+            "image_base64": thumbnail,
+        },
+        "detection_row": None,
+        "reasoning_row": None,
+        "image": None,
+        "phash_row": None,
+    }
+
+    label_final = None
+    id_detection = None
+    image_base64 = None
+    detection_confidence_score = None
+    reasoning_confidence_score = None
+    reasoning_text = None
+
+    # Detection API result -> object_detection row
+    if result.get('detection_status') == 'success' and result.get('detection_api_response'):
+        api_result = result['detection_api_response'].get('result', {})
+
+        label = api_result.get('status', '') == 'gambling'
+        label_final = label
+
+        # Use prob_fusion as the confidence score (this is what the API actually returns)
+        confidence = api_result.get('prob_fusion', 0.0)
+        detection_confidence_score = round(confidence * 100, 1)  # Convert to percentage (0-100)
+
+        # Visualization path from API contains the Base64 string
+        image_base64 = api_result.get('visualization_path', '')
+        id_detection = api_result.get('id')
+
+        record["detection_row"] = {
+            "id_detection": id_detection,
+            "label": label,
+            "confidence_score": detection_confidence_score,
+            "image_detected_base64": image_base64,
+            "bounding_box": json.dumps(api_result.get('detections', [])),
+            "ocr": json.dumps(api_result.get('ocr', [])),
+            "model_version": None,
+        }
+
+    # Reasoning API result -> reasoning row
+    if result.get('reasoning_status') == 'success' and result.get('reasoning_api_response'):
+        reasoning_response = result['reasoning_api_response']
+
+        reasoning_label_str = reasoning_response.get('label', 'non_judi')
+        reasoning_label = reasoning_label_str == 'judi'
+        reasoning_text = reasoning_response.get('reasoning', '')
+        reasoning_confidence_raw = round(reasoning_response.get('confidence', 0.0) * 100, 1)  # Convert to percentage (0-100)
+
+        # For reasoning: if label is non-judi, inverse the confidence
+        # This aligns reasoning confidence with gambling detection scale
+        if reasoning_label_str == 'non_judi':
+            reasoning_confidence_score = round(100 - reasoning_confidence_raw, 1)
+        else:
+            reasoning_confidence_score = reasoning_confidence_raw
+
+        # Update label_final if not set by detection
+        if label_final is None:
+            label_final = reasoning_label
 
+        record["reasoning_row"] = {
+            "label": reasoning_label,
+            "context": reasoning_text,
+            "confidence_score": reasoning_confidence_score,
+            "model_version": reasoning_response.get('metadata', {}).get('model_source', 'unknown'),
+        }
+
+    # Fusion: 50% object_detection + 50% reasoning (a single source contributes at most 50%)
+    if detection_confidence_score is not None and reasoning_confidence_score is not None:
+        final_confidence = round((detection_confidence_score * 0.5) + (reasoning_confidence_score * 0.5), 1)
+    elif detection_confidence_score is not None:
+        final_confidence = round(detection_confidence_score * 0.5, 1)
+    elif reasoning_confidence_score is not None:
+        final_confidence = round(reasoning_confidence_score * 0.5, 1)
+    else:
+        final_confidence = None
+
+    # Visualization bytes go to the image store; results only keeps the file path
+    decoded_image = decode_image_base64(image_base64)
+    image_sha256 = None
+    if decoded_image:
+        image_bytes, mime_type, image_sha256 = decoded_image
+        record["image"] = {
+            "sha256": image_sha256,
+            "mime_type": mime_type,
+            "byte_size": len(image_bytes),
+            "data": image_bytes,
+        }
+
+    # Hash of a screenshot the detector actually ran on, for dedup in later runs
+    if record["detection_row"] and result.get('screenshot_phash') and result.get('detection_source') == 'api':
+        record["phash_row"] = {
+            "phash": result['screenshot_phash'],
+            "detector": DETECTION_MODEL_VERSION,
+            "domain": result.get('domain', ''),
+            "detection_result": json.dumps(strip_visualization(result['detection_api_response'])),
+            "visualization_sha256": image_sha256,
+        }
 
-def save_to_database(all_results, keyword, username='system'):
-    """Save crawled results to database with user tracking."""
+    record["results_row"] = {
+        "id_detection": id_detection,
+        "url": result.get('url', ''),
+        "keywords": keyword,
+        "reasoning_text": reasoning_text,
+        "image_final_path": image_path if image_sha256 else (image_base64 or image_path),
+        "image_sha256": image_sha256,
+        "label_final": label_final,
+        "final_confidence": final_confidence,
+        "created_by": username,
+        "modified_by": username,
+    }
+    return record
+
+
+def _write_db_batch(cur, records, username):
+    """
+    Write a batch of prepared records with one multi-row statement per table.
+
+    Each statement is an INSERT ... ON CONFLICT DO UPDATE ... RETURNING driven by
+    execute_values, so a batch costs ~7 round trips regardless of its size.
+
+    Returns:
+        Counts per table, and "merged": records dropped because a later record
+        of the batch has the same domain
+    """
+    # Mirror domains inside one batch would hit the same conflict row twice; last one wins
+    by_domain = {}
+    for record in records:
+        by_domain[record["domain"]] = record
+    merged = len(records) - len(by_domain)
+    records = list(by_domain.values())
+
+    counts = {"domains": 0, "images": 0, "detection": 0, "reasoning": 0, "results": 0, "audit": 0, "hashes": 0,
+              "merged": merged}
+
+    # 1. generated_domains (unique on domain, see migrations/003)
+    domain_rows = execute_values(cur, """
+        INSERT INTO generated_domains (url, title, domain, image_base64)
+        VALUES %s
+        ON CONFLICT (domain) DO UPDATE SET
+            image_base64 = COALESCE(EXCLUDED.image_base64, generated_domains.image_base64)
+        RETURNING id_domain, domain
+    """, [
+        (r["domain_row"]["url"], r["domain_row"]["title"], r["domain_row"]["domain"], r["domain_row"]["image_base64"])
+        for r in records
+    ], fetch=True)
+    id_by_domain = {domain: id_domain for id_domain, domain in domain_rows}
+    counts["domains"] = len(domain_rows)
+
+    # Domain registry, in the same transaction so it never drifts from generated_domains
+    registry_keys = sorted({normalize_domain(r["domain"]) for r in records} - {""})
+    if registry_keys:
+        execute_values(cur, """
+            INSERT INTO domain_registry (normalized_domain, source)
+            VALUES %s
+            ON CONFLICT (normalized_domain) DO NOTHING
+        """, [(key, "crawler") for key in registry_keys])
+
+    # 2. result_images (content-addressed, duplicates are skipped)
+    images = {r["image"]["sha256"]: r["image"] for r in records if r["image"]}
+    if images:
+        execute_values(cur, """
+            INSERT INTO result_images (sha256, mime_type, byte_size, data)
+            VALUES %s
+            ON CONFLICT (sha256) DO NOTHING
+        """, [
+            (img["sha256"], img["mime_type"], img["byte_size"], psycopg2.Binary(img["data"]))
+            for img in images.values()
+        ])
+        counts["images"] = len(images)
+
+    # 3. object_detection (unique on id_domain)
+    detection_values = [
+        (
+            r["detection_row"]["id_detection"], id_by_domain[r["domain"]], r["detection_row"]["label"],
+            r["detection_row"]["confidence_score"], r["detection_row"]["image_detected_base64"],
+            r["detection_row"]["bounding_box"], r["detection_row"]["ocr"], r["detection_row"]["model_version"],
+        )
+        for r in records if r["detection_row"]
+    ]
+    if detection_values:
+        execute_values(cur, """
+            INSERT INTO object_detection (
+                id_detection, id_domain, label, confidence_score,
+                image_detected_base64, bounding_box, ocr, model_version
+            )
+            VALUES %s
+            ON CONFLICT (id_domain) DO UPDATE SET
+                id_detection = EXCLUDED.id_detection,
+                label = EXCLUDED.label,
+                confidence_score = EXCLUDED.confidence_score,
+                image_detected_base64 = EXCLUDED.image_detected_base64,
+                bounding_box = EXCLUDED.bounding_box,
+                ocr = EXCLUDED.ocr,
+                model_version = EXCLUDED.model_version,
+                processed_at = now()
+        """, detection_values, template="(%s, %s, %s, %s, %s, %s::jsonb, %s::jsonb, %s)")
+        counts["detection"] = len(detection_values)
+
+    # 4. reasoning (unique on id_domain)
+    id_reasoning_by_domain = {}
+    reasoning_values = [
+        (
+            id_by_domain[r["domain"]], r["reasoning_row"]["label"], r["reasoning_row"]["context"],
+            r["reasoning_row"]["confidence_score"], r["reasoning_row"]["model_version"],
+        )
+        for r in records if r["reasoning_row"]
+    ]
+    if reasoning_values:
+        reasoning_rows = execute_values(cur, """
+            INSERT INTO reasoning (id_domain, label, context, confidence_score, model_version)
+            VALUES %s
+            ON CONFLICT (id_domain) DO UPDATE SET
+                label = EXCLUDED.label,
+                context = EXCLUDED.context,
+                confidence_score = EXCLUDED.confidence_score,
+                model_version = EXCLUDED.model_version,
+                processed_at = now()
+            RETURNING id_reasoning, id_domain
+        """, reasoning_values, fetch=True)
+        id_reasoning_by_domain = {id_domain: id_reasoning for id_reasoning, id_domain in reasoning_rows}
+        counts["reasoning"] = len(reasoning_rows)
+
+    # 5. results (unique on id_domain); status/created_* are only set on first insert
+    results_rows = execute_values(cur, """
+        INSERT INTO results (
+            id_domain, id_reasoning, id_detection, url, keywords, reasoning_text,
+            image_final_path, image_sha256, label_final, final_confidence,
+            status, created_by, created_at, modified_by, modified_at
+        )
+        VALUES %s
+        ON CONFLICT (id_domain) DO UPDATE SET
+            id_reasoning = EXCLUDED.id_reasoning,
+            id_detection = EXCLUDED.id_detection,
+            url = EXCLUDED.url,
+            keywords = EXCLUDED.keywords,
+            reasoning_text = EXCLUDED.reasoning_text,
+            image_final_path = EXCLUDED.image_final_path,
+            image_sha256 = EXCLUDED.image_sha256,
+            label_final = EXCLUDED.label_final,
+            final_confidence = EXCLUDED.final_confidence,
+            modified_by = EXCLUDED.modified_by,
+            modified_at = now()
+        RETURNING id_results
+    """, [
+        (
+            id_by_domain[r["domain"]], id_reasoning_by_domain.get(id_by_domain[r["domain"]]),
+            r["results_row"]["id_detection"], r["results_row"]["url"], r["results_row"]["keywords"],
+            r["results_row"]["reasoning_text"], r["results_row"]["image_final_path"],
+            r["results_row"]["image_sha256"], r["results_row"]["label_final"],
+            r["results_row"]["final_confidence"], r["results_row"]["created_by"],
+            r["results_row"]["modified_by"],
+        )
+        for r in records
+    ], template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'unverified', %s, now(), %s, now())", fetch=True)
+    counts["results"] = len(results_rows)
+
+    # 6. screenshot_hashes for screenshot dedup (after result_images, which holds the visualization)
+    hash_values = [
+        (
+            r["phash_row"]["phash"], r["phash_row"]["detector"], r["phash_row"]["domain"],
+            r["phash_row"]["detection_result"], r["phash_row"]["visualization_sha256"],
+        )
+        for r in records if r["phash_row"]
+    ]
+    if hash_values:
+        execute_values(cur, """
+            INSERT INTO screenshot_hashes (phash, detector, domain, detection_result, visualization_sha256)
+            VALUES %s
+        """, hash_values, template="(%s, %s, %s, %s::jsonb, %s)")
+        counts["hashes"] = len(hash_values)
+
+    # 7. audit_log 'created' entry per saved result
+    execute_values(cur, """
+        INSERT INTO audit_log (id_result, action, username, timestamp)
+        VALUES %s
+    """, [(id_results, username) for (id_results,) in results_rows],
+        template="(%s, 'created', %s, now())")
+    counts["audit"] = len(results_rows)
+
+    return counts
+
+
+def log_database_summary(stats, username):
+    """Log the totals of one or more save_to_database calls."""
+    log_print(f"[DATABASE] ===== SAVE SUMMARY =====")
+    log_print(f"[DATABASE] Successfully saved {stats['saved']} domains in {stats['batches']} batch(es)")
+    log_print(f"[DATABASE] Successfully saved {stats['detection_saved']} detection results to object_detection")
+    log_print(f"[DATABASE] Successfully saved {stats['reasoning_saved']} reasoning results")
+    log_print(f"[DATABASE] Successfully saved {stats['results_saved']} results with created_by={username}")
+    log_print(f"[DATABASE] Failed records: {stats['failed']}")
+    log_print(f"[DATABASE] Merged same-domain records: {stats['merged']}")
+    log_print(f"[DATABASE] Throughput: {stats['rows_per_sec']} rows/sec ({stats['elapsed_seconds']}s)")
+    log_print(f"[DATABASE] ===========================")
+
+
+def save_to_database(all_results, keyword, username='system', log_summary=True):
+    """
+    Save crawled results to database with user tracking.
+
+    Records are written in batches of DB_BATCH_SIZE with set-based upserts. Each
+    batch runs under a savepoint; if it fails, its rows are retried one by one
+    so a single bad record is reported instead of rolling back the batch.
+
+    Returns:
+        Stats dict: saved/failed counts per table, records merged into a
+        same-domain record of their batch ("merged"), per-row errors and rows/sec
+    """
     log_print("[DATABASE] Starting database save...")
-    print(f"[DATABASE] Attempting to save {len(all_results)} records", flush=True)
     log_print(f"[DATABASE] Username: {username}")
-    
+
+    stats = {
+        "saved": 0,
+        "failed": 0,
+        "detection_saved": 0,
+        "reasoning_saved": 0,
+        "results_saved": 0,
+        "merged": 0,
+        "batches": 0,
+        "elapsed_seconds": 0.0,
+        "rows_per_sec": 0.0,
+        "errors": [],
+    }
+
     if not all_results:
         log_print("[DATABASE] WARNING: No results to save!")
-        return False
-    
+        return stats
+
+    start = time.time()
+
+    # Preparing is pure Python; a record that can't even be prepared is a per-row error
+    records = []
+    for result in all_results:
+        try:
+            records.append(prepare_db_record(result, keyword, username))
+        except Exception as e:
+            stats["failed"] += 1
+            stats["errors"].append({"id": result.get('id'), "domain": result.get('domain'), "error": str(e)[:200]})
+
+    def add_counts(counts):
+        stats["saved"] += counts["results"]
+        stats["detection_saved"] += counts["detection"]
+        stats["reasoning_saved"] += counts["reasoning"]
+        stats["results_saved"] += counts["results"]
+        stats["merged"] += counts["merged"]
+
+    conn = None
+    saved_domains = []  # moved out of DOMAIN_REGISTRY.pending once committed
     try:
-        with engine.begin() as conn:
-            saved_count = 0
-            detection_saved_count = 0
-            results_saved_count = 0
-            failed_count = 0
-            
-            for idx, result in enumerate(all_results):
+        conn = engine.raw_connection()
+        cur = conn.cursor()
+
+        for batch_start in range(0, len(records), DB_BATCH_SIZE):
+            batch = records[batch_start:batch_start + DB_BATCH_SIZE]
+            stats["batches"] += 1
+
+            cur.execute("SAVEPOINT save_batch")
+            try:
+                counts = _write_db_batch(cur, batch, username)
+                add_counts(counts)
+                cur.execute("RELEASE SAVEPOINT save_batch")
+                saved_domains.extend(record["domain"] for record in batch)
+                merged_note = f" ({counts['merged']} merged into same-domain records)" if counts["merged"] else ""
+                log_print(f"[DATABASE] Batch {stats['batches']}: {len(batch) - counts['merged']} records saved{merged_note}")
+                continue
+            except Exception as batch_error:
+                cur.execute("ROLLBACK TO SAVEPOINT save_batch")
+                log_print(f"[DATABASE] Batch {stats['batches']} failed ({str(batch_error)[:100]}), retrying row by row")
+
+            # Isolate the bad record(s): one savepoint per row
+            for record in batch:
+                cur.execute("SAVEPOINT save_row")
                 try:
-                    print(f"[DATABASE] Processing record {idx+1}/{len(all_results)}: {result.get('domain', 'unknown')}", flush=True)
-                    
-                    # Prepare image path in the format: domain-generator/output/img/<id>.png
-                    # Note: result['id'] is just for file naming, not for database ID
-                    screenshot_filename = result['id']
-                    image_path = f"domain-generator/output/img/{screenshot_filename}.png" if result.get('screenshot_status') == 'success' else None
-                    
-                    # Check if domain already exists in generated_domains
-                    existing_id = conn.execute(text("SELECT id_domain FROM generated_domains WHERE domain = :domain"), {"domain": result.get('domain', '')}).fetchone()
-                    
-                    if existing_id:
-                        id_domain = existing_id[0]
-                        log_print(f"[DATABASE] Domain already exists with id_domain={id_domain}. Using existing ID.")
-                        
-                        # Update image_base64 if available
-                        if result.get('image_base64'):
-                             conn.execute(text("UPDATE generated_domains SET image_base64 = :image_base64 WHERE id_domain = :id_domain"), 
-                                         {"image_base64": result.get('image_base64'), "id_domain": id_domain})
-                             log_print(f"[DATABASE] Updated image_base64 for id_domain={id_domain}")
-                    else:
-                        # Insert into generated_domains
-                        insert_result = conn.execute(text("""
-                            INSERT INTO generated_domains (url, title, domain, image_base64)
-                            VALUES (:url, :title, :domain, :image_base64)
-                            RETURNING id_domain
-                        """), {
-                            "url": result.get('url', ''),
-                            "title": result.get('title', '')[:255],  # Limit to 255 chars
-                            "domain": result.get('domain', ''),
-                            "image_base64": result.get('image_base64')
-                        })
-                        id_domain = insert_result.fetchone()[0]
-                        log_print(f"[DATABASE] Inserted into generated_domains with id_domain={id_domain}")
-                    
-                    saved_count += 1
-                    
-                    # Prepare detection data if available
-                    id_detection = None
-                    label_final = None
-                    final_confidence = None
-                    image_detected_path = None
-                    image_base64 = None  # Initialize image_base64
-                    
-                    # Variables to track detection and reasoning confidences for fusion
-                    detection_confidence_score = None
-                    reasoning_confidence_score = None
-                    
-                    # If detection API was successful, save to object_detection table
-                    if result.get('detection_status') == 'success' and result.get('detection_api_response'):
-                        api_response = result['detection_api_response']
-                        api_result = api_response.get('result', {})
-                        
-                        # Transform data
-                        status = api_result.get('status', '')
-                        label = True if status == 'gambling' else False
-                        label_final = label
-                        
-                        # Use prob_fusion as the confidence score (this is what the API actually returns)
-                        confidence = api_result.get('prob_fusion', 0.0)
-                        confidence_score = round(confidence * 100, 1)  # Convert to percentage (0-100)
-                        detection_confidence_score = confidence_score  # Store for fusion
-                        
-                        # Visualization path from API contains the Base64 string
-                        image_base64 = api_result.get('visualization_path', '')
-                        
-                        id_detection = api_result.get('id')
-                        
-                        # Check if detection exists for this domain
-                        existing_detection = conn.execute(text("SELECT 1 FROM object_detection WHERE id_domain = :id_domain"), {"id_domain": id_domain}).fetchone()
-                        
-                        detection_params = {
-                            "id_detection": id_detection,
-                            "id_domain": id_domain,
-                            "label": label,
-                            "confidence_score": confidence_score,
-                            "image_detected_base64": image_base64,
-                            "bounding_box": json.dumps(api_result.get('detections', [])),
-                            "ocr": json.dumps(api_result.get('ocr', [])),
-                            "model_version": None
-                        }
-
-                        if existing_detection:
-                            conn.execute(text("""
-                                UPDATE object_detection SET
-                                    id_detection = :id_detection,
-                                    label = :label,
-                                    confidence_score = :confidence_score,
-                                    image_detected_base64 = :image_detected_base64,
-                                    bounding_box = :bounding_box,
-                                    ocr = :ocr,
-                                    model_version = :model_version,
-                                    processed_at = now()
-                                WHERE id_domain = :id_domain
-                            """), detection_params)
-                        else:
-                            conn.execute(text("""
-                                INSERT INTO object_detection (
-                                    id_detection,
-                                    id_domain,
-                                    label,
-                                    confidence_score,
-                                    image_detected_base64,
-                                    bounding_box,
-                                    ocr,
-                                    model_version
-                                ) VALUES (
-                                    :id_detection,
-                                    :id_domain,
-                                    :label,
-                                    :confidence_score,
-                                    :image_detected_base64,
-                                    :bounding_box,
-                                    :ocr,
-                                    :model_version
-                                )
-                            """), detection_params)
-                        detection_saved_count += 1
-                        log_print(f"[DATABASE] Inserted into object_detection")
-                    
-                    # Prepare reasoning data if available
-                    id_reasoning = None
-                    reasoning_text = None
-                    
-                    # If reasoning API was successful, save to reasoning table
-                    if result.get('reasoning_status') == 'success' and result.get('reasoning_api_response'):
-                        reasoning_response = result['reasoning_api_response']
-                        
-                        # Extract data from reasoning API response
-                        reasoning_label_str = reasoning_response.get('label', 'non_judi')
-                        reasoning_label = True if reasoning_label_str == 'judi' else False
-                        reasoning_text = reasoning_response.get('reasoning', '')
-                        reasoning_confidence = reasoning_response.get('confidence', 0.0)
-                        reasoning_confidence_raw = round(reasoning_confidence * 100, 1)  # Convert to percentage (0-100)
-                        
-                        # For reasoning: if label is non-judi, inverse the confidence
-                        # This aligns reasoning confidence with gambling detection scale
-                        if reasoning_label_str == 'non_judi':
-                            reasoning_confidence_score = round(100 - reasoning_confidence_raw, 1)
-                        else:
-                            reasoning_confidence_score = reasoning_confidence_raw
-                        
-                        metadata = reasoning_response.get('metadata', {})
-                        model_source = metadata.get('model_source', 'unknown')
-                        
-                        # Update label_final if not set by detection
-                        if label_final is None:
-                            label_final = reasoning_label
-                        
-                        # Insert into reasoning table
-                        try:
-                            # Check if reasoning exists for this domain
-                            existing_reasoning = conn.execute(text("SELECT id_reasoning FROM reasoning WHERE id_domain = :id_domain"), {"id_domain": id_domain}).fetchone()
-                            
-                            
-                            reasoning_params = {
-                                "id_domain": id_domain,
-                                "label": reasoning_label,
-                                "context": reasoning_text,
-                                "confidence_score": reasoning_confidence_score,  # Already inverted for non-judi to align with gambling scale
-                                "model_version": model_source
-                            }
-                            
-                            if existing_reasoning:
-                                # UPDATE existing reasoning
-                                conn.execute(text("""
-                                    UPDATE reasoning SET
-                                        label = :label,
-                                        context = :context,
-                                        confidence_score = :confidence_score,
-                                        model_version = :model_version,
-                                        processed_at = now()
-                                    WHERE id_domain = :id_domain
-                                """), reasoning_params)
-                                id_reasoning = existing_reasoning[0]
-                                log_print(f"[DATABASE] Updated reasoning with id_reasoning={id_reasoning}")
-                            else:
-                                # INSERT new reasoning
-                                insert_result = conn.execute(text("""
-                                    INSERT INTO reasoning (
-                                        id_domain,
-                                        label,
-                                        context,
-                                        confidence_score,
-                                        model_version
-                                    ) VALUES (
-                                        :id_domain,
-                                        :label,
-                                        :context,
-                                        :confidence_score,
-                                        :model_version
-                                    )
-                                    RETURNING id_reasoning
-                                """), reasoning_params)
-                                id_reasoning = insert_result.fetchone()[0]
-                                log_print(f"[DATABASE] Inserted into reasoning with id_reasoning={id_reasoning}")
-                        except Exception as reasoning_error:
-                            print(f"[DATABASE] Failed to insert/update reasoning: {str(reasoning_error)}", flush=True)
-                    
-                    # Calculate final_confidence using fusion of detection and reasoning
-                    # Fusion: 50% object_detection + 50% reasoning
-                    if detection_confidence_score is not None and reasoning_confidence_score is not None:
-                        # Both available: 50-50 fusion
-                        final_confidence = round((detection_confidence_score * 0.5) + (reasoning_confidence_score * 0.5), 1)
-                        log_print(f"[FUSION] Detection: {detection_confidence_score}%, Reasoning: {reasoning_confidence_score}% → Final: {final_confidence}%")
-                    elif detection_confidence_score is not None:
-                        # Only detection available: max 50% contribution
-                        final_confidence = round(detection_confidence_score * 0.5, 1)
-                        log_print(f"[FUSION] Only detection available: {detection_confidence_score}% × 0.5 = {final_confidence}%")
-                    elif reasoning_confidence_score is not None:
-                        # Only reasoning available: max 50% contribution
-                        final_confidence = round(reasoning_confidence_score * 0.5, 1)
-                        log_print(f"[FUSION] Only reasoning available: {reasoning_confidence_score}% × 0.5 = {final_confidence}%")
-                    else:
-                        # Neither available
-                        final_confidence = None
-                        log_print(f"[FUSION] No confidence data available")
-                    
-                    # Insert or update results table with created_by tracking
-                    # properties for results
-                    results_params = {
-                        "id_domain": id_domain,
-                        "id_reasoning": id_reasoning,
-                        "id_detection": id_detection,
-                        "url": result.get('url', ''),
-                        "keywords": keyword,
-                        "reasoning_text": reasoning_text,
-                        "image_final_path": image_base64 or image_path,
-                        "label_final": label_final,
-                        "final_confidence": final_confidence,
-                        "created_by": username,
-                        "modified_by": username
-                    }
-                    
-                    # Check if result for this domain already exists
-                    existing_result = conn.execute(text("SELECT 1 FROM results WHERE id_domain = :id_domain"), {"id_domain": id_domain}).fetchone()
-                    
-                    try:
-                        if existing_result:
-                            # UPDATE
-                            log_print(f"[DATABASE] Updating existing result for id_domain={id_domain}")
-                            conn.execute(text("""
-                                UPDATE results SET
-                                    id_reasoning = :id_reasoning,
-                                    id_detection = :id_detection,
-                                    url = :url,
-                                    keywords = :keywords,
-                                    reasoning_text = :reasoning_text,
-                                    image_final_path = :image_final_path,
-                                    label_final = :label_final,
-                                    final_confidence = :final_confidence,
-                                    modified_by = :modified_by,
-                                    modified_at = now()
-                                WHERE id_domain = :id_domain
-                            """), results_params)
-                            log_print(f"[DATABASE] Updated existing result for id_domain={id_domain}")
-                        else:
-                            # INSERT
-                            log_print(f"[DATABASE] Inserting new result for id_domain={id_domain}")
-                            print(f"[DATABASE] Params: label_final={results_params.get('label_final')}, confidence={results_params.get('final_confidence')}", flush=True)
-                            conn.execute(text("""
-                                INSERT INTO results (
-                                    id_domain,
-                                    id_reasoning,
-                                    id_detection,
-                                    url,
-                                    keywords,
-                                    reasoning_text,
-                                    image_final_path,
-                                    label_final,
-                                    final_confidence,
-                                    status,
-                                    created_by,
-                                    created_at,
-                                    modified_by,
-                                    modified_at
-                                ) VALUES (
-                                    :id_domain,
-                                    :id_reasoning,
-                                    :id_detection,
-                                    :url,
-                                    :keywords,
-                                    :reasoning_text,
-                                    :image_final_path,
-                                    :label_final,
-                                    :final_confidence,
-                                    'unverified',
-                                    :created_by,
-                                    now(),
-                                    :modified_by,
-                                    now()
-                                )
-                            """), results_params)
-                            log_print(f"[DATABASE] Inserted into results")
-                        
-                        results_saved_count += 1
-                    except Exception as e:
-                        print(f"[ERROR] Failed to update/insert results table: {str(e)}", flush=True)
-                        import traceback
-                        print(f"[ERROR] Traceback: {traceback.format_exc()}", flush=True)
-                        raise  # Re-raise to be caught by outer exception handler
-                    
-                    # Add audit log entry for domain creation (optional, don't fail if it errors)
-                    try:
-                        conn.execute(text("""
-                            INSERT INTO audit_log (id_result, action, username, timestamp)
-                            SELECT id_results, 'created', :username, now()
-                            FROM results
-                            WHERE id_domain = :id_domain
-                            LIMIT 1
-                        """), {
-                            "username": username,
-                            "id_domain": id_domain
-                        })
-                        log_print(f"[DATABASE] Audit log created for id_domain={id_domain}")
-                    except Exception as audit_error:
-                        print(f"[WARN] Failed to create audit log (non-critical): {str(audit_error)[:100]}", flush=True)
-                    
-                    print(f"[DATABASE] Record {idx+1}/{len(all_results)} saved successfully", flush=True)
-                    
-                except Exception as record_error:
-                    failed_count += 1
-                    print(f"[DATABASE] ERROR saving record {idx+1}: {str(record_error)}", flush=True)
-                    import traceback
-                    print(f"[DATABASE] Record error traceback: {traceback.format_exc()}", flush=True)
-                    # Continue with next record instead of failing completely
-            
-            log_print(f"[DATABASE] ===== SAVE SUMMARY =====")
-            log_print(f"[DATABASE] Successfully saved {saved_count} domains to generated_domains")
-            log_print(f"[DATABASE] Successfully saved {detection_saved_count} detection results to object_detection")
-            log_print(f"[DATABASE] Successfully saved {results_saved_count} results with created_by={username}")
-            log_print(f"[DATABASE] Failed records: {failed_count}")
-            log_print(f"[DATABASE] ===========================")
-            return saved_count > 0  # Return True if at least one record was saved
-            
+                    add_counts(_write_db_batch(cur, [record], username))
+                    cur.execute("RELEASE SAVEPOINT save_row")
+                    saved_domains.append(record["domain"])
+                except Exception as row_error:
+                    cur.execute("ROLLBACK TO SAVEPOINT save_row")
+                    stats["failed"] += 1
+                    stats["errors"].append({"id": record["key"], "domain": record["domain"], "error": str(row_error)[:200]})
+                    print(f"[DATABASE] ERROR saving {record['domain']}: {str(row_error)[:200]}", flush=True)
+
+        conn.commit()
+        DOMAIN_REGISTRY.registered(saved_domains)
+
     except Exception as e:
+        if conn is not None:
+            conn.rollback()
+        stats["failed"] = len(all_results)
+        stats["saved"] = stats["detection_saved"] = stats["reasoning_saved"] = stats["results_saved"] = stats["merged"] = 0
+        stats["errors"].append({"id": None, "domain": None, "error": f"critical: {str(e)[:200]}"})
         print(f"[DATABASE] CRITICAL ERROR: Failed to save to database - {str(e)}", flush=True)
         import traceback
         print(f"[DATABASE] Traceback: {traceback.format_exc()}", flush=True)
-        return False
+    finally:
+        if conn is not None:
+            conn.close()
+
+    elapsed = time.time() - start
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["rows_per_sec"] = round(stats["saved"] / elapsed, 1) if elapsed > 0 else 0.0
+
+    if log_summary:
+        log_database_summary(stats, username)
+    return stats
+
+
+
+# End-of-stream marker passed through the pipeline queues
+_STOP = object()
+
+PIPELINE_STAGES = ("search", "filter", "screenshot", "analysis", "persist")
+
+
+def merge_db_stats(total, stats):
+    """Add the stats of one save_to_database call to a running total."""
+    for key in ("saved", "failed", "detection_saved", "reasoning_saved", "results_saved", "merged", "batches"):
+        total[key] += stats[key]
+    total["errors"].extend(stats["errors"])
+    total["elapsed_seconds"] = round(total["elapsed_seconds"] + stats["elapsed_seconds"], 3)
+    total["rows_per_sec"] = (
+        round(total["saved"] / total["elapsed_seconds"], 1) if total["elapsed_seconds"] > 0 else 0.0
+    )
+    return total
+
+
+class CrawlPipeline:
+    """
+    Streaming crawl: search -> filter -> screenshot -> analysis -> persist.
+
+    Stages are connected by bounded asyncio queues and run concurrently, so a
+    domain moves on as soon as its own screenshot is done instead of waiting
+    for the whole batch. Each stage has its own concurrency limit; a full
+    queue makes the upstream stage wait (backpressure). Wall time approaches
+    the slowest stage instead of the sum of all stages.
+
+    Per-item step latencies (search, screenshot launch/acquire/navigate/
+    capture/encode, detection, scrape, reasoning, DB save) and the time items
+    wait in each stage's queue are recorded in `timings` (CrawlMetrics) and
+    reported in stage_metrics events and the summary.
+    """
+
+    def __init__(self, target_domains, current_id, keyword, username, allow_duplicates=False):
+        """
+        Args:
+            target_domains: Number of domains to accept in the filter stage
+            current_id: First crawl ID to hand out
+            keyword: Keyword string stored with the results
+            username: Username for created_by tracking
+            allow_duplicates: Accept already-seen domains (manual mode)
+        """
+        self.target_domains = target_domains
+        self.current_id = current_id
+        self.keyword = keyword
+        self.username = username
+        self.allow_duplicates = allow_duplicates
+
+        self.screenshot_workers = SCREENSHOT_BROWSERS * SCREENSHOT_PAGES_PER_BROWSER
+        # Enough analysis workers to keep the reasoning dispatcher's limit filled
+        self.analysis_workers = MAX_WORKERS_DETECTION + REASONING_MAX_CONCURRENCY
+
+        self.filter_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.screenshot_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.analysis_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.persist_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+        self.detection_limit = asyncio.Semaphore(MAX_WORKERS_DETECTION)
+        self.scrape_limit = asyncio.Semaphore(MAX_WORKERS_DETECTION)
+        self.scraper = None
+        self.scrape_stats = None
+        self.image_pipeline = ImagePipeline(
+            OUTPUT_IMG_DIR,
+            image_format=SCREENSHOT_FORMAT,
+            quality=SCREENSHOT_QUALITY,
+            thumbnail_width=THUMBNAIL_WIDTH,
+            thumbnail_quality=THUMBNAIL_QUALITY,
+            log=lambda message: log_print(message),
+        )
+        self.content_sources = {"dom": 0, "fetch": 0, "none": 0}  # where reasoning content came from
+        self.reasoning = None
+        self.reasoning_stats = None
+        self.reasoning_cache = create_reasoning_cache()
+        self.screenshot_dedup = create_screenshot_dedup()
+
+        self.results = []
+        self.new_domains = []
+        self.screenshots_done = 0
+        self.screenshot_stats = None
+        self.upstream_stats = {}
+        self.db_stats = {
+            "saved": 0,
+            "failed": 0,
+            "detection_saved": 0,
+            "reasoning_saved": 0,
+            "results_saved": 0,
+            "merged": 0,
+            "batches": 0,
+            "elapsed_seconds": 0.0,
+            "rows_per_sec": 0.0,
+            "errors": [],
+        }
+
+        self._started = None
+        self.progress = ProgressTracker(target_domains)
+        self.timings = CrawlMetrics()
+        self.finished_stages = set()
+        self.stage_metrics = {
+            stage: {"items": 0, "busy_seconds": 0.0, "first_start": None, "last_end": None}
+            for stage in PIPELINE_STAGES
+        }
+
+    def _record_stage(self, stage, started, items=1):
+        ended = time.perf_counter()
+        metrics = self.stage_metrics[stage]
+        metrics["items"] += items
+        metrics["busy_seconds"] += ended - started
+        if metrics["first_start"] is None:
+            metrics["first_start"] = started
+        metrics["last_end"] = ended
+
+    @staticmethod
+    def _item_status(stage, result):
+        if stage == "filter":
+            return "accepted"
+        if stage == "screenshot":
+            return result.get("screenshot_status", "failed")
+        if result.get("screenshot_status") != "success":
+            return "skipped"
+        analysis_ok = result.get("detection_status") == "success" and result.get("reasoning_status") == "success"
+        return "success" if analysis_ok else "failed"
+
+    def _emit_stage_metrics(self, stage, finished=True):
+        if finished:
+            self.finished_stages.add(stage)
+        emit_event("stage_metrics", stage=stage, finished=finished, **self._stage_metrics(stage),
+                   timings=self.timings.snapshot(stage), buckets_ms=LATENCY_BUCKETS_MS)
+
+    async def _report_metrics(self):
+        """Live stage_metrics of the running stages every METRICS_INTERVAL seconds."""
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            for stage in PIPELINE_STAGES:
+                if self.stage_metrics[stage]["first_start"] is not None and stage not in self.finished_stages:
+                    self._emit_stage_metrics(stage, finished=False)
+
+    async def _put(self, queue, item):
+        """Enqueue with a timestamp, so the consumer can record how long the item waited."""
+        await queue.put((time.perf_counter(), item))
+
+    def _waited(self, stage, envelope):
+        queued_at, item = envelope
+        if item is not _STOP:
+            self.timings.observe(stage, "queue_wait", time.perf_counter() - queued_at)
+        return item
+
+    def _failed_item(self, stage, item):
+        """
+        What a stage passes on when its handler raised: a search result that
+        failed filtering is dropped (it has no domain to save), a result goes on
+        with the stage's statuses marked failed.
+        """
+        if stage == "screenshot":
+            item["screenshot_status"] = "failed"
+            return item
+        if stage == "analysis":
+            for status in ("detection_status", "reasoning_status"):
+                if item.get(status) != "success":
+                    item[status] = "failed"
+            return item
+        return None
+
+    async def _run_stage(self, stage, workers, handler, inbox, outbox, outbox_consumers):
+        """
+        Run `workers` consumers of `inbox`. `handler(item)` returns the item to
+        pass on, or None to drop it. Closes `outbox` with one stop marker per
+        downstream consumer once every worker has seen its stop marker.
+        """
+        async def worker():
+            while True:
+                item = self._waited(stage, await inbox.get())
+                if item is _STOP:
+                    return
+                started = time.perf_counter()
+                try:
+                    item = await handler(item)
+                except Exception as e:
+                    print(f"[PIPELINE] {stage} error: {str(e)[:100]}", flush=True)
+                    item = self._failed_item(stage, item)
+                self._record_stage(stage, started)
+                if item is not None:
+                    emit_event("item_progress", stage=stage, item_id=item.get("id"), domain=item.get("domain"),
+                               status=self._item_status(stage, item))
+                if item is not None and outbox is not None:
+                    await self._put(outbox, item)
+
+        emit_event("stage_started", stage=stage, workers=workers)
+        try:
+            await asyncio.gather(*[worker() for _ in range(workers)])
+        finally:
+            if outbox is not None:
+                for _ in range(outbox_consumers):
+                    await self._put(outbox, _STOP)
+            self._emit_stage_metrics(stage)
+
+    async def search_stage(self, fetch_results):
+        """Run the (blocking) search in a thread and feed its results to the filter."""
+        emit_event("stage_started", stage="search", workers=1)
+        started = time.perf_counter()
+        try:
+            with self.timings.time("search", "search"):
+                results = await asyncio.to_thread(fetch_results)
+            self._record_stage("search", started)
+            if not results:
+                log_print("[ERROR] No search results found")
+                return
+            print(f"[SEARCH] Found {len(results)} search results", flush=True)
+            for r in results:
+                await self._put(self.filter_queue, r)
+        except Exception as e:
+            log_print(f"[ERROR] Search failed: {str(e)[:200]}")
+        finally:
+            await self._put(self.filter_queue, _STOP)
+            self._emit_stage_metrics("search")
+
+    async def filter_item(self, r):
+        # Keep draining after the target so the search stage never blocks on a full queue
+        if len(self.results) >= self.target_domains:
+            return None
+
+        domain = extract_domain(r.get("href", "-"))
+
+        # Check various conditions to skip URL
+        if domain == "unknown":
+            print(f"[FILTER] Skipped invalid domain from URL: {r.get('href', '-')[:50]}...", flush=True)
+            return None
+
+        if is_domain_blocked(domain):
+            log_print(f"[FILTER] Skipped blocked domain: {domain}")
+            return None
+
+        # A Bloom filter hit is confirmed with a DB lookup, keep that off the event loop
+        if await asyncio.to_thread(is_domain_duplicate, domain):
+            if self.allow_duplicates:
+                log_print(f"[FILTER] Domain {domain} is duplicate but allowing in MANUAL mode")
+            else:
+                log_print(f"[FILTER] Skipped duplicate domain: {domain}")
+                return None
+
+        # All checks passed - this is a valid domain
+        result = build_result(r, self.current_id + len(self.results))
+        self.results.append(result)
+        self.new_domains.append(domain)
+        add_domain_to_set(domain)
+        print(f"[FILTER] Added domain ({len(self.results)}/{self.target_domains}): {domain}", flush=True)
+        return result
+
+    async def capture_item(self, result):
+        url = result.get("url", "")
+        item_id = result.get("id", "unknown")
+
+        if not url or url == "-":
+            result["screenshot_status"] = "skipped"
+            return result
 
+        status = await self.screenshot_engine.capture(url, None, item_id)
+        timings = dict(status["timings"])
+        if status["success"]:
+            # The PNG bytes stop here; later stages only get the file paths
+            try:
+                image = await self.image_pipeline.save(status.pop("png"), item_id)
+                timings["encode"] = image["encode_seconds"]
+                result["screenshot_path"] = image["path"]
+                result["thumbnail_path"] = image["thumbnail_path"]
+                result["screenshot_mime_type"] = image["mime_type"]
+                result["screenshot_bytes"] = image["bytes"]
+            except Exception as e:
+                print(f"[SCREENSHOT ERROR] {item_id}: encoding failed: {str(e)[:100]}")
+                status["success"] = False
+
+        for step, seconds in timings.items():
+            self.timings.observe("screenshot", step, seconds)
+        result["screenshot_status"] = "success" if status["success"] else "failed"
+        result["screenshot_timings_ms"] = {
+            stage: round(seconds * 1000, 1)
+            for stage, seconds in timings.items()
+        }
+        if status["settle"]:
+            result["screenshot_settle_reason"] = status["settle"]["reason"]
+        if status.get("content"):
+            result["page_content"] = status["content"]
+
+        self.screenshots_done += 1
+        status_symbol = "✓" if status["success"] else "✗"
+        print(f"[SCREENSHOT] [{self.screenshots_done}/{len(self.results)}] {item_id} {status_symbol}", flush=True)
+        return result
+
+    async def _detect(self, result):
+        screenshot_path = result['screenshot_path']
+
+        async def compute():
+            async with self.detection_limit:
+                with self.timings.time("analysis", "detection"):
+                    return await send_to_detection_api(
+                        self.http.detection, screenshot_path, result['id'], result['screenshot_mime_type']
+                    )
+
+        if self.screenshot_dedup is not None:
+            api_response, dedup = await self.screenshot_dedup.detect(screenshot_path, result['id'], compute)
+            result['screenshot_phash'] = dedup['phash'] if self.screenshot_dedup.persistent else None
+            result['detection_source'] = dedup['source']
+            if dedup['source'] != 'api' and api_response:
+                print(f"[DETECTION API] {result['id']}: ✓ reused from {dedup['duplicate_of']} "
+                      f"({dedup['source']}, distance {dedup['distance']})")
+        else:
+            api_response = await compute()
+        if api_response:
+            result['detection_api_response'] = api_response
+            result['detection_status'] = 'success'
+        else:
+            result['detection_status'] = 'failed'
+
+    async def _reason(self, result):
+        """Reasoning on the DOM content captured with the screenshot (or a direct scrape), through the dispatcher."""
+        content = result.pop('page_content', None)
+        if content and (content.get('title') or content.get('description') or content.get('paragraphs')):
+            scraped = scraped_fields(
+                result.get('url', ''), content.get('title'), content.get('description'),
+                content.get('keywords'), content.get('paragraphs') or [],
+            )
+            self.content_sources["dom"] += 1
+        else:
+            async with self.scrape_limit:
+                with self.timings.time("analysis", "scrape"):
+                    scraped = await scrape_website_direct(self.scraper, result.get('url', ''), result['id'])
+            self.content_sources["fetch" if scraped else "none"] += 1
+        api_response = None
+        if scraped:
+            with self.timings.time("analysis", "reasoning"):
+                api_response = await call_reasoning_llm(self.reasoning, scraped, result['id'], self.reasoning_cache)
+        if api_response:
+            result['reasoning_api_response'] = api_response
+            result['reasoning_status'] = 'success'
+        else:
+            result['reasoning_status'] = 'failed'
+
+    async def analyze_item(self, result):
+        """Detection and reasoning run side by side; only for successful screenshots."""
+        if result.get('screenshot_status') != 'success':
+            return result
+        # Both finish before the result moves on; an error marks only its own half failed
+        outcomes = await asyncio.gather(self._detect(result), self._reason(result), return_exceptions=True)
+        for status, outcome in zip(("detection_status", "reasoning_status"), outcomes):
+            if isinstance(outcome, Exception):
+                print(f"[PIPELINE] analysis {status.split('_')[0]} error for {result.get('id')}: "
+                      f"{str(outcome)[:100]}", flush=True)
+                result[status] = "failed"
+        return result
+
+    async def _flush(self, batch):
+        started = time.perf_counter()
+        with self.timings.time("persist", "db_save"):
+            stats = await asyncio.to_thread(save_to_database, batch, self.keyword, self.username, False)
+        merge_db_stats(self.db_stats, stats)
+        self._record_stage("persist", started, items=len(batch))
+        # An item is done once it is written; success means its screenshot was taken
+        for result in batch:
+            success = result.get("screenshot_status") == "success"
+            emit_event("item_result", item_id=result.get("id"), domain=result.get("domain"),
+                       status="success" if success else "failed",
+                       screenshot=result.get("screenshot_status"), detection=result.get("detection_status"),
+                       reasoning=result.get("reasoning_status"), **self.progress.add(success))
+
+    async def persist_stage(self):
+        """Write finished results in batches of DB_BATCH_SIZE, or every PERSIST_FLUSH_SECONDS."""
+        emit_event("stage_started", stage="persist", workers=1)
+        loop = asyncio.get_running_loop()
+        batch = []
+        flush_at = None
+        while True:
+            timeout = max(0.0, flush_at - loop.time()) if batch else None
+            try:
+                item = self._waited("persist", await asyncio.wait_for(self.persist_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                await self._flush(batch)
+                batch = []
+                continue
 
+            if item is _STOP:
+                break
+            batch.append(item)
+            if len(batch) == 1:
+                flush_at = loop.time() + PERSIST_FLUSH_SECONDS
+            if len(batch) >= DB_BATCH_SIZE:
+                await self._flush(batch)
+                batch = []
+
+        if batch:
+            await self._flush(batch)
+        self._emit_stage_metrics("persist")
+
+    async def run(self, fetch_results):
+        """
+        Run the whole pipeline.
+
+        Args:
+            fetch_results: Blocking callable returning the search results
+                (list of {"title", "href", "body"} dicts)
+        """
+        self._started = time.perf_counter()
+        self.progress = ProgressTracker(self.target_domains)
+        self.screenshot_engine, settle_store = create_screenshot_engine(
+            on_launch=lambda seconds: self.timings.observe("screenshot", "launch", seconds)
+        )
+        if self.reasoning_cache is not None:
+            pruned = await asyncio.to_thread(self.reasoning_cache.prune)
+            if pruned:
+                log_print(f"[REASONING CACHE] Pruned {pruned} expired entries")
+        if self.screenshot_dedup is not None:
+            loaded = await asyncio.to_thread(self.screenshot_dedup.load)
+            log_print(f"[DEDUP] Loaded {loaded} screenshot hashes from earlier runs")
+
+        async with self.screenshot_engine, HttpClients(
+            pool_size=MAX_WORKERS_DETECTION,
+            http2=HTTP_ENABLE_HTTP2,
+            retries=HTTP_RETRIES,
+            reasoning_pool_size=REASONING_MAX_CONCURRENCY,
+        ) as http_clients, ReasoningDispatcher(
+            http_clients.reasoning,
+            REASONING_MAX_TOKENS,
+            initial_concurrency=REASONING_INITIAL_CONCURRENCY,
+            min_concurrency=REASONING_MIN_CONCURRENCY,
+            max_concurrency=REASONING_MAX_CONCURRENCY,
+            token_budget=REASONING_TOKEN_BUDGET,
+            batch_size=REASONING_BATCH_SIZE,
+            batch_wait=REASONING_BATCH_WAIT_MS / 1000,
+        ) as reasoning:
+            self.http = http_clients
+            self.reasoning = reasoning
+            self.scraper = PageScraper(http_clients.scrape, max_bytes=SCRAPE_MAX_BYTES)
+
+            reporter = asyncio.create_task(self._report_metrics())
+            try:
+                await asyncio.gather(
+                    self.search_stage(fetch_results),
+                    self._run_stage("filter", 1, self.filter_item,
+                                    self.filter_queue, self.screenshot_queue, self.screenshot_workers),
+                    self._run_stage("screenshot", self.screenshot_workers, self.capture_item,
+                                    self.screenshot_queue, self.analysis_queue, self.analysis_workers),
+                    self._run_stage("analysis", self.analysis_workers, self.analyze_item,
+                                    self.analysis_queue, self.persist_queue, 1),
+                    self.persist_stage(),
+                )
+            finally:
+                reporter.cancel()
+            self.screenshot_stats = self.screenshot_engine.stats()
+            self.upstream_stats = http_clients.stats()
+            self.reasoning_stats = reasoning.stats()
+            self.scrape_stats = self.scraper.stats()
+
+        if settle_store is not None:
+            settle_store.save()
+            self.screenshot_stats["learned_domains"] = len(settle_store)
+
+    def _stage_metrics(self, stage):
+        metrics = self.stage_metrics[stage]
+        first_start = metrics["first_start"]
+        last_end = metrics["last_end"]
+        return {
+            "items": metrics["items"],
+            "busy_seconds": round(metrics["busy_seconds"], 3),
+            "started_at": round(first_start - self._started, 3) if first_start else None,
+            "finished_at": round(last_end - self._started, 3) if last_end else None,
+        }
 
+    def metrics(self):
+        """Per-stage item counts, busy time and active window (seconds since start)."""
+        stages = {stage: self._stage_metrics(stage) for stage in self.stage_metrics}
+        return {
+            "wall_seconds": round(time.perf_counter() - self._started, 3) if self._started else 0.0,
+            "queue_size": PIPELINE_QUEUE_SIZE,
+            "workers": {
+                "screenshot": self.screenshot_workers,
+                "analysis": self.analysis_workers,
+                "detection": MAX_WORKERS_DETECTION,
+                "reasoning": self.reasoning.max_concurrency if self.reasoning else REASONING_MAX_CONCURRENCY,
+            },
+            "stages": stages,
+        }
 
 
 def main():
-    # Initialize log file for real-time streaming
-    init_log_file()
-    
+    global LOG_FILE
+
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description='Domain Generator')
     parser.add_argument('-n', '--domain-count', type=int, default=10, help='Number of domains to generate')
     parser.add_argument('-k', '--keywords', type=str, help='Comma-separated list of keywords')
     parser.add_argument('-u', '--username', type=str, default='system', help='Username for created_by tracking')
     parser.add_argument('-d', '--domains', type=str, help='Comma-separated list of domains to process manually (skips search)')
+    parser.add_argument('--job-id', type=str, help='Backend crawler job ID (logs to output/jobs/<job_id>.log)')
     args = parser.parse_args()
+
+    # Concurrent jobs must not share crawler.log
+    if args.job_id:
+        os.makedirs(JOB_LOG_DIR, exist_ok=True)
+        LOG_FILE = os.path.join(JOB_LOG_DIR, f"{os.path.basename(args.job_id)}.log")
+
+    # Initialize log file for real-time streaming
+    init_log_file()
     
     # Track start time
     start_time = time.time()
@@ -1124,9 +1580,12 @@ def main():
     # Load existing domains, blocked domains, and blocked keywords first
     log_print("[INIT] Loading existing domains, blocked domains, and blocked keywords...")
     load_seen_domains()
-    load_blocked_domains()
-    blocked_keywords = load_blocked_keywords()
-    log_print(f"[INIT] Loaded {len(SEEN_DOMAINS)} existing domains, {len(BLOCKED_DOMAINS)} blocked domains, {len(blocked_keywords)} blocked keywords")
+    settings = GENERATOR_SETTINGS.reload()
+    GENERATOR_SETTINGS.on_change(on_settings_changed)
+    GENERATOR_SETTINGS.start_listener()
+    log_blocked_domain_rules(settings.blocked_domains)
+    blocked_keywords = settings.blocked_keywords
+    log_print(f"[INIT] Loaded {DOMAIN_REGISTRY.loaded} existing domains, {len(settings.blocked_domains)} blocked domain rules, {len(blocked_keywords)} blocked keywords")
 
     # Get keywords - either from args, last keywords, or stdin
     # If manual domains are provided, we don't need keywords for search, but we need a value for the variable
@@ -1172,11 +1631,10 @@ def main():
     MAX_RESULT = target_domains
     
     # Get search results or use manual domains
-    results = []
-    
     if args.domains:
         log_print("[MODE] Manual domain entry mode")
         # Process manual domains
+        manual_results = []
         manual_domains = [d.strip() for d in args.domains.split(',') if d.strip()]
         for domain in manual_domains:
             # Basic cleanup - remove protocol if present to get clean domain, but keep full URL for fetching
@@ -1190,16 +1648,19 @@ def main():
                 if not url.startswith('http'):
                     url = f"https://{url}"
             
-            results.append({
+            manual_results.append({
                 "title": f"Manual Entry: {clean_domain}",
                 "href": url,
                 "body": "Manual entry"
             })
             
-        print(f"[MANUAL] Loaded {len(results)} domains for processing", flush=True)
+        print(f"[MANUAL] Loaded {len(manual_results)} domains for processing", flush=True)
         # Override target domains to match input length if in manual mode
-        target_domains = len(results)
+        target_domains = len(manual_results)
         MAX_RESULT = target_domains
+
+        def fetch_results():
+            return manual_results
         
     else:
         # SEARCH MODE
@@ -1212,87 +1673,111 @@ def main():
             query += ' ' + ' '.join(f'-{kw}' for kw in blocked_keywords)
         log_print(f"[SEARCH] Starting search with query: {keywords} + blocked domains")
         
-        # Get search results
-        log_print("[SEARCH] Fetching search results from DuckDuckGo...")
-        results = DDGS().text(query, max_results=target_domains * 5)  # Get more results to handle filtering
-        
-        if not results:
-            log_print("[ERROR] No search results found")
-            return
-        
-        print(f"[SEARCH] Found {len(results)} search results", flush=True)
+        def fetch_results():
+            log_print("[SEARCH] Fetching search results from DuckDuckGo...")
+            return DDGS().text(query, max_results=target_domains * 5)  # Get more results to handle filtering
     
     # Get last ID and start from next
     last_id = get_last_id()
     current_id = last_id + 1
     
     log_print(f"[INIT] Starting ID: {current_id:08d}")
-    print(f"[FILTER] Filtering domains (target: {target_domains})...", flush=True)
-    
-    # Process results until we have target_domains valid domains
-    new_domains_list = []
-    filtered_no_duplicates = []
-    
-    for r in results:
-        if len(filtered_no_duplicates) >= target_domains:
-            break
-        
-        domain = extract_domain(r.get("href", "-"))
-        
-        # Check various conditions to skip URL
-        if domain == "unknown":
-            print(f"[FILTER] Skipped invalid domain from URL: {r.get('href', '-')[:50]}...", flush=True)
-            continue
-        
-        if is_domain_blocked(domain):
-            log_print(f"[FILTER] Skipped blocked domain: {domain}")
-            continue
-        
-        if is_domain_duplicate(domain):
-            if args.domains:
-                log_print(f"[FILTER] Domain {domain} is duplicate but allowing in MANUAL mode")
-            else:
-                log_print(f"[FILTER] Skipped duplicate domain: {domain}")
-                continue
-        
-        # All checks passed - this is a valid domain
-        filtered_no_duplicates.append(r)
-        new_domains_list.append(domain)
-        add_domain_to_set(domain)
-        print(f"[FILTER] Added domain ({len(filtered_no_duplicates)}/{target_domains}): {domain}", flush=True)
-    
-    if not filtered_no_duplicates:
+
+    # Stream every domain through search -> filter -> screenshot -> detection/reasoning -> database
+    print(f"[PIPELINE] Starting pipeline (target: {target_domains})...", flush=True)
+    pipeline = CrawlPipeline(
+        target_domains,
+        current_id,
+        ', '.join(keywords),
+        args.username,
+        allow_duplicates=bool(args.domains),
+    )
+    asyncio.run(pipeline.run(fetch_results))
+
+    if not pipeline.results:
         log_print("[ERROR] No valid domains found after filtering")
+        finish_log_file(success=False)
         return
-    
-    print(f"[FILTER] Filtering complete. Total valid domains: {len(filtered_no_duplicates)}", flush=True)
-    
-    # Process URLs with multithreading for fetching
-    print(f"[FETCH] Starting to fetch {len(filtered_no_duplicates)} URLs...", flush=True)
-    all_results = []
-    
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS_FETCH) as executor:
-        futures = {
-            executor.submit(fetch_url_data, url_item, idx + 1, current_id + idx): idx
-            for idx, url_item in enumerate(filtered_no_duplicates)
-        }
-        
-        for future in as_completed(futures):
-            result = future.result()
-            all_results.append(result)
-            print(f"[FETCH] Fetched {len(all_results)}/{len(filtered_no_duplicates)}: {result.get('domain', 'unknown')}", flush=True)
-    
+
     # Sort by ID to maintain order
-    all_results.sort(key=lambda x: int(x["id"]))
-    print(f"[FETCH] Fetch complete. Total fetched: {len(all_results)}", flush=True)
-    
-    # Process screenshots in parallel (multiprocessing)
-    print(f"[SCREENSHOT] Starting screenshot capture for {len(all_results)} URLs...", flush=True)
-    process_screenshots_parallel(all_results)
-    
-    # Process both detection and reasoning API calls for successful screenshots
-    print(f"[API] Starting parallel API calls (Detection + Reasoning) for successful screenshots...", flush=True)
-    process_apis_parallel(all_results)
+    all_results = sorted(pipeline.results, key=lambda x: int(x["id"]))
+    screenshot_stats = pipeline.screenshot_stats
+    db_stats = pipeline.db_stats
+    db_success = db_stats["saved"] > 0
+    pipeline_metrics = pipeline.metrics()
+
+    log_print(f"[FILTER] Filtering complete. Total valid domains: {len(all_results)}")
+    if screenshot_stats:
+        stages = ", ".join(
+            f"{stage} p50={values['p50_ms']:.0f}ms p95={values['p95_ms']:.0f}ms"
+            for stage, values in screenshot_stats["stages"].items()
+        )
+        print(f"[SCREENSHOT] Stage timings: {stages}")
+        if screenshot_stats["settle_reasons"]:
+            print(f"[SCREENSHOT] Settle ({screenshot_stats['settle_strategy']}): {screenshot_stats['settle_reasons']}")
+        print(
+            f"[SCREENSHOT] Pool: {screenshot_stats['launches']} launches, {screenshot_stats['recycles']} recycles, "
+            f"{screenshot_stats['crashes']} crashes, {screenshot_stats['timeouts']} timeouts"
+        )
+
+    detection_done = [r for r in all_results if r.get('detection_status')]
+    reasoning_done = [r for r in all_results if r.get('reasoning_status')]
+    print(f"[DETECTION API] Complete: {sum(1 for r in detection_done if r['detection_status'] == 'success')} success, "
+          f"{sum(1 for r in detection_done if r['detection_status'] == 'failed')} failed")
+    print(f"[REASONING API] Complete: {sum(1 for r in reasoning_done if r['reasoning_status'] == 'success')} success, "
+          f"{sum(1 for r in reasoning_done if r['reasoning_status'] == 'failed')} failed")
+    reasoning_cache_stats = pipeline.reasoning_cache.stats() if pipeline.reasoning_cache is not None else None
+    dedup_stats = pipeline.screenshot_dedup.stats() if pipeline.screenshot_dedup is not None else None
+    if dedup_stats:
+        print(f"[DEDUP] {dedup_stats['duplicates']}/{dedup_stats['checked']} screenshots reused a detection "
+              f"({dedup_stats['dedup_rate']:.0%}; this run {dedup_stats['run_hits'] + dedup_stats['coalesced']}, "
+              f"earlier runs {dedup_stats['database_hits']}), {dedup_stats['detector_calls']} detector calls")
+    if reasoning_cache_stats:
+        print(f"[REASONING CACHE] {reasoning_cache_stats['hits']}/{reasoning_cache_stats['lookups']} hits "
+              f"({reasoning_cache_stats['hit_rate']:.0%}; memory {reasoning_cache_stats['memory_hits']}, "
+              f"database {reasoning_cache_stats['database_hits']}, coalesced {reasoning_cache_stats['coalesced']}), "
+              f"~{reasoning_cache_stats['estimated_seconds_saved']:.1f}s of LLM time saved")
+    image_stats = pipeline.image_pipeline.stats()
+    if image_stats["images"]:
+        print(f"[IMAGES] {image_stats['images']} screenshots as {image_stats['format']} q{image_stats['quality']}: "
+              f"{image_stats['image_bytes_per_domain'] / 1024:.0f} KB + {image_stats['thumbnail_bytes_per_domain'] / 1024:.0f} KB "
+              f"thumbnail per domain (PNG {image_stats['png_bytes_per_domain'] / 1024:.0f} KB), "
+              f"encode p50={image_stats['encode_time']['p50_ms']:.0f}ms p95={image_stats['encode_time']['p95_ms']:.0f}ms")
+    print(f"[REASONING API] Content: {pipeline.content_sources['dom']} from rendered DOM, "
+          f"{pipeline.content_sources['fetch']} fetched, {pipeline.content_sources['none']} unavailable")
+    scrape_stats = pipeline.scrape_stats
+    if scrape_stats and scrape_stats["pages"]:
+        print(f"[SCRAPE LOCAL] {scrape_stats['pages']} pages, {scrape_stats['mean_bytes_read'] / 1024:.1f} KB read per page "
+              f"({scrape_stats['stopped_early']} stopped early, {scrape_stats['capped']} capped), "
+              f"parse p50={scrape_stats['parse_time']['p50_ms']:.1f}ms p95={scrape_stats['parse_time']['p95_ms']:.1f}ms")
+    reasoning_output_stats = REASONING_OUTPUT.stats()
+    print(f"[REASONING API] Output: {reasoning_output_stats['parsed']}/{reasoning_output_stats['responses']} parsed "
+          f"({reasoning_output_stats['repaired']} repaired, {reasoning_output_stats['parse_failures']} failed), "
+          f"{reasoning_output_stats['stopped_early']} stopped early, {reasoning_output_stats['mean_tokens']} tokens/response, "
+          f"structured output: {reasoning_output_stats['structured_output']}")
+    log_database_summary(db_stats, args.username)
+
+    for name, upstream in pipeline.upstream_stats.items():
+        latency = upstream["latency"]
+        print(
+            f"[HTTP] {name}: {upstream['requests']} requests, {upstream['errors']} errors, "
+            f"{upstream['retries']} retries, p50={latency['p50_ms']:.0f}ms p95={latency['p95_ms']:.0f}ms",
+            flush=True
+        )
+
+    for stage, metrics in pipeline_metrics["stages"].items():
+        print(
+            f"[PIPELINE] {stage}: {metrics['items']} items, busy {metrics['busy_seconds']:.1f}s, "
+            f"active {metrics['started_at']}s -> {metrics['finished_at']}s",
+            flush=True
+        )
+    log_print(f"[PIPELINE] Wall time: {pipeline_metrics['wall_seconds']:.1f}s")
+    timings = pipeline.timings.summary()
+    for stage, steps in timings.items():
+        print(f"[TIMINGS] {stage}: " + ", ".join(
+            f"{step} n={values['count']} p50={values['p50_ms']:.0f}ms p95={values['p95_ms']:.0f}ms p99={values['p99_ms']:.0f}ms"
+            for step, values in steps.items()
+        ), flush=True)
     
     # Generate timestamp
     now = datetime.utcnow()
@@ -1324,16 +1809,9 @@ def main():
     save_last_id(final_id)
     log_print(f"[SAVE] Last ID updated: {final_id:08d}")
     
-    # Save new domains to file
-    save_new_domains(new_domains_list)
-    
     # Save keywords for next use
     save_last_keywords(keywords)
     
-    # Save to database
-    print(f"[DATABASE] Saving {len(all_results)} records to database...", flush=True)
-    db_success = save_to_database(all_results, ', '.join(keywords), args.username)
-    
     # === DEBUG: cek isi all_results sebelum summary ===
     print("[DEBUG] all_results length:", len(all_results), flush=True)
     for r in all_results:
@@ -1376,7 +1854,8 @@ def main():
             "success": screenshot_success,
             "failed": screenshot_failed,
             "skipped": screenshot_skipped,
-            "total": len(all_results)
+            "total": len(all_results),
+            "engine": screenshot_stats
         },
         "detection_api": {
             "success": detection_success,
@@ -1388,20 +1867,45 @@ def main():
             "failed": reasoning_failed,
             "total": screenshot_success
         },
-        "domains_inserted": len(all_results) if db_success else 0,
+        "images": image_stats,
+        "scrape": pipeline.scrape_stats,
+        "reasoning_content": pipeline.content_sources,
+        "reasoning_cache": reasoning_cache_stats,
+        "reasoning_dispatcher": pipeline.reasoning_stats,
+        "reasoning_output": REASONING_OUTPUT.stats(),
+        "screenshot_dedup": dedup_stats,
+        "domains_inserted": db_stats["saved"],
+        "database": {
+            "saved": db_stats["saved"],
+            "failed": db_stats["failed"],
+            "merged": db_stats["merged"],
+            "batches": db_stats["batches"],
+            "elapsed_seconds": db_stats["elapsed_seconds"],
+            "rows_per_sec": db_stats["rows_per_sec"],
+            "errors": db_stats["errors"],
+        },
+        "pipeline": pipeline_metrics,
+        "timings": timings,
+        "upstreams": pipeline.upstream_stats,
+        "settings": GENERATOR_SETTINGS.stats(),
         "keywords": keywords
     }
     
     # Save summary to JSON file
-    summary_path = os.path.join(OUTPUT_DIR, "summary.json")
+    if args.job_id:
+        summary_path = os.path.join(JOB_LOG_DIR, f"{os.path.basename(args.job_id)}.summary.json")
+    else:
+        summary_path = os.path.join(OUTPUT_DIR, "summary.json")
     with open(summary_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, ensure_ascii=False, indent=2)
     log_print(f"[SAVE] Summary saved: {summary_path}")
 
-    # Output JSON summary for parsing
-    log_print(json.dumps(summary))
+    # Typed summary event for the integration service, workers and dashboard
+    emit_event("summary", summary=summary)
+    checkpoint_log_file()
     
     # Mark log file as complete
+    GENERATOR_SETTINGS.stop_listener()
     finish_log_file(success=True)
 
 
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lightweight latency metrics for the crawler (no external dependencies).
+
+LatencyHistogram is a fixed-bucket histogram for component stats;
+HdrHistogram keeps log-linear buckets with bounded relative error for
+per-item stage timings, which CrawlMetrics collects by (stage, step) through
+context-manager timers. CrawlMetrics.snapshot() also reports cumulative
+counts at LATENCY_BUCKETS_MS, the bucket layout of the integration
+service's Prometheus histograms.
+"""
+import bisect
+import time
+from contextlib import contextmanager
+
+# Bucket upper bounds in milliseconds; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000,
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count/sum/min/max and percentile estimates."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+
+    def observe(self, seconds: float):
+        """Record one duration given in seconds."""
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = ms if self.max_ms is None else max(self.max_ms, ms)
+
+    def percentile(self, pct: float) -> float:
+        """Estimated percentile in ms (upper bound of the bucket it falls in, capped at max)."""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index < len(self.buckets_ms):
+                    return min(float(self.buckets_ms[index]), self.max_ms)
+                return self.max_ms
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 1) if self.count else 0.0,
+            "min_ms": round(self.min_ms, 1) if self.min_ms is not None else 0.0,
+            "p50_ms": round(self.percentile(50), 1),
+            "p95_ms": round(self.percentile(95), 1),
+            "p99_ms": round(self.percentile(99), 1),
+            "max_ms": round(self.max_ms, 1) if self.max_ms is not None else 0.0,
+            "buckets": {
+                (f"le_{bound}" if i < len(self.buckets_ms) else "inf"): count
+                for i, (bound, count) in enumerate(zip(self.buckets_ms + (None,), self.counts))
+                if count
+            },
+        }
+
+
+class HdrHistogram:
+    """
+    Log-linear histogram in the style of HdrHistogram.
+
+    Values are recorded in microseconds. Below 2**significant_bits every
+    value has its own bucket; above, each power of two is split into
+    2**(significant_bits - 1) buckets, so a recorded value is off by at most
+    1 / 2**(significant_bits - 1) (1.6% with the default 7) at any
+    magnitude. Buckets are kept sparse, so memory grows with the spread of
+    the values, not their range.
+    """
+
+    def __init__(self, significant_bits=7):
+        self.significant_bits = significant_bits
+        self.counts = {}  # bucket lower bound (us) -> count
+        self.count = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = None
+
+    def _bucket(self, value_us):
+        """(lower bound, width) of the bucket holding `value_us`."""
+        shift = max(0, value_us.bit_length() - self.significant_bits)
+        return (value_us >> shift) << shift, 1 << shift
+
+    def observe(self, seconds: float):
+        """Record one duration given in seconds."""
+        value_us = max(0, int(seconds * 1_000_000))
+        lower, _ = self._bucket(value_us)
+        self.counts[lower] = self.counts.get(lower, 0) + 1
+        self.count += 1
+        self.sum_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def percentile(self, pct: float) -> float:
+        """Percentile in ms (middle of the bucket it falls in, within min..max)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, pct / 100 * self.count)
+        seen = 0
+        for lower in sorted(self.counts):
+            seen += self.counts[lower]
+            if seen >= rank:
+                _, width = self._bucket(lower)
+                value_us = min(max(lower + (width - 1) / 2, self.min_us), self.max_us)
+                return value_us / 1000
+        return self.max_us / 1000
+
+    def cumulative(self, bounds_ms=LATENCY_BUCKETS_MS) -> list:
+        """
+        Number of values <= each bound. A bucket only counts once all of it
+        (its upper edge) is <= the bound, so a `le` count never includes
+        values above the bound; the bucket straddling a bound goes to the next.
+        """
+        result = []
+        for bound_ms in bounds_ms:
+            bound_us = bound_ms * 1000
+            result.append(sum(
+                count for lower, count in self.counts.items()
+                if lower + self._bucket(lower)[1] - 1 <= bound_us
+            ))
+        return result
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_us / self.count / 1000, 1) if self.count else 0.0,
+            "min_ms": round(self.min_us / 1000, 1) if self.min_us is not None else 0.0,
+            "p50_ms": round(self.percentile(50), 1),
+            "p90_ms": round(self.percentile(90), 1),
+            "p95_ms": round(self.percentile(95), 1),
+            "p99_ms": round(self.percentile(99), 1),
+            "max_ms": round(self.max_us / 1000, 1) if self.max_us is not None else 0.0,
+        }
+
+
+class CrawlMetrics:
+    """
+    Per-item latency of the crawl's steps, grouped by pipeline stage.
+
+        with metrics.time("analysis", "detection"):
+            response = await send_to_detection_api(...)
+
+    Durations are recorded when the block exits, whether or not it raised.
+    """
+
+    def __init__(self):
+        self.histograms = {}  # stage -> {step: HdrHistogram}
+
+    def histogram(self, stage, step) -> HdrHistogram:
+        steps = self.histograms.setdefault(stage, {})
+        if step not in steps:
+            steps[step] = HdrHistogram()
+        return steps[step]
+
+    def observe(self, stage, step, seconds):
+        self.histogram(stage, step).observe(seconds)
+
+    @contextmanager
+    def time(self, stage, step):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, step, time.perf_counter() - started)
+
+    def summary(self) -> dict:
+        """{stage: {step: percentiles}} for summary.json."""
+        return {
+            stage: {step: histogram.summary() for step, histogram in steps.items()}
+            for stage, steps in self.histograms.items()
+        }
+
+    def snapshot(self, stage) -> dict:
+        """
+        One stage's steps with percentiles plus the totals the Prometheus
+        histograms are fed from: count, sum_seconds and cumulative bucket
+        counts at LATENCY_BUCKETS_MS.
+        """
+        return {
+            step: {
+                **histogram.summary(),
+                "sum_seconds": round(histogram.sum_us / 1_000_000, 6),
+                "buckets": histogram.cumulative(),
+            }
+            for step, histogram in self.histograms.get(stage, {}).items()
+        }
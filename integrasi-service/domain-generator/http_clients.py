@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared, pooled HTTP clients for the crawler's upstream calls.
+
+One keep-alive httpx.AsyncClient per upstream (detection, reasoning, scrape)
+instead of a fresh connection per request. Connection resets are retried
+with exponential backoff and full jitter, and every upstream keeps a latency
+histogram for the run summary.
+
+HTTP/2 is negotiated over TLS when the optional `h2` package is installed;
+plain-http upstreams stay on HTTP/1.1 keep-alive.
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+from crawler_metrics import LatencyHistogram
+
+# Errors that mean the connection broke before a response, safe to retry
+RETRYABLE_ERRORS = (
+    httpx.ConnectError,
+    httpx.RemoteProtocolError,
+    httpx.ReadError,
+    httpx.WriteError,
+    httpx.PoolTimeout,
+)
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class UpstreamClient:
+    """Pooled client for one upstream with retries and latency tracking."""
+
+    def __init__(
+        self,
+        name: str,
+        pool_size: int,
+        http2: bool = True,
+        retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        **client_options,
+    ):
+        """
+        Args:
+            name: Upstream name used in the summary
+            pool_size: Max open (and keep-alive) connections of this client
+            http2: Use HTTP/2 where the upstream supports it (needs `h2`)
+            retries: Extra attempts after a connection reset
+            backoff_base: First backoff ceiling in seconds, doubled per attempt
+            backoff_max: Upper limit of the backoff ceiling in seconds
+            client_options: Passed to httpx.AsyncClient (verify, follow_redirects, ...)
+        """
+        self.name = name
+        self.pool_size = pool_size
+        self.http2 = http2 and http2_available()
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=30.0,
+            ),
+            **client_options,
+        )
+
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.retried = 0
+        self.status_codes = {}
+        self.http_versions = {}
+
+    async def _send(self, method: str, url: str, stream: bool, **kwargs) -> httpx.Response:
+        """Send a request, retrying connection resets; raises the last error."""
+        # auth / follow_redirects belong to send(), everything else to the request
+        send_options = {key: kwargs.pop(key) for key in ("auth", "follow_redirects") if key in kwargs}
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                request = self._client.build_request(method, url, **kwargs)
+                response = await self._client.send(request, stream=stream, **send_options)
+            except RETRYABLE_ERRORS:
+                self.latency.observe(time.perf_counter() - started)
+                if attempt >= self.retries:
+                    self.requests += 1
+                    self.errors += 1
+                    raise
+                attempt += 1
+                self.retried += 1
+                ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+                await asyncio.sleep(random.uniform(0, ceiling))
+                continue
+            except Exception:
+                self.latency.observe(time.perf_counter() - started)
+                self.requests += 1
+                self.errors += 1
+                raise
+
+            self.latency.observe(time.perf_counter() - started)
+            self.requests += 1
+            status_class = f"{response.status_code // 100}xx"
+            self.status_codes[status_class] = self.status_codes.get(status_class, 0) + 1
+            self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+            return response
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request, retrying connection resets; raises the last error."""
+        return await self._send(method, url, False, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """
+        Send a request and yield the response with its body unread.
+
+        Connection resets before the response headers are retried like
+        request(); latency is time to headers. Leaving the block closes the
+        response, which cancels a streamed generation on the upstream.
+        """
+        response = await self._send(method, url, True, **kwargs)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "http2": self.http2,
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retried,
+            "status_codes": self.status_codes,
+            "http_versions": self.http_versions,
+            "latency": self.latency.summary(),
+        }
+
+
+class HttpClients:
+    """The crawler's upstream clients, opened and closed together."""
+
+    def __init__(self, pool_size: int, http2: bool = True, retries: int = 2, reasoning_pool_size: int = None):
+        """
+        Args:
+            pool_size: Connections per upstream (match the stage's concurrency)
+            http2: Allow HTTP/2 where supported
+            retries: Retries after a connection reset
+            reasoning_pool_size: Connections to the reasoning API (defaults to pool_size);
+                match the reasoning dispatcher's max concurrency
+        """
+        self.detection = UpstreamClient("detection", pool_size, http2=http2, retries=retries)
+        self.reasoning = UpstreamClient(
+            "reasoning", reasoning_pool_size or pool_size, http2=http2, retries=retries
+        )
+        # Arbitrary crawled sites: self-signed certs are common, redirects are expected
+        self.scrape = UpstreamClient(
+            "scrape", pool_size, http2=http2, retries=retries,
+            verify=False, follow_redirects=True,
+        )
+
+    @property
+    def upstreams(self):
+        return (self.detection, self.reasoning, self.scrape)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.gather(*[client.aclose() for client in self.upstreams])
+
+    def stats(self) -> dict:
+        return {client.name: client.stats() for client in self.upstreams}
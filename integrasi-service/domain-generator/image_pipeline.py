@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Screenshot encoding for storage, detection and the dashboard.
+
+The screenshot engine hands over the PNG bytes of a capture once; they are
+encoded to a compressed full-size image (WebP by default, JPEG or PNG
+configurable) and a small thumbnail, both written to the output directory.
+From then on only the file paths travel with the crawl result: detection
+and dedup read the full-size file, and the DB save embeds the thumbnail in
+generated_domains.image_base64 for the dashboard.
+
+Files are written to a temporary name and renamed, so a reader never sees
+a partial image. Encoding runs in a worker thread (Pillow releases the GIL
+while encoding).
+"""
+import asyncio
+import base64
+import io
+import os
+import time
+
+from PIL import Image, features
+
+from crawler_metrics import LatencyHistogram
+
+# format name -> (Pillow format, MIME type, file extension)
+IMAGE_FORMATS = {
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "png": ("PNG", "image/png", ".png"),
+}
+
+
+def data_uri(path, mime_type):
+    """Contents of an image file as a data: URI (None if the file is gone)."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+class ImagePipeline:
+    """Encodes captured screenshots to a full-size image and a thumbnail on disk."""
+
+    def __init__(self, output_dir, image_format="webp", quality=80, thumbnail_width=320,
+                 thumbnail_quality=60, log=print):
+        """
+        Args:
+            output_dir: Directory for <item_id><ext> and <item_id>_thumb<ext>
+            image_format: "webp", "jpeg" or "png" (lossless, quality ignored)
+            quality: Encoder quality of the full-size image (1-100)
+            thumbnail_width: Thumbnail width in pixels (aspect ratio kept)
+            thumbnail_quality: Encoder quality of the thumbnail
+            log: Logging function
+        """
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format: {image_format}")
+        if image_format == "webp" and not features.check("webp"):
+            log("[IMAGES] Pillow was built without WebP support, using JPEG")
+            image_format = "jpeg"
+        self.output_dir = output_dir
+        self.image_format = image_format
+        self.pillow_format, self.mime_type, self.extension = IMAGE_FORMATS[image_format]
+        self.quality = quality
+        self.thumbnail_width = thumbnail_width
+        self.thumbnail_quality = thumbnail_quality
+        self.log = log
+
+        self.encode_time = LatencyHistogram()
+        self.images = 0
+        self.failures = 0
+        self.source_bytes = 0
+        self.image_bytes = 0
+        self.thumbnail_bytes = 0
+
+    def path_for(self, item_id, thumbnail=False):
+        suffix = "_thumb" if thumbnail else ""
+        return os.path.join(self.output_dir, f"{item_id}{suffix}{self.extension}")
+
+    def _save(self, image, path, quality):
+        if self.pillow_format == "WEBP":
+            options = {"quality": quality, "method": 4}
+        elif self.pillow_format == "JPEG":
+            options = {"quality": quality, "optimize": True, "progressive": True}
+        else:
+            options = {"compress_level": 6}
+        temp_path = f"{path}.tmp"
+        image.save(temp_path, self.pillow_format, **options)
+        os.replace(temp_path, path)
+        return os.path.getsize(path)
+
+    def _encode(self, png_bytes, item_id):
+        started = time.perf_counter()
+        with Image.open(io.BytesIO(png_bytes)) as source:
+            # Screenshots are opaque; JPEG has no alpha channel
+            image = source.convert("RGB")
+        path = self.path_for(item_id)
+        image_bytes = self._save(image, path, self.quality)
+
+        thumbnail = image
+        if image.width > self.thumbnail_width:
+            height = max(1, round(image.height * self.thumbnail_width / image.width))
+            thumbnail = image.resize((self.thumbnail_width, height), Image.Resampling.LANCZOS)
+        thumbnail_path = self.path_for(item_id, thumbnail=True)
+        thumbnail_bytes = self._save(thumbnail, thumbnail_path, self.thumbnail_quality)
+
+        return {
+            "path": path,
+            "thumbnail_path": thumbnail_path,
+            "mime_type": self.mime_type,
+            "source_bytes": len(png_bytes),
+            "bytes": image_bytes,
+            "thumbnail_bytes": thumbnail_bytes,
+            "encode_seconds": time.perf_counter() - started,
+        }
+
+    async def save(self, png_bytes, item_id):
+        """
+        Encode one capture.
+
+        Args:
+            png_bytes: Screenshot as returned by the engine
+            item_id: Crawl item ID (file name)
+
+        Returns:
+            {"path", "thumbnail_path", "mime_type", "source_bytes", "bytes",
+            "thumbnail_bytes", "encode_seconds"}
+        """
+        try:
+            info = await asyncio.to_thread(self._encode, png_bytes, item_id)
+        except Exception:
+            self.failures += 1
+            raise
+        self.images += 1
+        self.source_bytes += info["source_bytes"]
+        self.image_bytes += info["bytes"]
+        self.thumbnail_bytes += info["thumbnail_bytes"]
+        self.encode_time.observe(info["encode_seconds"])
+        return info
+
+    def stats(self) -> dict:
+        def per_image(total):
+            return round(total / self.images) if self.images else 0
+
+        return {
+            "format": self.image_format,
+            "quality": self.quality,
+            "thumbnail_width": self.thumbnail_width,
+            "images": self.images,
+            "failures": self.failures,
+            "png_bytes_per_domain": per_image(self.source_bytes),
+            "image_bytes_per_domain": per_image(self.image_bytes),
+            "thumbnail_bytes_per_domain": per_image(self.thumbnail_bytes),
+            "compression_ratio": round(self.source_bytes / self.image_bytes, 2) if self.image_bytes else 0.0,
+            "encode_time": self.encode_time.summary(),
+        }
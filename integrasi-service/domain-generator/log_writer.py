@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched writer for the crawler's log file.
+
+log_print used to open the file, write one line and fsync it under a global
+lock for every line. Live output reaches the dashboard through stdout (the
+integration service reads the crawler's pipe), so the file is the durable
+record, not the transport: LogWriter keeps it open, collects lines and
+writes them in batches (at `batch_lines` lines, or every `flush_interval`
+seconds from a background thread), and fsyncs only at checkpoints: run
+start and end, summary saved, and at most every `checkpoint_interval`
+seconds.
+"""
+import os
+import threading
+import time
+
+
+class LogWriter:
+    """Append-only log file with batched writes and fsync at checkpoints."""
+
+    def __init__(self, path, batch_lines=64, flush_interval=0.2, checkpoint_interval=5.0):
+        """
+        Args:
+            path: Log file
+            batch_lines: Write once this many lines are pending
+            flush_interval: Seconds before pending lines are written anyway
+            checkpoint_interval: Seconds between periodic fsyncs (0 = only explicit checkpoints)
+        """
+        self.path = path
+        self.batch_lines = batch_lines
+        self.flush_interval = flush_interval
+        self.checkpoint_interval = checkpoint_interval
+        self._file = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._dirty = False  # written since the last fsync
+        self._synced_at = time.monotonic()
+        self._stop = threading.Event()
+        self._flusher = None
+
+        self.lines = 0
+        self.writes = 0
+        self.fsyncs = 0
+
+    def open(self, header=None):
+        """Truncate the file (start of a run), write `header` and start the flush thread."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._pending = [header] if header else []
+            self._write_pending()
+            self._sync()
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="log-writer", daemon=True)
+            self._flusher.start()
+
+    def write(self, line):
+        with self._lock:
+            self._pending.append(line)
+            self.lines += 1
+            if len(self._pending) >= self.batch_lines:
+                self._write_pending()
+
+    def flush(self):
+        """Write pending lines to the OS (visible to readers, not yet durable)."""
+        with self._lock:
+            self._write_pending()
+
+    def checkpoint(self):
+        """Write pending lines and fsync."""
+        with self._lock:
+            self._write_pending()
+            self._sync()
+
+    def close(self, *footer):
+        """Write the `footer` lines, fsync and close the file."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        with self._lock:
+            self._pending.extend(footer)
+            self._write_pending()
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write_pending(self):
+        if not self._pending:
+            return
+        if self._file is None:
+            # Not opened (or already closed): append, as the old per-line writes did
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(line + "\n" for line in self._pending))
+        self._file.flush()
+        self._pending = []
+        self._dirty = True
+        self.writes += 1
+
+    def _sync(self):
+        if self._file is not None and self._dirty:
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+        self._dirty = False
+        self._synced_at = time.monotonic()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                with self._lock:
+                    self._write_pending()
+                    if self.checkpoint_interval and time.monotonic() - self._synced_at >= self.checkpoint_interval:
+                        self._sync()
+            except Exception as e:
+                print(f"[LOG ERROR] Failed to write log file: {e}", flush=True)
+
+    def stats(self) -> dict:
+        return {"lines": self.lines, "writes": self.writes, "fsyncs": self.fsyncs}
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive "is this page ready to screenshot" detection.
+
+Replaces the fixed sleep after the load event. After navigation the page is
+considered ready once:
+
+1. the network went idle, or `network_idle_cap` passed (long-polling pages
+   never go idle), and
+2. first-contentful-paint happened, and
+3. the DOM saw no mutations for `quiet_ms` and the page isn't an empty
+   loading shell, or `soft_cap` passed since the load event (pages with
+   tickers/animations never go quiet).
+
+Pages that never paint are waited on up to `max_wait` so slow SPA landings
+don't come out blank.
+
+Settle times are learned per domain (EWMA) and kept in a JSON file between
+runs. A known domain isn't declared ready before half its usual settle time,
+which catches SPAs that render after a quiet gap. Slow domains also get
+their usual settle time as soft cap.
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Installed in every context before navigation; records the last DOM mutation
+MUTATION_TRACKER_SCRIPT = """
+(() => {
+    window.__prdLastMutation = performance.now();
+    new MutationObserver(() => { window.__prdLastMutation = performance.now(); })
+        .observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+})();
+"""
+
+# A page with almost no text and no sizeable media is treated as a loading
+# shell ("memuat...", a spinner) and is only ready once it fills in or at the
+# soft cap
+READY_CHECK_SCRIPT = """
+({quietMs, floorAt, softCapAt, minTextLength}) => {
+    const now = performance.now();
+    if (now < floorAt) return false;
+    if (performance.getEntriesByName('first-contentful-paint').length === 0) return false;
+    if (now >= softCapAt) return true;
+    const body = document.body;
+    const textLength = body ? body.innerText.trim().length : 0;
+    const hasMedia = Array.from(document.querySelectorAll('img, svg, canvas, video, iframe'))
+        .some((el) => el.clientWidth * el.clientHeight >= 40000);
+    if (textLength < minTextLength && !hasMedia) return false;
+    const lastMutation = window.__prdLastMutation || 0;
+    return now - lastMutation >= quietMs;
+}
+"""
+
+
+class SettleTimeStore:
+    """Per-domain learned settle times (milliseconds), persisted as JSON."""
+
+    def __init__(self, path: str, alpha: float = 0.3, max_domains: int = 50000):
+        """
+        Args:
+            path: JSON file the settle times are kept in
+            alpha: EWMA weight of a new observation
+            max_domains: Oldest entries are dropped beyond this many domains
+        """
+        self.path = path
+        self.alpha = alpha
+        self.max_domains = max_domains
+        self._items = {}
+        self._dirty = False
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._items = json.load(f)
+        except Exception as e:
+            print(f"[READINESS] Failed to load settle times: {e}")
+            self._items = {}
+
+    def save(self):
+        if not self._dirty:
+            return
+        if len(self._items) > self.max_domains:
+            newest = sorted(self._items.items(), key=lambda kv: kv[1].get("updated_at", ""), reverse=True)
+            self._items = dict(newest[:self.max_domains])
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._items, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"[READINESS] Failed to save settle times: {e}")
+
+    def get(self, domain: str):
+        """Learned settle time in ms, or None for an unknown domain."""
+        item = self._items.get(domain)
+        return item["settle_ms"] if item else None
+
+    def record(self, domain: str, settle_ms: float):
+        item = self._items.get(domain)
+        if item is None:
+            item = {"settle_ms": settle_ms, "samples": 0}
+        else:
+            item["settle_ms"] = (1 - self.alpha) * item["settle_ms"] + self.alpha * settle_ms
+        item["settle_ms"] = round(item["settle_ms"], 1)
+        item["samples"] += 1
+        item["updated_at"] = datetime.utcnow().isoformat()
+        self._items[domain] = item
+        self._dirty = True
+
+    def __len__(self):
+        return len(self._items)
+
+
+class AdaptiveReadiness:
+    """Readiness strategy used by ScreenshotEngine in place of a fixed sleep."""
+
+    def __init__(
+        self,
+        store: SettleTimeStore = None,
+        network_idle_cap: float = 1.5,
+        quiet_ms: float = 500,
+        soft_cap: float = 2.5,
+        max_wait: float = 8.0,
+        min_text_length: int = 50,
+    ):
+        """
+        Args:
+            store: Learned per-domain settle times (optional)
+            network_idle_cap: Max seconds to wait for network idle
+            quiet_ms: DOM-mutation quiet window in milliseconds
+            soft_cap: Seconds after which a painted but still-mutating page is ready
+            max_wait: Hard limit in seconds for the whole settle stage
+            min_text_length: Below this much visible text (and without media)
+                the page is considered a loading shell
+        """
+        self.store = store
+        self.network_idle_cap = network_idle_cap
+        self.quiet_ms = quiet_ms
+        self.soft_cap = soft_cap
+        self.max_wait = max_wait
+        self.min_text_length = min_text_length
+        self.reasons = {}
+
+    async def prepare(self, context):
+        """Install the mutation tracker in a fresh browser context."""
+        await context.add_init_script(MUTATION_TRACKER_SCRIPT)
+
+    def _limits_for(self, domain: str):
+        """(floor, soft cap) in seconds for a domain."""
+        learned_ms = self.store.get(domain) if self.store else None
+        if learned_ms is None:
+            return 0.0, self.soft_cap
+        learned = learned_ms / 1000
+        floor = min(learned * 0.5, self.max_wait / 2)
+        soft_cap = min(max(self.soft_cap, learned), self.max_wait)
+        return floor, soft_cap
+
+    async def wait_ready(self, page, domain: str) -> dict:
+        """
+        Wait until the page looks ready to capture.
+
+        Returns:
+            Dict with reason ("ready" or "max_wait"), seconds waited and
+            whether network idle was reached
+        """
+        started = time.perf_counter()
+        floor, soft_cap = self._limits_for(domain)
+
+        network_idle = True
+        try:
+            await page.wait_for_load_state("networkidle", timeout=self.network_idle_cap * 1000)
+        except PlaywrightTimeoutError:
+            network_idle = False
+
+        elapsed = time.perf_counter() - started
+        reason = "ready"
+        try:
+            page_now = await page.evaluate("performance.now()")
+            await page.wait_for_function(
+                READY_CHECK_SCRIPT,
+                arg={
+                    "quietMs": self.quiet_ms,
+                    "floorAt": page_now + max(0.0, floor - elapsed) * 1000,
+                    "softCapAt": page_now + max(0.0, soft_cap - elapsed) * 1000,
+                    "minTextLength": self.min_text_length,
+                },
+                polling=100,
+                timeout=max(1.0, (self.max_wait - elapsed) * 1000),
+            )
+        except PlaywrightTimeoutError:
+            reason = "max_wait"
+
+        seconds = time.perf_counter() - started
+        # Pages that never painted would only teach a useless floor
+        if self.store is not None and domain and reason == "ready":
+            self.store.record(domain, seconds * 1000)
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        return {"reason": reason, "seconds": seconds, "network_idle": network_idle}
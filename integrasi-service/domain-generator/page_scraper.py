@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming scrape of the page fields the reasoning prompt uses.
+
+The reasoning prompt only needs the title, meta description/keywords and the
+first few paragraphs, so the page is not downloaded and parsed as a whole:
+the response body is streamed into lxml's incremental HTML parser and
+reading stops once the <head> is done and `max_paragraphs` paragraphs were
+seen, or after `max_bytes` of body. Fields are extracted the same way the
+old BeautifulSoup scraper did (first <title>, meta name=description falling
+back to og:description, meta name=keywords, non-empty <p> texts with the
+text nodes stripped and joined), so reasoning prompts and cache keys stay
+the same.
+"""
+import re
+import time
+
+from lxml import etree
+
+from crawler_metrics import LatencyHistogram
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+# Bytes looked at for a <meta charset> before parsing starts
+SNIFF_BYTES = 2048
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_\-:.]+)', re.IGNORECASE)
+_BOMS = ((b"\xef\xbb\xbf", "utf-8"), (b"\xff\xfe", "utf-16-le"), (b"\xfe\xff", "utf-16-be"))
+
+# Text inside these is not page text (BeautifulSoup's get_text skips it too)
+_SKIP_TEXT = {"script", "style", "template", "noscript"}
+
+
+def sniff_encoding(head, declared=None):
+    """Encoding of an HTML body: HTTP charset, BOM, <meta charset>, else UTF-8."""
+    if declared:
+        return declared
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = _META_CHARSET.search(head[:SNIFF_BYTES])
+    if match:
+        encoding = match.group(1).decode("ascii", "ignore").lower()
+        try:
+            "".encode(encoding)
+            return encoding
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def scraped_fields(url, title="", description="", keywords="", paragraphs=()):
+    """Reasoning prompt fields: Scraped_URL, Title, Description, Keywords, P1-P5."""
+    data = {
+        "Scraped_URL": url,
+        "Title": title or "",
+        "Description": description or "",
+        "Keywords": keywords or "",
+    }
+    for i in range(5):
+        data[f"P{i+1}"] = paragraphs[i] if i < len(paragraphs) else ""
+    return data
+
+
+def element_text(element):
+    """Stripped text nodes of an element joined without separator (get_text(strip=True))."""
+    parts = []
+
+    def walk(node):
+        if node.text and node.tag not in _SKIP_TEXT:
+            parts.append(node.text.strip())
+        for child in node:
+            if isinstance(child.tag, str):
+                walk(child)
+            if child.tail:
+                parts.append(child.tail.strip())
+
+    walk(element)
+    return "".join(parts)
+
+
+class PageExtractor:
+    """Incremental extraction of title, meta tags and leading paragraphs."""
+
+    def __init__(self, max_paragraphs=5, encoding="utf-8"):
+        self.max_paragraphs = max_paragraphs
+        self._parser = etree.HTMLPullParser(
+            events=("start", "end"), encoding=encoding, remove_comments=True, remove_pis=True,
+        )
+        self.title = None
+        self.meta = {}
+        self.paragraphs = []
+        self.head_done = False
+
+    @property
+    def done(self):
+        """Head parsed and enough paragraphs: nothing more to read."""
+        return self.head_done and len(self.paragraphs) >= self.max_paragraphs
+
+    def feed(self, data):
+        """Parse the next body chunk. Returns True once done."""
+        self._parser.feed(data)
+        self._read_events()
+        return self.done
+
+    def close(self):
+        """End of input (or reading stopped); flush what the parser still holds."""
+        try:
+            self._parser.close()
+        except etree.LxmlError:
+            pass
+        self._read_events()
+
+    def _read_events(self):
+        for event, element in self._parser.read_events():
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue
+            if event == "start":
+                if tag == "body":
+                    self.head_done = True
+                continue
+            if tag == "head":
+                self.head_done = True
+            elif tag == "title" and self.title is None:
+                self.title = element.text.strip() if element.text else ""
+            elif tag == "meta":
+                key = element.get("name") or element.get("property")
+                if key:
+                    self.meta.setdefault(key.lower(), (element.get("content") or "").strip())
+            elif tag == "p" and len(self.paragraphs) < self.max_paragraphs:
+                text = element_text(element)
+                if text:
+                    self.paragraphs.append(text)
+
+    def data(self, url):
+        """Fields in the reasoning prompt's shape (see scraped_fields)."""
+        return scraped_fields(
+            url,
+            self.title,
+            self.meta.get("description") or self.meta.get("og:description", ""),
+            self.meta.get("keywords", ""),
+            self.paragraphs,
+        )
+
+
+def parse_html(content, url, max_paragraphs=5, encoding=None):
+    """Extract the reasoning fields from a complete HTML document (bytes)."""
+    extractor = PageExtractor(max_paragraphs, sniff_encoding(content, encoding))
+    extractor.feed(content)
+    extractor.close()
+    return extractor.data(url)
+
+
+class PageScraper:
+    """Streams pages from an UpstreamClient into a PageExtractor and keeps scrape stats."""
+
+    def __init__(self, client, max_bytes=512 * 1024, max_paragraphs=5, timeout=30):
+        """
+        Args:
+            client: UpstreamClient (or httpx.AsyncClient) used for the GET
+            max_bytes: Stop reading the body after this many (decoded) bytes
+            max_paragraphs: Paragraphs to collect before stopping
+            timeout: Request timeout in seconds
+        """
+        self.client = client
+        self.max_bytes = max_bytes
+        self.max_paragraphs = max_paragraphs
+        self.timeout = timeout
+
+        self.parse_time = LatencyHistogram()
+        self.pages = 0
+        self.failed = 0
+        self.bytes_read = 0
+        self.bytes_downloaded = 0
+        self.stopped_early = 0
+        self.capped = 0
+
+    async def scrape(self, url):
+        """
+        Fetch and extract one page.
+
+        Returns:
+            (data, info): data in parse_html's shape, info =
+            {"bytes_read", "bytes_downloaded", "parse_ms", "stop"}, where stop
+            is "done" (enough content), "cap" (max_bytes) or "eof"
+        """
+        parse_seconds = 0.0
+        bytes_read = 0
+        stop = "eof"
+        try:
+            async with self.client.stream(
+                "GET", url, headers={"User-Agent": USER_AGENT}, timeout=self.timeout,
+            ) as response:
+                response.raise_for_status()
+                extractor = None
+                pending = b""
+                async for chunk in response.aiter_bytes():
+                    bytes_read += len(chunk)
+                    if extractor is None:
+                        # Hold the first bytes back until the encoding can be sniffed
+                        pending += chunk
+                        if len(pending) < SNIFF_BYTES and bytes_read < self.max_bytes:
+                            continue
+                        chunk, pending = pending, b""
+                        started = time.perf_counter()
+                        extractor = PageExtractor(
+                            self.max_paragraphs, sniff_encoding(chunk, response.charset_encoding)
+                        )
+                        parse_seconds += time.perf_counter() - started
+                    started = time.perf_counter()
+                    done = extractor.feed(chunk)
+                    parse_seconds += time.perf_counter() - started
+                    if done:
+                        stop = "done"
+                        break
+                    if bytes_read >= self.max_bytes:
+                        stop = "cap"
+                        break
+                started = time.perf_counter()
+                if extractor is None:
+                    extractor = PageExtractor(
+                        self.max_paragraphs, sniff_encoding(pending, response.charset_encoding)
+                    )
+                    extractor.feed(pending)
+                extractor.close()
+                parse_seconds += time.perf_counter() - started
+                bytes_downloaded = response.num_bytes_downloaded
+        except Exception:
+            self.failed += 1
+            raise
+
+        self.pages += 1
+        self.bytes_read += bytes_read
+        self.bytes_downloaded += bytes_downloaded
+        self.parse_time.observe(parse_seconds)
+        if stop == "done":
+            self.stopped_early += 1
+        elif stop == "cap":
+            self.capped += 1
+        info = {
+            "bytes_read": bytes_read,
+            "bytes_downloaded": bytes_downloaded,
+            "parse_ms": round(parse_seconds * 1000, 2),
+            "stop": stop,
+        }
+        return extractor.data(url), info
+
+    def stats(self) -> dict:
+        return {
+            "pages": self.pages,
+            "failed": self.failed,
+            "max_bytes": self.max_bytes,
+            "bytes_read": self.bytes_read,
+            "bytes_downloaded": self.bytes_downloaded,
+            "mean_bytes_read": round(self.bytes_read / self.pages) if self.pages else 0,
+            "stopped_early": self.stopped_early,
+            "capped": self.capped,
+            "parse_time": self.parse_time.summary(),
+        }
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Result cache for the reasoning LLM.
+
+Gambling mirror domains mostly serve the same landing page template, so the
+prompt built by call_reasoning_llm is often identical apart from the site
+name. Results are keyed by a SHA-256 of the normalized prompt content
+(title, description, keywords, P1-P5, with the page's own host name and
+brand label removed as whole words) plus model name and prompt version.
+
+Two tiers:
+- memory: TTL + LRU bounded, per crawler process
+- database: reasoning_cache table (database/migrations/005_reasoning_cache.sql),
+  shared across runs; expired rows are ignored and pruned at startup
+
+Concurrent lookups of the same key share one LLM call. Failed calls are not
+cached.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from sqlalchemy import text
+
+CONTENT_FIELDS = ("Title", "Description", "Keywords", "P1", "P2", "P3", "P4", "P5")
+# Part of the key; bump when the normalization changes so old entries are not reused
+KEY_VERSION = 2
+
+CACHE_GET_QUERY = text("""
+    UPDATE reasoning_cache
+    SET hits = hits + 1, last_hit_at = now()
+    WHERE cache_key = :key
+      AND created_at > now() - make_interval(secs => :ttl)
+    RETURNING result
+""")
+
+CACHE_PUT_QUERY = text("""
+    INSERT INTO reasoning_cache (cache_key, model, prompt_version, result)
+    VALUES (:key, :model, :prompt_version, CAST(:result AS jsonb))
+    ON CONFLICT (cache_key) DO UPDATE SET
+        result = EXCLUDED.result,
+        created_at = now(),
+        hits = 0,
+        last_hit_at = NULL
+""")
+
+CACHE_PRUNE_QUERY = text("""
+    DELETE FROM reasoning_cache
+    WHERE created_at < now() - make_interval(secs => :ttl)
+""")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def host_tokens(url):
+    """Site-specific strings to strip from the content (host and brand label)."""
+    try:
+        host = (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return []
+    if host.startswith("www."):
+        host = host[4:]
+    if not host:
+        return []
+    tokens = [host]
+    brand = host.split(".")[0]
+    if len(brand) >= 4:
+        tokens.append(brand)
+    return tokens
+
+
+def normalize_content(value, tokens=()):
+    """
+    NFKC, lowercase, host tokens removed, whitespace collapsed. Tokens are
+    only removed as whole words, so a brand label such as "judi" is not cut
+    out of "perjudian" (pages that differ would otherwise share a key).
+    """
+    value = unicodedata.normalize("NFKC", str(value or "")).lower()
+    for token in tokens:
+        value = re.sub(rf"(?<!\w){re.escape(token)}(?!\w)", " ", value)
+    return _WHITESPACE.sub(" ", value).strip()
+
+
+def prompt_version_of(*parts):
+    """Short hash identifying a prompt configuration (system prompt, params)."""
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:12]
+
+
+class ReasoningCache:
+    """Two-tier (memory, database) cache of parsed reasoning results."""
+
+    def __init__(self, engine, model, prompt_version, ttl_seconds=7 * 86400, max_entries=5000,
+                 persistent=True, log=print):
+        """
+        Args:
+            engine: SQLAlchemy engine for the persistent tier
+            model: Model name, part of the key
+            prompt_version: Prompt configuration version, part of the key
+            ttl_seconds: Entry lifetime in both tiers
+            max_entries: Memory tier size (least recently used entries are evicted)
+            persistent: Use the reasoning_cache table
+            log: Logging function
+        """
+        self.engine = engine
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.persistent = persistent and engine is not None
+        self.log = log
+
+        self._memory = OrderedDict()  # key -> (expires_at, result)
+        self._inflight = {}  # key -> asyncio.Future
+
+        self.lookups = 0
+        self.memory_hits = 0
+        self.database_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.stores = 0
+        self.evictions = 0
+        self.pruned = 0
+        self.llm_seconds = 0.0
+        self.database_errors = 0
+
+    def key(self, scraped_data):
+        """Cache key of a scraped page, or None when there is no content to key on."""
+        tokens = host_tokens(scraped_data.get("Scraped_URL", ""))
+        content = [normalize_content(scraped_data.get(field, ""), tokens) for field in CONTENT_FIELDS]
+        if not any(content):
+            return None
+        payload = json.dumps(
+            {"version": KEY_VERSION, "model": self.model, "prompt_version": self.prompt_version,
+             "content": content},
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _memory_get(self, key):
+        item = self._memory.get(key)
+        if item is None:
+            return None
+        expires_at, result = item
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return result
+
+    def _memory_put(self, key, result):
+        self._memory[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    # ------------------------------------------------------------------
+    # Database tier (blocking, run in a thread)
+    # ------------------------------------------------------------------
+
+    def _disable_persistent(self, error):
+        self.database_errors += 1
+        self.persistent = False
+        self.log(f"[REASONING CACHE] Database tier disabled for this run: {str(error)[:200]}")
+
+    def _database_get(self, key):
+        with self.engine.begin() as conn:
+            row = conn.execute(CACHE_GET_QUERY, {"key": key, "ttl": self.ttl_seconds}).first()
+        if row is None:
+            return None
+        result = row[0]
+        return json.loads(result) if isinstance(result, str) else result
+
+    def _database_put(self, key, result):
+        with self.engine.begin() as conn:
+            conn.execute(CACHE_PUT_QUERY, {
+                "key": key,
+                "model": self.model,
+                "prompt_version": self.prompt_version,
+                "result": json.dumps(result, ensure_ascii=False),
+            })
+
+    def prune(self):
+        """Delete expired rows from the reasoning_cache table. Returns the number removed."""
+        if not self.persistent:
+            return 0
+        try:
+            with self.engine.begin() as conn:
+                self.pruned = conn.execute(CACHE_PRUNE_QUERY, {"ttl": self.ttl_seconds}).rowcount or 0
+        except Exception as e:
+            self._disable_persistent(e)
+        return self.pruned
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    async def get_or_compute(self, key, compute):
+        """
+        Return a cached result or compute (and cache) it.
+
+        Args:
+            key: Cache key from key(); None skips the cache
+            compute: Coroutine function returning the result dict, or None on failure
+
+        Returns:
+            (result, source) where source is "memory", "database", "coalesced"
+            (answered by a concurrent call for the same key) or "llm"
+        """
+        if key is None:
+            self.uncacheable += 1
+            return await self._compute(compute), "llm"
+
+        self.lookups += 1
+        result = self._memory_get(key)
+        if result is not None:
+            self.memory_hits += 1
+            return result, "memory"
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            result, source = await asyncio.shield(pending)
+            if result is not None:
+                return result, "coalesced"
+            return await self._compute(compute), "llm"
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result, source = await self._lookup_or_compute(key, compute)
+            future.set_result((result, source))
+            return result, source
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _lookup_or_compute(self, key, compute):
+        if self.persistent:
+            try:
+                result = await asyncio.to_thread(self._database_get, key)
+            except Exception as e:
+                self._disable_persistent(e)
+                result = None
+            if result is not None:
+                self.database_hits += 1
+                self._memory_put(key, result)
+                return result, "database"
+
+        self.misses += 1
+        result = await self._compute(compute)
+        if result is not None:
+            self._memory_put(key, result)
+            self.stores += 1
+            if self.persistent:
+                try:
+                    await asyncio.to_thread(self._database_put, key, result)
+                except Exception as e:
+                    self._disable_persistent(e)
+        return result, "llm"
+
+    async def _compute(self, compute):
+        started = time.perf_counter()
+        try:
+            return await compute()
+        finally:
+            self.llm_seconds += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.database_hits + self.coalesced
+        llm_calls = self.misses + self.uncacheable
+        mean_llm_seconds = self.llm_seconds / llm_calls if llm_calls else 0.0
+        return {
+            "model": self.model,
+            "prompt_version": self.prompt_version,
+            "lookups": self.lookups,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "database_hits": self.database_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "uncacheable": self.uncacheable,
+            "hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "pruned": self.pruned,
+            "persistent": self.persistent,
+            "database_errors": self.database_errors,
+            "llm_seconds": round(self.llm_seconds, 3),
+            # Estimate: every hit would have cost one mean LLM call
+            "estimated_seconds_saved": round(hits * mean_llm_seconds, 3),
+        }
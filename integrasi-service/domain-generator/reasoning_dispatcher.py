@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dispatcher for reasoning LLM requests with an adaptive concurrency limit.
+
+vLLM batches every sequence that is in flight at the same time (continuous
+batching), so throughput depends on keeping enough requests outstanding.
+A fixed worker count shared with detection either under-fills the server or
+overloads it. The dispatcher:
+
+- collects submitted requests into micro-batches (up to `batch_size`, or
+  whatever arrived within `batch_wait` seconds) and releases each batch
+  together, so the requests land in the same scheduler steps;
+- runs them under an AIMD limit: the limit grows by one per round of
+  requests whose latency stays near the best observed latency, and is cut
+  multiplicatively on timeouts, 429/5xx or latency above `latency_tolerance`
+  times that baseline. Latency is measured per generated token when the
+  response reports usage.completion_tokens, so long answers are not
+  mistaken for overload; per-token and whole-request samples keep separate
+  baselines, so one is never compared against the other;
+- caps the limit so concurrency * max_tokens stays within `token_budget`
+  (the server's KV cache / max_num_batched_tokens), when one is given.
+
+The chat completions API takes one conversation per request, so a
+micro-batch is a group of concurrent requests rather than a single call.
+"""
+import asyncio
+import time
+from collections import deque
+
+import httpx
+
+from crawler_metrics import LatencyHistogram
+
+# Responses that mean the server is saturated (back off, do not count as latency)
+OVERLOAD_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def completion_tokens(result):
+    """Generated token count of an OpenAI-style response dict (None if unknown)."""
+    if isinstance(result, dict):
+        usage = result.get("usage") or {}
+        tokens = usage.get("completion_tokens")
+        if isinstance(tokens, int) and tokens > 0:
+            return tokens
+    return None
+
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit."""
+
+    def __init__(self, initial, minimum=1, maximum=64, backoff=0.7,
+                 latency_tolerance=2.5, baseline_window=200):
+        """
+        Args:
+            initial: Starting limit
+            minimum: Lower bound of the limit
+            maximum: Upper bound of the limit
+            backoff: Factor applied to the limit on overload
+            latency_tolerance: Latency above baseline * tolerance counts as overload
+            baseline_window: Number of recent samples (per kind) the baseline (minimum) is taken over
+        """
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(self.maximum, max(minimum, initial)))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.baseline_window = baseline_window
+        self.samples = {}  # kind ("token" or "request") -> recent latencies
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self.peak = self.limit
+        self._last_decrease = 0.0
+        self.duration = None  # EWMA of request wall time
+        self._condition = asyncio.Condition()
+
+    def baseline(self, kind="request"):
+        """Best recent latency of one kind of sample ("token": per generated token, "request": wall time)."""
+        samples = self.samples.get(kind)
+        return min(samples) if samples else None
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency=None, overloaded=False, duration=None, kind="request"):
+        """
+        Return a slot and adjust the limit.
+
+        Args:
+            latency: Latency sample compared against the baseline of its kind;
+                None if the request failed
+            overloaded: The server signalled overload (timeout, 429, 5xx)
+            duration: Wall time of the whole request, paces decreases
+            kind: "token" when `latency` is seconds per generated token,
+                "request" when it is the request's wall time
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if duration is not None:
+                self.duration = duration if self.duration is None else 0.8 * self.duration + 0.2 * duration
+            if latency is not None and not overloaded:
+                samples = self.samples.setdefault(kind, deque(maxlen=self.baseline_window))
+                samples.append(latency)
+                baseline = self.baseline(kind)
+                if baseline and latency > baseline * self.latency_tolerance:
+                    overloaded = True
+            now = time.monotonic()
+            if overloaded:
+                # At most one decrease per typical request duration, one overload episode hits many requests
+                if now - self._last_decrease >= (self.duration or 1.0):
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self.decreases += 1
+                    self._last_decrease = now
+            elif latency is not None and self.limit < self.maximum:
+                # +1 per full window of successful requests
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.increases += 1
+                self.peak = max(self.peak, self.limit)
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        request_baseline = self.baseline("request")
+        token_baseline = self.baseline("token")
+        return {
+            "limit": round(self.limit, 2),
+            "peak": round(self.peak, 2),
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "baseline_ms": round(request_baseline * 1000, 2) if request_baseline else None,
+            "baseline_ms_per_token": round(token_baseline * 1000, 3) if token_baseline else None,
+        }
+
+
+class ReasoningDispatcher:
+    """Micro-batching, adaptively limited submission of reasoning requests."""
+
+    def __init__(self, client, max_tokens, initial_concurrency=4, min_concurrency=1,
+                 max_concurrency=32, token_budget=0, batch_size=8, batch_wait=0.05,
+                 latency_tolerance=2.5):
+        """
+        Args:
+            client: UpstreamClient (or httpx.AsyncClient) for the reasoning API
+            max_tokens: REASONING_MAX_TOKENS, worst-case generation per request
+            initial_concurrency: Starting AIMD limit
+            min_concurrency: Lower bound of the limit
+            max_concurrency: Upper bound of the limit
+            token_budget: Max tokens generated concurrently on the server (0 = no cap)
+            batch_size: Max requests released together
+            batch_wait: Seconds to wait for a micro-batch to fill
+            latency_tolerance: See AIMDLimiter
+        """
+        self.client = client
+        self.max_tokens = max_tokens
+        if token_budget and max_tokens:
+            max_concurrency = max(min_concurrency, min(max_concurrency, token_budget // max_tokens))
+        self.limiter = AIMDLimiter(
+            initial_concurrency, minimum=min_concurrency, maximum=max_concurrency,
+            latency_tolerance=latency_tolerance,
+        )
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+
+        self._queue = asyncio.Queue()
+        self._collector = None
+        self._tasks = set()
+
+        self.latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.overloads = 0
+        self.batches = 0
+        self.batched_items = 0
+        self._started = None
+
+    @property
+    def max_concurrency(self):
+        return self.limiter.maximum
+
+    async def __aenter__(self):
+        self._started = time.perf_counter()
+        self._collector = asyncio.create_task(self._collect())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.gather(self._collector, return_exceptions=True)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def submit(self, send):
+        """
+        Queue one request and wait for its result.
+
+        Args:
+            send: Coroutine function `send(client)` performing the request;
+                its return value (or exception) is passed through
+
+        Returns:
+            Whatever `send` returned
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.submitted += 1
+        await self._queue.put((send, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """Group queued requests into micro-batches and start them under the limiter."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.batch_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            self.batched_items += len(batch)
+            for item in batch:
+                # Slots are taken in order, so a batch is released as one group once capacity frees up
+                await self.limiter.acquire()
+                task = asyncio.create_task(self._run(*item))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, send, future, queued_at):
+        started = time.perf_counter()
+        self.queue_wait.observe(started - queued_at)
+        latency = None
+        kind = "request"
+        overloaded = False
+        try:
+            result = await send(self.client)
+            latency = time.perf_counter() - started
+            self.latency.observe(latency)
+            tokens = completion_tokens(result)
+            if tokens:
+                latency /= tokens
+                kind = "token"
+            self.completed += 1
+            if not future.done():
+                future.set_result(result)
+        except Exception as e:
+            self.failed += 1
+            overloaded = isinstance(e, httpx.TimeoutException) or (
+                isinstance(e, httpx.HTTPStatusError) and e.response.status_code in OVERLOAD_STATUS_CODES
+            )
+            if overloaded:
+                self.overloads += 1
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            await self.limiter.release(latency, overloaded, time.perf_counter() - started, kind)
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "overloads": self.overloads,
+            "max_tokens": self.max_tokens,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "requests_per_sec": round(self.completed / elapsed, 2) if elapsed else 0.0,
+            "concurrency": self.limiter.stats(),
+            "latency": self.latency.summary(),
+            "queue_wait": self.queue_wait.summary(),
+        }
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Requesting and parsing the reasoning LLM's JSON answer.
+
+The model is asked for {"label", "reasoning", "confidence"} but often wraps
+it in <think> blocks, code fences or trailing prose. ReasoningJSONExtractor
+is an incremental scanner that takes the completion in pieces (streamed
+deltas or the whole text), skips everything outside the first usable JSON
+object and reports completion as soon as all required fields are known:
+
+- at every top-level comma the object so far is closed and parsed, so the
+  stream can be cancelled before the model writes the closing brace or
+  any text after it;
+- trailing commas are repaired; an object cut off by max_tokens falls back
+  to the last complete prefix when it has a valid label.
+
+stream_completion() reads an OpenAI-style SSE stream (`stream: true`) into
+an extractor and closes the response once it is complete, which makes vLLM
+abort the rest of the generation. ReasoningOutput adds guided JSON
+(`response_format` json_schema, or vLLM's `guided_json`) to the payload and
+falls back to plain prompting when the server rejects it.
+"""
+import json
+import re
+
+REASONING_LABELS = ("judi", "non_judi")
+REQUIRED_FIELDS = ("label", "reasoning", "confidence")
+
+# Property order is the generation order under guided decoding
+REASONING_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "label": {"type": "string", "enum": list(REASONING_LABELS)},
+        "reasoning": {"type": "string"},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    },
+    "required": list(REQUIRED_FIELDS),
+    "additionalProperties": False,
+}
+
+STRUCTURED_OUTPUT_MODES = ("auto", "json_schema", "guided_json", "off")
+
+_THINK_OPEN = "<think>"
+_THINK_CLOSE = "</think>"
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def normalize_result(obj, complete=True):
+    """
+    Validate a parsed answer and normalize its fields.
+
+    Args:
+        obj: Parsed JSON value
+        complete: Require all fields; otherwise only a valid label is needed
+            (missing confidence becomes 0.0, missing reasoning "")
+
+    Returns:
+        The normalized dict, or None when it is not a usable answer
+    """
+    if not isinstance(obj, dict):
+        return None
+    label = str(obj.get("label", "")).strip().lower().replace("-", "_").replace(" ", "_")
+    if label not in REASONING_LABELS:
+        return None
+    if complete and any(field not in obj for field in REQUIRED_FIELDS):
+        return None
+    try:
+        confidence = float(obj.get("confidence", 0.0))
+    except (TypeError, ValueError):
+        if complete:
+            return None
+        confidence = 0.0
+    result = dict(obj)
+    result["label"] = label
+    result["confidence"] = min(1.0, max(0.0, confidence))
+    result["reasoning"] = str(obj.get("reasoning") or "").strip()
+    return result
+
+
+def _loads(candidate):
+    """json.loads with trailing commas repaired; None if it still fails."""
+    for text in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+        try:
+            return json.loads(text)
+        except ValueError:
+            continue
+    return None
+
+
+class ReasoningJSONExtractor:
+    """Incremental extractor of the reasoning answer from model output."""
+
+    def __init__(self):
+        self.text = ""
+        self.result = None
+        self.repaired = False  # answer came from a truncated object
+        self._pos = 0
+        self._start = None  # offset of the current candidate's "{"
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._in_think = False
+        self._partial = None  # last complete top-level prefix of the candidate
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def feed(self, chunk):
+        """Consume the next piece of output. Returns True once the answer is complete."""
+        if self.result is None and chunk:
+            self.text += chunk
+            self._scan()
+        return self.result is not None
+
+    def finish(self):
+        """End of output: the complete answer, a usable truncated one, or None."""
+        if self.result is None and self._partial is not None:
+            result = normalize_result(self._partial, complete=False)
+            if result is not None:
+                self.result = result
+                self.repaired = True
+        return self.result
+
+    def _reset_candidate(self):
+        self._start = None
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._partial = None
+
+    def _scan(self):
+        text = self.text
+        pos = self._pos
+        while pos < len(text):
+            if self._start is None:
+                if self._in_think:
+                    end = text.find(_THINK_CLOSE, pos)
+                    if end < 0:
+                        # Keep a possible partial closing tag for the next chunk
+                        pos = max(pos, len(text) - len(_THINK_CLOSE) + 1)
+                        break
+                    pos = end + len(_THINK_CLOSE)
+                    self._in_think = False
+                    continue
+                char = text[pos]
+                if char == "<":
+                    rest = text[pos:pos + len(_THINK_OPEN)]
+                    if rest == _THINK_OPEN:
+                        self._in_think = True
+                        pos += len(_THINK_OPEN)
+                        continue
+                    if _THINK_OPEN.startswith(rest):
+                        break  # wait for the rest of the tag
+                elif char == "{":
+                    self._start = pos
+                    self._stack = ["{"]
+                pos += 1
+                continue
+
+            char = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    if self._finish_candidate(text[self._start:pos + 1]):
+                        self._pos = pos + 1
+                        return
+                    self._reset_candidate()
+            elif char == "," and len(self._stack) == 1:
+                # A top-level value just ended: everything so far is a closed object
+                if self._check_prefix(text[self._start:pos] + "}"):
+                    self._pos = pos + 1
+                    return
+            pos += 1
+        self._pos = pos
+
+    def _check_prefix(self, candidate):
+        obj = _loads(candidate)
+        if not isinstance(obj, dict):
+            return False
+        self._partial = obj
+        self.result = normalize_result(obj)
+        return self.result is not None
+
+    def _finish_candidate(self, candidate):
+        obj = _loads(candidate)
+        if isinstance(obj, dict):
+            self._partial = obj
+            self.result = normalize_result(obj)
+            if self.result is None:
+                # Closed object with a valid label but missing fields is still an answer
+                self.result = normalize_result(obj, complete=False)
+                self.repaired = self.result is not None
+        return self.result is not None
+
+
+def extract_reasoning_json(text):
+    """Extract the reasoning answer from a complete model output (None if there is none)."""
+    extractor = ReasoningJSONExtractor()
+    extractor.feed(text)
+    return extractor.finish()
+
+
+async def stream_completion(client, url, payload, extractor, timeout=120):
+    """
+    POST a chat completion with `stream: true` and feed the deltas to an extractor.
+
+    Stops reading (closing the response, which aborts the generation on
+    vLLM) as soon as the extractor has the answer.
+
+    Args:
+        client: UpstreamClient or httpx.AsyncClient
+        url: Chat completions URL
+        payload: Request body (stream options are added)
+        extractor: ReasoningJSONExtractor
+        timeout: Request timeout in seconds
+
+    Returns:
+        {"tokens", "finish_reason", "stopped_early", "usage"}; tokens counts
+        content deltas (one per token on vLLM) when usage is not reported
+    """
+    payload = dict(payload, stream=True, stream_options={"include_usage": True})
+    tokens = 0
+    finish_reason = None
+    usage = None
+    stopped_early = False
+    async with client.stream("POST", url, json=payload, timeout=timeout) as response:
+        if response.is_error:
+            await response.aread()  # the error body tells whether response_format was the problem
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+            if chunk.get("usage"):
+                usage = chunk["usage"]
+            for choice in chunk.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    tokens += 1
+                    extractor.feed(content)
+                finish_reason = choice.get("finish_reason") or finish_reason
+            if extractor.done and finish_reason is None:
+                stopped_early = True
+                break
+    if usage and usage.get("completion_tokens"):
+        tokens = usage["completion_tokens"]
+    return {"tokens": tokens, "finish_reason": finish_reason, "stopped_early": stopped_early, "usage": usage}
+
+
+class ReasoningOutput:
+    """Structured-output mode of reasoning requests and parse statistics."""
+
+    def __init__(self, mode="auto", stream=True, log=print):
+        """
+        Args:
+            mode: "auto" (json_schema, dropped if the server rejects it),
+                "json_schema", "guided_json" (vLLM extra parameter) or "off"
+            stream: Request streamed completions and stop early
+            log: Logging function
+        """
+        if mode not in STRUCTURED_OUTPUT_MODES:
+            raise ValueError(f"Unknown structured output mode: {mode}")
+        self.configured_mode = mode
+        self.mode = mode
+        self.stream = stream
+        self.log = log
+
+        self.requests = 0
+        self.parsed = 0
+        self.repaired = 0
+        self.parse_failures = 0
+        self.stopped_early = 0
+        self.tokens = 0
+        self.fallbacks = 0
+
+    def apply(self, payload):
+        """Copy of a chat completions payload with the current structured-output parameters."""
+        payload = dict(payload)
+        if self.mode in ("auto", "json_schema"):
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "reasoning_result", "schema": REASONING_JSON_SCHEMA},
+            }
+        elif self.mode == "guided_json":
+            payload["guided_json"] = REASONING_JSON_SCHEMA
+        return payload
+
+    def rejected(self, status_code, body=""):
+        """
+        The server answered a request with an error status.
+
+        Args:
+            status_code: HTTP status of the response
+            body: Response body (error message)
+
+        Returns:
+            True when the structured-output parameters were dropped and the
+            request should be retried without them
+        """
+        body = (body or "").lower()
+        if self.mode == "auto" and status_code in (400, 422) and any(
+            word in body for word in ("response_format", "json_schema", "guided")
+        ):
+            self.mode = "off"
+            self.fallbacks += 1
+            self.log(f"[REASONING API] Server rejected response_format (HTTP {status_code}), "
+                     f"continuing without guided JSON")
+            return True
+        return False
+
+    def record(self, extractor, tokens=0, stopped_early=False):
+        """Count one finished response."""
+        self.requests += 1
+        self.tokens += tokens or 0
+        if extractor.result is None:
+            self.parse_failures += 1
+            return
+        self.parsed += 1
+        if extractor.repaired:
+            self.repaired += 1
+        if stopped_early:
+            self.stopped_early += 1
+
+    def stats(self) -> dict:
+        return {
+            "structured_output": self.mode,
+            "configured_mode": self.configured_mode,
+            "stream": self.stream,
+            "fallbacks": self.fallbacks,
+            "responses": self.requests,
+            "parsed": self.parsed,
+            "repaired": self.repaired,
+            "parse_failures": self.parse_failures,
+            "stopped_early": self.stopped_early,
+            "tokens_generated": self.tokens,
+            "mean_tokens": round(self.tokens / self.requests, 1) if self.requests else 0.0,
+        }
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perceptual-hash dedup of screenshots before object detection.
+
+Mirror domains usually render the same landing page, so their screenshots
+are near-identical and the detector returns the same answer. Each capture
+gets a difference hash (dHash, Pillow only); when an earlier screenshot is
+within `threshold` bits Hamming distance, its detection result is reused
+instead of calling the detection API.
+
+Known hashes live in memory in a multi-index: the hash is split into
+threshold + 1 bands, and by the pigeonhole principle two hashes within the
+threshold share at least one band exactly, so a lookup only compares
+against entries that collide on some band.
+
+Hashes of detected screenshots are stored in the screenshot_hashes table
+(database/migrations/006_screenshot_hashes.sql) by the crawler's batch save
+and loaded at startup, so duplicates are also caught across runs.
+"""
+import asyncio
+import base64
+import json
+
+from PIL import Image
+from sqlalchemy import text
+
+HASHES_LOAD_QUERY = text("""
+    SELECT id, phash
+    FROM screenshot_hashes
+    WHERE detector = :detector
+      AND created_at > now() - make_interval(secs => :ttl)
+    ORDER BY created_at DESC
+    LIMIT :limit
+""")
+
+HASH_DETAIL_QUERY = text("""
+    SELECT h.domain, h.detection_result, i.mime_type, i.data
+    FROM screenshot_hashes h
+    LEFT JOIN result_images i ON i.sha256 = h.visualization_sha256
+    WHERE h.id = :id
+""")
+
+
+def dhash(image_path, hash_size=16):
+    """
+    Difference hash of an image: hash_size * hash_size bits.
+
+    The grayscale image is shrunk to (hash_size + 1) x hash_size and each bit
+    says whether a pixel is brighter than its right neighbour.
+    """
+    with Image.open(image_path) as image:
+        pixels = list(
+            image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS).getdata()
+        )
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def hash_to_hex(value, bits):
+    return format(value, f"0{bits // 4}x")
+
+
+def strip_visualization(detection_response):
+    """Copy of a detection API response without the (large) visualization image."""
+    response = json.loads(json.dumps(detection_response))
+    result = response.get("result") or {}
+    result.pop("visualization_path", None)
+    return response
+
+
+class _HashIndex:
+    """Multi-index over fixed-size hashes for Hamming-radius lookups."""
+
+    def __init__(self, bits, threshold):
+        self.bits = bits
+        self.threshold = threshold
+        self.band_count = min(bits, threshold + 1)
+        # Band boundaries covering all bits (sizes differ by at most one)
+        self.bands = []
+        start = 0
+        for i in range(self.band_count):
+            size = bits // self.band_count + (1 if i < bits % self.band_count else 0)
+            self.bands.append((start, (1 << size) - 1))
+            start += size
+        self.tables = [{} for _ in self.bands]
+        self.entries = []  # (hash, payload)
+
+    def _keys(self, value):
+        return [(value >> shift) & mask for shift, mask in self.bands]
+
+    def add(self, value, payload):
+        index = len(self.entries)
+        self.entries.append((value, payload))
+        for table, key in zip(self.tables, self._keys(value)):
+            table.setdefault(key, []).append(index)
+
+    def nearest(self, value, accept=None):
+        """(distance, payload) of the closest accepted entry within the threshold, or None."""
+        best = None
+        seen = set()
+        for table, key in zip(self.tables, self._keys(value)):
+            for index in table.get(key, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+                candidate, payload = self.entries[index]
+                if accept is not None and not accept(payload):
+                    continue
+                distance = hamming(value, candidate)
+                if distance <= self.threshold and (best is None or distance < best[0]):
+                    best = (distance, payload)
+                    if distance == 0:
+                        return best
+        return best
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ScreenshotDedup:
+    """Reuses detection results for perceptually identical screenshots."""
+
+    def __init__(self, engine, detector, threshold=6, hash_size=16, ttl_seconds=30 * 86400,
+                 max_loaded=200000, persistent=True, log=print):
+        """
+        Args:
+            engine: SQLAlchemy engine for loading known hashes
+            detector: Detector identity; results are only reused for the same detector
+            threshold: Max Hamming distance (bits) counted as a duplicate
+            hash_size: dHash grid size (hash_size ** 2 bits)
+            ttl_seconds: Ignore stored hashes older than this
+            max_loaded: Newest stored hashes to load at startup
+            persistent: Load hashes from (and let the save write to) screenshot_hashes
+            log: Logging function
+        """
+        self.engine = engine
+        self.detector = detector
+        self.threshold = threshold
+        self.hash_size = hash_size
+        self.bits = hash_size * hash_size
+        self.ttl_seconds = ttl_seconds
+        self.max_loaded = max_loaded
+        self.persistent = persistent and engine is not None
+        self.log = log
+
+        self._index = _HashIndex(self.bits, threshold)
+        self.loaded = 0
+        self.checked = 0
+        self.run_hits = 0
+        self.database_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.hash_errors = 0
+        self.database_errors = 0
+        self.distances = {}
+
+    def load(self):
+        """Load recent hashes of this detector from the database. Returns the count."""
+        if not self.persistent:
+            return 0
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(HASHES_LOAD_QUERY, {
+                    "detector": self.detector,
+                    "ttl": self.ttl_seconds,
+                    "limit": self.max_loaded,
+                }).fetchall()
+        except Exception as e:
+            self.database_errors += 1
+            self.persistent = False
+            self.log(f"[DEDUP] Could not load screenshot hashes, cross-run dedup disabled: {str(e)[:200]}")
+            return 0
+        for row_id, phash in rows:
+            if not phash or len(phash) != self.bits // 4:
+                continue  # stored with another hash size
+            try:
+                self._index.add(int(phash, 16), ("database", row_id))
+            except (TypeError, ValueError):
+                continue
+        self.loaded = len(self._index)
+        return self.loaded
+
+    def _database_detail(self, row_id):
+        with self.engine.connect() as conn:
+            row = conn.execute(HASH_DETAIL_QUERY, {"id": row_id}).first()
+        if row is None:
+            return None
+        domain, detection_result, mime_type, data = row
+        response = json.loads(detection_result) if isinstance(detection_result, str) else detection_result
+        if data is not None:
+            encoded = base64.b64encode(bytes(data)).decode("ascii")
+            response.setdefault("result", {})["visualization_path"] = f"data:{mime_type};base64,{encoded}"
+        return domain, response
+
+    async def detect(self, image_path, item_id, compute):
+        """
+        Return a reused detection result for a near-duplicate, or call compute().
+
+        Args:
+            image_path: Screenshot file
+            item_id: Crawl item ID (for logging)
+            compute: Coroutine function calling the detection API (result dict or None)
+
+        Returns:
+            (response, info) where info = {"phash", "source", "distance", "duplicate_of"};
+            source is "run", "database", "coalesced" or "api"
+        """
+        try:
+            value = await asyncio.to_thread(dhash, image_path, self.hash_size)
+        except Exception as e:
+            self.hash_errors += 1
+            print(f"[DEDUP] {item_id}: hash failed ({str(e)[:100]}), calling detector")
+            return await compute(), {"phash": None, "source": "api", "distance": None, "duplicate_of": None}
+
+        self.checked += 1
+        phash = hash_to_hex(value, self.bits)
+        match = self._index.nearest(value, accept=self._usable)
+        if match is not None:
+            distance, (kind, ref) = match
+            response, duplicate_of, source = await self._resolve(kind, ref)
+            if response is not None:
+                self.distances[distance] = self.distances.get(distance, 0) + 1
+                return response, {"phash": phash, "source": source, "distance": distance, "duplicate_of": duplicate_of}
+
+        # Not a duplicate: let concurrent near-duplicates wait for this detection
+        future = asyncio.get_running_loop().create_future()
+        entry = {"future": future, "item_id": item_id}
+        self._index.add(value, ("run", entry))
+        self.misses += 1
+        try:
+            response = await compute()
+        except BaseException:
+            future.set_result(None)
+            raise
+        future.set_result(response)
+        return response, {"phash": phash, "source": "api", "distance": None, "duplicate_of": None}
+
+    @staticmethod
+    def _usable(payload):
+        kind, ref = payload
+        return kind != "run" or not ref["future"].done() or ref["future"].result() is not None
+
+    async def _resolve(self, kind, ref):
+        """Detection result behind an index entry: (response, duplicate_of, source)."""
+        if kind == "run":
+            future = ref["future"]
+            waited = not future.done()
+            response = await asyncio.shield(future)
+            if response is None:
+                return None, None, None
+            if waited:
+                self.coalesced += 1
+                return response, ref["item_id"], "coalesced"
+            self.run_hits += 1
+            return response, ref["item_id"], "run"
+
+        try:
+            detail = await asyncio.to_thread(self._database_detail, ref)
+        except Exception as e:
+            self.database_errors += 1
+            print(f"[DEDUP] Failed to load stored detection #{ref}: {str(e)[:100]}")
+            return None, None, None
+        if detail is None:
+            return None, None, None
+        domain, response = detail
+        self.database_hits += 1
+        return response, domain, "database"
+
+    def stats(self) -> dict:
+        hits = self.run_hits + self.database_hits + self.coalesced
+        return {
+            "threshold": self.threshold,
+            "hash_bits": self.bits,
+            "loaded": self.loaded,
+            "checked": self.checked,
+            "duplicates": hits,
+            "run_hits": self.run_hits,
+            "database_hits": self.database_hits,
+            "coalesced": self.coalesced,
+            "detector_calls": self.misses,
+            "dedup_rate": round(hits / self.checked, 4) if self.checked else 0.0,
+            "distances": {str(d): n for d, n in sorted(self.distances.items())},
+            "hash_errors": self.hash_errors,
+            "database_errors": self.database_errors,
+        }
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Long-lived screenshot engine on top of async Playwright.
+
+A small number of Chromium processes are launched once and kept warm. Each
+browser serves several pages concurrently, every page in its own isolated
+context, and is replaced after `recycle_after` pages or as soon as it crashes.
+Every capture has a hard deadline and reports how long each stage took
+(acquire a page slot, open the context, navigate, settle, capture,
+extract). The settle stage is a fixed sleep unless a readiness strategy
+(see page_readiness.py) is given. The PNG bytes
+are returned once; encoding for storage is the caller's job (see
+image_pipeline.py).
+
+With `extract_content`, the title, meta description/keywords and leading
+paragraphs are read from the rendered DOM after the screenshot, so the
+reasoning stage sees the same page as the detector without fetching it again.
+
+Usage:
+    async with ScreenshotEngine(browsers=3) as engine:
+        result = await engine.capture(url, output_path, item_id)  # output_path may be None
+"""
+import asyncio
+import time
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright
+
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-extensions",
+    "--disable-setuid-sandbox",
+    "--disable-web-security",
+    "--disable-features=VizDisplayCompositor",
+    "--window-size=1920,1080",
+    "--start-maximized",
+    "--log-level=3",
+]
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+VIEWPORT = {"width": 1920, "height": 1080}
+
+STAGES = ("acquire", "open", "navigate", "settle", "capture", "extract")
+
+# Reasoning fields from the live DOM; paragraph text follows BeautifulSoup's
+# get_text(strip=True) (text nodes trimmed and joined, script/style skipped)
+EXTRACT_CONTENT_JS = """
+(maxParagraphs) => {
+    const skip = new Set(["SCRIPT", "STYLE", "TEMPLATE", "NOSCRIPT"]);
+    const meta = (selector) => {
+        const element = document.querySelector(selector);
+        return element ? (element.getAttribute("content") || "").trim() : "";
+    };
+    const text = (element) => {
+        const parts = [];
+        const walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT, {
+            acceptNode: (node) => skip.has(node.parentNode.nodeName)
+                ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT,
+        });
+        while (walker.nextNode()) parts.push(walker.currentNode.nodeValue.trim());
+        return parts.join("");
+    };
+    const paragraphs = [];
+    for (const p of document.querySelectorAll("p")) {
+        const value = text(p);
+        if (value) paragraphs.push(value);
+        if (paragraphs.length >= maxParagraphs) break;
+    }
+    const title = document.querySelector("title");
+    return {
+        title: title ? (title.textContent || "").trim() : "",
+        description: meta('meta[name="description" i]') || meta('meta[property="og:description" i]'),
+        keywords: meta('meta[name="keywords" i]'),
+        paragraphs: paragraphs,
+    };
+}
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class _BrowserSlot:
+    """One warm browser process and its bookkeeping."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.browser = None
+        self.active = 0          # pages currently open on this browser
+        self.pages_served = 0    # pages since the last (re)launch
+        self.retiring = False    # no new pages; relaunch once active drops to 0
+        self.dead = False        # relaunch failed, slot is out of rotation
+
+    @property
+    def healthy(self) -> bool:
+        return (
+            self.browser is not None
+            and not self.retiring
+            and not self.dead
+            and self.browser.is_connected()
+        )
+
+
+class ScreenshotEngine:
+    """Pool of warm Chromium browsers serving isolated pages."""
+
+    def __init__(
+        self,
+        browsers: int = 2,
+        pages_per_browser: int = 4,
+        recycle_after: int = 50,
+        page_deadline: float = 45.0,
+        navigation_timeout: float = 30.0,
+        settle_seconds: float = 3.0,
+        readiness=None,
+        extract_content: bool = False,
+        max_paragraphs: int = 5,
+        on_launch: Optional[Callable[[float], None]] = None,
+        log: Callable[..., None] = print,
+    ):
+        """
+        Args:
+            browsers: Number of browser processes kept warm
+            pages_per_browser: Concurrent pages (contexts) per browser
+            recycle_after: Relaunch a browser after it served this many pages
+            page_deadline: Hard limit in seconds for one capture, all stages included
+            navigation_timeout: Playwright navigation timeout in seconds
+            settle_seconds: Fixed wait after the load event (used without `readiness`)
+            readiness: Strategy with prepare(context) and wait_ready(page, domain),
+                e.g. page_readiness.AdaptiveReadiness
+            extract_content: Also read title, meta tags and paragraphs from the DOM
+            max_paragraphs: Paragraphs extracted with extract_content
+            on_launch: Called with the seconds each successful browser launch took
+            log: Logging function (defaults to print)
+        """
+        self.browsers = max(1, browsers)
+        self.pages_per_browser = max(1, pages_per_browser)
+        self.recycle_after = max(1, recycle_after)
+        self.page_deadline = page_deadline
+        self.navigation_timeout = navigation_timeout
+        self.settle_seconds = settle_seconds
+        self.readiness = readiness
+        self.extract_content = extract_content
+        self.max_paragraphs = max_paragraphs
+        self.on_launch = on_launch
+        self.log = log
+
+        self._playwright = None
+        self._slots = [_BrowserSlot(i) for i in range(self.browsers)]
+        self._cond = asyncio.Condition()
+
+        self.launches = 0
+        self.recycles = 0
+        self.crashes = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.extract_failures = 0
+        self.pages = 0
+        self.stage_timings = {stage: [] for stage in STAGES}
+        self.total_timings = []
+        self.launch_timings = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """Start Playwright and launch all browsers."""
+        self._playwright = await async_playwright().start()
+        await asyncio.gather(*[self._launch(slot) for slot in self._slots])
+        if all(slot.dead for slot in self._slots):
+            raise RuntimeError("No browser could be launched")
+
+    async def close(self):
+        """Close all browsers and stop Playwright."""
+        for slot in self._slots:
+            await self._close_browser(slot)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self, slot: _BrowserSlot):
+        started = time.perf_counter()
+        try:
+            slot.browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+            slot.active = 0
+            slot.pages_served = 0
+            slot.retiring = False
+            slot.dead = False
+            self.launches += 1
+            self.launch_timings.append(time.perf_counter() - started)
+            if self.on_launch is not None:
+                self.on_launch(self.launch_timings[-1])
+        except Exception as e:
+            slot.browser = None
+            slot.dead = True
+            self.log(f"[SCREENSHOT ENGINE] Browser {slot.index} failed to launch: {str(e)[:100]}")
+
+    async def _close_browser(self, slot: _BrowserSlot):
+        browser, slot.browser = slot.browser, None
+        if browser is None:
+            return
+        try:
+            await browser.close()
+        except Exception:
+            # Already gone (crashed or disconnected)
+            pass
+
+    async def _recycle(self, slot: _BrowserSlot, crashed: bool):
+        reason = "crashed" if crashed else f"served {slot.pages_served} pages"
+        self.log(f"[SCREENSHOT ENGINE] Relaunching browser {slot.index} ({reason})")
+        await self._close_browser(slot)
+        await self._launch(slot)
+        self.recycles += 1
+        async with self._cond:
+            self._cond.notify_all()
+
+    def _pick_slot(self) -> Optional[_BrowserSlot]:
+        candidates = [s for s in self._slots if s.healthy and s.active < self.pages_per_browser]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda s: s.active)
+
+    async def _acquire(self) -> _BrowserSlot:
+        async with self._cond:
+            while True:
+                if all(slot.dead for slot in self._slots):
+                    raise RuntimeError("All browsers are down")
+                for idle in self._slots:
+                    # Crashed while idle: no page will fail on it, so relaunch here
+                    if (idle.browser is not None and not idle.retiring and idle.active == 0
+                            and not idle.browser.is_connected()):
+                        idle.retiring = True
+                        self.crashes += 1
+                        asyncio.ensure_future(self._recycle(idle, crashed=True))
+                slot = self._pick_slot()
+                if slot is not None:
+                    slot.active += 1
+                    return slot
+                await self._cond.wait()
+
+    async def _release(self, slot: _BrowserSlot, crashed: bool):
+        async with self._cond:
+            slot.active -= 1
+            slot.pages_served += 1
+            if crashed:
+                self.crashes += 1
+            if crashed or slot.pages_served >= self.recycle_after:
+                slot.retiring = True
+            # A retiring slot gets no new pages, so this is true exactly once
+            relaunch = slot.retiring and slot.active == 0 and not slot.dead
+
+        if relaunch:
+            await self._recycle(slot, crashed)
+        else:
+            async with self._cond:
+                self._cond.notify_all()
+
+    async def _extract(self, page, item_id: str) -> Optional[dict]:
+        """Reasoning fields from the rendered page, None if the page would not answer."""
+        try:
+            return await page.evaluate(EXTRACT_CONTENT_JS, self.max_paragraphs)
+        except Exception as e:
+            self.extract_failures += 1
+            self.log(f"[SCREENSHOT] {item_id}: content extraction failed: {str(e)[:100]}")
+            return None
+
+    async def _capture_on(self, slot: _BrowserSlot, url: str, output_path: Optional[str], timings: dict,
+                          settle: dict, item_id: str = "") -> tuple:
+        started = time.perf_counter()
+        context = await slot.browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+        try:
+            if self.readiness is not None:
+                await self.readiness.prepare(context)
+            page = await context.new_page()
+            page.set_default_navigation_timeout(self.navigation_timeout * 1000)
+            page.set_default_timeout(self.navigation_timeout * 1000)
+            timings["open"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            await page.goto(url, wait_until="load")
+            timings["navigate"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            if self.readiness is not None:
+                settle.update(await self.readiness.wait_ready(page, urlparse(url).hostname or ""))
+            else:
+                await asyncio.sleep(self.settle_seconds)
+            timings["settle"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            screenshot_bytes = await page.screenshot(path=output_path, full_page=False)
+            timings["capture"] = time.perf_counter() - started
+
+            content = None
+            if self.extract_content:
+                started = time.perf_counter()
+                content = await self._extract(page, item_id)
+                timings["extract"] = time.perf_counter() - started
+
+            return screenshot_bytes, content
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def capture(self, url: str, output_path: Optional[str] = None, item_id: str = "") -> dict:
+        """
+        Take a viewport screenshot of a URL.
+
+        Args:
+            url: Page to capture
+            output_path: PNG file written by Playwright (None: bytes only)
+            item_id: Identifier used in log lines
+
+        Returns:
+            Dict with success, png (screenshot bytes), error, timings (seconds per stage),
+            settle (readiness details, empty with a fixed sleep) and content
+            (title/description/keywords/paragraphs from the DOM with
+            extract_content, else None)
+        """
+        timings = {}
+        settle = {}
+        started = time.perf_counter()
+        slot = await self._acquire()
+        timings["acquire"] = time.perf_counter() - started
+        crashed = False
+        try:
+            png, content = await asyncio.wait_for(
+                self._capture_on(slot, url, output_path, timings, settle, item_id),
+                timeout=self.page_deadline,
+            )
+            return {"success": True, "png": png, "error": None, "timings": timings, "settle": settle,
+                    "content": content}
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.failures += 1
+            error = f"deadline of {self.page_deadline:.0f}s exceeded"
+            self.log(f"[SCREENSHOT ERROR] {item_id}: {error}")
+            return {"success": False, "png": None, "error": error, "timings": timings, "settle": settle,
+                    "content": None}
+        except Exception as e:
+            self.failures += 1
+            crashed = slot.browser is None or not slot.browser.is_connected()
+            self.log(f"[SCREENSHOT ERROR] {item_id}: {str(e)[:100]}")
+            return {"success": False, "png": None, "error": str(e)[:200], "timings": timings, "settle": settle,
+                    "content": None}
+        finally:
+            self.pages += 1
+            for stage, seconds in timings.items():
+                self.stage_timings[stage].append(seconds)
+            self.total_timings.append(time.perf_counter() - started)
+            await self._release(slot, crashed)
+
+    def stats(self) -> dict:
+        """Engine counters and per-stage timing percentiles (milliseconds)."""
+        def summarize(values):
+            return {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values) * 1000, 1) if values else 0.0,
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "max_ms": round(max(values) * 1000, 1) if values else 0.0,
+            }
+
+        return {
+            "browsers": self.browsers,
+            "pages_per_browser": self.pages_per_browser,
+            "recycle_after": self.recycle_after,
+            "page_deadline_seconds": self.page_deadline,
+            "pages": self.pages,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "crashes": self.crashes,
+            "launches": self.launches,
+            "recycles": self.recycles,
+            "settle_strategy": "adaptive" if self.readiness is not None else "fixed",
+            "extract_content": self.extract_content,
+            "extract_failures": self.extract_failures,
+            "settle_reasons": dict(getattr(self.readiness, "reasons", {})),
+            "stages": {stage: summarize(values) for stage, values in self.stage_timings.items()},
+            "total": summarize(self.total_timings),
+            "launch": summarize(self.launch_timings),
+        }
@@ -0,0 +1,118 @@
+"""
+In-memory log channels of the crawler runs started by this service.
+
+POST /process and /process-links read the crawler's stdout pipe; every line
+is published to the run's LogChannel (keyed by the backend job id, or
+"latest" for runs without one) as well as streamed to the caller. GET
+/process/logs subscribers are fanned out from that single reader instead of
+each polling crawler.log: a channel keeps the last `size` lines in a ring
+buffer with consecutive sequence numbers, so a late joiner (SSE
+Last-Event-ID) resumes from any offset still in the buffer, and waiting
+subscribers are woken by the publisher rather than a timer.
+
+Finished channels are kept for `retention` seconds so a client that
+connects right after the run still gets the whole output.
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Dict, Optional
+
+LATEST = "latest"
+
+
+class LogChannel:
+    """Ring buffer of one run's output lines with fan-out to async subscribers."""
+
+    def __init__(self, key: str, size: int = 10000):
+        self.key = key
+        self.lines = deque(maxlen=size)
+        self.last_seq = 0
+        self.finished = False
+        self.success: Optional[bool] = None
+        self.finished_at: Optional[float] = None
+        self.subscribers = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def first_seq(self) -> int:
+        """Seq of the oldest line still buffered."""
+        return self.last_seq - len(self.lines) + 1
+
+    async def publish(self, line: str):
+        self.last_seq += 1
+        self.lines.append(line)
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def close(self, success: Optional[bool] = None):
+        self.finished = True
+        self.success = success
+        self.finished_at = time.monotonic()
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def subscribe(self, after_seq: int = 0, keepalive: float = 15.0):
+        """
+        Yield (seq, line) for every line after `after_seq` until the run has
+        finished, and None after `keepalive` seconds without output.
+
+        Lines that already left the ring buffer are skipped with a single
+        (seq, "[INFO] ... earlier lines dropped") notice.
+        """
+        cursor = max(0, after_seq)
+        self.subscribers += 1
+        try:
+            while True:
+                if cursor < self.first_seq - 1:
+                    dropped = self.first_seq - 1 - cursor
+                    cursor = self.first_seq - 1
+                    yield cursor, f"[INFO] {dropped} earlier log lines are no longer available"
+                start = cursor - self.first_seq + 1
+                for line in list(itertools.islice(self.lines, start, None)):
+                    cursor += 1
+                    yield cursor, line
+                if self.finished and cursor >= self.last_seq:
+                    return
+                async with self._changed:
+                    try:
+                        await asyncio.wait_for(
+                            self._changed.wait_for(lambda: self.last_seq > cursor or self.finished),
+                            keepalive,
+                        )
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+                yield None
+        finally:
+            self.subscribers -= 1
+
+
+class LogChannels:
+    """Channels by run key; finished ones expire after `retention` seconds."""
+
+    def __init__(self, size: int = 10000, retention: float = 600.0):
+        self.size = size
+        self.retention = retention
+        self._channels: Dict[str, LogChannel] = {}
+
+    def open(self, key: Optional[str]) -> LogChannel:
+        """New channel for a run (replaces a previous run with the same key)."""
+        self._expire()
+        channel = LogChannel(key or LATEST, self.size)
+        self._channels[channel.key] = channel
+        if key:
+            # Runs of backend jobs are also the latest run
+            self._channels[LATEST] = channel
+        return channel
+
+    def get(self, key: Optional[str]) -> Optional[LogChannel]:
+        self._expire()
+        return self._channels.get(key or LATEST)
+
+    def _expire(self):
+        now = time.monotonic()
+        for key, channel in list(self._channels.items()):
+            if channel.finished and not channel.subscribers and now - channel.finished_at > self.retention:
+                del self._channels[key]
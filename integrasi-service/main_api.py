@@ -1,8 +1,10 @@
 import uvicorn
-from fastapi import FastAPI, HTTPException, Security, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Security, Depends, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 import secrets
+import uuid
 import requests  # Added for forwarding requests
 import socket
 import asyncio
@@ -18,9 +20,11 @@ app = FastAPI(title="Simple String API")
 class StringInput(BaseModel):
     data: str
     num_domains: int = 5  # Number of domains to generate (default: 5)
+    job_id: Optional[str] = None  # Backend crawler job (separate log file per job)
 
 class LinksInput(BaseModel):
     links: list[str]  # List of URLs to process directly
+    job_id: Optional[str] = None
 
 class ChatInput(BaseModel):
     query: str
@@ -90,80 +94,162 @@ import subprocess
 import os
 import aiofiles
 import aiofiles.os
+import sys
+
+from log_channels import LogChannels
+from run_metrics import CrawlerRunMetrics
+
+# Shared modules from the backend (crawler progress events)
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from utils.progress_events import parse_event, sse_message
+from utils.prometheus import CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 # Log file path (must match crawler.py)
 LOG_FILE_PATH = "/home/ubuntu/web-app/integrasi-service/domain-generator/output/crawler.log"
 
+# Output of the crawler runs started here, fanned out to /process/logs subscribers
+LOG_CHANNELS = LogChannels()
+
+# Step timings, items and runs of those crawls, for GET /metrics
+RUN_METRICS = CrawlerRunMetrics()
+
+
+def job_log_path(job_id: Optional[str]) -> str:
+    """crawler.log, or output/jobs/<job_id>.log for a backend job (crawler.py --job-id)."""
+    if not job_id:
+        return LOG_FILE_PATH
+    try:
+        job_id = str(uuid.UUID(job_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job_id")
+    return os.path.join(os.path.dirname(LOG_FILE_PATH), "jobs", f"{job_id}.log")
+
+
+def crawler_job_args(job_id: Optional[str]) -> list:
+    if not job_id:
+        return []
+    job_log_path(job_id)  # validates
+    return ["--job-id", job_id]
+
+
+async def tee_to_channel(chunks, channel):
+    """
+    Stream crawler output to the caller, publish each line to the run's log
+    channel and account its progress events in RUN_METRICS.
+    """
+    RUN_METRICS.run_started(channel)
+    try:
+        async for chunk in chunks:
+            for line in chunk.splitlines():
+                if line.strip():
+                    await channel.publish(line)
+                    event = parse_event(line)
+                    if event is not None:
+                        RUN_METRICS.observe_event(channel, event)
+            yield chunk
+    finally:
+        # Caller gone: close the crawler generator now (kills the subprocess)
+        await chunks.aclose()
+        RUN_METRICS.run_finished(channel, channel.success)
+
+
+async def stop_process(process):
+    """Kill the crawler when the client (backend worker) went away or cancelled."""
+    if process is not None and process.returncode is None:
+        process.kill()
+        await process.wait()
+
+
+async def replay_log_file(log_file_path: str):
+    """Output of a run this service is not streaming (finished before a restart, or run by hand)."""
+    if not os.path.exists(log_file_path):
+        yield "data: [INFO] No crawler log found\n\n"
+        return
+    async with aiofiles.open(log_file_path, mode='r', encoding='utf-8') as f:
+        content = await f.read()
+    for seq, line in enumerate(content.splitlines(), 1):
+        if line.strip():
+            yield sse_message(seq, line)
+    if "===END===" not in content:
+        yield "data: [INFO] Crawler output is not live on this service\n\n"
+
+
+@app.get("/metrics")
+def metrics():
+    """Crawler step latency histograms, item and run counters in Prometheus text format."""
+    return Response(RUN_METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/process/logs")
-async def stream_logs():
+async def stream_logs(request: Request, job_id: Optional[str] = None):
     """
-    Stream crawler log file in real-time.
-    Frontend should poll this endpoint or use EventSource.
-    Returns logs from file with ===END=== marker when complete.
+    Stream the output of the current (or given job's) crawler run as SSE.
+
+    Lines are relayed from the run's in-memory log channel as the crawler
+    prints them; each event id is the line's seq, so a reconnecting client
+    resumes with Last-Event-ID. The crawler's progress events (stage_started,
+    item_progress, item_result, stage_metrics, summary) are sent as SSE
+    events of that type with their JSON as data; log lines as plain
+    messages. Ends with [DONE] when the run is over.
+    Without a live channel the run's log file is replayed once.
     """
+    log_file_path = job_log_path(job_id)
+    channel = LOG_CHANNELS.get(job_id)
+    try:
+        after_seq = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        after_seq = 0
+
     async def log_generator():
-        last_position = 0
-        end_marker_found = False
-        max_wait_cycles = 7200  # 2 hours max (7200 * 1 second) for large batches
-        wait_cycles = 0
-        
-        while not end_marker_found and wait_cycles < max_wait_cycles:
-            try:
-                # Check if file exists
-                if not os.path.exists(LOG_FILE_PATH):
-                    await asyncio.sleep(0.5)
-                    wait_cycles += 1
-                    continue
-                
-                # Read new content from file
-                async with aiofiles.open(LOG_FILE_PATH, mode='r', encoding='utf-8') as f:
-                    await f.seek(last_position)
-                    content = await f.read()
-                    
-                    if content:
-                        # Update position
-                        last_position = await f.tell()
-                        
-                        # Check for end marker
-                        if "===END===" in content:
-                            end_marker_found = True
-                        
-                        # Yield content
-                        yield content
+        yield ": keepalive\n\n"
+        try:
+            if channel is None:
+                async for event in replay_log_file(log_file_path):
+                    yield event
+            else:
+                async for item in channel.subscribe(after_seq):
+                    if item is None:
+                        yield ": keepalive\n\n"
                     else:
-                        # No new content, wait a bit
-                        await asyncio.sleep(0.3)
-                        wait_cycles += 1
-                        
-            except Exception as e:
-                yield f"\n[ERROR] Failed to read log file: {str(e)}\n"
-                break
-        
-        if not end_marker_found:
-            yield "\n[TIMEOUT] Log streaming timed out\n"
-    
+                        yield sse_message(*item)
+        except Exception as e:
+            yield f"data: [ERROR] Failed to read crawler log: {str(e)}\n\n"
+        yield "data: [DONE]\n\n"
+
     return StreamingResponse(
         log_generator(),
-        media_type="text/plain",
+        media_type="text/event-stream",
         headers={
             "X-Accel-Buffering": "no",
             "Cache-Control": "no-cache, no-store, must-revalidate",
             "Connection": "keep-alive",
-            "Content-Type": "text/plain; charset=utf-8"
+            "Content-Type": "text/event-stream; charset=utf-8"
         }
     )
 
 @app.get("/process/logs/status")
-async def get_log_status():
+async def get_log_status(job_id: Optional[str] = None):
     """
-    Get current status of crawler log file.
+    Get current status of the latest (or given job's) crawler run.
     Returns whether crawl is running, complete, or no log exists.
     """
-    if not os.path.exists(LOG_FILE_PATH):
+    channel = LOG_CHANNELS.get(job_id)
+    if channel is not None:
+        if not channel.finished:
+            return {"status": "running", "message": "Crawler is still running", "lines": channel.last_seq}
+        if channel.success:
+            return {"status": "complete", "success": True, "message": "Crawler finished successfully"}
+        return {"status": "complete", "success": False, "message": "Crawler finished with errors"}
+
+    log_file_path = job_log_path(job_id)
+    if not os.path.exists(log_file_path):
         return {"status": "no_log", "message": "No crawler log file found"}
     
     try:
-        async with aiofiles.open(LOG_FILE_PATH, mode='r', encoding='utf-8') as f:
+        async with aiofiles.open(log_file_path, mode='r', encoding='utf-8') as f:
             content = await f.read()
             
             if "===END===" in content:
@@ -175,7 +261,7 @@ async def get_log_status():
                 else:
                     return {"status": "complete", "success": None, "message": "Crawler finished (unknown status)"}
             else:
-                return {"status": "running", "message": "Crawler is still running"}
+                return {"status": "unknown", "message": "Crawler log is incomplete and the run is not live on this service"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -184,7 +270,9 @@ async def process_string(input_data: StringInput):
     """
     Menerima sebuah string (keywords) dan menjalankan crawler.py dengan streaming logs.
     """
-    
+    job_args = crawler_job_args(input_data.job_id)
+    channel = LOG_CHANNELS.open(input_data.job_id)
+
     async def crawler_log_generator():
         """Generator untuk streaming logs dari crawler subprocess"""
         # Path script crawler
@@ -199,8 +287,9 @@ async def process_string(input_data: StringInput):
             crawler_script,
             "-k", input_data.data,
             "-n", str(input_data.num_domains)
-        ]
+        ] + job_args
         
+        process = None
         try:
             # Yield info awal
             yield f"Starting crawler with keywords: '{input_data.data}'\n"
@@ -234,9 +323,12 @@ async def process_string(input_data: StringInput):
                 
         except Exception as e:
             yield f"\n❌ Error: {str(e)}\n"
+        finally:
+            await stop_process(process)
+            await channel.close(process is not None and process.returncode == 0)
     
     return StreamingResponse(
-        crawler_log_generator(),
+        tee_to_channel(crawler_log_generator(), channel),
         media_type="text/plain",
         headers={
             "X-Accel-Buffering": "no",
@@ -251,7 +343,9 @@ async def process_links(input_data: LinksInput):
     Menerima kumpulan link dan menjalankan crawler.py langsung tanpa pencarian keyword.
     Link-link akan langsung diproses oleh crawler.
     """
-    
+    job_args = crawler_job_args(input_data.job_id)
+    channel = LOG_CHANNELS.open(input_data.job_id)
+
     async def crawler_log_generator():
         """Generator untuk streaming logs dari crawler subprocess"""
         # Path script crawler
@@ -267,8 +361,9 @@ async def process_links(input_data: LinksInput):
             "-u",  # Unbuffered output untuk real-time streaming
             crawler_script,
             "-d", domains_str,  # Direct domains mode
-        ]
+        ] + job_args
         
+        process = None
         try:
             # Yield info awal
             yield f"Starting crawler with direct links (skipping search)\n"
@@ -305,9 +400,12 @@ async def process_links(input_data: LinksInput):
                 
         except Exception as e:
             yield f"\n❌ Error: {str(e)}\n"
+        finally:
+            await stop_process(process)
+            await channel.close(process is not None and process.returncode == 0)
     
     return StreamingResponse(
-        crawler_log_generator(),
+        tee_to_channel(crawler_log_generator(), channel),
         media_type="text/plain",
         headers={
             "X-Accel-Buffering": "no",
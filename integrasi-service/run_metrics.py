@@ -0,0 +1,78 @@
+"""
+Prometheus metrics of the crawler runs started by this service.
+
+The crawler reports its per-step timings in stage_metrics progress events
+(utils/progress_events.py): every CRAWLER_METRICS_INTERVAL seconds while a
+stage runs and once when it finishes, each step with its cumulative count,
+sum and bucket counts since the run started. CrawlerRunMetrics keeps the
+last report of every run and adds only the difference to the process-wide
+histograms, so repeated reports are not counted twice; item_result and
+summary events feed the item and run counters. Rendered by GET /metrics.
+"""
+from typing import Dict, Hashable, Optional
+
+from utils.prometheus import Registry
+
+# Must match crawler_metrics.LATENCY_BUCKETS_MS (the buckets reported by the crawler)
+STEP_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+
+class CrawlerRunMetrics:
+    """Crawler step latency, items and runs, fed from the runs' progress events."""
+
+    def __init__(self, registry: Optional[Registry] = None):
+        self.registry = registry or Registry()
+        self.step_seconds = self.registry.histogram(
+            "crawler_step_duration_seconds", "Per-item duration of a crawler pipeline step",
+            ("stage", "step"), buckets=[bound / 1000 for bound in STEP_BUCKETS_MS],
+        )
+        self.run_seconds = self.registry.histogram(
+            "crawler_run_duration_seconds", "Wall time of finished crawler runs",
+            buckets=(30, 60, 120, 300, 600, 1200, 1800, 3600, 7200),
+        )
+        self.items = self.registry.counter("crawler_items_total", "Crawled domains by result", ("status",))
+        self.runs = self.registry.counter("crawler_runs_total", "Finished crawler runs", ("status",))
+        self.running = self.registry.gauge("crawler_runs_in_progress", "Crawler runs in progress")
+        self._reported: Dict[Hashable, Dict[tuple, tuple]] = {}  # run -> (stage, step) -> (count, sum, buckets)
+
+    def run_started(self, run: Hashable):
+        """`run` identifies the run in the calls that follow (its log channel)."""
+        self._reported[run] = {}
+        self.running.inc()
+
+    def run_finished(self, run: Hashable, success: Optional[bool]):
+        self._reported.pop(run, None)
+        self.running.dec()
+        self.runs.inc(status="success" if success else "failed")
+
+    def observe_event(self, run: Hashable, event: dict):
+        """Account one progress event of `run`."""
+        if event["type"] == "item_result":
+            self.items.inc(status=event.get("status", "unknown"))
+        elif event["type"] == "summary":
+            elapsed = (event.get("summary") or {}).get("time_elapsed_seconds")
+            if elapsed is not None:
+                self.run_seconds.observe(elapsed)
+        elif event["type"] == "stage_metrics":
+            if tuple(event.get("buckets_ms") or ()) != STEP_BUCKETS_MS:
+                return
+            reported = self._reported.setdefault(run, {})
+            for step, timing in (event.get("timings") or {}).items():
+                self._add(reported, event["stage"], step, timing)
+
+    def _add(self, reported: dict, stage: str, step: str, timing: dict):
+        count, total, buckets = timing["count"], timing["sum_seconds"], timing["buckets"]
+        last_count, last_total, last_buckets = reported.get((stage, step), (0, 0.0, [0] * len(buckets)))
+        if count <= last_count:
+            return
+        reported[(stage, step)] = (count, total, buckets)
+        self.step_seconds.add(
+            [new - old for new, old in zip(buckets, last_buckets)],
+            count - last_count,
+            total - last_total,
+            stage=stage,
+            step=step,
+        )
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark screenshot storage: PNG as captured vs image_pipeline.py's
+compressed image + thumbnail.
+
+Renders --images synthetic 1920x1080 landing-page screenshots (flat
+banners, gradients, text-like noise and a photo-like block), encodes each
+in every format and prints bytes per domain, compression ratio and encode
+time. The base64 size is what the old flow carried through the pipeline and
+stored in generated_domains.image_base64.
+
+Usage:
+    python3 benchmark_images.py --images 20 --quality 80
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import tempfile
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from image_pipeline import ImagePipeline  # noqa: E402
+
+
+def make_screenshot(index, width=1920, height=1080):
+    rng = random.Random(index)
+    image = Image.new("RGB", (width, height), (245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    # Header banner with a gradient
+    for y in range(220):
+        draw.line([(0, y), (width, y)], fill=(120 + y // 4, 20, 60 + y // 3))
+    # Text-like rows
+    for row in range(40):
+        y = 260 + row * 18
+        x = 80
+        while x < width // 2:
+            word = rng.randint(20, 90)
+            draw.rectangle([x, y, x + word, y + 9], fill=(40, 40, 40))
+            x += word + 8
+    # Photo-like block (noise is the worst case for any encoder)
+    noise = Image.effect_noise((640, 480), 40).convert("RGB")
+    image.paste(noise, (width // 2 + 200, 300))
+    # Buttons
+    for i in range(6):
+        x = 100 + i * 280
+        draw.rounded_rectangle([x, 1000 - 60, x + 240, 1000], 12, fill=(230, 180, 20))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def main(args):
+    screenshots = [make_screenshot(i) for i in range(args.images)]
+    png_bytes = sum(len(s) for s in screenshots) / len(screenshots)
+    print(f"{args.images} screenshots, PNG {png_bytes / 1024:.0f} KB "
+          f"(base64 {png_bytes * 4 / 3 / 1024:.0f} KB) per domain\n")
+
+    for image_format in ("webp", "jpeg", "png"):
+        with tempfile.TemporaryDirectory() as output_dir:
+            pipeline = ImagePipeline(
+                output_dir, image_format=image_format, quality=args.quality,
+                thumbnail_width=args.thumbnail_width,
+            )
+            for i, png in enumerate(screenshots):
+                await pipeline.save(png, f"bench_{i}")
+            stats = pipeline.stats()
+        encode = stats["encode_time"]
+        print(f"{stats['format']:<5} image {stats['image_bytes_per_domain'] / 1024:>6.0f} KB  "
+              f"thumb {stats['thumbnail_bytes_per_domain'] / 1024:>5.1f} KB  "
+              f"ratio {stats['compression_ratio']:>5.1f}x  "
+              f"encode p50 {encode['p50_ms']:>5.0f}ms p95 {encode['p95_ms']:>5.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark screenshot encoding")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--thumbnail-width", type=int, default=320)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark fixed-sleep vs adaptive readiness for screenshot capture.
+
+Serves the fixture corpus in fixtures/readiness/ on a local HTTP server and
+captures every page with both strategies. Each fixture gets its own
+<name>.localhost host name (Chromium resolves *.localhost to loopback), so
+the adaptive strategy learns one settle time per fixture just like it does
+per domain in the crawler.
+
+For every strategy it prints mean/p95 capture latency (navigate + settle +
+capture + encode) and the number of blank screenshots. A screenshot counts
+as blank when less than --blank-threshold of its pixels are non-white; every
+fixture renders a large dark banner once it is really ready.
+
+Usage:
+    python3 benchmark_readiness.py --rounds 3 --repeat 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from screenshot_engine import ScreenshotEngine, percentile  # noqa: E402
+from page_readiness import AdaptiveReadiness, SettleTimeStore  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "readiness")
+
+BANNER_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="1200" height="400">'
+    '<rect width="1200" height="400" fill="#1f4e8c"/></svg>'
+)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Static fixtures plus slow API / image endpoints."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=FIXTURES_DIR, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self, query):
+        ms = int(parse_qs(query).get("ms", ["0"])[0])
+        time.sleep(ms / 1000)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/api/slow":
+            self._delay(parsed.query)
+            body = json.dumps({"title": "Data dari API"}).encode()
+            content_type = "application/json"
+        elif parsed.path == "/img/banner.svg":
+            self._delay(parsed.query)
+            body = BANNER_SVG.encode()
+            content_type = "image/svg+xml"
+        else:
+            return super().do_GET()
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Page was closed while the long poll was pending
+            pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fixture_urls(port):
+    names = sorted(f[:-5] for f in os.listdir(FIXTURES_DIR) if f.endswith(".html"))
+    return [(name, f"http://{name.replace('_', '-')}.localhost:{port}/{name}.html") for name in names]
+
+
+def ink_ratio(path):
+    """Fraction of non-white pixels of a screenshot."""
+    with Image.open(path) as img:
+        small = img.convert("L").resize((192, 108))
+        pixels = list(small.getdata())
+    return sum(1 for p in pixels if p < 240) / len(pixels)
+
+
+async def run_strategy(strategy, urls, rounds, repeat, concurrency, blank_threshold, workdir):
+    readiness = None
+    if strategy == "adaptive":
+        store = SettleTimeStore(os.path.join(workdir, "settle_times.json"))
+        readiness = AdaptiveReadiness(store=store)
+
+    samples = []  # (round, fixture, latency seconds, blank)
+    for round_no in range(1, rounds + 1):
+        async with ScreenshotEngine(
+            browsers=1,
+            pages_per_browser=concurrency,
+            readiness=readiness,
+            log=lambda *a: None,
+        ) as engine:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def capture(name, url, i):
+                async with semaphore:
+                    path = os.path.join(workdir, f"{strategy}-{round_no}-{name}-{i}.png")
+                    result = await engine.capture(url, path, name)
+                    latency = sum(result["timings"].values())
+                    blank = not result["success"] or ink_ratio(path) < blank_threshold
+                    samples.append((round_no, name, latency, blank))
+
+            await asyncio.gather(*[
+                capture(name, url, i)
+                for i in range(repeat)
+                for name, url in urls
+            ])
+    return samples
+
+
+def report(strategy, samples, rounds):
+    print(f"\n=== {strategy} ===")
+    print(f"{'fixture':<14}" + "".join(f"{'r' + str(r) + ' mean':>12}" for r in range(1, rounds + 1)) + f"{'blank':>8}")
+    for name in sorted({s[1] for s in samples}):
+        row = f"{name:<14}"
+        for r in range(1, rounds + 1):
+            values = [s[2] for s in samples if s[1] == name and s[0] == r]
+            row += f"{(sum(values) / len(values) if values else 0):>11.2f}s"
+        row += f"{sum(1 for s in samples if s[1] == name and s[3]):>8}"
+        print(row)
+
+    latencies = [s[2] for s in samples]
+    blanks = sum(1 for s in samples if s[3])
+    print(
+        f"ALL: n={len(latencies)} mean={sum(latencies) / len(latencies):.2f}s "
+        f"p95={percentile(latencies, 95):.2f}s blank={blanks}"
+    )
+    return sum(latencies) / len(latencies), blanks
+
+
+async def main(args):
+    server = start_server()
+    port = server.server_address[1]
+    urls = fixture_urls(port)
+    print(f"Fixtures: {len(urls)} pages on port {port}, rounds={args.rounds}, repeat={args.repeat}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for strategy in ("fixed", "adaptive"):
+            samples = await run_strategy(
+                strategy, urls, args.rounds, args.repeat, args.concurrency, args.blank_threshold, workdir
+            )
+            results[strategy] = report(strategy, samples, args.rounds)
+
+    server.shutdown()
+    fixed_mean, fixed_blank = results["fixed"]
+    adaptive_mean, adaptive_blank = results["adaptive"]
+    print(
+        f"\nMean capture latency: fixed {fixed_mean:.2f}s -> adaptive {adaptive_mean:.2f}s "
+        f"({(1 - adaptive_mean / fixed_mean) * 100:+.0f}% faster); "
+        f"blank: {fixed_blank} -> {adaptive_blank}"
+    )
+    if adaptive_blank > fixed_blank:
+        print("FAIL: adaptive readiness produced more blank screenshots")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screenshot readiness benchmark")
+    parser.add_argument("--rounds", type=int, default=2, help="Runs per strategy (round 2+ uses learned settle times)")
+    parser.add_argument("--repeat", type=int, default=2, help="Captures per fixture per round")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--blank-threshold", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
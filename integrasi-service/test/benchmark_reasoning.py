@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark reasoning throughput: fixed concurrency vs the reasoning dispatcher.
+
+Starts stub_vllm_server.py in-process and sends --items requests with the
+crawler's payload shape, once with a fixed number of workers (the old
+MAX_WORKERS_DETECTION semaphore) and once through ReasoningDispatcher.
+Prints requests/sec, latency and the dispatcher's concurrency limit.
+
+Usage:
+    python3 benchmark_reasoning.py --items 300 --fixed-workers 3 --max-num-seqs 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from crawler_metrics import LatencyHistogram  # noqa: E402
+from reasoning_dispatcher import ReasoningDispatcher  # noqa: E402
+from stub_vllm_server import start_server  # noqa: E402
+
+
+def payload(max_tokens):
+    return {
+        "model": "stub-reasoning",
+        "messages": [
+            {"role": "system", "content": "Klasifikasikan judi / non_judi."},
+            {"role": "user", "content": "Judul: contoh\n\nIsi artikel:\n- paragraf"},
+        ],
+        "temperature": 0.2,
+        "max_tokens": max_tokens,
+    }
+
+
+async def run_fixed(url, items, workers, max_tokens):
+    latency = LatencyHistogram()
+    limit = asyncio.Semaphore(workers)
+    errors = 0
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=workers)) as client:
+        async def one():
+            nonlocal errors
+            async with limit:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, json=payload(max_tokens), timeout=120)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                latency.observe(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(items)])
+        elapsed = time.perf_counter() - started
+    return elapsed, latency, errors, None
+
+
+async def run_dispatcher(url, items, max_concurrency, max_tokens, token_budget):
+    latency = LatencyHistogram()
+    errors = 0
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=max_concurrency)) as client:
+        async with ReasoningDispatcher(
+            client, max_tokens, max_concurrency=max_concurrency, token_budget=token_budget,
+        ) as dispatcher:
+            async def send(http):
+                response = await http.post(url, json=payload(max_tokens), timeout=120)
+                response.raise_for_status()
+                return response.json()
+
+            async def one():
+                nonlocal errors
+                started = time.perf_counter()
+                try:
+                    await dispatcher.submit(send)
+                except httpx.HTTPError:
+                    errors += 1
+                latency.observe(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*[one() for _ in range(items)])
+            elapsed = time.perf_counter() - started
+            stats = dispatcher.stats()
+    return elapsed, latency, errors, stats
+
+
+def report(name, items, elapsed, latency, errors, stats):
+    summary = latency.summary()
+    line = (f"{name:<12} {items / elapsed:>8.1f} req/s  p50 {summary['p50_ms']:>7.0f}ms  "
+            f"p95 {summary['p95_ms']:>7.0f}ms  errors {errors}")
+    if stats:
+        concurrency = stats["concurrency"]
+        line += (f"  limit {concurrency['limit']} (peak {concurrency['peak']}, "
+                 f"{concurrency['decreases']} decreases)  mean batch {stats['mean_batch_size']}")
+    print(line)
+
+
+async def main(args):
+    server, simulator = start_server(
+        max_num_seqs=args.max_num_seqs, max_waiting=args.max_waiting,
+        min_tokens=args.min_tokens, max_tokens=args.max_tokens, prose_ratio=1.0,
+    )
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    print(f"Stub: max_num_seqs={args.max_num_seqs}, max_waiting={args.max_waiting or 'unlimited'}, "
+          f"items={args.items}\n")
+
+    results = await run_fixed(url, args.items, args.fixed_workers, args.request_max_tokens)
+    report(f"fixed({args.fixed_workers})", args.items, *results)
+    results = await run_dispatcher(url, args.items, args.max_concurrency, args.request_max_tokens, args.token_budget)
+    report("dispatcher", args.items, *results)
+    print(f"\nStub peak running sequences: {simulator.peak_running}, rejected: {simulator.rejected}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reasoning dispatch against a stub vLLM server")
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--fixed-workers", type=int, default=3, help="Old fixed concurrency")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="Dispatcher upper limit")
+    parser.add_argument("--token-budget", type=int, default=0, help="Dispatcher token budget (0 = none)")
+    parser.add_argument("--request-max-tokens", type=int, default=600, help="REASONING_MAX_TOKENS")
+    parser.add_argument("--max-num-seqs", type=int, default=32, help="Stub batch capacity")
+    parser.add_argument("--max-waiting", type=int, default=16, help="Stub 503s beyond this many waiting")
+    parser.add_argument("--min-tokens", type=int, default=40)
+    parser.add_argument("--max-tokens", type=int, default=120)
+    asyncio.run(main(parser.parse_args()))
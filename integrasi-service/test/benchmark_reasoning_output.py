@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark reasoning answer parsing: full responses vs streamed early stop.
+
+Starts stub_vllm_server.py in-process (a share of answers has prose after
+the JSON, some start with <think>) and sends --items requests in each mode:
+
+- legacy:     full response, <think>/fence regexes + json.loads (old crawler)
+- extractor:  full response, ReasoningJSONExtractor
+- stream:     `stream: true`, response closed once the JSON is complete
+- structured: stream + response_format json_schema (bare JSON answers)
+
+Prints parse failures (domains that would be recrawled), tokens generated
+on the server and wall time.
+
+Usage:
+    python3 benchmark_reasoning_output.py --items 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from reasoning_output import ReasoningJSONExtractor, ReasoningOutput, stream_completion  # noqa: E402
+from stub_vllm_server import start_server  # noqa: E402
+
+
+def payload():
+    return {
+        "model": "stub-reasoning",
+        "messages": [
+            {"role": "system", "content": "Klasifikasikan judi / non_judi."},
+            {"role": "user", "content": "Judul: contoh\n\nIsi artikel:\n- paragraf"},
+        ],
+        "temperature": 0.2,
+        "max_tokens": 600,
+    }
+
+
+def legacy_parse(raw_text):
+    cleaned = re.sub(r"<think>.*?</think>", "", raw_text, flags=re.DOTALL).strip()
+    cleaned = re.sub(r"```json|```", "", cleaned).strip()
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        return None
+
+
+async def one(client, url, mode):
+    """Parsed answer of one request (None on parse failure)."""
+    if mode in ("legacy", "extractor"):
+        response = await client.post(url, json=payload(), timeout=120)
+        response.raise_for_status()
+        content = response.json()["choices"][0]["message"]["content"]
+        if mode == "legacy":
+            return legacy_parse(content)
+        extractor = ReasoningJSONExtractor()
+        extractor.feed(content)
+        return extractor.finish()
+
+    output = ReasoningOutput("json_schema" if mode == "structured" else "off", log=lambda message: None)
+    extractor = ReasoningJSONExtractor()
+    await stream_completion(client, url, output.apply(payload()), extractor)
+    return extractor.finish()
+
+
+async def run(url, simulator, mode, items, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    failures = 0
+    tokens_before = simulator.generated_tokens
+    aborted_before = simulator.aborted
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def task():
+            nonlocal failures
+            async with limit:
+                if await one(client, url, mode) is None:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[task() for _ in range(items)])
+        elapsed = time.perf_counter() - started
+
+    await asyncio.sleep(0.2)  # let aborted generations finish their last step
+    tokens = simulator.generated_tokens - tokens_before
+    aborted = simulator.aborted - aborted_before
+    print(f"{mode:<11} parse failures {failures:>4} ({failures / items:>4.0%})  "
+          f"tokens/item {tokens / items:>6.1f}  aborted {aborted:>4}  {elapsed:>6.1f}s")
+
+
+async def main(args):
+    server, simulator = start_server(
+        max_num_seqs=args.max_num_seqs, min_tokens=args.min_tokens, max_tokens=args.max_tokens,
+        prose_ratio=args.prose_ratio, think_ratio=args.think_ratio,
+    )
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    print(f"Stub: prose_ratio={args.prose_ratio}, think_ratio={args.think_ratio}, "
+          f"items={args.items}, concurrency={args.concurrency}\n")
+    for mode in ("legacy", "extractor", "stream", "structured"):
+        await run(url, simulator, mode, args.items, args.concurrency)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reasoning answer parsing against a stub vLLM server")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-num-seqs", type=int, default=32)
+    parser.add_argument("--prose-ratio", type=float, default=0.3)
+    parser.add_argument("--think-ratio", type=float, default=0.2)
+    parser.add_argument("--min-tokens", type=int, default=80)
+    parser.add_argument("--max-tokens", type=int, default=250)
+    asyncio.run(main(parser.parse_args()))
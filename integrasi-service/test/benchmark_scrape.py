@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark the crawler's reasoning scrape: full download + BeautifulSoup vs
+the streamed lxml extraction in page_scraper.py.
+
+Serves generated gambling-style landing pages (a <head> with meta tags and
+a script, 2-30 <p> blocks, then filler markup up to --page-kb) from a
+local HTTP server and scrapes --pages of them both ways. Checks that both
+produce the same fields and prints bytes read and parse time per page.
+
+Usage:
+    python3 benchmark_scrape.py --pages 20 --page-kb 300
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from crawler_metrics import LatencyHistogram  # noqa: E402
+from page_scraper import PageScraper  # noqa: E402
+
+
+def make_page(index, size_kb, paragraphs):
+    head = (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>Slot Gacor {index} – Situs Resmi 🎰</title>"
+        f"<meta name='description' content='Daftar slot gacor hari ini, bonus {index}% member baru'>"
+        "<meta name='keywords' content='slot, gacor, maxwin'>"
+        "<script>" + "var x=1;" * 2000 + "</script></head><body>"
+    )
+    body = []
+    for i in range(paragraphs):
+        body.append(f"<div class='promo'><p>Paragraf {i} <b>bonus</b> deposit pulsa <a href='#'>daftar</a></p>"
+                    f"<script>track({i})</script></div>")
+    page = head + "".join(body)
+    filler = "<div class='game'><img src='/g.png'><span>RTP 97%</span></div>"
+    while len(page) < size_kb * 1024:
+        page += filler * 200
+    return (page + "</body></html>").encode("utf-8")
+
+
+def old_parse(content, url):
+    """The crawler's previous parse_scraped_html."""
+    soup = BeautifulSoup(content, 'html.parser')
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+    description = ""
+    meta_desc = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
+    if meta_desc:
+        description = meta_desc.get('content', '').strip()
+    keywords = ""
+    meta_keys = soup.find('meta', attrs={'name': 'keywords'})
+    if meta_keys:
+        keywords = meta_keys.get('content', '').strip()
+    paragraphs = [p.get_text(strip=True) for p in soup.find_all('p') if p.get_text(strip=True)]
+    data = {"Scraped_URL": url, "Title": title, "Description": description, "Keywords": keywords}
+    for i in range(5):
+        data[f"P{i+1}"] = paragraphs[i] if i < len(paragraphs) else ""
+    return data
+
+
+def start_server(pages):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            body = pages[int(self.path.strip("/")) % len(pages)]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def main(args):
+    pages = [make_page(i, args.page_kb, random.randint(2, 30)) for i in range(10)]
+    server = start_server(pages)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"{args.pages} pages of ~{args.page_kb} KB\n")
+
+    old_parse_time = LatencyHistogram()
+    old_bytes = 0
+    old_results = []
+    async with httpx.AsyncClient() as client:
+        started = time.perf_counter()
+        for i in range(args.pages):
+            url = f"{base}/{i}"
+            response = await client.get(url)
+            old_bytes += len(response.content)
+            parse_started = time.perf_counter()
+            old_results.append(old_parse(response.content, url))
+            old_parse_time.observe(time.perf_counter() - parse_started)
+        old_elapsed = time.perf_counter() - started
+
+        scraper = PageScraper(client, max_bytes=args.max_kb * 1024)
+        new_results = []
+        started = time.perf_counter()
+        for i in range(args.pages):
+            data, _ = await scraper.scrape(f"{base}/{i}")
+            new_results.append(data)
+        new_elapsed = time.perf_counter() - started
+
+    mismatches = sum(1 for old, new in zip(old_results, new_results) if old != new)
+    stats = scraper.stats()
+    old_summary = old_parse_time.summary()
+    print(f"{'bs4 full':<10} {old_bytes / args.pages / 1024:>8.1f} KB/page  parse p50 {old_summary['p50_ms']:>7.1f}ms "
+          f"p95 {old_summary['p95_ms']:>7.1f}ms  total {old_elapsed:>6.2f}s")
+    print(f"{'streamed':<10} {stats['mean_bytes_read'] / 1024:>8.1f} KB/page  parse p50 "
+          f"{stats['parse_time']['p50_ms']:>7.1f}ms p95 {stats['parse_time']['p95_ms']:>7.1f}ms  total {new_elapsed:>6.2f}s"
+          f"  ({stats['stopped_early']} stopped early, {stats['capped']} capped)")
+    print(f"\nField mismatches: {mismatches}/{args.pages}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark streamed page scraping against BeautifulSoup")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-kb", type=int, default=300, help="Generated page size")
+    parser.add_argument("--max-kb", type=int, default=256, help="SCRAPE_MAX_BYTES in KB")
+    asyncio.run(main(parser.parse_args()))
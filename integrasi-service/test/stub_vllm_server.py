@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Stub of a vLLM OpenAI-compatible server for reasoning throughput benchmarks.
+
+Simulates continuous batching: at most --max-num-seqs requests decode at
+once (the rest wait), and every decode step takes
+--step-ms + --step-ms-per-seq * <running sequences>, so throughput grows
+with the batch until the step time dominates. With --max-waiting, requests
+beyond that many waiting ones get 503, like an overloaded server behind a
+proxy.
+
+Answers are the JSON the crawler's reasoning prompt asks for, one token per
+4 characters. Like the real model, a share of answers (--prose-ratio) keeps
+explaining after the JSON up to a random length and --think-ratio of them
+start with a <think> block; with response_format / guided_json the answer
+is the bare JSON (--reject-structured answers those requests with 400).
+`stream: true` is answered with SSE chunks, and a client that disconnects
+aborts its generation, as on vLLM.
+
+Usage:
+    python3 stub_vllm_server.py --port 8001
+    REASONING_SERVICE_URL=http://localhost:8001/v1 python3 crawler.py ...
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class BatchSimulator:
+    """Shared decode state of the simulated server."""
+
+    def __init__(self, max_num_seqs, step_ms, step_ms_per_seq, prefill_ms, max_waiting, min_tokens, max_tokens,
+                 prose_ratio=0.3, think_ratio=0.0, reject_structured=False):
+        self.slots = threading.BoundedSemaphore(max_num_seqs)
+        self.step_ms = step_ms
+        self.step_ms_per_seq = step_ms_per_seq
+        self.prefill_ms = prefill_ms
+        self.max_waiting = max_waiting
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.prose_ratio = prose_ratio
+        self.think_ratio = think_ratio
+        self.reject_structured = reject_structured
+        self.lock = threading.Lock()
+        self.running = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self.peak_running = 0
+        self.generated_tokens = 0
+        self.aborted = 0
+
+    def admit(self):
+        """Queue a request; False if the server is overloaded (503)."""
+        with self.lock:
+            if self.max_waiting and self.waiting >= self.max_waiting:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            return True
+
+    def answer(self, max_tokens, structured):
+        """Output pieces (one per token) and finish reason of one answer."""
+        pieces = []
+        if not structured and random.random() < self.think_ratio:
+            pieces += split_tokens("<think>Periksa judul, deskripsi dan isi halaman.</think>\n")
+        pieces += split_tokens(completion_text())
+        if not structured and random.random() < self.prose_ratio:
+            # Keeps talking after the JSON until a random total length
+            length = random.randint(self.min_tokens, self.max_tokens)
+            filler = "\n\nPenjelasan: halaman ini berisi ajakan bermain dan informasi deposit."
+            answer_end = len(pieces)
+            while len(pieces) < length:
+                pieces += split_tokens(filler)
+            pieces = pieces[:max(length, answer_end)]
+        if len(pieces) > max_tokens:
+            return pieces[:max_tokens], "length"
+        return pieces, "stop"
+
+    def generate(self, tokens, on_token=None):
+        """
+        Block for the simulated generation of an admitted request.
+
+        on_token(index) is called after every decode step; returning False
+        (client gone) aborts the generation. Returns the generated token count.
+        """
+        self.slots.acquire()
+        with self.lock:
+            self.waiting -= 1
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+        generated = 0
+        try:
+            time.sleep(self.prefill_ms / 1000)
+            for index in range(tokens):
+                time.sleep((self.step_ms + self.step_ms_per_seq * self.running) / 1000)
+                generated += 1
+                if on_token is not None and on_token(index) is False:
+                    with self.lock:
+                        self.aborted += 1
+                    break
+            return generated
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.served += 1
+                self.generated_tokens += generated
+            self.slots.release()
+
+
+def split_tokens(text, size=4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def completion_text():
+    label = random.choice(["judi", "non_judi"])
+    return json.dumps({
+        "label": label,
+        "reasoning": "Konten mempromosikan permainan slot." if label == "judi" else "Konten berita umum.",
+        "confidence": round(random.uniform(0.7, 0.99), 2),
+    })
+
+
+def make_handler(simulator, model):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/v1/models":
+                self._send_json(200, {"object": "list", "data": [{"id": model, "object": "model"}]})
+            elif self.path == "/stats":
+                self._send_json(200, {
+                    "served": simulator.served,
+                    "rejected": simulator.rejected,
+                    "running": simulator.running,
+                    "waiting": simulator.waiting,
+                    "peak_running": simulator.peak_running,
+                    "generated_tokens": simulator.generated_tokens,
+                    "aborted": simulator.aborted,
+                })
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", "0"))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.rstrip("/") != "/v1/chat/completions":
+                self._send_json(404, {"error": "not found"})
+                return
+            structured = bool(request.get("response_format") or request.get("guided_json"))
+            if structured and simulator.reject_structured:
+                self._send_json(400, {"object": "error", "message": "response_format is not supported", "code": 400})
+                return
+            if not simulator.admit():
+                self._send_json(503, {"error": "server overloaded"})
+                return
+            pieces, finish_reason = simulator.answer(int(request.get("max_tokens") or 600), structured)
+            if request.get("stream"):
+                self._stream(request, pieces, finish_reason)
+                return
+            tokens = simulator.generate(len(pieces))
+            self._send_json(200, {
+                "id": f"chatcmpl-{random.getrandbits(48):x}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", model),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(pieces)},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": {"prompt_tokens": 400, "completion_tokens": tokens, "total_tokens": 400 + tokens},
+            })
+
+        def _stream(self, request, pieces, finish_reason):
+            """Server-sent events, one chunk per token; stops generating when the client goes away."""
+            chunk_id = f"chatcmpl-{random.getrandbits(48):x}"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def event(choices, **extra):
+                body = {"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": request.get("model", model), "choices": choices, **extra}
+                return f"data: {json.dumps(body)}\n\n".encode("utf-8")
+
+            def write(data):
+                try:
+                    self.wfile.write(data)
+                    self.wfile.flush()
+                    return True
+                except (BrokenPipeError, ConnectionResetError):
+                    return False
+
+            def on_token(index):
+                last = index == len(pieces) - 1
+                return write(event([{
+                    "index": 0,
+                    "delta": {"content": pieces[index]},
+                    "finish_reason": finish_reason if last else None,
+                }]))
+
+            tokens = simulator.generate(len(pieces), on_token)
+            if tokens < len(pieces):
+                return  # aborted by the client
+            if (request.get("stream_options") or {}).get("include_usage"):
+                write(event([], usage={"prompt_tokens": 400, "completion_tokens": tokens,
+                                       "total_tokens": 400 + tokens}))
+            write(b"data: [DONE]\n\n")
+
+    return StubHandler
+
+
+def start_server(port=0, max_num_seqs=16, step_ms=15.0, step_ms_per_seq=1.0, prefill_ms=40.0,
+                 max_waiting=0, min_tokens=40, max_tokens=120, model="stub-reasoning",
+                 prose_ratio=0.3, think_ratio=0.0, reject_structured=False):
+    """Start the stub in a background thread. Returns (server, simulator)."""
+    simulator = BatchSimulator(
+        max_num_seqs, step_ms, step_ms_per_seq, prefill_ms, max_waiting, min_tokens, max_tokens,
+        prose_ratio, think_ratio, reject_structured,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(simulator, model))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, simulator
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub vLLM server with simulated continuous batching")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--max-num-seqs", type=int, default=16, help="Sequences decoded concurrently")
+    parser.add_argument("--step-ms", type=float, default=15.0, help="Base decode step time")
+    parser.add_argument("--step-ms-per-seq", type=float, default=1.0, help="Extra step time per running sequence")
+    parser.add_argument("--prefill-ms", type=float, default=40.0)
+    parser.add_argument("--max-waiting", type=int, default=0, help="Reject with 503 beyond this many waiting (0 = never)")
+    parser.add_argument("--min-tokens", type=int, default=40)
+    parser.add_argument("--max-tokens", type=int, default=120)
+    parser.add_argument("--prose-ratio", type=float, default=0.3, help="Share of answers with text after the JSON")
+    parser.add_argument("--think-ratio", type=float, default=0.0, help="Share of answers starting with <think>")
+    parser.add_argument("--reject-structured", action="store_true", help="Answer response_format requests with 400")
+    args = parser.parse_args()
+
+    server, simulator = start_server(
+        args.port, args.max_num_seqs, args.step_ms, args.step_ms_per_seq, args.prefill_ms,
+        args.max_waiting, args.min_tokens, args.max_tokens,
+        prose_ratio=args.prose_ratio, think_ratio=args.think_ratio, reject_structured=args.reject_structured,
+    )
+    print(f"Stub vLLM server on http://127.0.0.1:{server.server_address[1]}/v1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
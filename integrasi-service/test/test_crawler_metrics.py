@@ -0,0 +1,88 @@
+"""
+Pins the crawler's step timers (crawler_metrics) and how the integration
+service turns their reports into Prometheus histograms (run_metrics).
+
+Run: cd integrasi-service/test && python3 -m pytest test_crawler_metrics.py
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend"))
+
+from crawler_metrics import LATENCY_BUCKETS_MS, CrawlMetrics, HdrHistogram  # noqa: E402
+from run_metrics import STEP_BUCKETS_MS, CrawlerRunMetrics  # noqa: E402
+
+
+def test_hdr_percentiles_stay_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1.5) for _ in range(20000)]
+    histogram = HdrHistogram()
+    for value in values:
+        histogram.observe(value)
+    values.sort()
+    for pct in (50, 95, 99):
+        exact_ms = values[int(pct / 100 * len(values)) - 1] * 1000
+        assert abs(histogram.percentile(pct) - exact_ms) / exact_ms < 0.02
+
+
+def test_hdr_cumulative_counts():
+    histogram = HdrHistogram()
+    for seconds in (0.003, 0.02, 0.02, 0.4, 90):
+        histogram.observe(seconds)
+    counts = dict(zip(LATENCY_BUCKETS_MS, histogram.cumulative()))
+    assert counts[5] == 1 and counts[25] == 3 and counts[500] == 4 and counts[60000] == 4
+    assert counts[120000] == 5
+
+
+def test_bucket_straddling_a_bound_is_not_counted_below_it():
+    histogram = HdrHistogram()
+    histogram.observe(0.00504)  # bucket 4992..5055 us, straddles le=5 ms
+    histogram.observe(0.0049)  # bucket 4864..4927 us
+    counts = dict(zip(LATENCY_BUCKETS_MS, histogram.cumulative()))
+    assert counts[5] == 1 and counts[10] == 2
+
+
+def test_timer_records_even_when_the_block_raises():
+    metrics = CrawlMetrics()
+    try:
+        with metrics.time("analysis", "detection"):
+            raise RuntimeError("detector down")
+    except RuntimeError:
+        pass
+    assert metrics.summary()["analysis"]["detection"]["count"] == 1
+
+
+def test_buckets_match_the_crawler():
+    assert STEP_BUCKETS_MS == LATENCY_BUCKETS_MS
+
+
+def stage_metrics_event(metrics, stage):
+    return {"type": "stage_metrics", "stage": stage, "timings": metrics.snapshot(stage),
+            "buckets_ms": list(LATENCY_BUCKETS_MS)}
+
+
+def test_repeated_reports_are_counted_once():
+    crawl = CrawlMetrics()
+    run_metrics = CrawlerRunMetrics()
+    run = object()
+    run_metrics.run_started(run)
+    crawl.observe("screenshot", "navigate", 0.3)
+    run_metrics.observe_event(run, stage_metrics_event(crawl, "screenshot"))
+    run_metrics.observe_event(run, stage_metrics_event(crawl, "screenshot"))
+    crawl.observe("screenshot", "navigate", 3.0)
+    run_metrics.observe_event(run, stage_metrics_event(crawl, "screenshot"))
+    run_metrics.observe_event(run, {"type": "item_result", "status": "success"})
+    run_metrics.run_finished(run, True)
+
+    text = run_metrics.render()
+    labels = 'stage="screenshot",step="navigate"'
+    assert f'crawler_step_duration_seconds_count{{{labels}}} 2' in text
+    assert f'crawler_step_duration_seconds_bucket{{{labels},le="0.5"}} 1' in text
+    assert f'crawler_step_duration_seconds_bucket{{{labels},le="5"}} 2' in text
+    assert f'crawler_step_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert 'crawler_items_total{status="success"} 1' in text
+    assert 'crawler_runs_total{status="success"} 1' in text
+    assert "crawler_runs_in_progress 0" in text
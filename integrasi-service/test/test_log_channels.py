@@ -0,0 +1,94 @@
+"""
+Pins the fan-out and resume semantics of log_channels (crawler log streaming)
+and the batching of the crawler's LogWriter.
+
+Run: cd integrasi-service/test && python3 -m pytest test_log_channels.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from log_channels import LogChannel, LogChannels  # noqa: E402
+from log_writer import LogWriter  # noqa: E402
+
+
+async def collect(channel, after_seq=0):
+    return [item async for item in channel.subscribe(after_seq, keepalive=5) if item is not None]
+
+
+def test_subscribers_fan_out_from_one_publisher():
+    async def scenario():
+        channel = LogChannel("job")
+        first = asyncio.create_task(collect(channel))
+        second = asyncio.create_task(collect(channel))
+        await asyncio.sleep(0)
+        for line in ("a", "b", "c"):
+            await channel.publish(line)
+        await channel.close(True)
+        return await first, await second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == [(1, "a"), (2, "b"), (3, "c")]
+
+
+def test_late_joiner_resumes_after_last_event_id():
+    async def scenario():
+        channel = LogChannel("job")
+        for line in ("a", "b", "c"):
+            await channel.publish(line)
+        await channel.close(True)
+        return await collect(channel, after_seq=2)
+
+    assert asyncio.run(scenario()) == [(3, "c")]
+
+
+def test_offsets_outside_the_ring_buffer_are_reported():
+    async def scenario():
+        channel = LogChannel("job", size=2)
+        for line in ("a", "b", "c", "d"):
+            await channel.publish(line)
+        await channel.close(True)
+        return await collect(channel)
+
+    items = asyncio.run(scenario())
+    assert items[0][0] == 2 and "2 earlier" in items[0][1]
+    assert items[1:] == [(3, "c"), (4, "d")]
+
+
+def test_keepalive_while_idle():
+    async def scenario():
+        channel = LogChannel("job")
+        items = channel.subscribe(keepalive=0.01)
+        first = await items.__anext__()
+        await items.aclose()
+        return first, channel.subscribers
+
+    assert asyncio.run(scenario()) == (None, 0)
+
+
+def test_job_run_is_also_latest():
+    channels = LogChannels()
+    channel = channels.open("3f1c9a52-0000-4000-8000-000000000000")
+    assert channels.get(None) is channel
+    assert channels.get("3f1c9a52-0000-4000-8000-000000000000") is channel
+
+
+def test_log_writer_batches_and_syncs_at_checkpoints(tmp_path):
+    path = tmp_path / "crawler.log"
+    writer = LogWriter(str(path), batch_lines=3, flush_interval=60, checkpoint_interval=0)
+    writer.open("start")
+    syncs_after_open = writer.fsyncs
+    writer.write("one")
+    writer.write("two")
+    assert path.read_text() == "start\n"  # still pending
+    writer.write("three")
+    assert path.read_text() == "start\none\ntwo\nthree\n"
+    assert writer.fsyncs == syncs_after_open
+    writer.checkpoint()
+    assert writer.fsyncs == syncs_after_open + 1
+    writer.write("four")
+    writer.close("===END===")
+    assert path.read_text().splitlines()[-2:] == ["four", "===END==="]
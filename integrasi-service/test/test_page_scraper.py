@@ -0,0 +1,64 @@
+"""
+Pins the field extraction of page_scraper (reasoning scrape).
+
+Run: cd integrasi-service/test && python3 -m pytest test_page_scraper.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from page_scraper import PageExtractor, parse_html, sniff_encoding  # noqa: E402
+
+URL = "https://contoh.com/"
+
+
+def page(head="", body=""):
+    return f"<html><head>{head}</head><body>{body}</body></html>".encode("utf-8")
+
+
+def test_title_and_meta():
+    data = parse_html(page(
+        "<title> Slot Gacor </title><meta name='description' content=' Bonus '><meta name='keywords' content='slot'>"
+    ), URL)
+    assert (data["Title"], data["Description"], data["Keywords"]) == ("Slot Gacor", "Bonus", "slot")
+    assert data["Scraped_URL"] == URL
+
+
+def test_og_description_is_fallback():
+    head = "<meta property='og:description' content='og'>"
+    assert parse_html(page(head), URL)["Description"] == "og"
+    assert parse_html(page(head + "<meta name='description' content='meta'>"), URL)["Description"] == "meta"
+
+
+def test_paragraph_text_like_get_text_strip():
+    data = parse_html(page(body="<p> Daftar <b> sekarang </b> juga <script>track()</script></p><p> </p><p>Dua</p>"), URL)
+    assert data["P1"] == "Daftarsekarangjuga"
+    assert data["P2"] == "Dua"
+    assert data["P3"] == ""
+
+
+def test_only_first_five_paragraphs():
+    data = parse_html(page(body="".join(f"<p>{i}</p>" for i in range(8))), URL)
+    assert [data[f"P{i}"] for i in range(1, 6)] == ["0", "1", "2", "3", "4"]
+
+
+def test_utf8_without_declaration():
+    assert parse_html(page("<title>Judi 🎰 Ñ</title>"), URL)["Title"] == "Judi 🎰 Ñ"
+
+
+def test_meta_charset_is_used():
+    content = "<html><head><meta charset='iso-8859-1'><title>Señor</title></head></html>".encode("iso-8859-1")
+    assert parse_html(content, URL)["Title"] == "Señor"
+
+
+def test_sniff_encoding_prefers_declared():
+    assert sniff_encoding(b"<meta charset='latin-1'>", "utf-8") == "utf-8"
+    assert sniff_encoding(b"<meta http-equiv='Content-Type' content='text/html; charset=windows-1252'>") == "windows-1252"
+    assert sniff_encoding(b"<meta charset='bogus-encoding'>") == "utf-8"
+
+
+def test_extractor_is_done_after_head_and_paragraphs():
+    extractor = PageExtractor(max_paragraphs=2)
+    assert not extractor.feed(b"<html><head><title>t</title></head><body><p>a</p>")
+    assert extractor.feed(b"<p>b</p><p>c</p>")
@@ -0,0 +1,177 @@
+"""
+Pins the keys and the lookup path of reasoning_cache (crawler reasoning LLM
+cache): host stripping, TTL and LRU of the memory tier, coalescing of
+concurrent lookups and the fallback when the database tier fails.
+
+Run: cd integrasi-service/test && python3 -m pytest test_reasoning_cache.py
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+pytest.importorskip("sqlalchemy")
+
+import reasoning_cache  # noqa: E402
+from reasoning_cache import ReasoningCache, normalize_content  # noqa: E402
+
+RESULT = {"label": "gambling", "confidence": 0.9}
+
+
+def page(url, title, p1=""):
+    return {"Scraped_URL": url, "Title": title, "P1": p1}
+
+
+def compute_returning(result, calls):
+    async def compute():
+        calls.append(1)
+        return result
+    return compute
+
+
+class FailingEngine:
+    def begin(self):
+        raise RuntimeError("connection refused")
+
+
+class RowEngine:
+    """Engine whose reasoning_cache lookup returns `result` (as the jsonb text)."""
+
+    def __init__(self, result):
+        self.result = result
+
+    def begin(self):
+        engine = self
+
+        class Connection:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, query, params):
+                class Rows:
+                    def first(self):
+                        return (json.dumps(engine.result),)
+                return Rows()
+
+        return Connection()
+
+
+def test_mirror_pages_share_a_key():
+    cache = ReasoningCache(None, "model", "v1")
+    first = cache.key(page("https://www.slotgacor88.com/", "Slotgacor88 - slotgacor88.com Situs Resmi"))
+    second = cache.key(page("https://slotgacor99.net/", "SLOTGACOR99 - slotgacor99.net situs resmi"))
+    assert first == second
+    assert cache.key(page("https://a.com/", "", "")) is None
+    assert ReasoningCache(None, "other-model", "v1").key(page("https://a.com/", "x")) != cache.key(
+        page("https://a.com/", "x"))
+
+
+def test_brand_label_is_only_removed_as_a_whole_word():
+    tokens = reasoning_cache.host_tokens("https://judi.example/")
+    assert normalize_content("Judi online, bukan perjudian", tokens) == "online, bukan perjudian"
+    cache = ReasoningCache(None, "model", "v1")
+    # A brand that is a common word must not make different pages collide
+    assert cache.key(page("https://slot.example/", "Slotter tools")) != cache.key(
+        page("https://slot.example/", "ter tools"))
+
+
+def test_memory_entries_expire_after_the_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(reasoning_cache.time, "monotonic", lambda: clock[0])
+    cache = ReasoningCache(None, "model", "v1", ttl_seconds=60)
+    calls = []
+
+    async def scenario():
+        sources = [(await cache.get_or_compute("k", compute_returning(RESULT, calls)))[1]]
+        clock[0] += 30
+        sources.append((await cache.get_or_compute("k", compute_returning(RESULT, calls)))[1])
+        clock[0] += 31
+        sources.append((await cache.get_or_compute("k", compute_returning(RESULT, calls)))[1])
+        return sources
+
+    assert asyncio.run(scenario()) == ["llm", "memory", "llm"]
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ReasoningCache(None, "model", "v1", max_entries=2)
+    calls = []
+
+    async def scenario():
+        for key in ("a", "b", "a", "c"):
+            await cache.get_or_compute(key, compute_returning(RESULT, calls))
+        return [(await cache.get_or_compute(key, compute_returning(RESULT, calls)))[1] for key in ("a", "b")]
+
+    assert asyncio.run(scenario()) == ["memory", "llm"]
+    assert cache.evictions == 2
+
+
+def test_concurrent_identical_lookups_share_one_call():
+    cache = ReasoningCache(None, "model", "v1")
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return RESULT
+
+        lookups = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*lookups)
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ["coalesced", "coalesced", "llm"]
+    assert all(result == RESULT for result, _ in results)
+
+
+def test_failed_calls_are_not_cached():
+    cache = ReasoningCache(None, "model", "v1")
+    calls = []
+
+    async def scenario():
+        await cache.get_or_compute("k", compute_returning(None, calls))
+        return await cache.get_or_compute("k", compute_returning(RESULT, calls))
+
+    assert asyncio.run(scenario()) == (RESULT, "llm")
+    assert len(calls) == 2
+
+
+def test_database_hit_fills_the_memory_tier():
+    cache = ReasoningCache(RowEngine(RESULT), "model", "v1")
+    calls = []
+
+    async def scenario():
+        first = await cache.get_or_compute("k", compute_returning(None, calls))
+        second = await cache.get_or_compute("k", compute_returning(None, calls))
+        return first, second
+
+    assert asyncio.run(scenario()) == ((RESULT, "database"), (RESULT, "memory"))
+    assert calls == []
+
+
+def test_database_failure_falls_back_to_the_llm():
+    logged = []
+    cache = ReasoningCache(FailingEngine(), "model", "v1", log=logged.append)
+    calls = []
+
+    async def scenario():
+        first = await cache.get_or_compute("k", compute_returning(RESULT, calls))
+        second = await cache.get_or_compute("k", compute_returning(RESULT, calls))
+        return first, second
+
+    assert asyncio.run(scenario()) == ((RESULT, "llm"), (RESULT, "memory"))
+    stats = cache.stats()
+    assert not stats["persistent"] and stats["database_errors"] == 1
+    assert len(calls) == 1 and len(logged) == 1
@@ -0,0 +1,131 @@
+"""
+Pins the AIMD concurrency limit and the micro-batching of reasoning_dispatcher
+(crawler reasoning LLM requests).
+
+Run: cd integrasi-service/test && python3 -m pytest test_reasoning_dispatcher.py
+"""
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from reasoning_dispatcher import AIMDLimiter, ReasoningDispatcher  # noqa: E402
+
+
+async def cycle(limiter, **release):
+    await limiter.acquire()
+    await limiter.release(**release)
+
+
+def test_limit_grows_by_one_per_window_of_good_requests():
+    limiter = AIMDLimiter(2, maximum=4)
+
+    async def scenario():
+        for _ in range(2):
+            await cycle(limiter, latency=1.0, duration=1.0)
+
+    asyncio.run(scenario())
+    assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    assert limiter.increases == 2
+
+
+def test_overload_cuts_the_limit_once_per_request_duration():
+    limiter = AIMDLimiter(10, minimum=2)
+
+    async def scenario():
+        await cycle(limiter, overloaded=True, duration=60.0)
+        await cycle(limiter, overloaded=True, duration=60.0)  # same episode, within the cooldown
+        first = limiter.limit
+        limiter._last_decrease -= 120
+        await cycle(limiter, overloaded=True, duration=60.0)
+        return first
+
+    assert asyncio.run(scenario()) == pytest.approx(7.0)
+    assert limiter.limit == pytest.approx(4.9)
+    assert limiter.decreases == 2
+
+
+def test_slow_request_against_the_baseline_counts_as_overload():
+    limiter = AIMDLimiter(10, latency_tolerance=2.0)
+
+    async def scenario():
+        await cycle(limiter, latency=1.0, duration=1.0)
+        await cycle(limiter, latency=3.0, duration=0.0)
+
+    asyncio.run(scenario())
+    assert limiter.decreases == 1
+
+
+def test_per_token_and_wall_time_samples_are_not_compared():
+    limiter = AIMDLimiter(10, latency_tolerance=2.0)
+
+    async def scenario():
+        await cycle(limiter, latency=0.02, duration=2.0, kind="token")
+        await cycle(limiter, latency=2.0, duration=2.0, kind="request")
+        await cycle(limiter, latency=0.03, duration=2.0, kind="token")
+
+    asyncio.run(scenario())
+    assert limiter.decreases == 0 and limiter.increases == 3
+    stats = limiter.stats()
+    assert (stats["baseline_ms"], stats["baseline_ms_per_token"]) == (2000.0, 20.0)
+
+
+def test_token_budget_caps_concurrency():
+    assert ReasoningDispatcher(None, max_tokens=512, max_concurrency=32, token_budget=4096).max_concurrency == 8
+    assert ReasoningDispatcher(None, max_tokens=512, max_concurrency=4, token_budget=8192).max_concurrency == 4
+    assert ReasoningDispatcher(None, max_tokens=512, min_concurrency=2, token_budget=100).max_concurrency == 2
+
+
+def test_requests_start_in_submission_order_and_get_their_own_result():
+    started = []
+
+    def request(n):
+        async def send(client):
+            started.append(n)
+            await asyncio.sleep(0.01)
+            return {"n": n, "usage": {"completion_tokens": 10}}
+        return send
+
+    async def scenario():
+        async with ReasoningDispatcher(None, max_tokens=64, initial_concurrency=1, max_concurrency=1,
+                                       batch_size=3, batch_wait=0.05) as dispatcher:
+            results = await asyncio.gather(*(dispatcher.submit(request(n)) for n in range(5)))
+        return dispatcher, results
+
+    dispatcher, results = asyncio.run(scenario())
+    assert started == [0, 1, 2, 3, 4]
+    assert [result["n"] for result in results] == [0, 1, 2, 3, 4]
+    stats = dispatcher.stats()
+    assert stats["completed"] == 5 and stats["batches"] == 2 and stats["mean_batch_size"] == 2.5
+
+
+def test_failed_request_delivers_its_error_and_frees_the_slot():
+    request = httpx.Request("POST", "http://reasoning/v1/chat/completions")
+
+    async def timeout(client):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    async def bad_request(client):
+        raise httpx.HTTPStatusError("bad", request=request, response=httpx.Response(400, request=request))
+
+    async def ok(client):
+        return {"ok": True}
+
+    async def scenario():
+        async with ReasoningDispatcher(None, max_tokens=64, initial_concurrency=1, max_concurrency=1,
+                                       batch_wait=0) as dispatcher:
+            with pytest.raises(httpx.ReadTimeout):
+                await dispatcher.submit(timeout)
+            with pytest.raises(httpx.HTTPStatusError):
+                await dispatcher.submit(bad_request)
+            result = await asyncio.wait_for(dispatcher.submit(ok), 5)
+        return dispatcher, result
+
+    dispatcher, result = asyncio.run(scenario())
+    assert result == {"ok": True}
+    assert (dispatcher.failed, dispatcher.overloads, dispatcher.completed) == (2, 1, 1)
+    assert dispatcher.limiter.in_flight == 0
@@ -0,0 +1,111 @@
+"""
+Pins the parsing of reasoning answers by reasoning_output.ReasoningJSONExtractor.
+
+Run: cd integrasi-service/test && python3 -m pytest test_reasoning_output.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+from reasoning_output import ReasoningJSONExtractor, ReasoningOutput, extract_reasoning_json  # noqa: E402
+
+ANSWER = '{"label": "judi", "reasoning": "Promosi slot.", "confidence": 0.93}'
+
+
+def feed_pieces(text, size=3):
+    """Feed text in small chunks like a stream; returns (extractor, consumed length)."""
+    extractor = ReasoningJSONExtractor()
+    for start in range(0, len(text), size):
+        if extractor.feed(text[start:start + size]):
+            return extractor, start + size
+    extractor.finish()
+    return extractor, len(text)
+
+
+# Whole responses
+
+def test_plain_json():
+    assert extract_reasoning_json(ANSWER) == {"label": "judi", "reasoning": "Promosi slot.", "confidence": 0.93}
+
+
+def test_think_block_and_code_fence_are_skipped():
+    text = '<think>Contoh {"label": "non_judi"} di pikiran.</think>\n```json\n' + ANSWER + "\n```"
+    assert extract_reasoning_json(text)["label"] == "judi"
+
+
+def test_trailing_prose_is_ignored():
+    assert extract_reasoning_json(ANSWER + "\n\nPenjelasan: situs ini {mungkin} judi.")["confidence"] == 0.93
+
+
+def test_leading_prose_and_invalid_braces_are_skipped():
+    text = "Berikut {hasil} analisis: " + ANSWER
+    assert extract_reasoning_json(text)["label"] == "judi"
+
+
+def test_trailing_comma_is_repaired():
+    assert extract_reasoning_json('{"label": "non_judi", "reasoning": "Berita", "confidence": 0.8,}')["label"] == "non_judi"
+
+
+def test_braces_and_quotes_inside_strings():
+    text = '{"label": "judi", "reasoning": "Teks \\"bonus}\\" {100%}", "confidence": 0.9}'
+    assert extract_reasoning_json(text)["reasoning"] == 'Teks "bonus}" {100%}'
+
+
+def test_label_and_confidence_are_normalized():
+    result = extract_reasoning_json('{"label": "Non-Judi", "reasoning": " x ", "confidence": "1.7"}')
+    assert result == {"label": "non_judi", "reasoning": "x", "confidence": 1.0}
+
+
+def test_unknown_label_is_rejected():
+    assert extract_reasoning_json('{"label": "mungkin", "reasoning": "x", "confidence": 0.5}') is None
+
+
+def test_no_json_is_rejected():
+    assert extract_reasoning_json("Maaf, saya tidak bisa menjawab.") is None
+
+
+def test_truncated_object_uses_complete_prefix():
+    extractor = ReasoningJSONExtractor()
+    extractor.feed('{"label": "judi", "reasoning": "Promosi sl')
+    assert extractor.finish() == {"label": "judi", "reasoning": "", "confidence": 0.0}
+    assert extractor.repaired
+
+
+# Streaming
+
+def test_stream_stops_after_last_required_field():
+    text = '{"label": "judi", "reasoning": "x", "confidence": 0.9, "extra": "' + "a" * 200 + '"}'
+    extractor, consumed = feed_pieces(text)
+    assert extractor.result["confidence"] == 0.9
+    assert consumed < 60
+
+
+def test_stream_stops_at_closing_brace_before_prose():
+    text = ANSWER + " Penjelasan panjang." * 20
+    extractor, consumed = feed_pieces(text)
+    assert extractor.done
+    assert consumed <= len(ANSWER) + 3
+
+
+def test_think_tag_split_across_chunks():
+    text = '<think>{"label": "non_judi", "reasoning": "r", "confidence": 0.1}</think>' + ANSWER
+    for size in (1, 2, 5):
+        extractor, _ = feed_pieces(text, size)
+        assert extractor.result["label"] == "judi"
+
+
+# Structured output
+
+def test_auto_mode_falls_back_when_response_format_is_rejected():
+    output = ReasoningOutput("auto", log=lambda message: None)
+    assert "response_format" in output.apply({})
+    assert not output.rejected(400, "This model's maximum context length is 4096 tokens")
+    assert output.rejected(400, "response_format is not supported")
+    assert "response_format" not in output.apply({})
+    assert not output.rejected(400, "response_format is not supported")
+
+
+def test_guided_json_mode():
+    payload = ReasoningOutput("guided_json").apply({"model": "m"})
+    assert payload["guided_json"]["required"] == ["label", "reasoning", "confidence"]
@@ -0,0 +1,160 @@
+"""
+Pins the perceptual-hash dedup of screenshot_dedup (crawler detection):
+dHash distances, the banded Hamming index and the three ways a detection
+result is reused (earlier in the run, in-flight, stored in the database).
+
+Run: cd integrasi-service/test && python3 -m pytest test_screenshot_dedup.py
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "domain-generator"))
+
+pytest.importorskip("sqlalchemy")
+
+from screenshot_dedup import ScreenshotDedup, _HashIndex, dhash, hamming, hash_to_hex  # noqa: E402
+
+RESPONSE = {"result": {"label": "gambling", "confidence": 0.97}}
+
+
+def landing_page(path, banner="#c00000", text_offset=0):
+    image = Image.new("RGB", (640, 400), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 640, 80), fill=banner)
+    draw.rectangle((40 + text_offset, 120, 360 + text_offset, 300), fill="#202020")
+    draw.ellipse((420, 140, 600, 320), fill="#f0c000")
+    image.save(path)
+    return str(path)
+
+
+def test_dhash_of_identical_and_near_identical_images(tmp_path):
+    original = landing_page(tmp_path / "a.png")
+    copy = landing_page(tmp_path / "b.png")
+    mirror = landing_page(tmp_path / "c.png", banner="#c80000", text_offset=2)
+    other = Image.new("RGB", (640, 400), "white")
+    for x in range(0, 640, 80):
+        ImageDraw.Draw(other).rectangle((x, 0, x + 40, 400), fill="black")
+    other.save(tmp_path / "d.png")
+
+    assert dhash(original) == dhash(copy)
+    assert hamming(dhash(original), dhash(mirror)) <= 6
+    assert hamming(dhash(original), dhash(str(tmp_path / "d.png"))) > 6
+    assert len(hash_to_hex(dhash(original), 256)) == 64
+
+
+def test_index_finds_entries_up_to_the_threshold_only():
+    index = _HashIndex(64, threshold=3)
+    base = 0x0123456789ABCDEF
+    index.add(base, "base")
+    # Flipped bits spread over all bands still share one band with the base (pigeonhole)
+    within = base ^ (1 << 0) ^ (1 << 20) ^ (1 << 40)
+    beyond = within ^ (1 << 60)
+    assert index.nearest(base) == (0, "base")
+    assert index.nearest(within) == (3, "base")
+    assert index.nearest(beyond) is None
+    index.add(within, "closer")
+    assert index.nearest(within ^ 1) == (1, "closer")
+    assert index.nearest(within ^ 1, accept=lambda payload: payload == "base") == (2, "base")
+
+
+def detector(calls, release=None):
+    async def compute():
+        calls.append(1)
+        if release is not None:
+            await release.wait()
+        return RESPONSE
+    return compute
+
+
+def test_reuses_an_earlier_result_of_the_run(tmp_path):
+    dedup = ScreenshotDedup(None, "yolo-v1")
+    calls = []
+
+    async def scenario():
+        first = await dedup.detect(landing_page(tmp_path / "a.png"), "1", detector(calls))
+        second = await dedup.detect(landing_page(tmp_path / "b.png", text_offset=2), "2", detector(calls))
+        return first, second
+
+    (_, first), (response, second) = asyncio.run(scenario())
+    assert first["source"] == "api" and second["source"] == "run"
+    assert second["duplicate_of"] == "1" and response == RESPONSE
+    assert len(calls) == 1 and dedup.stats()["run_hits"] == 1
+
+
+def test_waits_for_an_in_flight_detection(tmp_path):
+    dedup = ScreenshotDedup(None, "yolo-v1")
+    calls = []
+    path = landing_page(tmp_path / "a.png")
+
+    async def scenario():
+        release = asyncio.Event()
+        first = asyncio.create_task(dedup.detect(path, "1", detector(calls, release)))
+        while not calls:
+            await asyncio.sleep(0.01)
+        second = asyncio.create_task(dedup.detect(path, "2", detector(calls)))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await first, await second
+
+    (_, first), (response, second) = asyncio.run(scenario())
+    assert (first["source"], second["source"]) == ("api", "coalesced")
+    assert response == RESPONSE and len(calls) == 1
+
+
+def test_failed_detection_is_not_reused(tmp_path):
+    dedup = ScreenshotDedup(None, "yolo-v1")
+    path = landing_page(tmp_path / "a.png")
+
+    async def failed():
+        return None
+
+    async def scenario():
+        await dedup.detect(path, "1", failed)
+        return await dedup.detect(path, "2", detector([]))
+
+    assert asyncio.run(scenario())[1]["source"] == "api"
+
+
+class StoredHashes:
+    """Engine serving one screenshot_hashes row (and its detail) for the dedup queries."""
+
+    def __init__(self, phash):
+        self.phash = phash
+
+    def connect(self):
+        stored = self
+
+        class Connection:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, query, params):
+                class Rows:
+                    def fetchall(self):
+                        return [(7, stored.phash)]
+
+                    def first(self):
+                        return ("mirror.example", json.dumps(RESPONSE), "image/webp", b"viz")
+                return Rows()
+
+        return Connection()
+
+
+def test_reuses_a_result_stored_by_an_earlier_run(tmp_path):
+    path = landing_page(tmp_path / "a.png")
+    dedup = ScreenshotDedup(StoredHashes(hash_to_hex(dhash(path), 256)), "yolo-v1")
+    assert dedup.load() == 1
+    calls = []
+
+    response, info = asyncio.run(dedup.detect(path, "1", detector(calls)))
+    assert info["source"] == "database" and info["duplicate_of"] == "mirror.example"
+    assert response["result"]["visualization_path"] == "data:image/webp;base64,dml6"
+    assert calls == []
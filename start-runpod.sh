@@ -170,6 +170,26 @@ else
 fi
 echo ""
 
+# ==========================================
+# 4.5 Start Crawler Workers
+# ==========================================
+CRAWLER_WORKERS=${CRAWLER_WORKERS:-2}
+print_info "Step 4.5: Starting Crawler Workers ($CRAWLER_WORKERS processes)..."
+
+cd backend
+nohup python crawler_worker.py --workers $CRAWLER_WORKERS > ../logs/crawler-worker.log 2>&1 &
+WORKER_PID=$!
+cd ..
+
+sleep 2
+if ps -p $WORKER_PID > /dev/null; then
+    print_success "Crawler Workers started (PID: $WORKER_PID)"
+else
+    print_error "Failed to start Crawler Workers. Check logs/crawler-worker.log"
+    exit 1
+fi
+echo ""
+
 # ==========================================
 # 5. Start Frontend
 # ==========================================
@@ -226,6 +246,7 @@ echo "Services:"
 echo "  • PostgreSQL:         localhost:${DB_PORT:-5432}"
 echo "  • Integrasi Service:  http://localhost:${INTEGRASI_PORT} (PID: $INTEGRASI_PID)"
 echo "  • Backend API:        http://0.0.0.0:${BACKEND_PORT} (PID: $BACKEND_PID)"
+echo "  • Crawler Workers:    $CRAWLER_WORKERS processes (PID: $WORKER_PID)"
 echo "  • Frontend:           http://0.0.0.0:${FRONTEND_PORT} (PID: $FRONTEND_PID)"
 echo ""
 echo "Access the application:"
@@ -235,6 +256,7 @@ echo ""
 echo "View logs:"
 echo "  tail -f logs/integrasi-service.log"
 echo "  tail -f logs/backend.log"
+echo "  tail -f logs/crawler-worker.log"
 echo "  tail -f logs/frontend.log"
 echo ""
 echo "Stop all services:"
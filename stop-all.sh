@@ -20,6 +20,10 @@ INTEGRASI_PORT=${SERVICE_API_PORT:-5000}
 echo "→ Stopping Frontend (port $FRONTEND_PORT)..."
 lsof -ti:$FRONTEND_PORT | xargs kill -9 2>/dev/null || echo "  Frontend not running"
 
+echo "→ Stopping Crawler Workers..."
+# SIGTERM (not -9): running jobs are put back in the queue
+pkill -TERM -f "crawler_worker.py" 2>/dev/null || echo "  Crawler Workers not running"
+
 echo "→ Stopping Backend (port $BACKEND_PORT)..."
 lsof -ti:$BACKEND_PORT | xargs kill -9 2>/dev/null || echo "  Backend not running"
 